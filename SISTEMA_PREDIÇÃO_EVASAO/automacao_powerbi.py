@@ -16,6 +16,55 @@ import pandas as pd
 class AutomacaoPowerBI:
     """Classe para automatizar atualização do Power BI"""
     
+    # Mapeamento de colunas do sistema atual para estrutura padrão
+    MAPEAMENTO_COLUNAS = {
+        'Nome': ['Nome', 'nome'],
+        'Matricula': ['Matrícula', 'Matricula', 'matricula'], 
+        'Curso': ['Curso', 'curso'],
+        'Sexo': ['Sexo', 'sexo'],
+        'Turma': ['Turma Atual', 'Turma', 'turma'],
+        'Status': ['Status Predição', 'Status', 'status_predicao'],
+        'Situacao_Predita': ['Situação Predita', 'Situacao_Predita', 'situacao_predita'],
+        'Probabilidade_Situacao': ['Probabilidade Situação', 'Probabilidade_Situacao', 'probabilidade_situacao'],
+        'Probabilidade_Evasao_Total': ['Probabilidade Evasão', 'Probabilidade_Evasao_Total', 'probabilidade_evasao_total'],
+        'Urgencia': ['Nível Urgência', 'Urgencia', 'nivel_urgencia'],
+        'Fator_Principal': ['Fator Principal', 'Fator_Principal', 'fator_principal'],
+        'Valor_Importancia': ['Valor Importância', 'Valor_Importancia', 'valor_importancia'],
+        'Confianca': ['Confiança', 'Confianca', 'confianca_predicao']
+    }
+    
+    # Valores padrão se coluna não for encontrada (demais: 'N/A')
+    VALORES_PADRAO = {
+        'Sexo': 'M',
+        'Turma': 'N/A',
+        'Status': 'MATRICULADO',
+        'Situacao_Predita': 'Matriculado',
+        'Probabilidade_Situacao': '50.0%',
+        'Probabilidade_Evasao_Total': '30.0%',
+        'Urgencia': 'NENHUMA',  # Padrão para matriculados
+        'Fator_Principal': 'Não identificado',
+        'Valor_Importancia': 0.0,
+        'Confianca': 'Média'
+    }
+    
+    # Emoji baseado no nível de urgência (cores psicológicas)
+    EMOJIS_URGENCIA = {
+        'URGENTE': '🔴',      # Vermelho forte (#FF0000) - perigo/atenção imediata
+        'ALTA': '🟠',         # Laranja (#FF8000) - chama atenção, menos que vermelho
+        'MEDIA': '🟡',        # Amarelo (#FFD700) - intermediário, alerta moderado
+        'BAIXA': '🔵',        # Azul (#1E90FF) - tranquilidade, prioridade menor
+        'NENHUMA': '⚪'       # Cinza claro (#A9A9A9) - neutro, sem prioridade
+    }
+    EMOJI_PADRAO = '⚪'
+    
+    # Colunas Top_N simuladas quando a origem não as tem
+    TOP_N_SIMULADAS = {
+        'Top_2_Situacao': 'Matriculado',
+        'Top_2_Prob': '30.0%',
+        'Top_3_Situacao': 'Limpeza Academica',
+        'Top_3_Prob': '15.0%'
+    }
+    
     def __init__(self, pasta_csv_powerbi="C:/PowerBI_Data/"):
         """
         Inicializa automação
@@ -77,25 +126,8 @@ class AutomacaoPowerBI:
         # Criar DataFrame com estrutura padronizada
         df_padrao = pd.DataFrame()
         
-        # Mapeamento de colunas do sistema atual para estrutura padrão
-        mapeamento_colunas = {
-            'Nome': ['Nome', 'nome'],
-            'Matricula': ['Matrícula', 'Matricula', 'matricula'], 
-            'Curso': ['Curso', 'curso'],
-            'Sexo': ['Sexo', 'sexo'],
-            'Turma': ['Turma Atual', 'Turma', 'turma'],
-            'Status': ['Status Predição', 'Status', 'status_predicao'],
-            'Situacao_Predita': ['Situação Predita', 'Situacao_Predita', 'situacao_predita'],
-            'Probabilidade_Situacao': ['Probabilidade Situação', 'Probabilidade_Situacao', 'probabilidade_situacao'],
-            'Probabilidade_Evasao_Total': ['Probabilidade Evasão', 'Probabilidade_Evasao_Total', 'probabilidade_evasao_total'],
-            'Urgencia': ['Nível Urgência', 'Urgencia', 'nivel_urgencia'],
-            'Fator_Principal': ['Fator Principal', 'Fator_Principal', 'fator_principal'],
-            'Valor_Importancia': ['Valor Importância', 'Valor_Importancia', 'valor_importancia'],
-            'Confianca': ['Confiança', 'Confianca', 'confianca_predicao']
-        }
-        
         # Aplicar mapeamento
-        for col_padrao, possibilidades in mapeamento_colunas.items():
+        for col_padrao, possibilidades in self.MAPEAMENTO_COLUNAS.items():
             valor_encontrado = None
             for possivel in possibilidades:
                 if possivel in df_original.columns:
@@ -106,46 +138,17 @@ class AutomacaoPowerBI:
                 df_padrao[col_padrao] = valor_encontrado
             else:
                 # Valores padrão se coluna não for encontrada
-                if col_padrao == 'Sexo':
-                    df_padrao[col_padrao] = 'M'
-                elif col_padrao == 'Turma':
-                    df_padrao[col_padrao] = 'N/A'
-                elif col_padrao == 'Status':
-                    df_padrao[col_padrao] = 'MATRICULADO'
-                elif col_padrao == 'Situacao_Predita':
-                    df_padrao[col_padrao] = 'Matriculado'
-                elif col_padrao == 'Probabilidade_Situacao':
-                    df_padrao[col_padrao] = '50.0%'
-                elif col_padrao == 'Probabilidade_Evasao_Total':
-                    df_padrao[col_padrao] = '30.0%'
-                elif col_padrao == 'Urgencia':
-                    df_padrao[col_padrao] = 'NENHUMA'  # Padrão para matriculados
-                elif col_padrao == 'Fator_Principal':
-                    df_padrao[col_padrao] = 'Não identificado'
-                elif col_padrao == 'Valor_Importancia':
-                    df_padrao[col_padrao] = 0.0
-                elif col_padrao == 'Confianca':
-                    df_padrao[col_padrao] = 'Média'
-                else:
-                    df_padrao[col_padrao] = 'N/A'
+                df_padrao[col_padrao] = self.VALORES_PADRAO.get(col_padrao, 'N/A')
         
         # Adicionar emoji baseado no nível de urgência (cores psicológicas)
-        df_padrao['Emoji'] = df_padrao['Urgencia'].map({
-            'URGENTE': '🔴',      # Vermelho forte (#FF0000) - perigo/atenção imediata
-            'ALTA': '🟠',         # Laranja (#FF8000) - chama atenção, menos que vermelho
-            'MEDIA': '🟡',        # Amarelo (#FFD700) - intermediário, alerta moderado
-            'BAIXA': '🔵',        # Azul (#1E90FF) - tranquilidade, prioridade menor
-            'NENHUMA': '⚪'       # Cinza claro (#A9A9A9) - neutro, sem prioridade
-        }).fillna('⚪')
+        df_padrao['Emoji'] = df_padrao['Urgencia'].map(self.EMOJIS_URGENCIA).fillna(self.EMOJI_PADRAO)
         
         # Adicionar colunas Top_N (simuladas se não existirem)
         if 'Top_1_Situacao' not in df_original.columns:
             df_padrao['Top_1_Situacao'] = df_padrao['Situacao_Predita']
             df_padrao['Top_1_Prob'] = df_padrao['Probabilidade_Situacao']
-            df_padrao['Top_2_Situacao'] = 'Matriculado'
-            df_padrao['Top_2_Prob'] = '30.0%'
-            df_padrao['Top_3_Situacao'] = 'Limpeza Academica'
-            df_padrao['Top_3_Prob'] = '15.0%'
+            for coluna, valor in self.TOP_N_SIMULADAS.items():
+                df_padrao[coluna] = valor
         
         # Adicionar metadados como colunas extras (opcionais)
         if metadados:
@@ -155,6 +158,72 @@ class AutomacaoPowerBI:
         
         return df_padrao
     
+    def salvar_tabela_para_powerbi(self, tabela, metadados=None):
+        """
+        Salva na pasta do Power BI o mesmo CSV de salvar_csv_para_powerbi(),
+        a partir da tabela Arrow do caminho colunar (principal.py --arrow),
+        gravada direto do Arrow, sem passar pelo pandas
+        
+        Args:
+            tabela: pyarrow.Table de SistemaPredicaoEvasao.predizer_tabela()
+            metadados: Informações sobre o processamento
+        """
+        from codigo_fonte.utilitarios import salvar_tabela
+        
+        try:
+            tabela_padronizada = self._padronizar_estrutura_tabela(tabela, metadados)
+            
+            # BOM UTF-8, como o to_csv(encoding='utf-8-sig') do caminho pandas
+            caminho_completo = self.pasta_csv_powerbi / self.nome_arquivo_bi
+            salvar_tabela(tabela_padronizada, caminho_completo, bom=True)
+            
+            self._registrar_atualizacao(metadados, tabela_padronizada.num_rows)
+            
+            print(f"✅ CSV salvo para Power BI: {caminho_completo}")
+            print(f"📊 Total de alunos: {tabela_padronizada.num_rows}")
+            print(f"📁 Colunas: {tabela_padronizada.num_columns}")
+            
+            return True
+            
+        except Exception as e:
+            print(f"❌ Erro ao salvar CSV para Power BI: {e}")
+            return False
+    
+    def _padronizar_estrutura_tabela(self, tabela, metadados):
+        """
+        Mesma estrutura de _padronizar_estrutura_csv(), com colunas Arrow
+        """
+        import pyarrow as pa
+        from codigo_fonte.utilitarios import mapear_por_valor
+        
+        def constante(valor):
+            return pa.repeat(pa.scalar(valor), tabela.num_rows)
+        
+        colunas = {}
+        for col_padrao, possibilidades in self.MAPEAMENTO_COLUNAS.items():
+            encontrada = next((possivel for possivel in possibilidades if possivel in tabela.column_names), None)
+            if encontrada is not None:
+                colunas[col_padrao] = tabela.column(encontrada)
+            else:
+                colunas[col_padrao] = constante(self.VALORES_PADRAO.get(col_padrao, 'N/A'))
+        
+        colunas['Emoji'] = mapear_por_valor(
+            colunas['Urgencia'], lambda nivel: self.EMOJIS_URGENCIA.get(nivel, self.EMOJI_PADRAO)
+        )
+        
+        if 'Top_1_Situacao' not in tabela.column_names:
+            colunas['Top_1_Situacao'] = colunas['Situacao_Predita']
+            colunas['Top_1_Prob'] = colunas['Probabilidade_Situacao']
+            for coluna, valor in self.TOP_N_SIMULADAS.items():
+                colunas[coluna] = constante(valor)
+        
+        if metadados:
+            colunas['Data_Processamento'] = constante(str(metadados.get('data_processamento', datetime.now())))
+            colunas['Total_Processados'] = constante(tabela.num_rows)
+            colunas['Arquivo_Origem'] = constante(metadados.get('arquivo_original', 'Sistema Web'))
+        
+        return pa.table(colunas)
+    
     def _registrar_atualizacao(self, metadados, total_processados=None):
         """Registra log de atualização"""
         try:
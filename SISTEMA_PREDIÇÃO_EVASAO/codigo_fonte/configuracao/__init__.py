@@ -8,7 +8,9 @@ from .configuracoes import (
     ConfiguracaoModelo,
     ConfiguracaoRegrasNegocio,
     ConfiguracaoDados,
-    ConfiguracaoLogs
+    ConfiguracaoLogs,
+    ConfiguracaoMetricas,
+    ConfiguracaoExecucao
 )
 
 __all__ = [
@@ -17,5 +19,7 @@ __all__ = [
     'ConfiguracaoModelo', 
     'ConfiguracaoRegrasNegocio',
     'ConfiguracaoDados',
-    'ConfiguracaoLogs'
+    'ConfiguracaoLogs',
+    'ConfiguracaoMetricas',
+    'ConfiguracaoExecucao'
 ]
\ No newline at end of file
@@ -4,7 +4,7 @@ Configurações do sistema de predição de evasão estudantil.
 
 import os
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
 
 # Diretório raiz do projeto
@@ -20,6 +20,24 @@ class ConfiguracaoModelo:
     subamostra_colunas: float = 0.8
     semente_aleatoria: int = 42
     metrica_avaliacao: str = 'mlogloss'
+    
+    # Treino: histogramas ('hist') escalam melhor que 'exact' em históricos grandes
+    metodo_arvore: str = 'hist'
+    max_bin: int = 256                # Bins por feature no método 'hist'
+    threads_treino: int = 0           # Threads do XGBoost no treino (0 = todos os núcleos)
+    linhas_por_bloco: int = 100000    # Memória externa: linhas por arquivo Parquet
+    rodadas_continuacao: int = 50     # Árvores acrescentadas por train_model.py --continuar
+    
+    # Inferência: orçamento de threads do processo (fatias simultâneas x threads por fatia)
+    threads_inferencia: int = 0       # Total de threads (0 = todos os núcleos)
+    threads_por_fatia: int = 1        # Threads do XGBoost em cada fatia
+    linhas_minimas_fatia: int = 2000  # Lotes menores que o dobro disso não são divididos
+    
+    # Busca de hiperparâmetros (scripts/train_model.py --buscar)
+    busca_candidatos: int = 24        # Combinações sorteadas do espaço de busca
+    busca_trabalhadores: int = 0      # Processos do pool (0 = um por núcleo)
+    busca_fator_reducao: int = 3      # Successive halving: mantém 1/3 e triplica as árvores a cada rodada
+    busca_rodadas_parada: int = 20    # Parada antecipada: rodadas sem melhora na validação
 
 @dataclass
 class ConfiguracaoRegrasNegocio:
@@ -38,6 +56,9 @@ class ConfiguracaoRegrasNegocio:
     probabilidade_nf: float = 0.80
     probabilidade_mt: float = 0.85
     
+    # Tabela de regras em JSON (None = tabela padrão de regras_negocio/tabela_regras.py)
+    arquivo_tabela_regras: str = None
+    
     # Mapeamento de prefixos para cursos
     prefixos_cursos: Dict[str, str] = None
     
@@ -60,6 +81,7 @@ class ConfiguracaoDados:
     diretorio_dados_processados: Path = RAIZ_PROJETO / "data" / "processed"
     diretorio_modelos: Path = RAIZ_PROJETO / "data" / "models"
     diretorio_saida: Path = RAIZ_PROJETO / "output"
+    diretorio_modelo_candidato: Path = RAIZ_PROJETO / "data" / "models" / "candidato"  # Modelo em avaliação (modo sombra)
     
     # Arquivos de entrada
     arquivo_alunos: str = "alunos_ativos_atual.xlsx"
@@ -70,10 +92,19 @@ class ConfiguracaoDados:
     # Arquivos de modelo
     arquivo_modelo: str = "modelo_xgboost_sem_classes_criticas.pkl"
     arquivo_mapeamento_classes: str = "class_mapping_otimizado.pkl"
+    arquivo_modelo_compacto: str = "modelo_xgboost_compacto.pkl"  # Gerado por scripts/compactar_modelo.py
+    usar_modelo_compacto: bool = False  # Predizer com o modelo compacto no lugar do completo
     
     # Features esperadas
     caracteristicas_esperadas: List[str] = None
     
+    # Backend de leitura de planilhas: 'auto' (mais rápido instalado), 'calamine', 'openpyxl' ou 'xlrd'
+    leitor_planilha: str = "auto"
+    
+    # Compactação de tipos na carga (category/int pequeno/float32)
+    compactar_tipos: bool = False
+    limite_cardinalidade_categoria: float = 0.5  # Fração máxima de valores distintos
+    
     def __post_init__(self):
         if self.caracteristicas_esperadas is None:
             self.caracteristicas_esperadas = [
@@ -96,6 +127,37 @@ class ConfiguracaoLogs:
     console_handler: bool = True
     arquivo_log: str = "sistema_predicao_evasao.log"
 
+@dataclass
+class ConfiguracaoMetricas:
+    """Configurações de exportação de métricas."""
+    habilitado: bool = True           # Exportação em arquivo (textfile collector)
+    arquivo_metricas: str = "metricas_predicao.prom"  # .prom (Prometheus) ou .json
+    servidor_habilitado: bool = False  # /metrics por HTTP nas interfaces web (sem autenticação)
+    porta_servidor: int = 9108
+    endereco_servidor: str = "127.0.0.1"  # "0.0.0.0" para o Prometheus coletar de outra máquina
+
+@dataclass
+class ConfiguracaoExecucao:
+    """Configurações de execução do pipeline e das tarefas em segundo plano."""
+    tamanho_lote: int = 1000          # Alunos por lote (granularidade do progresso)
+    regras_primeiro: bool = False     # Aplicar as regras antes e rodar modelo/SHAP só nos alunos sem regra
+    deduplicar_vetores: bool = True   # Modelo/SHAP uma vez por vetor de features distinto
+    cache_predicoes: bool = False     # Reaproveitar probabilidades/fator SHAP de execuções anteriores
+    arquivo_cache_predicoes: str = "cache_predicoes.sqlite"
+    cache_predicoes_max_entradas: int = 500000  # Vetores guardados; acima disso saem os menos usados
+    processos_pontuacao: int = 0      # Processos para modelo/SHAP com memória compartilhada (0 = no próprio processo)
+    metodo_inicio_processos: str = 'fork'  # 'fork' (modelo herdado) ou 'spawn' (cada processo carrega o modelo)
+    trabalhadores_tarefas: int = 2    # Tarefas de predição simultâneas na interface web
+    tarefas_retidas: int = 20         # Tarefas concluídas mantidas em memória
+    recarregar_modelo: bool = True    # Processos longos trocam o modelo quando data/models muda
+    intervalo_verificacao_modelo: float = 30.0  # Segundos entre verificações de data/models
+    modo_sombra: bool = False         # Pontuar também com o modelo candidato e comparar
+    arquivo_relatorio_sombra: str = "relatorio_sombra.json"
+    linhas_por_unidade: int = 50000   # Fila de trabalho: alunos por unidade de trabalho
+    duracao_arrendamento: float = 120.0  # Segundos sem heartbeat até outro trabalhador assumir a unidade
+    intervalo_heartbeat: float = 20.0    # Segundos entre renovações do arrendamento
+    tentativas_unidade: int = 3       # Falhas de uma unidade antes de ela ser deixada de lado
+
 class Configuracoes:
     """Classe principal de configurações."""
     
@@ -104,6 +166,8 @@ class Configuracoes:
         self.regras_negocio = ConfiguracaoRegrasNegocio()
         self.dados = ConfiguracaoDados()
         self.logs = ConfiguracaoLogs()
+        self.metricas = ConfiguracaoMetricas()
+        self.execucao = ConfiguracaoExecucao()
         
         # Classes mantidas após otimização
         self.classes_mantidas = [
@@ -142,13 +206,33 @@ class Configuracoes:
         """Retorna caminho do arquivo de cursos."""
         return self.dados.diretorio_dados_brutos / self.dados.arquivo_cursos
     
-    def obter_caminho_modelo(self) -> Path:
-        """Retorna caminho do arquivo de modelo."""
-        return self.dados.diretorio_modelos / self.dados.arquivo_modelo
+    def obter_caminho_dados_treinamento(self) -> Path:
+        """Retorna caminho do arquivo de dados de treinamento."""
+        return self.dados.diretorio_dados_brutos / self.dados.arquivo_dados_treinamento
+    
+    def obter_caminho_modelo(self, compacto: Optional[bool] = None) -> Path:
+        """
+        Retorna caminho do arquivo de modelo.
+        
+        Args:
+            compacto: Modelo compacto ou completo (padrão: configuracoes.dados.usar_modelo_compacto)
+        """
+        if compacto is None:
+            compacto = self.dados.usar_modelo_compacto
+        arquivo = self.dados.arquivo_modelo_compacto if compacto else self.dados.arquivo_modelo
+        return self.dados.diretorio_modelos / arquivo
     
     def obter_caminho_mapeamento_classes(self) -> Path:
         """Retorna caminho do arquivo de mapeamento de classes."""
         return self.dados.diretorio_modelos / self.dados.arquivo_mapeamento_classes
+    
+    def obter_caminho_metricas(self) -> Path:
+        """Retorna caminho do arquivo de métricas das execuções em lote."""
+        return self.dados.diretorio_saida / self.metricas.arquivo_metricas
+    
+    def obter_caminho_cache_predicoes(self) -> Path:
+        """Retorna caminho do cache persistente de predições."""
+        return self.dados.diretorio_dados_processados / self.execucao.arquivo_cache_predicoes
 
 # Instância global de configurações
 configuracoes = Configuracoes()
\ No newline at end of file
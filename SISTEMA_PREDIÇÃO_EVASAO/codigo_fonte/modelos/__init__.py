@@ -2,8 +2,28 @@
 Módulo de modelos de Machine Learning.
 """
 
-from .modelo_ml import PreditorEvasaoEstudantil
+from .modelo_ml import PreditorEvasaoEstudantil, calcular_versao_modelo
+from .busca_hiperparametros import BuscaHiperparametros
+from .memoria_externa import (
+    IteradorBlocosParquet, gravar_blocos, treinar_memoria_externa, prever_blocos, memoria_externa_disponivel
+)
+from .treino_incremental import estender_codificador, continuar_treino
+from .compactacao import truncar_modelo, podar_modelo, destilar_modelo
+from .cache_predicoes import CachePredicoes
 
 __all__ = [
-    'PreditorEvasaoEstudantil'
+    'PreditorEvasaoEstudantil',
+    'calcular_versao_modelo',
+    'BuscaHiperparametros',
+    'IteradorBlocosParquet',
+    'gravar_blocos',
+    'treinar_memoria_externa',
+    'memoria_externa_disponivel',
+    'prever_blocos',
+    'estender_codificador',
+    'continuar_treino',
+    'truncar_modelo',
+    'podar_modelo',
+    'destilar_modelo',
+    'CachePredicoes'
 ]
\ No newline at end of file
@@ -0,0 +1,265 @@
+﻿"""
+Busca de hiperparâmetros do XGBoost em paralelo.
+
+A matriz de treino (já pré-processada) é enviada uma única vez para cada
+processo do pool; cada tentativa treina com parada antecipada em um fold de
+validação. Na estratégia 'halving' (successive halving) todos os candidatos
+começam com poucas árvores e só o melhor terço de cada rodada segue com o
+triplo do orçamento; na 'aleatoria' cada candidato treina uma vez com o
+orçamento completo.
+"""
+
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import xgboost as xgb
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+
+from ..utilitarios import obter_registrador
+from ..configuracao import configuracoes
+
+registrador = obter_registrador(__name__)
+
+ESTRATEGIAS = ('halving', 'aleatoria')
+
+# Espaço de busca: valores sorteados para cada candidato
+ESPACO_BUSCA: Dict[str, List[Any]] = {
+    'max_depth': [3, 4, 5, 6, 8, 10],
+    'learning_rate': [0.01, 0.03, 0.05, 0.1, 0.2, 0.3],
+    'n_estimators': [100, 200, 400, 800],
+    'subsample': [0.6, 0.8, 1.0],
+    'colsample_bytree': [0.6, 0.8, 1.0],
+    'min_child_weight': [1, 3, 5]
+}
+
+# Maior número de árvores treinado por uma tentativa
+ORCAMENTO_MAXIMO = max(ESPACO_BUSCA['n_estimators'])
+
+# Dados do fold de treino/validação, carregados uma vez por processo (ver _inicializar_processo)
+_DADOS_PROCESSO: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = None
+
+def _inicializar_processo(X_treino: np.ndarray, y_treino: np.ndarray,
+                          X_validacao: np.ndarray, y_validacao: np.ndarray) -> None:
+    global _DADOS_PROCESSO
+    _DADOS_PROCESSO = (X_treino, y_treino, X_validacao, y_validacao)
+
+def _avaliar_candidato(indice: int, parametros: Dict[str, Any], n_estimadores: int,
+                       n_jobs: int, rodadas_parada: int, rodada: int) -> Dict[str, Any]:
+    """Treina um candidato no fold de treino com parada antecipada na validação."""
+    X_treino, y_treino, X_validacao, y_validacao = _DADOS_PROCESSO
+    metrica = configuracoes.modelo.metrica_avaliacao
+    inicio = time.perf_counter()
+    
+    modelo = xgb.XGBClassifier(
+        **{**parametros, 'n_estimators': n_estimadores},
+        tree_method=configuracoes.modelo.metodo_arvore,
+        max_bin=configuracoes.modelo.max_bin,
+        random_state=configuracoes.modelo.semente_aleatoria,
+        eval_metric=metrica,
+        early_stopping_rounds=rodadas_parada,
+        n_jobs=n_jobs
+    )
+    modelo.fit(X_treino, y_treino, eval_set=[(X_validacao, y_validacao)], verbose=False)
+    
+    melhor_iteracao = int(modelo.best_iteration)
+    return {
+        'candidato': indice,
+        'rodada': rodada,
+        'parametros': parametros,
+        'n_estimators_orcamento': n_estimadores,
+        'melhor_iteracao': melhor_iteracao,
+        'n_estimators_efetivo': melhor_iteracao + 1,
+        metrica: float(modelo.evals_result()['validation_0'][metrica][melhor_iteracao]),
+        'acuracia_validacao': float(accuracy_score(y_validacao, modelo.predict(X_validacao))),
+        'duracao_segundos': round(time.perf_counter() - inicio, 3)
+    }
+
+def sortear_candidatos(quantidade: int, semente: int,
+                       espaco: Optional[Dict[str, List[Any]]] = None) -> List[Dict[str, Any]]:
+    """
+    Sorteia combinações distintas do espaço de busca.
+    
+    Args:
+        quantidade: Candidatos desejados (limitado ao total de combinações)
+        semente: Semente do sorteio
+        espaco: Valores por parâmetro (padrão: ESPACO_BUSCA)
+    """
+    espaco = espaco or ESPACO_BUSCA
+    total_combinacoes = math.prod(len(valores) for valores in espaco.values())
+    quantidade = min(quantidade, total_combinacoes)
+    
+    sorteador = random.Random(semente)
+    candidatos, vistos = [], set()
+    while len(candidatos) < quantidade:
+        candidato = {nome: sorteador.choice(valores) for nome, valores in espaco.items()}
+        chave = tuple(candidato.values())
+        if chave not in vistos:
+            vistos.add(chave)
+            candidatos.append(candidato)
+    return candidatos
+
+class BuscaHiperparametros:
+    """
+    Busca aleatória ou successive halving em um pool de processos.
+    
+    Os núcleos são divididos entre os processos: com P processos em uma
+    máquina de N núcleos, cada treino usa N // P threads do XGBoost.
+    """
+    
+    def __init__(self, estrategia: str = 'halving', candidatos: Optional[int] = None,
+                 trabalhadores: Optional[int] = None, fator_reducao: Optional[int] = None,
+                 rodadas_parada: Optional[int] = None, fracao_validacao: float = 0.2):
+        """
+        Inicializa a busca.
+        
+        Args:
+            estrategia: 'halving' ou 'aleatoria'
+            candidatos: Combinações sorteadas (padrão: configuracoes.modelo.busca_candidatos)
+            trabalhadores: Processos do pool (padrão: configuracoes.modelo.busca_trabalhadores;
+                0 = um por núcleo, limitado ao número de candidatos)
+            fator_reducao: Fração mantida e aumento do orçamento a cada rodada do halving
+                (padrão: configuracoes.modelo.busca_fator_reducao)
+            rodadas_parada: Rodadas sem melhora na validação antes de parar
+                (padrão: configuracoes.modelo.busca_rodadas_parada)
+            fracao_validacao: Parte do treino separada para a parada antecipada
+        
+        Raises:
+            ValueError: Se a estratégia não for conhecida
+        """
+        if estrategia not in ESTRATEGIAS:
+            raise ValueError(f"Estratégia de busca desconhecida: {estrategia} (use {', '.join(ESTRATEGIAS)})")
+        
+        self.estrategia = estrategia
+        self.candidatos = candidatos or configuracoes.modelo.busca_candidatos
+        self.fator_reducao = fator_reducao or configuracoes.modelo.busca_fator_reducao
+        self.rodadas_parada = rodadas_parada or configuracoes.modelo.busca_rodadas_parada
+        self.fracao_validacao = fracao_validacao
+        
+        nucleos = os.cpu_count() or 1
+        self.trabalhadores = min(trabalhadores or configuracoes.modelo.busca_trabalhadores or nucleos,
+                                 self.candidatos)
+        self.threads_por_treino = max(1, nucleos // self.trabalhadores)
+        self.placar: List[Dict[str, Any]] = []
+        self.duracao = 0.0
+    
+    def executar(self, X: np.ndarray, y: np.ndarray) -> Dict[str, Any]:
+        """
+        Executa a busca.
+        
+        Args:
+            X: Matriz de treino pré-processada (sem o conjunto de teste)
+            y: Classes codificadas
+        
+        Returns:
+            Parâmetros da melhor tentativa, com n_estimators = iterações até a parada antecipada
+        """
+        semente = configuracoes.modelo.semente_aleatoria
+        X_treino, X_validacao, y_treino, y_validacao = train_test_split(
+            np.asarray(X, dtype=np.float32), np.asarray(y), test_size=self.fracao_validacao,
+            random_state=semente, stratify=y
+        )
+        candidatos = sortear_candidatos(self.candidatos, semente)
+        metrica = configuracoes.modelo.metrica_avaliacao
+        
+        registrador.info(
+            f"Busca '{self.estrategia}': {len(candidatos)} candidatos, {self.trabalhadores} processo(s) "
+            f"x {self.threads_por_treino} thread(s), treino {X_treino.shape}, validação {X_validacao.shape}"
+        )
+        inicio = time.perf_counter()
+        self.placar = []
+        
+        with ProcessPoolExecutor(max_workers=self.trabalhadores, initializer=_inicializar_processo,
+                                 initargs=(X_treino, y_treino, X_validacao, y_validacao)) as executor:
+            vivos = list(enumerate(candidatos))
+            # Aleatória: uma rodada, cada candidato com o próprio n_estimators; halving: orçamento comum crescente
+            rodadas = 1 if self.estrategia == 'aleatoria' else self._rodadas_halving(len(vivos))
+            rodada = 0
+            
+            while True:
+                orcamento = None if self.estrategia == 'aleatoria' else self._orcamento_rodada(rodada, rodadas)
+                futuros = [
+                    executor.submit(_avaliar_candidato, indice,
+                                    {nome: valor for nome, valor in parametros.items() if nome != 'n_estimators'},
+                                    parametros['n_estimators'] if orcamento is None else orcamento,
+                                    self.threads_por_treino, self.rodadas_parada, rodada)
+                    for indice, parametros in vivos
+                ]
+                resultados = sorted((futuro.result() for futuro in futuros), key=lambda r: r[metrica])
+                self.placar.extend(resultados)
+                
+                registrador.info(
+                    f"Rodada {rodada}: {len(resultados)} tentativa(s), melhor {metrica}="
+                    f"{resultados[0][metrica]:.4f} (candidato {resultados[0]['candidato']})"
+                )
+                
+                if rodada + 1 >= rodadas:
+                    break
+                
+                mantidos = {r['candidato'] for r in resultados[:max(1, len(resultados) // self.fator_reducao)]}
+                vivos = [(indice, parametros) for indice, parametros in vivos if indice in mantidos]
+                # Um único sobrevivente já venceu: treiná-lo de novo com mais árvores não decide nada
+                if len(vivos) == 1:
+                    break
+                rodada += 1
+        
+        self.duracao = time.perf_counter() - inicio
+        melhor = self.melhor_tentativa()
+        registrador.info(f"Busca concluída em {self.duracao:.1f}s; melhor: {melhor['parametros']} "
+                         f"({metrica}={melhor[metrica]:.4f}, acurácia {melhor['acuracia_validacao']:.4f})")
+        return {**melhor['parametros'], 'n_estimators': melhor['n_estimators_efetivo']}
+    
+    def _rodadas_halving(self, candidatos: int) -> int:
+        """Rodadas do halving até restar um candidato por fator_reducao."""
+        rodadas = 1
+        while self.fator_reducao ** rodadas < candidatos:
+            rodadas += 1
+        return rodadas
+    
+    def _orcamento_rodada(self, rodada: int, rodadas: int) -> int:
+        """Árvores de uma rodada do halving; a última usa exatamente o orçamento máximo."""
+        return max(self.rodadas_parada * 2, ORCAMENTO_MAXIMO // self.fator_reducao ** (rodadas - 1 - rodada))
+    
+    def melhor_tentativa(self) -> Dict[str, Any]:
+        """Tentativa com menor métrica na última rodada que o candidato alcançou."""
+        metrica = configuracoes.modelo.metrica_avaliacao
+        ultima_rodada = max(tentativa['rodada'] for tentativa in self.placar)
+        finalistas = [tentativa for tentativa in self.placar if tentativa['rodada'] == ultima_rodada]
+        return min(finalistas, key=lambda tentativa: tentativa[metrica])
+    
+    def salvar_placar(self, caminho: Path, arquivo_dados: Optional[Path] = None) -> Path:
+        """
+        Grava o placar da busca em JSON.
+        
+        Args:
+            caminho: Arquivo de saída
+            arquivo_dados: Dados de treino usados (informativo)
+        """
+        metrica = configuracoes.modelo.metrica_avaliacao
+        placar = sorted(self.placar, key=lambda tentativa: (-tentativa['rodada'], tentativa[metrica]))
+        conteudo = {
+            'gerado_em': datetime.now().isoformat(timespec='seconds'),
+            'arquivo_dados': str(arquivo_dados) if arquivo_dados else None,
+            'estrategia': self.estrategia,
+            'metrica': metrica,
+            'candidatos': self.candidatos,
+            'trabalhadores': self.trabalhadores,
+            'threads_por_treino': self.threads_por_treino,
+            'rodadas_parada': self.rodadas_parada,
+            'duracao_segundos': round(self.duracao, 2),
+            'melhor': self.melhor_tentativa(),
+            'tentativas': placar
+        }
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(conteudo, f, ensure_ascii=False, indent=2)
+        registrador.info(f"Placar da busca salvo em: {caminho}")
+        return caminho
\ No newline at end of file
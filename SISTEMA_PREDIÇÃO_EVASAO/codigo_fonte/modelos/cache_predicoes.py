@@ -0,0 +1,204 @@
+﻿"""
+Cache persistente de predições por versão do modelo e vetor de features.
+
+As execuções diárias repetem quase sempre os mesmos vetores codificados. O
+cache guarda, em um arquivo SQLite, as probabilidades e o fator SHAP
+principal (feature, classe e valor de maior impacto) de cada vetor já
+pontuado, com a chave formada pela versão do modelo e pelos bytes do vetor.
+Como a versão faz parte da chave, entradas de outra versão nunca são
+devolvidas, e várias versões podem usar o mesmo arquivo ao mesmo tempo
+(recarga do modelo, modelo compacto, sombra, trabalhadores da fila). Quando o
+limite de entradas é atingido, saem as usadas há mais tempo (LRU), o que
+inclui as de versões que deixaram de ser usadas; remover_outras_versoes()
+as apaga de uma vez, como manutenção.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..utilitarios import obter_registrador, metricas
+from ..configuracao import configuracoes
+
+registrador = obter_registrador(__name__)
+
+# Máximo de parâmetros por consulta SQLite (limite padrão de versões antigas: 999)
+CHAVES_POR_CONSULTA = 900
+
+# (feature, classe, valor) do fator SHAP principal; classe -1 em modelos binários
+FatorShap = Tuple[int, int, float]
+
+def fator_principal(valores_linha: np.ndarray) -> FatorShap:
+    """
+    Contribuição SHAP de maior magnitude de uma linha.
+    
+    Segue o mesmo critério do fator principal do relatório: a feature com o
+    maior |SHAP| entre as classes e, nela, a classe de maior |SHAP|.
+    
+    Args:
+        valores_linha: SHAP de um aluno, (features, classes) ou (features,)
+    """
+    valores = np.asarray(valores_linha)
+    if valores.ndim == 2:
+        feature = int(np.argmax(np.max(np.abs(valores), axis=1)))
+        classe = int(np.argmax(np.abs(valores[feature])))
+        return feature, classe, float(valores[feature, classe])
+    feature = int(np.argmax(np.abs(valores)))
+    return feature, -1, float(valores[feature])
+
+class CachePredicoes:
+    """Probabilidades e fator SHAP principal por (versão do modelo, vetor de features), em SQLite."""
+    
+    def __init__(self, caminho: Optional[Path] = None, max_entradas: Optional[int] = None):
+        """
+        Abre (ou cria) o cache.
+        
+        Args:
+            caminho: Arquivo SQLite (padrão: configuracoes.obter_caminho_cache_predicoes())
+            max_entradas: Limite de vetores guardados (padrão: configuracoes.execucao.cache_predicoes_max_entradas)
+        """
+        self.caminho = Path(caminho or configuracoes.obter_caminho_cache_predicoes())
+        self.max_entradas = max_entradas or configuracoes.execucao.cache_predicoes_max_entradas
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        
+        self._trava = threading.Lock()
+        self._conexao = sqlite3.connect(str(self.caminho), check_same_thread=False, timeout=30)
+        with self._conexao:
+            self._conexao.execute("PRAGMA journal_mode=WAL")
+            self._conexao.execute(
+                "CREATE TABLE IF NOT EXISTS memo ("
+                "chave BLOB PRIMARY KEY, versao TEXT NOT NULL, probabilidades BLOB NOT NULL, "
+                "feature INTEGER NOT NULL, classe INTEGER NOT NULL, valor REAL NOT NULL, "
+                "acesso REAL NOT NULL) WITHOUT ROWID"
+            )
+            self._conexao.execute("CREATE INDEX IF NOT EXISTS memo_acesso ON memo (acesso)")
+        registrador.info(f"Cache de predições: {self.caminho} ({self.total_entradas()} entradas)")
+    
+    def total_entradas(self) -> int:
+        """Vetores guardados no cache."""
+        with self._trava:
+            return self._conexao.execute("SELECT COUNT(*) FROM memo").fetchone()[0]
+    
+    def chaves(self, versao: str, df: pd.DataFrame) -> List[bytes]:
+        """
+        Chave de cada linha: hash da versão do modelo, das colunas e dos valores.
+        
+        Args:
+            versao: Versão do modelo (calcular_versao_modelo)
+            df: Dados pré-processados
+        """
+        prefixo = hashlib.blake2b(f"{versao}|{'|'.join(map(str, df.columns))}".encode('utf-8'),
+                                  digest_size=16).digest()
+        valores = np.ascontiguousarray(df.to_numpy(dtype=np.float64))
+        return [hashlib.blake2b(prefixo + linha.tobytes(), digest_size=16).digest() for linha in valores]
+    
+    def remover_outras_versoes(self, versao: str) -> int:
+        """
+        Manutenção: remove as entradas de todas as versões do modelo exceto a informada.
+        
+        Não é chamada automaticamente: outro processo pode estar usando o mesmo
+        arquivo com outra versão.
+        
+        Returns:
+            Entradas removidas
+        """
+        with self._trava, self._conexao:
+            removidas = self._conexao.execute("DELETE FROM memo WHERE versao != ?", (versao,)).rowcount
+        if removidas:
+            registrador.info(f"Cache de predições: {removidas} entradas de outras versões do modelo removidas")
+            metricas.incrementar('cache_predicoes_invalidadas_total', removidas,
+                                 descricao='Entradas de outras versões do modelo removidas do cache de predições')
+        return removidas
+    
+    def buscar(self, versao: str, chaves: Sequence[bytes]) -> Dict[bytes, Tuple[np.ndarray, FatorShap]]:
+        """
+        Busca as chaves no cache e marca os acertos como usados agora.
+        
+        Returns:
+            {chave: (probabilidades, fator SHAP principal)} das chaves encontradas
+        """
+        encontrados = {}
+        with self._trava:
+            unicas = list(dict.fromkeys(chaves))
+            for inicio in range(0, len(unicas), CHAVES_POR_CONSULTA):
+                parte = unicas[inicio:inicio + CHAVES_POR_CONSULTA]
+                linhas = self._conexao.execute(
+                    f"SELECT chave, probabilidades, feature, classe, valor FROM memo "
+                    f"WHERE chave IN ({','.join('?' * len(parte))})", parte
+                )
+                for chave, probabilidades, feature, classe, valor in linhas:
+                    encontrados[chave] = (np.frombuffer(probabilidades, dtype=np.float64), (feature, classe, valor))
+            
+            if encontrados:
+                agora = time.time()
+                with self._conexao:
+                    self._conexao.executemany("UPDATE memo SET acesso = ? WHERE chave = ?",
+                                              [(agora, chave) for chave in encontrados])
+        
+        metricas.incrementar('cache_predicoes_consultas_total', len(encontrados),
+                             descricao='Consultas ao cache de predições', resultado='acerto')
+        metricas.incrementar('cache_predicoes_consultas_total', len(chaves) - len(encontrados),
+                             descricao='Consultas ao cache de predições', resultado='falha')
+        return encontrados
+    
+    def gravar(self, versao: str, chaves: Sequence[bytes], probabilidades: np.ndarray,
+               fatores: Sequence[FatorShap]) -> None:
+        """
+        Grava vetores pontuados e remove os menos usados acima do limite.
+        
+        Args:
+            versao: Versão do modelo
+            chaves: Chaves das linhas (mesma ordem de probabilidades e fatores)
+            probabilidades: Probabilidades por classe de cada linha
+            fatores: Fator SHAP principal de cada linha
+        """
+        if not len(chaves):
+            return
+        agora = time.time()
+        registros = [
+            (chave, versao, np.ascontiguousarray(linha, dtype=np.float64).tobytes(), feature, classe, valor, agora)
+            for chave, linha, (feature, classe, valor) in zip(chaves, probabilidades, fatores)
+        ]
+        with self._trava:
+            with self._conexao:
+                self._conexao.executemany("INSERT OR REPLACE INTO memo VALUES (?, ?, ?, ?, ?, ?, ?)", registros)
+                total = self._conexao.execute("SELECT COUNT(*) FROM memo").fetchone()[0]
+                excesso = total - self.max_entradas
+                if excesso > 0:
+                    self._conexao.execute(
+                        "DELETE FROM memo WHERE chave IN (SELECT chave FROM memo ORDER BY acesso LIMIT ?)", (excesso,)
+                    )
+                    metricas.incrementar('cache_predicoes_removidas_total', excesso,
+                                         descricao='Entradas do cache de predições removidas pelo limite (LRU)')
+        metricas.definir('cache_predicoes_entradas', min(total, self.max_entradas),
+                         descricao='Vetores guardados no cache de predições')
+    
+    def fechar(self) -> None:
+        """Fecha a conexão com o arquivo."""
+        with self._trava:
+            self._conexao.close()
+
+_cache_compartilhado: Optional[CachePredicoes] = None
+_trava_cache = threading.Lock()
+
+def obter_cache_predicoes() -> Optional[CachePredicoes]:
+    """
+    Cache compartilhado pelos preditores do processo, ou None se desativado.
+    
+    Preditores recarregados (troca de modelo) usam a mesma conexão; as
+    entradas da versão anterior deixam de ser consultadas e saem pelo limite (LRU).
+    """
+    global _cache_compartilhado
+    if not configuracoes.execucao.cache_predicoes:
+        return None
+    with _trava_cache:
+        caminho = configuracoes.obter_caminho_cache_predicoes()
+        if _cache_compartilhado is None or _cache_compartilhado.caminho != caminho:
+            _cache_compartilhado = CachePredicoes(caminho)
+        return _cache_compartilhado
\ No newline at end of file
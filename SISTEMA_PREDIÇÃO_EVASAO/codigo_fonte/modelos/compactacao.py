@@ -0,0 +1,140 @@
+﻿"""
+Compactação do modelo XGBoost para inferência e SHAP mais rápidos.
+
+Cada linha percorre todas as árvores do booster (rodadas x classes), e o
+TreeExplainer também; um modelo menor reduz os dois custos. Três formas de
+gerar um modelo "aluno" a partir do modelo em produção ("professor"):
+
+- truncar: mantém só as primeiras rodadas (fatia do booster);
+- podar: remove divisões com ganho abaixo de um limite (updater 'prune');
+- destilar: treina um booster mais raso nas probabilidades do professor.
+
+Todos devolvem um XGBClassifier com as mesmas features e classes, que pode
+ser salvo como arquivo_modelo_compacto e lido pelo preditor.
+"""
+
+import os
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from ..utilitarios import obter_registrador
+from ..configuracao import configuracoes
+from .memoria_externa import classificador_de_booster, parametros_arvore
+
+registrador = obter_registrador(__name__)
+
+# Probabilidade mínima do professor para uma classe virar linha de treino na destilação
+PROBABILIDADE_MINIMA_DESTILACAO = 1e-3
+
+def resumo_modelo(modelo: xgb.XGBClassifier) -> Dict[str, int]:
+    """Rodadas, árvores e nós de divisão do modelo."""
+    booster = modelo.get_booster()
+    arvores = booster.trees_to_dataframe()
+    return {
+        'rodadas': booster.num_boosted_rounds(),
+        'arvores': int(arvores['Tree'].nunique()),
+        'divisoes': int((arvores['Feature'] != 'Leaf').sum())
+    }
+
+def ganhos_divisoes(modelo: xgb.XGBClassifier) -> np.ndarray:
+    """Ganho (redução da perda) de cada divisão do modelo, para escolher o limite de poda."""
+    arvores = modelo.get_booster().trees_to_dataframe()
+    return arvores.loc[arvores['Feature'] != 'Leaf', 'Gain'].to_numpy()
+
+def truncar_modelo(modelo: xgb.XGBClassifier, rodadas: int) -> xgb.XGBClassifier:
+    """
+    Mantém só as primeiras rodadas de boosting.
+    
+    Args:
+        modelo: Modelo completo (não é alterado)
+        rodadas: Rodadas mantidas (cada uma tem uma árvore por classe)
+    """
+    booster = modelo.get_booster()
+    rodadas = max(1, min(rodadas, booster.num_boosted_rounds()))
+    return classificador_de_booster(booster[:rodadas])
+
+def podar_modelo(modelo: xgb.XGBClassifier, X: pd.DataFrame, y: np.ndarray, ganho_minimo: float,
+                 profundidade_maxima: Optional[int] = None) -> xgb.XGBClassifier:
+    """
+    Remove as divisões com ganho menor que ganho_minimo (e as abaixo de profundidade_maxima).
+    
+    As árvores continuam as mesmas em número; só perdem ramos. Os dados são
+    exigidos pelo updater do XGBoost, mas as folhas mantêm os pesos calculados
+    no treino original.
+    
+    Args:
+        modelo: Modelo completo (não é alterado)
+        X: Features codificadas
+        y: Classes codificadas
+        ganho_minimo: Divisões com ganho abaixo disso viram folha
+        profundidade_maxima: Profundidade máxima após a poda (None = manter)
+    """
+    booster = modelo.get_booster()
+    parametros = {
+        'objective': 'multi:softprob',
+        'num_class': int(modelo.n_classes_),
+        'process_type': 'update',
+        'updater': 'prune',
+        'gamma': float(ganho_minimo)
+    }
+    if profundidade_maxima:
+        parametros['max_depth'] = int(profundidade_maxima)
+    
+    matriz = xgb.DMatrix(X[booster.feature_names or list(X.columns)].astype(np.float32), label=y)
+    # xgb_model copia o booster: o modelo recebido continua intacto
+    podado = xgb.train(parametros, matriz, num_boost_round=booster.num_boosted_rounds(), xgb_model=booster)
+    return classificador_de_booster(podado)
+
+def destilar_modelo(professor: xgb.XGBClassifier, X: pd.DataFrame, rodadas: int, profundidade_maxima: int,
+                    parametros: Optional[Dict[str, Any]] = None) -> xgb.XGBClassifier:
+    """
+    Treina um booster menor que imita as probabilidades do professor.
+    
+    Cada linha é repetida uma vez por classe com peso igual à probabilidade
+    dada pelo professor; a perda multiclasse ponderada fica igual à entropia
+    cruzada contra os rótulos "suaves" do professor. Classes com probabilidade
+    abaixo de PROBABILIDADE_MINIMA_DESTILACAO são omitidas.
+    
+    Args:
+        professor: Modelo completo
+        X: Features codificadas (não precisam de rótulo)
+        rodadas: Rodadas do aluno
+        profundidade_maxima: Profundidade das árvores do aluno
+        parametros: Hiperparâmetros no formato do XGBClassifier (learning_rate,
+            subsample, ...); n_estimators e max_depth são ignorados
+    
+    Returns:
+        XGBClassifier aluno
+    """
+    parametros = {**parametros_arvore(), **(parametros or {})}
+    for nome in ('n_estimators', 'max_depth'):
+        parametros.pop(nome, None)
+    threads = parametros.pop('n_jobs')
+    
+    nomes_features = professor.get_booster().feature_names or list(X.columns)
+    X = X[nomes_features].astype(np.float32)
+    probabilidades = professor.predict_proba(X)
+    num_classes = probabilidades.shape[1]
+    
+    linhas, classes = np.nonzero(probabilidades >= PROBABILIDADE_MINIMA_DESTILACAO)
+    matriz = xgb.DMatrix(
+        X.iloc[linhas].reset_index(drop=True), label=classes, weight=probabilidades[linhas, classes],
+        nthread=threads if threads > 0 else None
+    )
+    
+    booster_parametros = {
+        'objective': 'multi:softprob',
+        'num_class': num_classes,
+        'max_depth': int(profundidade_maxima),
+        'nthread': threads if threads > 0 else os.cpu_count(),
+        'seed': parametros.pop('random_state', configuracoes.modelo.semente_aleatoria),
+        'eval_metric': parametros.pop('eval_metric', configuracoes.modelo.metrica_avaliacao),
+        **{('eta' if nome == 'learning_rate' else nome): valor for nome, valor in parametros.items()}
+    }
+    
+    registrador.info(f"Destilando: {len(X)} linhas ({len(linhas)} pares linha/classe), "
+                     f"{rodadas} rodadas, profundidade {profundidade_maxima}")
+    return classificador_de_booster(xgb.train(booster_parametros, matriz, num_boost_round=rodadas))
\ No newline at end of file
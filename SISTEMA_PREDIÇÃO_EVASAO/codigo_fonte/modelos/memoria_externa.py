@@ -0,0 +1,166 @@
+﻿"""
+Treino do XGBoost em memória externa.
+
+Os dados de treino ficam em arquivos Parquet (um bloco por arquivo, features
+já codificadas + coluna de rótulo). Um DataIter entrega um bloco por vez ao
+XGBoost, que monta o índice de histogramas em páginas no disco; assim só um
+bloco precisa estar em memória durante o treino, e não o histórico inteiro.
+"""
+
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from ..utilitarios import obter_registrador
+from ..configuracao import configuracoes
+
+registrador = obter_registrador(__name__)
+
+# Coluna com a classe codificada em cada bloco
+COLUNA_ROTULO = 'rotulo'
+
+def memoria_externa_disponivel() -> bool:
+    """True se o XGBoost instalado tem ExtMemQuantileDMatrix (XGBoost 3.0 ou mais recente)."""
+    return hasattr(xgb, 'ExtMemQuantileDMatrix')
+
+def parametros_arvore() -> Dict[str, Any]:
+    """Método de árvore, bins e threads de treino definidos em ConfiguracaoModelo."""
+    return {
+        'tree_method': configuracoes.modelo.metodo_arvore,
+        'max_bin': configuracoes.modelo.max_bin,
+        'n_jobs': configuracoes.modelo.threads_treino or -1
+    }
+
+def gravar_blocos(X: pd.DataFrame, y: np.ndarray, diretorio: Path, linhas_por_bloco: Optional[int] = None,
+                  prefixo: str = 'bloco') -> List[Path]:
+    """
+    Grava uma matriz codificada em blocos Parquet.
+    
+    Args:
+        X: Features codificadas
+        y: Classes codificadas
+        diretorio: Destino dos arquivos
+        linhas_por_bloco: Linhas por arquivo (padrão: configuracoes.modelo.linhas_por_bloco)
+        prefixo: Início do nome dos arquivos
+    
+    Returns:
+        Arquivos gravados, em ordem
+    """
+    linhas_por_bloco = linhas_por_bloco or configuracoes.modelo.linhas_por_bloco
+    diretorio.mkdir(parents=True, exist_ok=True)
+    
+    arquivos = []
+    for numero, inicio in enumerate(range(0, len(X), linhas_por_bloco)):
+        bloco = X.iloc[inicio:inicio + linhas_por_bloco].astype(np.float32)
+        bloco[COLUNA_ROTULO] = np.asarray(y[inicio:inicio + linhas_por_bloco])
+        caminho = diretorio / f"{prefixo}-{numero:05d}.parquet"
+        bloco.to_parquet(caminho, index=False)
+        arquivos.append(caminho)
+    return arquivos
+
+def ler_bloco(caminho: Path) -> Tuple[pd.DataFrame, np.ndarray]:
+    """Lê um bloco e separa (features, rótulos)."""
+    bloco = pd.read_parquet(caminho)
+    return bloco.drop(columns=[COLUNA_ROTULO]), bloco[COLUNA_ROTULO].to_numpy()
+
+class IteradorBlocosParquet(xgb.DataIter):
+    """Entrega ao XGBoost um bloco Parquet por vez."""
+    
+    def __init__(self, arquivos: List[Path], diretorio_cache: Path):
+        """
+        Inicializa o iterador.
+        
+        Args:
+            arquivos: Blocos gravados por gravar_blocos()
+            diretorio_cache: Onde o XGBoost grava as páginas da matriz
+        """
+        self.arquivos = list(arquivos)
+        self._posicao = 0
+        diretorio_cache.mkdir(parents=True, exist_ok=True)
+        super().__init__(cache_prefix=os.path.join(str(diretorio_cache), 'xgb'))
+    
+    def next(self, input_data: Callable) -> bool:
+        if self._posicao == len(self.arquivos):
+            return False
+        X, y = ler_bloco(self.arquivos[self._posicao])
+        input_data(data=X, label=y)
+        self._posicao += 1
+        return True
+    
+    def reset(self) -> None:
+        self._posicao = 0
+
+def treinar_memoria_externa(arquivos: List[Path], parametros: Dict[str, Any], num_classes: int,
+                            diretorio_cache: Path) -> xgb.XGBClassifier:
+    """
+    Treina a partir dos blocos sem carregar o conjunto inteiro.
+    
+    Args:
+        arquivos: Blocos de treino
+        parametros: Hiperparâmetros no formato do XGBClassifier (n_estimators,
+            max_depth, learning_rate, ...)
+        num_classes: Quantidade de classes
+        diretorio_cache: Páginas temporárias do XGBoost
+    
+    Returns:
+        XGBClassifier equivalente ao treinado em memória (mesmo formato salvo
+        em data/models e lido pelo preditor)
+    
+    Raises:
+        ImportError: Se o XGBoost instalado não tiver ExtMemQuantileDMatrix
+    """
+    if not memoria_externa_disponivel():
+        raise ImportError(f"O treino em memória externa precisa do XGBoost 3.0 ou mais recente "
+                          f"(ExtMemQuantileDMatrix); instalado: {xgb.__version__}")
+    parametros = {**parametros_arvore(), **parametros}
+    num_rodadas = parametros.pop('n_estimators')
+    threads = parametros.pop('n_jobs')
+    
+    # Memória externa exige o índice de histogramas
+    if parametros.get('tree_method') != 'hist':
+        registrador.warning(f"tree_method={parametros.get('tree_method')} não suporta memória externa; usando 'hist'")
+    parametros['tree_method'] = 'hist'
+    
+    registrador.info(f"Treino em memória externa: {len(arquivos)} bloco(s), {num_rodadas} rodadas")
+    matriz = xgb.ExtMemQuantileDMatrix(
+        IteradorBlocosParquet(arquivos, diretorio_cache),
+        max_bin=parametros.pop('max_bin', None),
+        nthread=threads if threads > 0 else None
+    )
+    
+    booster_parametros = {
+        'objective': 'multi:softprob',
+        'num_class': num_classes,
+        'nthread': threads if threads > 0 else os.cpu_count(),
+        'seed': parametros.pop('random_state', configuracoes.modelo.semente_aleatoria),
+        'eval_metric': parametros.pop('eval_metric', configuracoes.modelo.metrica_avaliacao),
+        **{('eta' if nome == 'learning_rate' else nome): valor for nome, valor in parametros.items()}
+    }
+    booster = xgb.train(booster_parametros, matriz, num_boost_round=num_rodadas)
+    return classificador_de_booster(booster)
+
+def classificador_de_booster(booster: xgb.Booster) -> xgb.XGBClassifier:
+    """Envolve um Booster multiclasse em um XGBClassifier (formato salvo em data/models)."""
+    modelo = xgb.XGBClassifier()
+    modelo.load_model(bytearray(booster.save_raw('json')))
+    return modelo
+
+def prever_blocos(modelo: xgb.XGBClassifier, arquivos: List[Path]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Prediz bloco a bloco.
+    
+    Returns:
+        Tuple com (classes reais, classes preditas) de todos os blocos
+    """
+    reais, preditas = [], []
+    for arquivo in arquivos:
+        X, y = ler_bloco(arquivo)
+        reais.append(y)
+        preditas.append(modelo.predict(X))
+    if not reais:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(reais), np.concatenate(preditas)
\ No newline at end of file
@@ -2,20 +2,73 @@
 Modelo de Machine Learning para predição de evasão estudantil.
 """
 
+import time
+import hashlib
 import joblib
 import shap
 import numpy as np
+import xgboost as xgb
 import pandas as pd
 from pathlib import Path
-from typing import Tuple, List, Optional, Dict, Any
+from typing import Tuple, List, Optional, Dict, Any, Callable
 from sklearn.impute import SimpleImputer
 from sklearn.preprocessing import LabelEncoder
 
-from ..utilitarios import obter_registrador
+from ..utilitarios import (
+    obter_registrador, metricas, orcamento_threads, reservar_threads, dividir_em_fatias, executar_em_fatias,
+    valores_distintos, coluna_arrow
+)
 from ..configuracao import configuracoes
+from .cache_predicoes import obter_cache_predicoes, fator_principal
 
 registrador = obter_registrador(__name__)
 
+def calcular_versao_modelo(caminhos: List[Path]) -> str:
+    """
+    Calcula a versão do modelo a partir do conteúdo dos arquivos.
+    
+    Args:
+        caminhos: Arquivos do modelo (os inexistentes são ignorados)
+        
+    Returns:
+        Os 12 primeiros caracteres do SHA-256 dos arquivos
+    """
+    resumo = hashlib.sha256()
+    for caminho in caminhos:
+        if caminho is not None and Path(caminho).exists():
+            resumo.update(Path(caminho).read_bytes())
+    return resumo.hexdigest()[:12]
+
+def agrupar_vetores_iguais(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Agrupa as linhas com o mesmo vetor de features.
+    
+    As linhas são identificadas por hash e a igualdade é conferida valor a
+    valor; se houver colisão de hash, nenhuma linha é agrupada.
+    
+    Args:
+        df: Dados pré-processados
+        
+    Returns:
+        Tuple com (posição da primeira ocorrência de cada vetor distinto, na
+        ordem em que aparecem, e índice inverso: o vetor distinto de cada linha)
+    """
+    inverso, _ = pd.factorize(pd.util.hash_pandas_object(df, index=False).to_numpy())
+    _, primeiras = np.unique(inverso, return_index=True)
+    
+    reconstruido = df.iloc[primeiras[inverso]].reset_index(drop=True)
+    if not reconstruido.equals(df.reset_index(drop=True)):
+        registrador.warning("Colisão de hash entre vetores de features distintos; deduplicação desativada")
+        return np.arange(len(df)), np.arange(len(df))
+    return primeiras, inverso
+
+def _expandir_shap(valores_shap: Any, inverso: np.ndarray) -> Any:
+    """Espalha os valores SHAP dos vetores distintos para todas as linhas."""
+    # Versões antigas do SHAP retornam uma lista com um array por classe
+    if isinstance(valores_shap, list):
+        return [valores[inverso] for valores in valores_shap]
+    return valores_shap[inverso]
+
 class PreditorEvasaoEstudantil:
     """Preditor de evasão estudantil usando XGBoost."""
     
@@ -26,16 +79,30 @@ class PreditorEvasaoEstudantil:
         self.info_classes = None
         self.codificadores_rotulos = {}
         self.imputadores = {}
+        self.versao = None
+        self._threads_modelo: Optional[int] = None
+        self.caminhos_artefatos: List[Path] = []
         self._carregado = False
     
+    @staticmethod
+    def caminhos_padrao() -> List[Path]:
+        """Arquivos do modelo em produção (modelo, mapeamento de classes e artifacts de treino)."""
+        return [
+            configuracoes.obter_caminho_modelo(),
+            configuracoes.obter_caminho_mapeamento_classes(),
+            configuracoes.dados.diretorio_modelos / "training_artifacts.pkl"
+        ]
+    
     def carregar_modelo(self, caminho_modelo: Optional[Path] = None, 
-                       caminho_mapeamento_classes: Optional[Path] = None) -> None:
+                       caminho_mapeamento_classes: Optional[Path] = None,
+                       caminho_artifacts: Optional[Path] = None) -> None:
         """
         Carrega o modelo treinado e configurações.
         
         Args:
             caminho_modelo: Caminho para o arquivo do modelo
             caminho_mapeamento_classes: Caminho para o mapeamento de classes
+            caminho_artifacts: Caminho para os artifacts de treinamento (encoders e imputadores)
             
         Raises:
             FileNotFoundError: Se os arquivos não forem encontrados
@@ -57,6 +124,10 @@ class PreditorEvasaoEstudantil:
             # Carregar modelo
             self.modelo = joblib.load(caminho_modelo)
             registrador.info(f"Modelo carregado: {type(self.modelo).__name__}")
+            # Threads escolhidas a cada pontuação (ver _pontuar_com_threads), não fixadas no treino
+            self.modelo.set_params(n_jobs=None)
+            self.modelo.get_booster().set_param({'nthread': 0})
+            self._threads_modelo = None
             
             # Carregar mapeamento de classes
             if caminho_mapeamento_classes.exists():
@@ -64,7 +135,8 @@ class PreditorEvasaoEstudantil:
                 registrador.info("Mapeamento de classes carregado")
             
             # Carregar artifacts de treinamento
-            caminho_artifacts = configuracoes.dados.diretorio_modelos / "training_artifacts.pkl"
+            if caminho_artifacts is None:
+                caminho_artifacts = configuracoes.dados.diretorio_modelos / "training_artifacts.pkl"
             if caminho_artifacts.exists():
                 artifacts = joblib.load(caminho_artifacts)
                 self.codificadores_rotulos = artifacts.get('label_encoders', {})
@@ -74,17 +146,70 @@ class PreditorEvasaoEstudantil:
             registrador.info("Inicializando explainer SHAP...")
             self.explicador = shap.TreeExplainer(self.modelo)
             
+            # Versão = hash do conteúdo dos arquivos (muda a cada novo treino)
+            self.caminhos_artefatos = [caminho_modelo, caminho_mapeamento_classes, caminho_artifacts]
+            self.versao = calcular_versao_modelo(self.caminhos_artefatos)
+            
             self._carregado = True
-            registrador.info("Modelo carregado com sucesso")
+            registrador.info(f"Modelo carregado com sucesso (versão {self.versao})")
             
         except Exception as e:
             registrador.error(f"Erro ao carregar modelo: {e}")
             raise
     
+    def aquecer(self) -> None:
+        """
+        Executa uma predição de teste para validar o modelo carregado.
+        
+        Usado antes de colocar um modelo novo em uso: garante que o modelo,
+        o explainer SHAP e o mapeamento de classes funcionam juntos e deixa
+        as estruturas internas do XGBoost inicializadas.
+        
+        Raises:
+            RuntimeError: Se o modelo não estiver carregado ou for inconsistente
+        """
+        if not self._carregado:
+            raise RuntimeError("Modelo não foi carregado. Chame carregar_modelo() primeiro.")
+        
+        colunas = getattr(self.modelo, 'feature_names_in_', None)
+        if colunas is None:
+            colunas = configuracoes.dados.caracteristicas_esperadas[:getattr(self.modelo, 'n_features_in_', None)]
+        amostra = pd.DataFrame(np.zeros((1, len(colunas))), columns=list(colunas))
+        
+        probabilidades = self.modelo.predict_proba(amostra)
+        self.explicador.shap_values(amostra)
+        
+        if not np.all(np.isfinite(probabilidades)):
+            raise RuntimeError("Modelo retornou probabilidades inválidas no aquecimento")
+        
+        if isinstance(self.info_classes, dict) and 'class_names' in self.info_classes:
+            total_classes = len(self.info_classes['class_names'])
+            if probabilidades.shape[1] != total_classes:
+                raise RuntimeError(
+                    f"Modelo com {probabilidades.shape[1]} classes, mapeamento com {total_classes}"
+                )
+        
+        registrador.info(f"Aquecimento do modelo {self.versao} concluído")
+    
+    def nomes_features(self) -> List[str]:
+        """Features na ordem do modelo (a ordem das colunas da matriz pré-processada)."""
+        nomes = self.modelo.get_booster().feature_names if self.modelo is not None else None
+        return list(nomes) if nomes else list(configuracoes.dados.caracteristicas_esperadas)
+    
     def preprocessar_dados(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Pré-processa os dados para o modelo.
         
+        Cada coluna é codificada e escrita direto em uma matriz float32
+        C-contígua, na ordem de features do modelo; o DataFrame retornado é uma
+        view dessa matriz (um único bloco, sem cópia), que o XGBoost e o SHAP
+        usam sem conversão de tipos. O float32 é o tipo que o XGBoost usa
+        internamente, então as predições não mudam.
+        
+        Colunas Arrow (caminho colunar, pd.ArrowDtype) são codificadas pelo
+        dicionário: só os valores distintos passam pelos encoders, e o código
+        de cada linha é lido pelos índices.
+        
         Args:
             df: DataFrame com dados brutos
             
@@ -96,76 +221,262 @@ class PreditorEvasaoEstudantil:
         
         registrador.info(f"Pré-processando dados: {df.shape}")
         
-        # Selecionar features esperadas
-        features_disponives = []
-        for feature in configuracoes.dados.caracteristicas_esperadas:
-            if feature in df.columns:
-                features_disponives.append(feature)
+        # Selecionar features esperadas, na ordem do modelo
+        features_disponives = [feature for feature in self.nomes_features() if feature in df.columns]
         
         registrador.info(f"Features disponíveis: {len(features_disponives)}/{len(configuracoes.dados.caracteristicas_esperadas)}")
         
         if len(features_disponives) == 0:
             raise ValueError("Nenhuma feature esperada encontrada nos dados")
         
-        df_processado = df[features_disponives].copy()
-        
-        # Aplicar label encoders
-        for coluna, encoder in self.codificadores_rotulos.items():
-            if coluna in df_processado.columns:
-                # Primeiro, preencher valores NaN com valor padrão
-                valor_default = encoder.classes_[0] if len(encoder.classes_) > 0 else 'DESCONHECIDO'
-                df_processado[coluna] = df_processado[coluna].fillna(valor_default)
-                
-                # Converter para string e tratar 'nan' string
-                df_processado[coluna] = df_processado[coluna].astype(str)
-                df_processado[coluna] = df_processado[coluna].replace('nan', valor_default)
-                
-                # Verificar valores únicos após tratamento
-                valores_unicos = df_processado[coluna].unique()
-                valores_novos = set(valores_unicos) - set(encoder.classes_)
-                
-                if valores_novos:
-                    registrador.warning(f"Valores novos em {coluna}: {valores_novos}")
-                    # Substituir valores desconhecidos por valor padrão
-                    mask = ~df_processado[coluna].isin(encoder.classes_)
-                    df_processado.loc[mask, coluna] = valor_default
-                
-                df_processado[coluna] = encoder.transform(df_processado[coluna])
-        
-        # Aplicar imputadores
-        for coluna, imputador in self.imputadores.items():
-            if coluna in df_processado.columns:
-                valores_originais = df_processado[coluna].values.reshape(-1, 1)
-                valores_imputados = imputador.transform(valores_originais)
-                df_processado[coluna] = valores_imputados.flatten()
-        
-        # Garantir que todas as colunas estejam em formato numérico
-        # Tratar colunas que ainda são objeto (string)
-        for coluna in df_processado.columns:
-            if df_processado[coluna].dtype == 'object':
-                registrador.warning(f"Coluna {coluna} ainda é tipo object. Convertendo para numérico.")
-                # Tentar converter diretamente para numérico
-                try:
-                    df_processado[coluna] = pd.to_numeric(df_processado[coluna], errors='coerce')
-                    # Se houve valores NaN após conversão, preencher com 0
-                    if df_processado[coluna].isnull().any():
-                        df_processado[coluna] = df_processado[coluna].fillna(0)
-                except:
-                    # Se falhou, usar label encoder simples
-                    from sklearn.preprocessing import LabelEncoder
-                    le = LabelEncoder()
-                    df_processado[coluna] = df_processado[coluna].fillna('DESCONHECIDO')
-                    df_processado[coluna] = le.fit_transform(df_processado[coluna].astype(str))
+        matriz = np.empty((len(df), len(features_disponives)), dtype=np.float32)
+        
+        for posicao, coluna in enumerate(features_disponives):
+            if coluna_arrow(df[coluna]):
+                distintos, indices = valores_distintos(df[coluna])
+                codigos = self._codificar_coluna(coluna, distintos, np.bincount(indices, minlength=len(distintos)))
+                matriz[:, posicao] = codigos[indices]
+            else:
+                matriz[:, posicao] = self._codificar_coluna(coluna, df[coluna])
         
+        df_processado = pd.DataFrame(matriz, columns=features_disponives, copy=False)
         registrador.info(f"Dados pré-processados: {df_processado.shape}")
         return df_processado
     
-    def fazer_predicoes(self, df: pd.DataFrame) -> Tuple[List[str], List[List[float]], np.ndarray]:
+    def _codificar_coluna(self, coluna: str, valores: pd.Series,
+                          ocorrencias: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Valores numéricos de uma feature: label encoder, imputador e conversão de texto restante.
+        
+        Args:
+            coluna: Nome da feature
+            valores: Valores brutos (um por linha, ou os valores distintos da coluna)
+            ocorrencias: Linhas de cada valor, quando valores são os distintos
+                (usado na contagem de categorias desconhecidas)
+        """
+        valores = valores.reset_index(drop=True)
+        
+        # Aplicar label encoder
+        encoder = self.codificadores_rotulos.get(coluna)
+        if encoder is not None:
+            # Colunas 'category' (carga compactada) voltam a object para aceitar o valor padrão
+            if isinstance(valores.dtype, pd.CategoricalDtype):
+                valores = valores.astype(object)
+            
+            # Primeiro, preencher valores NaN com valor padrão
+            valor_default = encoder.classes_[0] if len(encoder.classes_) > 0 else 'DESCONHECIDO'
+            
+            # Converter para string e tratar 'nan' string
+            valores = valores.fillna(valor_default).astype(str).replace('nan', valor_default)
+            
+            # Verificar valores únicos após tratamento
+            valores_novos = set(valores.unique()) - set(encoder.classes_)
+            
+            if valores_novos:
+                registrador.warning(f"Valores novos em {coluna}: {valores_novos}")
+                # Substituir valores desconhecidos por valor padrão
+                mask = ~valores.isin(encoder.classes_)
+                valores = valores.mask(mask, valor_default)
+                metricas.incrementar(
+                    'categorias_desconhecidas_total',
+                    int(mask.sum() if ocorrencias is None else ocorrencias[mask.to_numpy()].sum()),
+                    descricao='Valores de categoria desconhecidos substituídos pelo padrão',
+                    coluna=coluna
+                )
+            
+            valores = pd.Series(encoder.transform(valores))
+        
+        # Aplicar imputador
+        imputador = self.imputadores.get(coluna)
+        if imputador is not None:
+            valores = pd.Series(imputador.transform(valores.to_numpy().reshape(-1, 1)).flatten())
+        
+        # Garantir formato numérico: tratar colunas que ainda são objeto (string)
+        if isinstance(valores.dtype, pd.CategoricalDtype):
+            valores = valores.astype(object)
+        if valores.dtype == 'object':
+            registrador.warning(f"Coluna {coluna} ainda é tipo object. Convertendo para numérico.")
+            # Tentar converter diretamente para numérico
+            try:
+                valores = pd.to_numeric(valores, errors='coerce')
+                # Se houve valores NaN após conversão, preencher com 0
+                if valores.isnull().any():
+                    valores = valores.fillna(0)
+            except (TypeError, ValueError):
+                # Se falhou, usar label encoder simples
+                le = LabelEncoder()
+                valores = pd.Series(le.fit_transform(valores.fillna('DESCONHECIDO').astype(str)))
+        
+        return valores.to_numpy(dtype=np.float32, na_value=np.nan)
+    
+    def deduplicar(self, df: pd.DataFrame,
+                   estatisticas: Optional[Dict[str, Any]]) -> Tuple[pd.DataFrame, Optional[np.ndarray]]:
+        """
+        Reduz o DataFrame aos vetores de features distintos.
+        
+        Modelo e SHAP tratam cada linha de forma independente, então pontuar só
+        os vetores distintos e espalhar o resultado dá exatamente o mesmo valor.
+        
+        Returns:
+            Tuple com (vetores distintos, índice inverso ou None se a deduplicação
+            estiver desativada)
+        """
+        if not configuracoes.execucao.deduplicar_vetores or len(df) == 0:
+            return df, None
+        
+        primeiras, inverso = agrupar_vetores_iguais(df)
+        total_unicos = len(primeiras)
+        registrador.info(f"{total_unicos} vetores de features distintos em {len(df)} amostras "
+                         f"({len(df) / total_unicos:.1f}x)")
+        metricas.incrementar('linhas_deduplicadas_total', len(df) - total_unicos,
+                             descricao='Linhas pontuadas reaproveitando um vetor de features idêntico')
+        if estatisticas is not None:
+            estatisticas['linhas'] = len(df)
+            estatisticas['vetores_unicos'] = total_unicos
+        return df.iloc[primeiras], inverso
+    
+    def _pontuar(self, df: pd.DataFrame,
+                 estatisticas: Optional[Dict[str, Any]]) -> Tuple[np.ndarray, Any, float, float]:
+        """
+        Probabilidades e valores SHAP de um bloco de vetores.
+        
+        Com o cache de predições ativo, só os vetores ausentes passam pelo
+        modelo e pelo SHAP. Os encontrados recebem as probabilidades guardadas
+        e uma linha SHAP com apenas a contribuição principal (zeros nas demais),
+        que é tudo o que o relatório usa: fator principal e valor de importância
+        saem idênticos aos do cálculo completo.
+        
+        Returns:
+            Tuple com (probabilidades, valores SHAP, segundos de inferência, segundos de SHAP)
+        """
+        cache = obter_cache_predicoes()
+        if cache is None:
+            inicio = time.perf_counter()
+            probabilidades = self.modelo.predict_proba(df)
+            fim_inferencia = time.perf_counter()
+            valores_shap = self.explicador.shap_values(df)
+            return probabilidades, valores_shap, fim_inferencia - inicio, time.perf_counter() - fim_inferencia
+        
+        chaves = cache.chaves(self.versao, df)
+        memorizados = cache.buscar(self.versao, chaves)
+        faltantes = [i for i, chave in enumerate(chaves) if chave not in memorizados]
+        if estatisticas is not None:
+            estatisticas['acertos_cache'] = estatisticas.get('acertos_cache', 0) + len(df) - len(faltantes)
+        
+        inicio = time.perf_counter()
+        df_faltantes = df.iloc[faltantes]
+        probabilidades_faltantes = self.modelo.predict_proba(df_faltantes) if faltantes else None
+        fim_inferencia = time.perf_counter()
+        shap_faltantes = self.explicador.shap_values(df_faltantes) if faltantes else None
+        duracao_shap = time.perf_counter() - fim_inferencia
+        
+        # Versões antigas do SHAP retornam uma lista com um array por classe
+        if isinstance(shap_faltantes, list):
+            shap_faltantes = np.stack(shap_faltantes, axis=-1)
+        if faltantes:
+            cache.gravar(self.versao, [chaves[i] for i in faltantes], probabilidades_faltantes,
+                         [fator_principal(linha) for linha in shap_faltantes])
+            if len(faltantes) == len(df):
+                return probabilidades_faltantes, shap_faltantes, fim_inferencia - inicio, duracao_shap
+        
+        # Forma do SHAP: a do cálculo atual ou, se tudo veio do cache, a indicada pela classe guardada
+        num_classes = len(self.modelo.classes_)
+        binario = shap_faltantes.ndim == 2 if faltantes else next(iter(memorizados.values()))[1][1] < 0
+        forma = (len(df), df.shape[1]) if binario else (len(df), df.shape[1], num_classes)
+        probabilidades = np.empty((len(df), num_classes))
+        valores_shap = np.zeros(forma, dtype=shap_faltantes.dtype if faltantes else np.float64)
+        if faltantes:
+            probabilidades[faltantes] = probabilidades_faltantes
+            valores_shap[faltantes] = shap_faltantes
+        
+        for i, chave in enumerate(chaves):
+            if chave in memorizados:
+                probabilidades_linha, (feature, classe, valor) = memorizados[chave]
+                probabilidades[i] = probabilidades_linha
+                valores_shap[(i, feature) if binario else (i, feature, classe)] = valor
+        return probabilidades, valores_shap, fim_inferencia - inicio, duracao_shap
+    
+    def definir_threads(self, threads: int) -> None:
+        """
+        Fixa as threads do XGBoost no booster (predição e SHAP usam o mesmo booster).
+        
+        Só para processos dedicados (executor_processos); no processo principal
+        o booster é compartilhado entre threads e cada pontuação define as suas
+        em _pontuar_com_threads().
+        """
+        if threads != self._threads_modelo:
+            self.modelo.set_params(n_jobs=threads)
+            self.modelo.get_booster().set_param({'nthread': threads})
+            self._threads_modelo = threads
+    
+    def _pontuar_com_threads(self, df: pd.DataFrame, estatisticas: Optional[Dict[str, Any]],
+                             minimo: int, maximo: int) -> Tuple[np.ndarray, Any, float, float]:
+        """
+        _pontuar() com threads reservadas do orçamento do processo.
+        
+        O número de threads vai na configuração do XGBoost da thread atual
+        (config_context é local à thread), sem alterar o booster compartilhado:
+        o booster carregado fica com nthread=0 e segue essa configuração.
+        """
+        with reservar_threads(minimo, maximo) as threads, xgb.config_context(nthread=threads):
+            return self._pontuar(df, estatisticas)
+    
+    def _pontuar_em_fatias(self, df: pd.DataFrame,
+                           estatisticas: Optional[Dict[str, Any]]) -> Tuple[np.ndarray, Any, float, float]:
+        """
+        Pontua um bloco dividido em fatias paralelas (ver utilitarios.paralelismo).
+        
+        Mesmo resultado de _pontuar(): cada linha é independente e as fatias
+        são concatenadas na ordem. Os tempos de inferência e SHAP são o tempo
+        de parede dividido na proporção do tempo somado das fatias.
+        """
+        fatias_simultaneas, threads_por_fatia = orcamento_threads()
+        fatias = dividir_em_fatias(len(df))
+        if len(fatias) == 1:
+            # Fatia única: o orçamento inteiro, se nenhuma outra pontuação estiver usando
+            return self._pontuar_com_threads(df, estatisticas, threads_por_fatia,
+                                             fatias_simultaneas * threads_por_fatia)
+        
+        parciais: List[Dict[str, Any]] = [{} for _ in fatias]
+        posicoes = {inicio: indice for indice, (inicio, _) in enumerate(fatias)}
+        inicio_parede = time.perf_counter()
+        resultados = executar_em_fatias(
+            lambda inicio, fim: self._pontuar_com_threads(df.iloc[inicio:fim], parciais[posicoes[inicio]],
+                                                          threads_por_fatia, threads_por_fatia),
+            fatias
+        )
+        parede = time.perf_counter() - inicio_parede
+        
+        if estatisticas is not None and any(parciais):
+            estatisticas['acertos_cache'] = (estatisticas.get('acertos_cache', 0)
+                                             + sum(parcial.get('acertos_cache', 0) for parcial in parciais))
+        
+        probabilidades = np.vstack([resultado[0] for resultado in resultados])
+        # Versões antigas do SHAP retornam uma lista com um array por classe
+        if isinstance(resultados[0][1], list):
+            valores_shap = [np.concatenate([resultado[1][classe] for resultado in resultados])
+                            for classe in range(len(resultados[0][1]))]
+        else:
+            valores_shap = np.concatenate([resultado[1] for resultado in resultados])
+        
+        soma_inferencia = sum(resultado[2] for resultado in resultados)
+        soma_shap = sum(resultado[3] for resultado in resultados)
+        proporcao = soma_inferencia / (soma_inferencia + soma_shap) if soma_inferencia + soma_shap else 0.0
+        registrador.debug(f"{len(df)} vetores em {len(fatias)} fatias paralelas ({parede:.2f}s)")
+        return probabilidades, valores_shap, parede * proporcao, parede * (1 - proporcao)
+    
+    def fazer_predicoes(self, df: pd.DataFrame, estatisticas: Optional[Dict[str, Any]] = None,
+                        como_arrays: bool = False) -> Tuple[List[str], List[List[float]], np.ndarray]:
         """
         Faz predições para um DataFrame.
         
         Args:
             df: DataFrame com dados processados
+            estatisticas: Se informado, recebe 'linhas' e 'vetores_unicos' da deduplicação
+                e 'acertos_cache' do cache de predições; 'duracao_inferencia' recebe o
+                tempo do modelo sem o SHAP
+            como_arrays: Retornar predições e probabilidades como np.ndarray
+                (sem listas por linha; usado pelo caminho colunar)
             
         Returns:
             Tuple com (predições, probabilidades, valores SHAP)
@@ -174,22 +485,137 @@ class PreditorEvasaoEstudantil:
             raise RuntimeError("Modelo não foi carregado. Chame carregar_modelo() primeiro.")
         
         registrador.info(f"Fazendo predições para {len(df)} amostras...")
+        df_unicos, inverso = self.deduplicar(df, estatisticas)
         
-        # Fazer predições
-        predicoes_indices = self.modelo.predict(df)
-        probabilidades = self.modelo.predict_proba(df)
+        # Predições e valores SHAP
+        probabilidades, valores_shap, duracao_inferencia, duracao_shap = self._pontuar_em_fatias(
+            df_unicos, estatisticas
+        )
+        for etapa, duracao in (('inferencia', duracao_inferencia), ('shap', duracao_shap)):
+            metricas.observar('duracao_etapa_segundos', duracao,
+                              descricao='Latência de cada etapa do pipeline', etapa=etapa)
+        if estatisticas is not None:
+            estatisticas['duracao_inferencia'] = duracao_inferencia
+        # multi:softprob: a classe prevista é a de maior probabilidade (o mesmo que predict())
+        predicoes_indices = np.argmax(probabilidades, axis=1)
         
-        # Converter índices para nomes de classes
-        nomes_classes = self.modelo.classes_
-        predicoes = [nomes_classes[idx] for idx in predicoes_indices]
+        if inverso is not None:
+            predicoes_indices = predicoes_indices[inverso]
+            probabilidades = probabilidades[inverso]
+            valores_shap = _expandir_shap(valores_shap, inverso)
+        
+        registrador.info("Predições concluídas")
+        
+        return self.formatar_predicoes(predicoes_indices, probabilidades, valores_shap, como_arrays)
+    
+    def fazer_predicoes_em_lotes(self, df: pd.DataFrame, tamanho_lote: int,
+                                 ao_concluir_lote: Optional[Callable[[int], None]] = None,
+                                 estatisticas: Optional[Dict[str, Any]] = None,
+                                 como_arrays: bool = False) -> Tuple[List[str], List[List[float]], Any]:
+        """
+        Faz predições em lotes, chamando ao_concluir_lote entre eles.
         
-        # Calcular valores SHAP
-        registrador.info("Calculando valores SHAP...")
-        valores_shap = self.explicador.shap_values(df)
+        O resultado é idêntico ao de fazer_predicoes() (cada linha é pontuada
+        de forma independente); os lotes permitem reportar progresso e
+        interromper a execução entre um lote e outro.
+        
+        Args:
+            df: DataFrame com dados processados
+            tamanho_lote: Vetores de features distintos por lote
+            ao_concluir_lote: Recebe o total de linhas já pontuadas; pode
+                lançar exceção para interromper (ex.: cancelamento)
+            estatisticas: Se informado, recebe 'linhas' e 'vetores_unicos' da deduplicação
+                e 'acertos_cache' do cache de predições; 'duracao_inferencia' recebe o
+                tempo do modelo sem o SHAP
+            como_arrays: Retornar predições e probabilidades como np.ndarray
+            
+        Returns:
+            Tuple com (predições, probabilidades, valores SHAP)
+        """
+        if not self._carregado:
+            raise RuntimeError("Modelo não foi carregado. Chame carregar_modelo() primeiro.")
+        
+        registrador.info(f"Fazendo predições para {len(df)} amostras em lotes de {tamanho_lote}...")
+        df_unicos, inverso = self.deduplicar(df, estatisticas)
+        
+        # Linhas originais cobertas após pontuar os k primeiros vetores distintos
+        # (os distintos seguem a ordem da primeira ocorrência)
+        if inverso is not None:
+            linhas_cobertas = np.cumsum(np.bincount(inverso))
+        else:
+            linhas_cobertas = np.arange(1, len(df) + 1)
+        
+        lotes_probabilidades, lotes_shap = [], []
+        duracao_inferencia = 0.0
+        duracao_shap = 0.0
+        
+        for inicio in range(0, len(df_unicos), tamanho_lote):
+            lote = df_unicos.iloc[inicio:inicio + tamanho_lote]
+            
+            probabilidades_lote, shap_lote, inferencia_lote, shap_duracao_lote = self._pontuar_em_fatias(
+                lote, estatisticas
+            )
+            lotes_probabilidades.append(probabilidades_lote)
+            lotes_shap.append(shap_lote)
+            
+            duracao_inferencia += inferencia_lote
+            duracao_shap += shap_duracao_lote
+            
+            if ao_concluir_lote is not None:
+                ao_concluir_lote(int(linhas_cobertas[min(inicio + tamanho_lote, len(df_unicos)) - 1]))
+        
+        for etapa, duracao in (('inferencia', duracao_inferencia), ('shap', duracao_shap)):
+            metricas.observar('duracao_etapa_segundos', duracao,
+                              descricao='Latência de cada etapa do pipeline', etapa=etapa)
+        if estatisticas is not None:
+            estatisticas['duracao_inferencia'] = duracao_inferencia
+        
+        probabilidades = np.vstack(lotes_probabilidades)
+        predicoes_indices = np.argmax(probabilidades, axis=1)
+        
+        # Versões antigas do SHAP retornam uma lista com um array por classe
+        if isinstance(lotes_shap[0], list):
+            valores_shap = [np.concatenate([lote[classe] for lote in lotes_shap])
+                            for classe in range(len(lotes_shap[0]))]
+        else:
+            valores_shap = np.concatenate(lotes_shap)
+        
+        if inverso is not None:
+            predicoes_indices = predicoes_indices[inverso]
+            probabilidades = probabilidades[inverso]
+            valores_shap = _expandir_shap(valores_shap, inverso)
         
         registrador.info("Predições concluídas")
         
-        return predicoes, probabilidades.tolist(), valores_shap
+        return self.formatar_predicoes(predicoes_indices, probabilidades, valores_shap, como_arrays)
+    
+    def formatar_predicoes(self, predicoes_indices: np.ndarray, probabilidades: np.ndarray, valores_shap: Any,
+                           como_arrays: bool = False) -> Tuple[Any, Any, Any]:
+        """Converte os índices previstos em rótulos (listas por linha, ou arrays com como_arrays)."""
+        nomes_classes = self.modelo.classes_
+        if como_arrays:
+            return np.asarray(nomes_classes)[predicoes_indices], probabilidades, valores_shap
+        return [nomes_classes[idx] for idx in predicoes_indices], probabilidades.tolist(), valores_shap
+    
+    def nomes_classes(self) -> List[str]:
+        """
+        Nomes das classes na ordem das probabilidades do modelo.
+        
+        Returns:
+            Lista de nomes (genéricos se não houver mapeamento de classes)
+        """
+        # Verificar diferentes chaves possíveis do mapeamento
+        if self.info_classes:
+            if 'class_names' in self.info_classes:
+                return list(self.info_classes['class_names'])
+            if 'classes' in self.info_classes:
+                return list(self.info_classes['classes'])
+            if 'situacao_mapping' in self.info_classes:
+                return list(self.info_classes['situacao_mapping'].values())
+            if isinstance(self.info_classes, dict):
+                # Usar as chaves do próprio dicionário
+                return list(self.info_classes.keys())
+        return ['Classe_0', 'Classe_1', 'Classe_2', 'Classe_3', 'Classe_4', 'Classe_5']
     
     def obter_feature_importance(self) -> Dict[str, float]:
         """
@@ -0,0 +1,88 @@
+﻿"""
+Retreino incremental a partir do modelo em produção.
+
+Em vez de treinar do zero sobre o histórico inteiro, o booster atual recebe
+novas rodadas de boosting apenas com os snapshots rotulados desde o último
+treino (continuação via xgb_model). Os códigos dos LabelEncoders precisam
+continuar os mesmos, pois as árvores existentes dividem sobre eles: categorias
+novas entram no fim de classes_ com os próximos códigos livres.
+"""
+
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.preprocessing import LabelEncoder
+
+from ..utilitarios import obter_registrador
+from ..configuracao import configuracoes
+from .memoria_externa import classificador_de_booster, parametros_arvore
+
+registrador = obter_registrador(__name__)
+
+def estender_codificador(codificador: LabelEncoder, valores: Iterable[Any]) -> List[str]:
+    """
+    Acrescenta ao codificador as categorias ainda não vistas.
+    
+    Os códigos existentes não mudam (as novas categorias vão para o fim de
+    classes_, sem reordenar); o LabelEncoder codifica texto por dicionário,
+    então classes_ não precisa estar ordenado.
+    
+    Args:
+        codificador: LabelEncoder já ajustado
+        valores: Valores (convertidos para texto) da coluna nos dados novos
+    
+    Returns:
+        Categorias acrescentadas
+    """
+    conhecidas = set(codificador.classes_)
+    novas = sorted({str(valor) for valor in valores} - conhecidas)
+    if novas:
+        codificador.classes_ = np.concatenate([
+            np.asarray(codificador.classes_, dtype=object), np.asarray(novas, dtype=object)
+        ])
+    return novas
+
+def continuar_treino(modelo: xgb.XGBClassifier, X: pd.DataFrame, y: np.ndarray, num_rodadas: int,
+                     parametros: Optional[Dict[str, Any]] = None) -> xgb.XGBClassifier:
+    """
+    Acrescenta rodadas de boosting a um modelo treinado.
+    
+    O treino usa xgb.train diretamente (e não XGBClassifier.fit) porque os
+    dados novos podem não ter todas as classes do modelo.
+    
+    Args:
+        modelo: Modelo atual (não é alterado)
+        X: Features codificadas com os mesmos encoders do modelo
+        y: Classes codificadas no mapeamento do modelo
+        num_rodadas: Árvores acrescentadas por classe
+        parametros: Hiperparâmetros no formato do XGBClassifier (learning_rate,
+            max_depth, ...); n_estimators é ignorado
+    
+    Returns:
+        Novo XGBClassifier com as árvores do modelo atual seguidas das novas
+    """
+    parametros = {**parametros_arvore(), **(parametros or {})}
+    parametros.pop('n_estimators', None)
+    threads = parametros.pop('n_jobs')
+    
+    booster = modelo.get_booster()
+    nomes_features = booster.feature_names or list(X.columns)
+    matriz = xgb.DMatrix(X[nomes_features].astype(np.float32), label=y, nthread=threads if threads > 0 else None)
+    
+    booster_parametros = {
+        'objective': 'multi:softprob',
+        'num_class': int(modelo.n_classes_),
+        'nthread': threads if threads > 0 else os.cpu_count(),
+        'seed': parametros.pop('random_state', configuracoes.modelo.semente_aleatoria),
+        'eval_metric': parametros.pop('eval_metric', configuracoes.modelo.metrica_avaliacao),
+        **{('eta' if nome == 'learning_rate' else nome): valor for nome, valor in parametros.items()}
+    }
+    
+    rodadas_atuais = booster.num_boosted_rounds()
+    registrador.info(f"Continuando treino: {rodadas_atuais} + {num_rodadas} rodadas com {len(X)} linhas novas")
+    # xgb_model copia o booster: o modelo recebido continua intacto
+    continuado = xgb.train(booster_parametros, matriz, num_boost_round=num_rodadas, xgb_model=booster)
+    return classificador_de_booster(continuado)
\ No newline at end of file
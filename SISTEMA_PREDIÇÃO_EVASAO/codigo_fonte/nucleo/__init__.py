@@ -3,8 +3,30 @@ Módulo núcleo do sistema.
 """
 
 from .preditor import SistemaPredicaoEvasao, PredicaoAluno
+from .progresso import (
+    EventoProgresso, RastreadorProgresso, ObservadorPredicao,
+    TokenCancelamento, PredicaoCancelada
+)
+from .tarefas import GerenciadorTarefas, Tarefa
+from .recarregador import RecarregadorModelo
+from .sombra import AvaliadorSombra
+from .executor_processos import ExecutorProcessos
+from .fila_trabalho import FilaTrabalho, TrabalhadorFila, UnidadeTrabalho
 
 __all__ = [
     'SistemaPredicaoEvasao',
-    'PredicaoAluno'
+    'PredicaoAluno',
+    'EventoProgresso',
+    'RastreadorProgresso',
+    'ObservadorPredicao',
+    'TokenCancelamento',
+    'PredicaoCancelada',
+    'GerenciadorTarefas',
+    'Tarefa',
+    'RecarregadorModelo',
+    'AvaliadorSombra',
+    'ExecutorProcessos',
+    'FilaTrabalho',
+    'TrabalhadorFila',
+    'UnidadeTrabalho'
 ]
\ No newline at end of file
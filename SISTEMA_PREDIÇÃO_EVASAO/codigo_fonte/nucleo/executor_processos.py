@@ -0,0 +1,302 @@
+﻿"""
+Pontuação em vários processos com matriz e resultados em memória compartilhada.
+
+O processo principal pré-processa os dados e copia a matriz de features
+(float32) uma única vez para um bloco de multiprocessing.shared_memory; as probabilidades e
+os valores SHAP também são escritos pelos processos em blocos compartilhados.
+Cada processo lê só o seu intervalo de linhas, como uma view NumPy, sem
+receber a matriz por pickle.
+
+Com o método de início 'fork' (padrão no Linux), os processos são criados a
+partir do processo principal já com o modelo carregado: as páginas do modelo
+são compartilhadas (copy-on-write) em vez de uma cópia por processo. Com
+'spawn' (Windows) cada processo carrega o próprio modelo.
+
+Os processos são criados uma única vez, na ativação. Quando o modelo é
+trocado (recarga), o pool é reaproveitado: cada intervalo leva a versão e
+os caminhos do modelo, e o processo carrega a versão nova na primeira vez
+que a recebe. Assim nenhum fork acontece a partir da thread do recarregador
+com as demais threads do processo principal em andamento.
+"""
+
+import copy
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..utilitarios import obter_registrador, metricas, orcamento_threads
+from ..configuracao import configuracoes
+from ..modelos import PreditorEvasaoEstudantil
+
+registrador = obter_registrador(__name__)
+
+METODOS_INICIO = ('fork', 'spawn')
+
+# (nome do bloco, forma, dtype) de um array em memória compartilhada
+DescritorBloco = Tuple[str, Tuple[int, ...], str]
+
+# Preditor do processo principal na ativação: herdado pelos processos com fork
+_PREDITOR: Optional[PreditorEvasaoEstudantil] = None
+# Preditores do processo por versão: a atual e a anterior (execuções em andamento na troca)
+_PREDITORES: Dict[str, PreditorEvasaoEstudantil] = {}
+_THREADS = 1
+
+def _inicializar_processo(caminhos: Optional[List[Any]], threads: int) -> None:
+    """Prepara o preditor do processo (carregando o modelo se ele não foi herdado)."""
+    global _THREADS
+    _THREADS = threads
+    if caminhos is not None:
+        _carregar_versao(caminhos)
+    else:
+        _PREDITOR.definir_threads(threads)
+        _PREDITORES[_PREDITOR.versao] = _PREDITOR
+
+def _carregar_versao(caminhos: List[Any]) -> PreditorEvasaoEstudantil:
+    """Carrega o modelo dos caminhos e descarta as versões anteriores à atual."""
+    preditor = PreditorEvasaoEstudantil()
+    preditor.carregar_modelo(*caminhos)
+    preditor.definir_threads(_THREADS)
+    for versao in list(_PREDITORES)[:-1]:
+        del _PREDITORES[versao]
+    _PREDITORES[preditor.versao] = preditor
+    return preditor
+
+def _obter_preditor(versao: str, caminhos: List[Any]) -> PreditorEvasaoEstudantil:
+    """
+    Preditor da versão pedida, carregado na primeira vez que ela chega ao processo.
+    
+    Raises:
+        RuntimeError: Se os arquivos já tiverem outra versão do modelo
+    """
+    preditor = _PREDITORES.get(versao)
+    if preditor is None:
+        preditor = _carregar_versao(caminhos)
+        if preditor.versao != versao:
+            raise RuntimeError(f"Os arquivos do modelo {versao} foram substituídos pela versão {preditor.versao}")
+    return preditor
+
+def _aguardar_processo() -> None:
+    """Tarefa vazia usada para criar os processos logo na ativação."""
+
+def _criar_bloco(forma: Tuple[int, ...], dtype) -> Tuple[shared_memory.SharedMemory, np.ndarray, DescritorBloco]:
+    """Cria um bloco compartilhado e a view NumPy sobre ele."""
+    dtype = np.dtype(dtype)
+    bloco = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(forma)) * dtype.itemsize))
+    return bloco, np.ndarray(forma, dtype=dtype, buffer=bloco.buf), (bloco.name, forma, dtype.str)
+
+def _pontuar_intervalo(versao: str, caminhos: List[Any], matriz: DescritorBloco, colunas: List[str],
+                       probabilidades: DescritorBloco, shap: DescritorBloco,
+                       inicio: int, fim: int) -> Tuple[float, float]:
+    """
+    Pontua as linhas [inicio, fim) lendo e escrevendo direto nos blocos compartilhados.
+    
+    Returns:
+        Tuple com (segundos de inferência, segundos de SHAP)
+    """
+    preditor = _obter_preditor(versao, caminhos)
+    blocos = [shared_memory.SharedMemory(name=nome) for nome, _, _ in (matriz, probabilidades, shap)]
+    X = saida_probabilidades = saida_shap = df = None
+    try:
+        X, saida_probabilidades, saida_shap = [
+            np.ndarray(forma, dtype=np.dtype(dtype), buffer=bloco.buf)
+            for bloco, (_, forma, dtype) in zip(blocos, (matriz, probabilidades, shap))
+        ]
+        df = pd.DataFrame(X[inicio:fim], columns=colunas, copy=False)
+        
+        inicio_inferencia = time.perf_counter()
+        saida_probabilidades[inicio:fim] = preditor.modelo.predict_proba(df)
+        fim_inferencia = time.perf_counter()
+        valores_shap = preditor.explicador.shap_values(df)
+        # Versões antigas do SHAP retornam uma lista com um array por classe
+        saida_shap[inicio:fim] = np.stack(valores_shap, axis=-1) if isinstance(valores_shap, list) else valores_shap
+        return fim_inferencia - inicio_inferencia, time.perf_counter() - fim_inferencia
+    finally:
+        # As views precisam ser soltas antes de fechar os blocos
+        X = saida_probabilidades = saida_shap = df = None
+        for bloco in blocos:
+            bloco.close()
+
+class ExecutorProcessos:
+    """
+    Pool de processos que pontua a matriz pré-processada de um preditor.
+    
+    Expõe fazer_predicoes() e fazer_predicoes_em_lotes() com a mesma assinatura
+    e o mesmo resultado de PreditorEvasaoEstudantil, para o SistemaPredicaoEvasao
+    usar um ou outro sem mudar o pipeline. A deduplicação continua no processo
+    principal; o cache de predições não é consultado neste modo (um aviso é
+    registrado se ele estiver ativado).
+    """
+    
+    def __init__(self, preditor: PreditorEvasaoEstudantil, processos: Optional[int] = None,
+                 metodo_inicio: Optional[str] = None):
+        """
+        Cria os processos a partir do preditor já carregado.
+        
+        Args:
+            preditor: Preditor carregado no processo principal
+            processos: Quantidade de processos (padrão: configuracoes.execucao.processos_pontuacao
+                ou, se 0, orçamento de threads de inferência // configuracoes.modelo.threads_por_fatia)
+            metodo_inicio: 'fork' ou 'spawn'
+                (padrão: configuracoes.execucao.metodo_inicio_processos)
+        
+        Raises:
+            ValueError: Se o método de início não for conhecido
+        """
+        global _PREDITOR
+        metodo_inicio = metodo_inicio or configuracoes.execucao.metodo_inicio_processos
+        if metodo_inicio not in METODOS_INICIO:
+            raise ValueError(f"Método de início desconhecido: {metodo_inicio} (use {', '.join(METODOS_INICIO)})")
+        if metodo_inicio not in multiprocessing.get_all_start_methods():
+            registrador.warning(f"Método de início '{metodo_inicio}' indisponível nesta plataforma; usando 'spawn'")
+            metodo_inicio = 'spawn'
+        
+        fatias_simultaneas, threads_por_processo = orcamento_threads()
+        self.preditor = preditor
+        self.processos = processos or configuracoes.execucao.processos_pontuacao or fatias_simultaneas
+        self.metodo_inicio = metodo_inicio
+        
+        contexto = multiprocessing.get_context(metodo_inicio)
+        
+        if configuracoes.execucao.cache_predicoes:
+            registrador.warning("O cache de predições não é usado com o executor de processos; "
+                                "todos os vetores serão pontuados pelo modelo")
+        
+        # Rastreador de recursos iniciado antes dos processos: eles herdam o do
+        # processo principal em vez de criar o próprio, que tentaria remover no
+        # encerramento os blocos compartilhados que o principal já removeu
+        resource_tracker.ensure_running()
+        
+        # fork: os processos herdam _PREDITOR; com spawn cada um carrega o modelo
+        _PREDITOR = preditor
+        caminhos = None if metodo_inicio == 'fork' else preditor.caminhos_artefatos
+        self._executor = ProcessPoolExecutor(max_workers=self.processos, mp_context=contexto,
+                                             initializer=_inicializar_processo,
+                                             initargs=(caminhos, threads_por_processo))
+        # Criar os processos agora (e não no meio da primeira execução)
+        self._executor.submit(_aguardar_processo).result()
+        registrador.info(f"Executor com {self.processos} processo(s) ('{metodo_inicio}', "
+                         f"{threads_por_processo} thread(s) cada) para o modelo {preditor.versao}")
+    
+    def fazer_predicoes(self, df: pd.DataFrame, estatisticas: Optional[Dict[str, Any]] = None,
+                        como_arrays: bool = False) -> Tuple[List[str], List[List[float]], np.ndarray]:
+        """Mesmo resultado de PreditorEvasaoEstudantil.fazer_predicoes(), pontuado pelos processos."""
+        registrador.info(f"Fazendo predições para {len(df)} amostras em {self.processos} processo(s)...")
+        return self._executar(df, estatisticas, como_arrays=como_arrays)
+    
+    def fazer_predicoes_em_lotes(self, df: pd.DataFrame, tamanho_lote: int,
+                                 ao_concluir_lote: Optional[Callable[[int], None]] = None,
+                                 estatisticas: Optional[Dict[str, Any]] = None,
+                                 como_arrays: bool = False) -> Tuple[List[str], List[List[float]], np.ndarray]:
+        """Mesmo resultado de PreditorEvasaoEstudantil.fazer_predicoes_em_lotes(), pontuado pelos processos."""
+        registrador.info(f"Fazendo predições para {len(df)} amostras em lotes de {tamanho_lote} "
+                         f"em {self.processos} processo(s)...")
+        return self._executar(df, estatisticas, tamanho_lote, ao_concluir_lote, como_arrays)
+    
+    def _executar(self, df: pd.DataFrame, estatisticas: Optional[Dict[str, Any]],
+                  tamanho_lote: Optional[int] = None,
+                  ao_concluir_lote: Optional[Callable[[int], None]] = None,
+                  como_arrays: bool = False) -> Tuple[List[str], List[List[float]], np.ndarray]:
+        df_unicos, inverso = self.preditor.deduplicar(df, estatisticas)
+        total, num_features = df_unicos.shape
+        num_classes = len(self.preditor.modelo.classes_)
+        # Modelos binários têm uma única saída: SHAP (linhas, features)
+        forma_shap = (total, num_features) if num_classes == 2 else (total, num_features, num_classes)
+        
+        # Sem lotes: alguns intervalos por processo, para equilibrar a carga
+        if tamanho_lote is None:
+            tamanho_lote = max(1, -(-total // (self.processos * 4)))
+        intervalos = [(inicio, min(inicio + tamanho_lote, total)) for inicio in range(0, total, tamanho_lote)]
+        if inverso is not None:
+            linhas_cobertas = np.cumsum(np.bincount(inverso))
+        else:
+            linhas_cobertas = np.arange(1, len(df) + 1)
+        
+        blocos: List[shared_memory.SharedMemory] = []
+        # Views sobre os blocos: só neste dicionário, para poderem ser soltas antes de fechar os blocos
+        views: Dict[str, np.ndarray] = {}
+        descritores: Dict[str, DescritorBloco] = {}
+        futuros = []
+        try:
+            # Matriz em float32, o tipo da saída de preprocessar_dados() e o usado pelo XGBoost
+            for nome, forma, dtype in (('matriz', (total, num_features), np.float32),
+                                       ('probabilidades', (total, num_classes), np.float64),
+                                       ('shap', forma_shap, np.float64)):
+                bloco, views[nome], descritores[nome] = _criar_bloco(forma, dtype)
+                blocos.append(bloco)
+            views['matriz'][:] = df_unicos.to_numpy(dtype=np.float32)
+            
+            colunas = list(df_unicos.columns)
+            futuros = [
+                self._executor.submit(_pontuar_intervalo, self.preditor.versao, self.preditor.caminhos_artefatos,
+                                      descritores['matriz'], colunas, descritores['probabilidades'],
+                                      descritores['shap'], inicio, fim)
+                for inicio, fim in intervalos
+            ]
+            duracao_inferencia = duracao_shap = 0.0
+            for futuro, (_, fim) in zip(futuros, intervalos):
+                inferencia, shap = futuro.result()
+                duracao_inferencia += inferencia
+                duracao_shap += shap
+                if ao_concluir_lote is not None:
+                    ao_concluir_lote(int(linhas_cobertas[fim - 1]))
+            
+            for etapa, duracao in (('inferencia', duracao_inferencia), ('shap', duracao_shap)):
+                metricas.observar('duracao_etapa_segundos', duracao,
+                                  descricao='Latência de cada etapa do pipeline', etapa=etapa)
+            if estatisticas is not None:
+                estatisticas['duracao_inferencia'] = duracao_inferencia
+            
+            # Cópia para fora dos blocos compartilhados, liberados a seguir
+            indices = inverso if inverso is not None else slice(None)
+            probabilidades = np.array(views['probabilidades'][indices])
+            valores_shap = np.array(views['shap'][indices])
+        finally:
+            # Cancelamento ou erro: descartar os intervalos não iniciados e esperar os em andamento
+            for futuro in futuros:
+                futuro.cancel()
+            for futuro in futuros:
+                if not futuro.cancelled():
+                    futuro.exception()
+            views.clear()
+            for bloco in blocos:
+                bloco.close()
+                bloco.unlink()
+        
+        registrador.info("Predições concluídas")
+        return self.preditor.formatar_predicoes(np.argmax(probabilidades, axis=1), probabilidades, valores_shap,
+                                                como_arrays)
+    
+    def trocar_preditor(self, preditor: PreditorEvasaoEstudantil) -> 'ExecutorProcessos':
+        """
+        Executor do novo preditor sobre os mesmos processos.
+        
+        Nenhum processo é criado: os processos carregam a versão nova quando
+        recebem o primeiro intervalo dela e mantêm a anterior para as execuções
+        que ainda usam este executor.
+        
+        Args:
+            preditor: Preditor carregado a partir de caminhos_artefatos
+            
+        Returns:
+            Executor que pontua com o novo preditor
+        """
+        novo = copy.copy(self)
+        novo.preditor = preditor
+        registrador.info(f"Executor de processos passa a usar o modelo {preditor.versao}")
+        return novo
+    
+    def encerrar(self, aguardar: bool = True) -> None:
+        """
+        Encerra os processos depois dos intervalos já submetidos.
+        
+        Args:
+            aguardar: Esperar os processos terminarem (False: retorna na hora e
+                as execuções em andamento concluem em segundo plano)
+        """
+        self._executor.shutdown(wait=aguardar)
+        registrador.info("Executor de processos encerrado")
\ No newline at end of file
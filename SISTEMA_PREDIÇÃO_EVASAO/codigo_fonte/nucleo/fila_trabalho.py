@@ -0,0 +1,588 @@
+﻿"""
+Fila de trabalho em arquivos para pontuar grandes volumes em várias máquinas.
+
+O coordenador (FilaTrabalho.criar) divide os arquivos de entrada em unidades
+de linhas e grava a fila em um diretório compartilhado (disco local ou
+montado por NFS/SMB). Cada trabalhador (TrabalhadorFila), nesta ou em outra
+máquina, mantém um SistemaPredicaoEvasao carregado, reivindica unidades
+livres, pontua cada uma pelo caminho colunar e grava uma saída parcial;
+mesclar() junta as parciais na ordem das entradas.
+
+Layout do diretório:
+    fila.json                manifesto (entradas, unidades e versão do modelo)
+    entradas/                cópia das entradas (opcional, para máquinas sem acesso aos originais)
+    arrendamentos/<id>.json  quem está com a unidade e até quando
+    parciais/<id>.parquet    saída de cada unidade concluída
+    concluidas/<id>.json     estatísticas da unidade (marca de conclusão)
+    falhas/<id>.json         tentativas que falharam
+
+O arrendamento é criado com O_CREAT | O_EXCL (só um trabalhador consegue) e
+renovado pelo heartbeat do trabalhador. Se não for renovado dentro de
+configuracoes.execucao.duracao_arrendamento (máquina caiu, processo morto),
+outro trabalhador o remove e assume a unidade. A pontuação é determinística,
+então uma unidade refeita produz a mesma saída. Os prazos usam o relógio de
+cada máquina: elas precisam estar sincronizadas (NTP) com folga bem menor
+que a duração do arrendamento.
+
+Requer o pyarrow (saídas parciais em Parquet).
+"""
+
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+from ..utilitarios import obter_registrador, metricas, CarregadorDados, salvar_tabela, salvar_tabelas
+from ..configuracao import configuracoes
+from .preditor import SistemaPredicaoEvasao
+from .progresso import TokenCancelamento, PredicaoCancelada
+
+registrador = obter_registrador(__name__)
+
+ARQUIVO_MANIFESTO = 'fila.json'
+DIRETORIO_ENTRADAS = 'entradas'
+DIRETORIO_ARRENDAMENTOS = 'arrendamentos'
+DIRETORIO_PARCIAIS = 'parciais'
+DIRETORIO_CONCLUIDAS = 'concluidas'
+DIRETORIO_FALHAS = 'falhas'
+
+# Situação de uma unidade (FilaTrabalho.situacao)
+UNIDADE_PENDENTE = 'pendente'
+UNIDADE_EM_ANDAMENTO = 'em_andamento'
+UNIDADE_CONCLUIDA = 'concluida'
+UNIDADE_FALHOU = 'falhou'
+
+# Estatísticas das unidades somadas na mesclagem
+ESTATISTICAS_SOMADAS = ('total_students', 'enrolled_students', 'dropout_risk_students', 'ml_scored_students')
+
+class ArrendamentoPerdido(Exception):
+    """Lançada quando a unidade passou para outro trabalhador (arrendamento expirado)."""
+
+def _gravar_json_atomico(caminho: Path, dados: Any) -> None:
+    """Grava em um temporário e renomeia: leitores nunca veem o arquivo pela metade."""
+    temporario = caminho.with_name(f".{caminho.name}.{uuid.uuid4().hex}.tmp")
+    temporario.write_text(json.dumps(dados, ensure_ascii=False, indent=2), encoding='utf-8')
+    os.replace(temporario, caminho)
+
+def _criar_exclusivo(caminho: Path, dados: Any) -> bool:
+    """Cria o arquivo só se ele ainda não existir (atômico); False se já existia."""
+    try:
+        descritor = os.open(caminho, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+    except FileExistsError:
+        return False
+    with os.fdopen(descritor, 'w', encoding='utf-8') as arquivo:
+        json.dump(dados, arquivo, ensure_ascii=False)
+    return True
+
+def _ler_json(caminho: Path) -> Optional[Dict[str, Any]]:
+    """Conteúdo do arquivo, ou None se ele não existir ou ainda estiver sendo escrito."""
+    try:
+        return json.loads(caminho.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+@dataclass
+class UnidadeTrabalho:
+    """Linhas [inicio, fim) de um arquivo de entrada."""
+    identificador: str
+    arquivo: str  # Relativo ao diretório da fila quando a entrada foi copiada para ela
+    inicio: int
+    fim: int
+    
+    @property
+    def linhas(self) -> int:
+        return self.fim - self.inicio
+
+@dataclass
+class Arrendamento:
+    """Posse temporária de uma unidade por um trabalhador."""
+    unidade: UnidadeTrabalho
+    trabalhador: str
+    token: str
+    expira_em: float
+
+class FilaTrabalho:
+    """Unidades de trabalho e seus arrendamentos em um diretório compartilhado."""
+    
+    def __init__(self, diretorio: Path, duracao_arrendamento: Optional[float] = None,
+                 tentativas: Optional[int] = None):
+        """
+        Abre uma fila já criada.
+        
+        Args:
+            diretorio: Diretório da fila
+            duracao_arrendamento: Segundos até um arrendamento sem heartbeat expirar
+                (padrão: configuracoes.execucao.duracao_arrendamento)
+            tentativas: Falhas até a unidade ser deixada de lado
+                (padrão: configuracoes.execucao.tentativas_unidade)
+        
+        Raises:
+            FileNotFoundError: Se não houver fila no diretório
+        """
+        self.diretorio = Path(diretorio)
+        manifesto = _ler_json(self.diretorio / ARQUIVO_MANIFESTO)
+        if manifesto is None:
+            raise FileNotFoundError(f"Fila não encontrada em {self.diretorio} (crie com FilaTrabalho.criar)")
+        self.versao_modelo: Optional[str] = manifesto.get('versao_modelo')
+        self.linhas_entradas: Dict[str, int] = {
+            entrada['arquivo']: entrada['linhas'] for entrada in manifesto['entradas']
+        }
+        self.unidades = [UnidadeTrabalho(**unidade) for unidade in manifesto['unidades']]
+        self.duracao_arrendamento = duracao_arrendamento or configuracoes.execucao.duracao_arrendamento
+        self.tentativas = tentativas or configuracoes.execucao.tentativas_unidade
+        for subdiretorio in (DIRETORIO_ARRENDAMENTOS, DIRETORIO_PARCIAIS, DIRETORIO_CONCLUIDAS, DIRETORIO_FALHAS):
+            (self.diretorio / subdiretorio).mkdir(exist_ok=True)
+    
+    @classmethod
+    def criar(cls, diretorio: Path, arquivos: Sequence[Path], linhas_por_unidade: Optional[int] = None,
+              copiar_entradas: bool = False, versao_modelo: Optional[str] = None) -> 'FilaTrabalho':
+        """
+        Coordenador: divide os arquivos em unidades e grava a fila.
+        
+        Args:
+            diretorio: Diretório compartilhado da fila (criado se não existir)
+            arquivos: Arquivos de alunos (.xlsx, .xls, .csv, .parquet ou .feather)
+            linhas_por_unidade: Alunos por unidade (padrão: configuracoes.execucao.linhas_por_unidade)
+            copiar_entradas: Copiar as entradas para a fila (trabalhadores em máquinas
+                que não enxergam os caminhos originais)
+            versao_modelo: Versão exigida dos trabalhadores (None = não verificar)
+        
+        Raises:
+            FileExistsError: Se o diretório já tiver uma fila
+            ValueError: Se algum arquivo não tiver formato suportado
+        """
+        diretorio = Path(diretorio)
+        linhas_por_unidade = linhas_por_unidade or configuracoes.execucao.linhas_por_unidade
+        if (diretorio / ARQUIVO_MANIFESTO).exists():
+            raise FileExistsError(f"Já existe uma fila em {diretorio}")
+        
+        entradas, unidades = [], []
+        for indice, arquivo in enumerate(map(Path, arquivos)):
+            if arquivo.suffix.lower() not in CarregadorDados.EXTENSOES_SUPORTADAS:
+                raise ValueError(f"Formato não suportado: {arquivo} "
+                                 f"(use {', '.join(CarregadorDados.EXTENSOES_SUPORTADAS)})")
+            if copiar_entradas:
+                destino = diretorio / DIRETORIO_ENTRADAS / f"{indice:04d}_{arquivo.name}"
+                destino.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(arquivo, destino)
+                caminho = destino.relative_to(diretorio).as_posix()
+            else:
+                caminho = str(arquivo.resolve())
+            
+            # Mesma leitura dos trabalhadores: as linhas contadas aqui são as que eles fatiam
+            total = CarregadorDados.carregar_alunos_tabela(
+                arquivo, colunas=CarregadorDados.colunas_necessarias()
+            ).num_rows
+            entradas.append({'arquivo': caminho, 'linhas': total})
+            for inicio in range(0, total, linhas_por_unidade):
+                unidades.append(UnidadeTrabalho(f"{len(unidades):06d}", caminho, inicio,
+                                                min(inicio + linhas_por_unidade, total)))
+        
+        diretorio.mkdir(parents=True, exist_ok=True)
+        _gravar_json_atomico(diretorio / ARQUIVO_MANIFESTO, {
+            'criada_em': time.time(),
+            'versao_modelo': versao_modelo,
+            'linhas_por_unidade': linhas_por_unidade,
+            'entradas': entradas,
+            'unidades': [asdict(unidade) for unidade in unidades]
+        })
+        registrador.info(f"Fila criada em {diretorio}: {len(unidades)} unidade(s), "
+                         f"{sum(entrada['linhas'] for entrada in entradas)} alunos em {len(entradas)} arquivo(s)")
+        return cls(diretorio)
+    
+    def _caminho(self, subdiretorio: str, unidade: UnidadeTrabalho, extensao: str = '.json') -> Path:
+        return self.diretorio / subdiretorio / f"{unidade.identificador}{extensao}"
+    
+    def caminho_entrada(self, unidade: UnidadeTrabalho) -> Path:
+        """Arquivo de entrada da unidade."""
+        caminho = Path(unidade.arquivo)
+        return caminho if caminho.is_absolute() else self.diretorio / caminho
+    
+    def concluida(self, unidade: UnidadeTrabalho) -> bool:
+        return self._caminho(DIRETORIO_CONCLUIDAS, unidade).exists()
+    
+    def tentativas_falhas(self, unidade: UnidadeTrabalho) -> int:
+        """Tentativas da unidade que terminaram em erro."""
+        falhas = _ler_json(self._caminho(DIRETORIO_FALHAS, unidade))
+        return falhas['tentativas'] if falhas else 0
+    
+    def _expirado(self, caminho: Path, dados: Optional[Dict[str, Any]], agora: float) -> bool:
+        """Arrendamento vencido; sem conteúdo legível, vale a data de modificação do arquivo."""
+        if dados is not None:
+            return dados['expira_em'] < agora
+        try:
+            return caminho.stat().st_mtime + self.duracao_arrendamento < agora
+        except OSError:
+            return False
+    
+    def situacao(self, unidade: UnidadeTrabalho, agora: Optional[float] = None) -> str:
+        """UNIDADE_PENDENTE, UNIDADE_EM_ANDAMENTO, UNIDADE_CONCLUIDA ou UNIDADE_FALHOU."""
+        if self.concluida(unidade):
+            return UNIDADE_CONCLUIDA
+        if self.tentativas_falhas(unidade) >= self.tentativas:
+            return UNIDADE_FALHOU
+        caminho = self._caminho(DIRETORIO_ARRENDAMENTOS, unidade)
+        if caminho.exists() and not self._expirado(caminho, _ler_json(caminho), agora or time.time()):
+            return UNIDADE_EM_ANDAMENTO
+        return UNIDADE_PENDENTE
+    
+    def estado(self) -> Dict[str, Any]:
+        """Unidades por situação e arrendamentos ativos."""
+        agora = time.time()
+        contagem = {situacao: 0 for situacao in (UNIDADE_PENDENTE, UNIDADE_EM_ANDAMENTO,
+                                                 UNIDADE_CONCLUIDA, UNIDADE_FALHOU)}
+        linhas_concluidas = 0
+        em_andamento = []
+        for unidade in self.unidades:
+            situacao = self.situacao(unidade, agora)
+            contagem[situacao] += 1
+            if situacao == UNIDADE_CONCLUIDA:
+                linhas_concluidas += unidade.linhas
+            elif situacao == UNIDADE_EM_ANDAMENTO:
+                dados = _ler_json(self._caminho(DIRETORIO_ARRENDAMENTOS, unidade)) or {}
+                em_andamento.append({
+                    'unidade': unidade.identificador,
+                    'trabalhador': dados.get('trabalhador'),
+                    'expira_em_segundos': round(dados['expira_em'] - agora, 1) if 'expira_em' in dados else None
+                })
+        return {
+            'total_unidades': len(self.unidades),
+            'total_linhas': sum(unidade.linhas for unidade in self.unidades),
+            'linhas_concluidas': linhas_concluidas,
+            'contagem': contagem,
+            'em_andamento': em_andamento
+        }
+    
+    def _remover_expirado(self, caminho: Path) -> bool:
+        """
+        Remove um arrendamento vencido, se ainda for o mesmo que foi lido.
+        
+        O arquivo é renomeado (só um trabalhador consegue) e conferido: se outro
+        trabalhador já tinha trocado o arrendamento por um novo nesse meio
+        tempo, o novo é devolvido ao lugar.
+        """
+        dados = _ler_json(caminho)
+        if not self._expirado(caminho, dados, time.time()):
+            return False
+        removido = caminho.with_name(f".{caminho.stem}.{uuid.uuid4().hex}.expirado")
+        try:
+            os.rename(caminho, removido)
+        except FileNotFoundError:
+            return False
+        
+        conferido = _ler_json(removido)
+        if dados is not None and (conferido or {}).get('token') != dados.get('token'):
+            try:
+                os.link(removido, caminho)
+            except OSError:
+                pass
+            removido.unlink(missing_ok=True)
+            return False
+        removido.unlink(missing_ok=True)
+        
+        registrador.warning(f"Arrendamento expirado de {caminho.stem} "
+                            f"(trabalhador {(dados or {}).get('trabalhador')}) devolvido à fila")
+        metricas.incrementar('fila_arrendamentos_expirados_total',
+                             descricao='Unidades da fila retomadas após o arrendamento expirar')
+        return True
+    
+    def _dados_arrendamento(self, arrendamento: Arrendamento) -> Dict[str, Any]:
+        return {'unidade': arrendamento.unidade.identificador, 'trabalhador': arrendamento.trabalhador,
+                'token': arrendamento.token, 'expira_em': arrendamento.expira_em}
+    
+    def reivindicar(self, trabalhador: str) -> Optional[Arrendamento]:
+        """
+        Arrenda a primeira unidade livre (pendente ou com arrendamento vencido).
+        
+        Args:
+            trabalhador: Identificação do trabalhador (gravada no arrendamento)
+        
+        Returns:
+            Arrendamento obtido, ou None se não houver unidade livre
+        """
+        for unidade in self.unidades:
+            if self.concluida(unidade) or self.tentativas_falhas(unidade) >= self.tentativas:
+                continue
+            caminho = self._caminho(DIRETORIO_ARRENDAMENTOS, unidade)
+            if caminho.exists() and not self._remover_expirado(caminho):
+                continue
+            
+            arrendamento = Arrendamento(unidade, trabalhador, uuid.uuid4().hex,
+                                        time.time() + self.duracao_arrendamento)
+            if not _criar_exclusivo(caminho, self._dados_arrendamento(arrendamento)):
+                continue
+            # Concluída por outro trabalhador entre a verificação e o arrendamento
+            if self.concluida(unidade):
+                caminho.unlink(missing_ok=True)
+                continue
+            registrador.info(f"Unidade {unidade.identificador} arrendada por {trabalhador} "
+                             f"({unidade.linhas} alunos de {unidade.arquivo})")
+            return arrendamento
+        return None
+    
+    def possui(self, arrendamento: Arrendamento) -> bool:
+        """True se o arrendamento ainda é do trabalhador e não venceu."""
+        dados = _ler_json(self._caminho(DIRETORIO_ARRENDAMENTOS, arrendamento.unidade))
+        return dados is not None and dados.get('token') == arrendamento.token and dados['expira_em'] >= time.time()
+    
+    def renovar(self, arrendamento: Arrendamento) -> bool:
+        """
+        Heartbeat: estende o arrendamento por mais duracao_arrendamento segundos.
+        
+        Returns:
+            False se o arrendamento já venceu ou passou para outro trabalhador
+        """
+        if not self.possui(arrendamento):
+            return False
+        arrendamento.expira_em = time.time() + self.duracao_arrendamento
+        _gravar_json_atomico(self._caminho(DIRETORIO_ARRENDAMENTOS, arrendamento.unidade),
+                             self._dados_arrendamento(arrendamento))
+        return True
+    
+    def liberar(self, arrendamento: Arrendamento) -> None:
+        """Devolve a unidade à fila (se o arrendamento ainda for deste trabalhador)."""
+        if self.possui(arrendamento):
+            self._caminho(DIRETORIO_ARRENDAMENTOS, arrendamento.unidade).unlink(missing_ok=True)
+    
+    def concluir(self, arrendamento: Arrendamento, tabela, estatisticas: Dict[str, Any], duracao: float) -> None:
+        """
+        Grava a saída parcial e marca a unidade como concluída.
+        
+        Args:
+            arrendamento: Arrendamento da unidade
+            tabela: Tabela de predições da unidade (pyarrow.Table)
+            estatisticas: Estatísticas de SistemaPredicaoEvasao.predizer_tabela()
+            duracao: Segundos de processamento da unidade
+        
+        Raises:
+            ArrendamentoPerdido: Se a unidade passou para outro trabalhador
+        """
+        unidade = arrendamento.unidade
+        if not self.possui(arrendamento):
+            raise ArrendamentoPerdido(f"Arrendamento da unidade {unidade.identificador} perdido")
+        
+        parcial = self._caminho(DIRETORIO_PARCIAIS, unidade, '.parquet')
+        temporario = parcial.with_name(f".{unidade.identificador}.{arrendamento.token}.parquet")
+        salvar_tabela(tabela, temporario)
+        os.replace(temporario, parcial)
+        
+        _gravar_json_atomico(self._caminho(DIRETORIO_CONCLUIDAS, unidade), {
+            'unidade': unidade.identificador,
+            'trabalhador': arrendamento.trabalhador,
+            'concluida_em': time.time(),
+            'duracao_segundos': duracao,
+            'linhas': tabela.num_rows,
+            'versao_modelo': estatisticas.get('model_version'),
+            'estatisticas': {chave: estatisticas[chave] for chave in ESTATISTICAS_SOMADAS if chave in estatisticas}
+        })
+        self._caminho(DIRETORIO_ARRENDAMENTOS, unidade).unlink(missing_ok=True)
+        
+        metricas.incrementar('fila_unidades_concluidas_total', descricao='Unidades da fila concluídas')
+        registrador.info(f"Unidade {unidade.identificador} concluída por {arrendamento.trabalhador} "
+                         f"em {duracao:.1f}s")
+    
+    def registrar_falha(self, arrendamento: Arrendamento, erro: Exception) -> int:
+        """
+        Conta uma tentativa com erro e devolve a unidade à fila.
+        
+        Returns:
+            Total de tentativas com erro da unidade
+        """
+        unidade = arrendamento.unidade
+        caminho = self._caminho(DIRETORIO_FALHAS, unidade)
+        falhas = _ler_json(caminho) or {'tentativas': 0, 'erros': []}
+        falhas['tentativas'] += 1
+        falhas['erros'] = (falhas['erros'] + [{'trabalhador': arrendamento.trabalhador, 'erro': str(erro),
+                                               'em': time.time()}])[-self.tentativas:]
+        _gravar_json_atomico(caminho, falhas)
+        self.liberar(arrendamento)
+        
+        metricas.incrementar('fila_unidades_falhas_total', descricao='Tentativas de unidades da fila com erro')
+        if falhas['tentativas'] >= self.tentativas:
+            registrador.error(f"Unidade {unidade.identificador} falhou {falhas['tentativas']} vez(es) "
+                              f"e foi deixada de lado: {erro}")
+        return falhas['tentativas']
+    
+    def mesclar(self, destino: Path, parcial: bool = False) -> Dict[str, Any]:
+        """
+        Junta as saídas parciais, na ordem das entradas, em um único arquivo.
+        
+        As parciais são lidas uma a uma (ver salvar_tabelas), sem carregar
+        a saída inteira em memória.
+        
+        Args:
+            destino: Arquivo .csv, .parquet ou .feather
+            parcial: Mesclar mesmo com unidades não concluídas
+        
+        Returns:
+            Resumo com linhas, estatísticas somadas, versões do modelo e unidades faltantes
+        
+        Raises:
+            RuntimeError: Se houver unidades não concluídas e parcial for False
+        """
+        import pyarrow.parquet as pq
+        
+        concluidas = [unidade for unidade in self.unidades if self.concluida(unidade)]
+        faltantes = [unidade.identificador for unidade in self.unidades if not self.concluida(unidade)]
+        if faltantes and not parcial:
+            raise RuntimeError(f"{len(faltantes)} unidade(s) não concluída(s): {', '.join(faltantes[:10])}"
+                               f"{'...' if len(faltantes) > 10 else ''}")
+        if not concluidas:
+            raise RuntimeError("Nenhuma unidade concluída para mesclar")
+        
+        marcas = [_ler_json(self._caminho(DIRETORIO_CONCLUIDAS, unidade)) for unidade in concluidas]
+        versoes = sorted({marca['versao_modelo'] for marca in marcas if marca.get('versao_modelo')})
+        if len(versoes) > 1:
+            registrador.warning(f"Unidades pontuadas por versões diferentes do modelo: {', '.join(versoes)}")
+        
+        def parciais() -> Iterator:
+            for unidade in concluidas:
+                yield pq.read_table(self._caminho(DIRETORIO_PARCIAIS, unidade, '.parquet'))
+        
+        linhas = salvar_tabelas(parciais(), destino, bom=Path(destino).suffix.lower() == '.csv')
+        estatisticas = {chave: sum(marca['estatisticas'].get(chave, 0) for marca in marcas)
+                        for chave in ESTATISTICAS_SOMADAS}
+        registrador.info(f"{len(concluidas)} unidade(s) mescladas em {destino} ({linhas} alunos)")
+        return {
+            'arquivo': str(destino),
+            'unidades': len(concluidas),
+            'linhas': linhas,
+            'estatisticas': estatisticas,
+            'versoes_modelo': versoes,
+            'faltantes': faltantes,
+            'segundos_trabalhadores': sum(marca['duracao_segundos'] for marca in marcas)
+        }
+
+class TrabalhadorFila:
+    """
+    Processa unidades da fila com um SistemaPredicaoEvasao carregado uma única vez.
+    
+    Cada unidade roda com um TokenCancelamento: o heartbeat o cancela se o
+    arrendamento for perdido, e parar() o cancela para devolver a unidade à
+    fila (ex.: SIGTERM), interrompendo a pontuação no próximo lote.
+    """
+    
+    def __init__(self, fila: FilaTrabalho, sistema: Optional[SistemaPredicaoEvasao] = None,
+                 nome: Optional[str] = None, intervalo_heartbeat: Optional[float] = None):
+        """
+        Inicializa o trabalhador.
+        
+        Args:
+            fila: Fila aberta
+            sistema: Sistema inicializado (padrão: um novo, inicializado em executar())
+            nome: Identificação nos arrendamentos (padrão: máquina-pid)
+            intervalo_heartbeat: Segundos entre renovações
+                (padrão: configuracoes.execucao.intervalo_heartbeat)
+        """
+        self.fila = fila
+        self.sistema = sistema
+        self.nome = nome or f"{socket.gethostname()}-{os.getpid()}"
+        self.intervalo_heartbeat = intervalo_heartbeat or configuracoes.execucao.intervalo_heartbeat
+        self.unidades_concluidas = 0
+        self._parar = threading.Event()
+        self._cancelamento: Optional[TokenCancelamento] = None
+        # Última entrada lida: unidades seguidas do mesmo arquivo não o releem
+        self._entrada: Optional[Tuple[Path, Any]] = None
+    
+    def parar(self, motivo: str = 'Trabalhador encerrado') -> None:
+        """Encerra depois de devolver a unidade atual à fila (pode ser chamado de outra thread)."""
+        self._parar.set()
+        cancelamento = self._cancelamento
+        if cancelamento is not None:
+            cancelamento.cancelar(motivo)
+    
+    def executar(self, aguardar: bool = True, max_unidades: Optional[int] = None) -> int:
+        """
+        Reivindica e processa unidades até a fila acabar.
+        
+        Args:
+            aguardar: Sem unidade livre mas com unidades em andamento em outros
+                trabalhadores, esperar (elas voltam à fila se o arrendamento vencer)
+            max_unidades: Encerrar após concluir esta quantidade de unidades
+        
+        Returns:
+            Unidades concluídas por este trabalhador
+        
+        Raises:
+            RuntimeError: Se o modelo carregado não for a versão exigida pela fila
+        """
+        if self.sistema is None:
+            self.sistema = SistemaPredicaoEvasao()
+            self.sistema.inicializar()
+        versao = self.sistema.preditor_ml.versao
+        if self.fila.versao_modelo and versao != self.fila.versao_modelo:
+            raise RuntimeError(f"Modelo {versao} diferente do exigido pela fila ({self.fila.versao_modelo})")
+        
+        registrador.info(f"Trabalhador {self.nome} iniciado (modelo {versao})")
+        while not self._parar.is_set() and (max_unidades is None or self.unidades_concluidas < max_unidades):
+            arrendamento = self.fila.reivindicar(self.nome)
+            if arrendamento is not None:
+                self._processar(arrendamento)
+                continue
+            
+            contagem = self.fila.estado()['contagem']
+            if not contagem[UNIDADE_PENDENTE] and not (aguardar and contagem[UNIDADE_EM_ANDAMENTO]):
+                break
+            self._parar.wait(self.intervalo_heartbeat)
+        
+        registrador.info(f"Trabalhador {self.nome} encerrado: {self.unidades_concluidas} unidade(s) concluída(s)")
+        return self.unidades_concluidas
+    
+    def _carregar_unidade(self, unidade: UnidadeTrabalho):
+        """Linhas da unidade (fatia sem cópia da entrada, lida uma vez por arquivo)."""
+        caminho = self.fila.caminho_entrada(unidade)
+        if self._entrada is None or self._entrada[0] != caminho:
+            self._entrada = None
+            tabela = CarregadorDados.carregar_alunos_tabela(caminho, colunas=CarregadorDados.colunas_necessarias())
+            esperado = self.fila.linhas_entradas.get(unidade.arquivo)
+            if esperado is not None and tabela.num_rows != esperado:
+                raise ValueError(f"{caminho} tem {tabela.num_rows} alunos, mas a fila foi criada com {esperado} "
+                                 f"(arquivo alterado depois da criação da fila)")
+            self._entrada = (caminho, tabela)
+        return self._entrada[1].slice(unidade.inicio, unidade.linhas)
+    
+    def _manter_arrendamento(self, arrendamento: Arrendamento, cancelamento: TokenCancelamento,
+                             parar: threading.Event) -> None:
+        """Heartbeat: renova o arrendamento até a unidade terminar; cancela se ele for perdido."""
+        while not parar.wait(self.intervalo_heartbeat):
+            if not self.fila.renovar(arrendamento):
+                cancelamento.cancelar(f"Arrendamento da unidade {arrendamento.unidade.identificador} perdido")
+                return
+    
+    def _processar(self, arrendamento: Arrendamento) -> None:
+        unidade = arrendamento.unidade
+        cancelamento = self._cancelamento = TokenCancelamento()
+        if self._parar.is_set():
+            cancelamento.cancelar('Trabalhador encerrado')
+        parar_heartbeat = threading.Event()
+        heartbeat = threading.Thread(target=self._manter_arrendamento,
+                                     args=(arrendamento, cancelamento, parar_heartbeat),
+                                     name=f"heartbeat-{unidade.identificador}", daemon=True)
+        heartbeat.start()
+        inicio = time.perf_counter()
+        try:
+            tabela = self._carregar_unidade(unidade)
+            resultado, estatisticas = self.sistema.predizer_tabela(tabela, cancelamento=cancelamento)
+            parar_heartbeat.set()
+            heartbeat.join()
+            self.fila.concluir(arrendamento, resultado, estatisticas, time.perf_counter() - inicio)
+            self.unidades_concluidas += 1
+        except PredicaoCancelada as erro:
+            registrador.warning(f"Unidade {unidade.identificador} interrompida: {erro}")
+            if self._parar.is_set():
+                self.fila.liberar(arrendamento)
+        except ArrendamentoPerdido as erro:
+            registrador.warning(str(erro))
+        except Exception as erro:
+            registrador.error(f"Erro na unidade {unidade.identificador}: {erro}", exc_info=True)
+            self.fila.registrar_falha(arrendamento, erro)
+        finally:
+            parar_heartbeat.set()
+            heartbeat.join()
+            self._cancelamento = None
\ No newline at end of file
@@ -2,18 +2,47 @@
 Sistema principal de predição de evasão estudantil.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Tuple, Optional, Sequence
+import time
+import numpy as np
 import pandas as pd
 
-from ..utilitarios import obter_registrador, CarregadorDados
+from ..utilitarios import obter_registrador, CarregadorDados, metricas, tabela_para_dataframe
 from ..configuracao import configuracoes
 from ..modelos import PreditorEvasaoEstudantil
-from ..regras_negocio import MotorRegrasNegocio, AnalisadorCurriculo, ResultadoRegra
+from ..regras_negocio import MotorRegrasNegocio, AnalisadorCurriculo, ResultadoRegra, ContagemRegras
+from .sombra import AvaliadorSombra
+from .executor_processos import ExecutorProcessos
+from .progresso import (
+    Observador, TokenCancelamento, acompanhar_etapa, emitir,
+    INICIO_ETAPA, FIM_ETAPA, PROGRESSO,
+    ETAPA_CARREGAMENTO, ETAPA_PREPROCESSAMENTO, ETAPA_MODELO, ETAPA_REGRAS
+)
 
 registrador = obter_registrador(__name__)
 
+# Modo regras primeiro: colunas do modelo para alunos decididos por regra
+ML_NAO_CALCULADO = 'Não calculado (decidido por regra)'
+
+# Coluna que decide cada regra, usada como fator principal quando não há SHAP
+FATORES_POR_REGRA = {
+    'NC': 'Faltas Consecutivas',
+    'LFR': 'Faltas Consecutivas',
+    'LFI': 'Pend. Financ.',
+    'LAC': 'Pend. Acad.',
+    'NF': 'Pend. Financ.',
+    'MT': 'Sem pendências'
+}
+
+# Nomes amigáveis das features no fator principal
+NOMES_FEATURES_AMIGAVEIS = {
+    'Pend. Financ.': 'Pend. Financ.',
+    'Faltas Consecutivas': 'Faltas Consec.',
+    'Pend. Acad.': 'Pend. Acad.',
+}
+
 @dataclass
 class PredicaoAluno:
     """Dados de predição para um aluno."""
@@ -40,6 +69,33 @@ class PredicaoAluno:
     top_2_probabilidade_ml: str
     top_3_situacao_ml: str
     top_3_probabilidade_ml: str
+    versao_modelo: str = ''  # Versão do modelo que gerou a predição
+
+@dataclass
+class PontuacaoExecucao:
+    """
+    Regras e modelo de uma execução, antes de montar a saída.
+    
+    Compartilhada pela saída em objetos (predizer_dataframe) e pela saída em
+    tabela Arrow (predizer_tabela).
+    """
+    preditor: PreditorEvasaoEstudantil
+    contagem: ContagemRegras
+    inicio: float
+    regras_primeiro: bool
+    # Posição de cada aluno nas saídas do modelo (-1 = decidido por regra)
+    posicoes_modelo: np.ndarray
+    # No modo regras primeiro vem de _pontuar(); nos demais, avaliada depois do modelo
+    resultados_regras: Optional[pd.DataFrame] = None
+    total_modelo: int = 0
+    predicoes_ml: Any = field(default_factory=list)
+    probabilidades_ml: Any = field(default_factory=list)
+    valores_shap: Any = None
+    nomes_features: List[str] = field(default_factory=list)
+    deduplicacao: Dict[str, Any] = field(default_factory=dict)
+    sombra: Optional[AvaliadorSombra] = None
+    futuro_sombra: Any = None
+    sobrecarga_sombra: float = 0.0
 
 class SistemaPredicaoEvasao:
     """Sistema principal de predição de evasão estudantil."""
@@ -49,6 +105,8 @@ class SistemaPredicaoEvasao:
         self.preditor_ml = PreditorEvasaoEstudantil()
         self.motor_regras_negocio = None
         self.analisador_curriculo = None
+        self.sombra: Optional[AvaliadorSombra] = None
+        self.executor_processos: Optional[ExecutorProcessos] = None
         self._inicializado = False
     
     def inicializar(self) -> None:
@@ -73,6 +131,14 @@ class SistemaPredicaoEvasao:
             # Inicializar motor de regras de negócio
             self.motor_regras_negocio = MotorRegrasNegocio(self.analisador_curriculo)
             
+            # Modelo candidato avaliado em paralelo (não altera os resultados)
+            if configuracoes.execucao.modo_sombra:
+                self.ativar_modo_sombra()
+            
+            # Modelo/SHAP em processos criados a partir deste, com o modelo já carregado
+            if configuracoes.execucao.processos_pontuacao:
+                self.ativar_processos(configuracoes.execucao.processos_pontuacao)
+            
             self._inicializado = True
             registrador.info("Sistema inicializado com sucesso")
             
@@ -80,86 +146,450 @@ class SistemaPredicaoEvasao:
             registrador.error(f"Erro na inicialização do sistema: {e}")
             raise
     
-    def predizer_alunos(self, arquivo_alunos: Path) -> Tuple[List[PredicaoAluno], Dict[str, Any]]:
+    def ativar_modo_sombra(self, diretorio: Optional[Path] = None) -> AvaliadorSombra:
+        """
+        Passa a pontuar cada execução também com um modelo candidato.
+        
+        As predições continuam vindo do modelo de produção; o candidato roda
+        em outra thread e gera o relatório de divergências (ver sombra.py).
+        
+        Args:
+            diretorio: Diretório do candidato (padrão: configuracoes.dados.diretorio_modelo_candidato)
+            
+        Returns:
+            Avaliador ativado
+        """
+        self.sombra = AvaliadorSombra.carregar(diretorio)
+        registrador.info(f"Modo sombra ativo: candidato {self.sombra.candidato.versao}")
+        return self.sombra
+    
+    def ativar_processos(self, processos: Optional[int] = None) -> ExecutorProcessos:
+        """
+        Passa a pontuar modelo e SHAP em um pool de processos com memória compartilhada.
+        
+        Os resultados são os mesmos do modo em um processo (ver executor_processos.py).
+        
+        Args:
+            processos: Quantidade de processos (padrão: ver ExecutorProcessos)
+            
+        Returns:
+            Executor ativado
+        """
+        if self.executor_processos is not None:
+            self.executor_processos.encerrar()
+        self.executor_processos = ExecutorProcessos(self.preditor_ml, processos)
+        return self.executor_processos
+    
+    def trocar_preditor(self, preditor: PreditorEvasaoEstudantil) -> PreditorEvasaoEstudantil:
+        """
+        Substitui o modelo em uso por um preditor já carregado.
+        
+        Execuções em andamento terminam com o preditor anterior (a referência
+        é lida uma vez no início de predizer_dataframe).
+        
+        Args:
+            preditor: Preditor carregado e aquecido
+            
+        Returns:
+            Preditor substituído
+        """
+        anterior = self.preditor_ml
+        self.preditor_ml = preditor
+        registrador.info(f"Modelo em uso: {anterior.versao} -> {preditor.versao}")
+        
+        # Mesmos processos, que carregam o modelo novo (sem fork a partir desta thread)
+        if self.executor_processos is not None:
+            self.executor_processos = self.executor_processos.trocar_preditor(preditor)
+        return anterior
+    
+    def predizer_alunos(self, arquivo_alunos: Path, observador: Optional[Observador] = None,
+                        cancelamento: Optional[TokenCancelamento] = None
+                        ) -> Tuple[List[PredicaoAluno], Dict[str, Any]]:
         """
         Faz predições para todos os alunos no arquivo.
         
         Args:
             arquivo_alunos: Caminho para o arquivo com dados dos alunos
+                (.xlsx, .xls, .csv, .parquet ou .feather)
+            observador: Função que recebe os EventoProgresso de cada etapa
+            cancelamento: Token verificado entre etapas e entre lotes
             
         Returns:
             Tuple com lista de predições e estatísticas
+            
+        Raises:
+            PredicaoCancelada: Se o token for cancelado durante a execução
         """
         if not self._inicializado:
             raise RuntimeError("Sistema não foi inicializado. Chame inicializar() primeiro.")
         
         registrador.info(f"Iniciando predições para arquivo: {arquivo_alunos}")
+        self._verificar_cancelamento(cancelamento)
         
         # Carregar dados
-        df = CarregadorDados.carregar_excel_com_deteccao_cabecalho(arquivo_alunos)
+        with metricas.cronometrar('carregamento'), acompanhar_etapa(observador, ETAPA_CARREGAMENTO):
+            df = CarregadorDados.carregar_alunos(
+                arquivo_alunos,
+                colunas=CarregadorDados.colunas_necessarias(),
+                compactar=configuracoes.dados.compactar_tipos
+            )
         registrador.info(f"Dados carregados: {len(df)} alunos")
         
-        # Preprocessar dados para o modelo ML
-        df_processado = self.preditor_ml.preprocessar_dados(df)
+        return self.predizer_dataframe(df, observador, cancelamento)
+    
+    def predizer_dataframe(self, df: pd.DataFrame, observador: Optional[Observador] = None,
+                           cancelamento: Optional[TokenCancelamento] = None
+                           ) -> Tuple[List[PredicaoAluno], Dict[str, Any]]:
+        """
+        Faz predições para alunos já carregados em memória.
+        
+        Usado pelas interfaces web, que já leram o upload, para evitar
+        gravar e reler um arquivo temporário.
+        
+        Args:
+            df: DataFrame com dados dos alunos (uma linha por aluno, com header aplicado)
+            observador: Função que recebe os EventoProgresso de cada etapa e
+                o avanço a cada configuracoes.execucao.tamanho_lote alunos
+            cancelamento: Token verificado entre etapas e entre lotes
+            
+        Returns:
+            Tuple com lista de predições e estatísticas
+            
+        Raises:
+            PredicaoCancelada: Se o token for cancelado durante a execução
+        """
+        if not self._inicializado:
+            raise RuntimeError("Sistema não foi inicializado. Chame inicializar() primeiro.")
         
-        # Fazer predições ML
-        predicoes_ml, probabilidades_ml, valores_shap = self.preditor_ml.fazer_predicoes(df_processado)
+        if df.empty:
+            raise ValueError("Nenhum aluno para predizer: DataFrame vazio")
         
-        # Resetar contadores de regras
-        self.motor_regras_negocio.resetar_contadores()
+        execucao = self._pontuar(df, observador, cancelamento)
+        total_linhas = len(df)
+        tamanho_lote = configuracoes.execucao.tamanho_lote
+        acompanhado = observador is not None or cancelamento is not None
+        regras_primeiro = execucao.regras_primeiro
+        posicoes_modelo = execucao.posicoes_modelo
+        predicoes_ml, probabilidades_ml = execucao.predicoes_ml, execucao.probabilidades_ml
         
         # Processar cada aluno
         predicoes = []
+        regras_aplicadas = []
         contador_matriculados = 0
-        contador_risco_evasao = 0
+        inicio_regras = time.perf_counter()
+        if not regras_primeiro:
+            emitir(observador, INICIO_ETAPA, ETAPA_REGRAS, 0, total_linhas)
+            # Tabela de regras avaliada uma vez para o lote inteiro
+            execucao.resultados_regras = self.motor_regras_negocio.aplicar_regras_lote(df, execucao.contagem)
+        linhas_regras = execucao.resultados_regras[
+            ['situacao', 'probabilidade', 'razao', 'regra_aplicada']
+        ].values.tolist()
         
-        for i, (_, dados_aluno) in enumerate(df.iterrows()):
-            # Obter predição ML para este aluno
-            predicao_ml = predicoes_ml[i]
-            probabilidade_ml = max(probabilidades_ml[i])
+        # Registros em dicionário: bem mais barato que montar uma Series por linha (iterrows)
+        for i, dados_aluno in enumerate(df.to_dict('records')):
+            if acompanhado and i and i % tamanho_lote == 0:
+                if not regras_primeiro:
+                    emitir(observador, PROGRESSO, ETAPA_REGRAS, i, total_linhas)
+                self._verificar_cancelamento(cancelamento)
             
-            # Aplicar regras de negócio
-            resultado_regra = self.motor_regras_negocio.aplicar_regras_negocio(
-                dados_aluno.to_dict(), predicao_ml, probabilidade_ml
-            )
+            # Sem regra aplicável: predição do modelo
+            indice_ml = int(posicoes_modelo[i])
+            if linhas_regras[i][3] != 'ML':
+                resultado_regra = ResultadoRegra(*linhas_regras[i])
+            else:
+                resultado_regra = ResultadoRegra(predicoes_ml[indice_ml], max(probabilidades_ml[indice_ml]),
+                                                 'Predição ML', 'ML')
             
-            # Criar objeto de predição
+            # Criar objeto de predição (sem colunas do modelo se ele não foi executado para o aluno)
+            modelo_executado = indice_ml >= 0
             predicao_aluno = self._criar_predicao_aluno(
-                dados_aluno, resultado_regra, i, probabilidades_ml[i], 
-                valores_shap, df_processado.columns.tolist(), i
+                dados_aluno, resultado_regra, indice_ml,
+                probabilidades_ml[indice_ml] if modelo_executado else None,
+                execucao.valores_shap if modelo_executado else None, execucao.nomes_features, i,
+                execucao.preditor
             )
             
             predicoes.append(predicao_aluno)
+            regras_aplicadas.append(resultado_regra.regra_aplicada)
             
             # Contar resultados
             if predicao_aluno.status_predicao == 'MATRICULADO':
                 contador_matriculados += 1
-            else:
-                contador_risco_evasao += 1
+        
+        self._concluir_regras(execucao, observador, total_linhas, inicio_regras)
+        estatisticas = self._concluir_execucao(execucao, len(predicoes), contador_matriculados,
+                                               regras_aplicadas, df.attrs)
+        return predicoes, estatisticas
+    
+    def predizer_alunos_tabela(self, arquivo_alunos: Path, observador: Optional[Observador] = None,
+                               cancelamento: Optional[TokenCancelamento] = None
+                               ) -> Tuple['pa.Table', Dict[str, Any]]:
+        """
+        Faz predições para todos os alunos no arquivo pelo caminho colunar (Apache Arrow).
+        
+        O arquivo é lido direto para uma tabela Arrow (ver
+        CarregadorDados.carregar_alunos_tabela); configuracoes.dados.compactar_tipos
+        não se aplica, já que as colunas Arrow já são compactas.
+        
+        Args:
+            arquivo_alunos: Caminho para o arquivo com dados dos alunos
+                (.xlsx, .xls, .csv, .parquet ou .feather)
+            observador: Função que recebe os EventoProgresso de cada etapa
+            cancelamento: Token verificado entre etapas e entre lotes
+            
+        Returns:
+            Tuple com tabela de predições e estatísticas
+            
+        Raises:
+            ImportError: Se o pyarrow não estiver instalado
+            PredicaoCancelada: Se o token for cancelado durante a execução
+        """
+        if not self._inicializado:
+            raise RuntimeError("Sistema não foi inicializado. Chame inicializar() primeiro.")
+        
+        registrador.info(f"Iniciando predições (colunar) para arquivo: {arquivo_alunos}")
+        self._verificar_cancelamento(cancelamento)
+        
+        with metricas.cronometrar('carregamento'), acompanhar_etapa(observador, ETAPA_CARREGAMENTO):
+            tabela = CarregadorDados.carregar_alunos_tabela(
+                arquivo_alunos,
+                colunas=CarregadorDados.colunas_necessarias()
+            )
+        registrador.info(f"Dados carregados: {tabela.num_rows} alunos")
+        
+        return self.predizer_tabela(tabela, observador, cancelamento)
+    
+    def predizer_tabela(self, tabela: 'pa.Table', observador: Optional[Observador] = None,
+                        cancelamento: Optional[TokenCancelamento] = None
+                        ) -> Tuple['pa.Table', Dict[str, Any]]:
+        """
+        Faz predições para alunos em uma tabela Arrow, com a saída também em tabela Arrow.
+        
+        Mesmo pipeline e mesmos valores de predizer_dataframe(), sem um objeto
+        PredicaoAluno por aluno: regras e pré-processamento leem as colunas
+        como ArrowDtype (sem cópia), o modelo devolve arrays NumPy e a saída é
+        montada coluna a coluna (ver saida_colunar), com as colunas do CSV
+        gravado por principal.py.
+        
+        Args:
+            tabela: Tabela com dados dos alunos (uma linha por aluno)
+            observador: Função que recebe os EventoProgresso de cada etapa
+            cancelamento: Token verificado entre etapas e entre lotes
+            
+        Returns:
+            Tuple com tabela de predições e estatísticas
+            
+        Raises:
+            ImportError: Se o pyarrow não estiver instalado
+            PredicaoCancelada: Se o token for cancelado durante a execução
+        """
+        # pyarrow é opcional: só o caminho colunar importa a montagem da saída
+        from .saida_colunar import montar_tabela_predicoes
+        
+        if not self._inicializado:
+            raise RuntimeError("Sistema não foi inicializado. Chame inicializar() primeiro.")
+        
+        if tabela.num_rows == 0:
+            raise ValueError("Nenhum aluno para predizer: tabela vazia")
+        
+        df = tabela_para_dataframe(tabela)
+        execucao = self._pontuar(df, observador, cancelamento, como_arrays=True)
+        total_linhas = len(df)
+        
+        inicio_regras = time.perf_counter()
+        if not execucao.regras_primeiro:
+            emitir(observador, INICIO_ETAPA, ETAPA_REGRAS, 0, total_linhas)
+            execucao.resultados_regras = self.motor_regras_negocio.aplicar_regras_lote(df, execucao.contagem)
+        self._verificar_cancelamento(cancelamento)
+        
+        resultado, matriculados = montar_tabela_predicoes(tabela, execucao)
+        
+        self._concluir_regras(execucao, observador, total_linhas, inicio_regras)
+        estatisticas = self._concluir_execucao(execucao, total_linhas, matriculados,
+                                               execucao.resultados_regras['regra_aplicada'].to_numpy(), df.attrs)
+        return resultado, estatisticas
+    
+    def _pontuar(self, df: pd.DataFrame, observador: Optional[Observador],
+                 cancelamento: Optional[TokenCancelamento], como_arrays: bool = False) -> PontuacaoExecucao:
+        """
+        Primeira metade de uma execução: regras (no modo regras primeiro), pré-processamento e modelo/SHAP.
+        
+        Args:
+            df: Dados dos alunos
+            observador: Função que recebe os EventoProgresso de cada etapa
+            cancelamento: Token verificado entre etapas e entre lotes
+            como_arrays: Saídas do modelo como arrays NumPy (ver PreditorEvasaoEstudantil.fazer_predicoes)
+        """
+        inicio_execucao = time.perf_counter()
+        total_linhas = len(df)
+        
+        # Referência fixa durante toda a execução (ver trocar_preditor)
+        preditor = self.preditor_ml
+        sombra = self.sombra
+        executor = self.executor_processos
+        # Modelo/SHAP nos processos só se eles foram criados com o mesmo preditor
+        pontuador = executor if executor is not None and executor.preditor is preditor else preditor
+        tamanho_lote = configuracoes.execucao.tamanho_lote
+        
+        # Sem observador nem token o pipeline roda sem lotes (nenhum custo extra)
+        acompanhado = observador is not None or cancelamento is not None
+        
+        self._verificar_cancelamento(cancelamento)
+        
+        # Contadores de regras desta execução (o motor é compartilhado entre execuções simultâneas)
+        execucao = PontuacaoExecucao(
+            preditor=preditor,
+            contagem=self.motor_regras_negocio.nova_contagem(),
+            inicio=inicio_execucao,
+            regras_primeiro=configuracoes.execucao.regras_primeiro,
+            posicoes_modelo=np.arange(total_linhas),
+            sombra=sombra
+        )
+        
+        # Modo regras primeiro: regras vetorizadas e só os alunos sem regra vão para o modelo
+        df_modelo = df
+        if execucao.regras_primeiro:
+            with metricas.cronometrar('regras'), acompanhar_etapa(observador, ETAPA_REGRAS, total_linhas):
+                execucao.resultados_regras = self.motor_regras_negocio.aplicar_regras_lote(df, execucao.contagem)
+            sem_regra = execucao.resultados_regras['regra_aplicada'].to_numpy() == 'ML'
+            df_modelo = df[sem_regra]
+            execucao.posicoes_modelo = np.where(sem_regra, np.cumsum(sem_regra) - 1, -1)
+            registrador.info(f"Regras decidiram {total_linhas - len(df_modelo)} de {total_linhas} alunos; "
+                             f"{len(df_modelo)} seguem para o modelo")
+            metricas.incrementar('linhas_sem_modelo_total', total_linhas - len(df_modelo),
+                                 descricao='Alunos decididos por regra sem executar modelo e SHAP')
+        
+        total_modelo = execucao.total_modelo = len(df_modelo)
+        if total_modelo:
+            # Preprocessar dados para o modelo ML
+            with metricas.cronometrar('preprocessamento'), \
+                    acompanhar_etapa(observador, ETAPA_PREPROCESSAMENTO, total_modelo):
+                df_processado = preditor.preprocessar_dados(df_modelo)
+            execucao.nomes_features = df_processado.columns.tolist()
+            
+            # Candidato pontua a mesma matriz em paralelo
+            if sombra is not None:
+                inicio_sombra = time.perf_counter()
+                execucao.futuro_sombra = sombra.pontuar(preditor, df_modelo, df_processado)
+                execucao.sobrecarga_sombra = time.perf_counter() - inicio_sombra
+            
+            # Fazer predições ML
+            self._verificar_cancelamento(cancelamento)
+            with acompanhar_etapa(observador, ETAPA_MODELO, total_modelo):
+                if acompanhado:
+                    def ao_concluir_lote(linhas_pontuadas: int) -> None:
+                        emitir(observador, PROGRESSO, ETAPA_MODELO, linhas_pontuadas, total_modelo)
+                        self._verificar_cancelamento(cancelamento)
+                    
+                    resultado = pontuador.fazer_predicoes_em_lotes(
+                        df_processado, tamanho_lote, ao_concluir_lote, execucao.deduplicacao, como_arrays
+                    )
+                else:
+                    resultado = pontuador.fazer_predicoes(df_processado, execucao.deduplicacao, como_arrays)
+            execucao.predicoes_ml, execucao.probabilidades_ml, execucao.valores_shap = resultado
+        
+        return execucao
+    
+    def _concluir_regras(self, execucao: PontuacaoExecucao, observador: Optional[Observador],
+                         total_linhas: int, inicio_regras: float) -> None:
+        """Fecha a etapa de regras quando ela rodou depois do modelo."""
+        if execucao.regras_primeiro:
+            return
+        duracao_regras = time.perf_counter() - inicio_regras
+        emitir(observador, FIM_ETAPA, ETAPA_REGRAS, total_linhas, total_linhas, duracao_regras)
+        metricas.observar('duracao_etapa_segundos', duracao_regras,
+                          descricao='Latência de cada etapa do pipeline', etapa='regras')
+    
+    def _concluir_execucao(self, execucao: PontuacaoExecucao, total_alunos: int, matriculados: int,
+                           regras_aplicadas: Sequence[str], atributos: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Métricas, relatório do modo sombra e estatísticas de uma execução.
+        
+        Args:
+            execucao: Resultado de _pontuar()
+            total_alunos: Alunos pontuados
+            matriculados: Alunos com status MATRICULADO
+            regras_aplicadas: Regra que decidiu cada aluno ('ML' = modelo)
+            atributos: attrs do DataFrame carregado (relatório de memória)
+        """
+        preditor = execucao.preditor
+        total_modelo = execucao.total_modelo
+        risco_evasao = total_alunos - matriculados
+        self._registrar_metricas_execucao(total_alunos, time.perf_counter() - execucao.inicio, execucao.contagem)
+        
+        # Relatório de divergências montado na thread do candidato
+        if execucao.sombra is not None and total_modelo:
+            regras_modelo = ['ML'] * total_modelo if execucao.regras_primeiro else regras_aplicadas
+            execucao.sombra.comparar(execucao.futuro_sombra, preditor, execucao.predicoes_ml,
+                                     execucao.probabilidades_ml, regras_modelo,
+                                     execucao.deduplicacao.get('duracao_inferencia', 0.0),
+                                     execucao.sobrecarga_sombra)
         
         # Compilar estatísticas
+        deduplicacao = execucao.deduplicacao
         estatisticas = {
-            'total_students': len(predicoes),
-            'enrolled_students': contador_matriculados,
-            'dropout_risk_students': contador_risco_evasao,
-            'enrolled_percentage': (contador_matriculados / len(predicoes)) * 100,
-            'dropout_risk_percentage': (contador_risco_evasao / len(predicoes)) * 100,
-            'rules_summary': self.motor_regras_negocio.obter_resumo_regras()
+            'total_students': total_alunos,
+            'enrolled_students': matriculados,
+            'dropout_risk_students': risco_evasao,
+            'enrolled_percentage': (matriculados / total_alunos) * 100,
+            'dropout_risk_percentage': (risco_evasao / total_alunos) * 100,
+            'rules_summary': self.motor_regras_negocio.obter_resumo_regras(execucao.contagem),
+            'rules_evaluation': execucao.contagem.desempenho_regras,
+            'model_version': preditor.versao,
+            'ml_scored_students': total_modelo,
+            'ml_unique_vectors': deduplicacao.get('vetores_unicos', total_modelo),
+            'ml_dedup_ratio': total_modelo / deduplicacao['vetores_unicos'] if 'vetores_unicos' in deduplicacao else 1.0,
+            'ml_cache_hits': deduplicacao.get('acertos_cache', 0)
         }
+        if execucao.sombra is not None:
+            estatisticas['shadow_model_version'] = execucao.sombra.candidato.versao
+        if 'relatorio_memoria' in atributos:
+            estatisticas['memory_report'] = atributos['relatorio_memoria']
         
-        registrador.info(f"Predições concluídas: {contador_matriculados} matriculados, {contador_risco_evasao} em risco")
+        registrador.info(f"Predições concluídas: {matriculados} matriculados, {risco_evasao} em risco")
         
-        return predicoes, estatisticas
+        return estatisticas
+    
+    def _verificar_cancelamento(self, cancelamento: Optional[TokenCancelamento]) -> None:
+        """Interrompe a predição (e conta nas métricas) se o token foi cancelado."""
+        if cancelamento is not None and cancelamento.cancelado:
+            metricas.incrementar('execucoes_canceladas_total', descricao='Execuções de predição canceladas')
+            registrador.warning(f"Predição cancelada: {cancelamento.motivo}")
+            cancelamento.verificar()
     
-    def _criar_predicao_aluno(self, dados_aluno: pd.Series, resultado_regra: ResultadoRegra,
+    def _registrar_metricas_execucao(self, total_linhas: int, duracao: float, contagem: ContagemRegras) -> None:
+        """Publica no registro de métricas os totais de uma execução."""
+        metricas.incrementar('execucoes_total', descricao='Execuções de predição concluídas')
+        metricas.incrementar('linhas_pontuadas_total', total_linhas,
+                             descricao='Alunos pontuados pelo pipeline')
+        metricas.definir('linhas_ultima_execucao', total_linhas,
+                         descricao='Alunos pontuados na última execução')
+        metricas.definir('linhas_por_segundo', total_linhas / duracao if duracao > 0 else 0.0,
+                         descricao='Vazão da última execução (alunos por segundo)')
+        metricas.observar('duracao_etapa_segundos', duracao,
+                          descricao='Latência de cada etapa do pipeline', etapa='total')
+        
+        for chave, quantidade in contagem.contador_regras.items():
+            if chave.endswith('_por_regra') and quantidade:
+                metricas.incrementar('regras_aplicadas_total', quantidade,
+                                     descricao='Alunos decididos por regra de negócio',
+                                     regra=chave.replace('_por_regra', ''))
+        
+        for nome, desempenho in contagem.desempenho_regras.items():
+            metricas.incrementar('regras_avaliacao_segundos_total', desempenho['segundos'],
+                                 descricao='Tempo gasto avaliando cada regra da tabela', regra=nome)
+    
+    def _criar_predicao_aluno(self, dados_aluno: Dict[str, Any], resultado_regra: ResultadoRegra,
                              indice_predicao_ml: int, probabilidades_ml: List[float],
                              valores_shap: Any, nomes_features: List[str], 
-                             indice_aluno: int) -> PredicaoAluno:
+                             indice_aluno: int, preditor: Optional[PreditorEvasaoEstudantil] = None
+                             ) -> PredicaoAluno:
         """Cria objeto de predição para um aluno."""
+        preditor = preditor or self.preditor_ml
         
         # Informações básicas do aluno
         nome = str(dados_aluno.get('Nome', f'Aluno_{indice_aluno+1}'))
-        matricula = CarregadorDados.limpar_identificador_aluno(dados_aluno.to_dict())
+        matricula = CarregadorDados.limpar_identificador_aluno(dados_aluno)
         situacao_atual = str(dados_aluno.get('Situação', 'Não informada'))
         curso = str(dados_aluno.get('Curso', 'Não informado'))
         sexo = str(dados_aluno.get('Sexo', 'Não informado'))
@@ -188,85 +618,83 @@ class SistemaPredicaoEvasao:
                 nivel_urgencia = 'BAIXA'
         
         # Obter fator principal (feature mais importante do SHAP)
-        fator_principal = "N/A"
-        valor_importancia = 0.0
-        try:
-            if len(valores_shap) > indice_aluno and len(nomes_features) > 0:
-                valores_aluno = valores_shap[indice_aluno] if hasattr(valores_shap[indice_aluno], '__len__') else []
-                if len(valores_aluno) > 0:
-                    # Converter para numpy array se necessário
-                    import numpy as np
-                    valores_array = np.array(valores_aluno)
-                    
-                    # Para modelos multiclasse, valores SHAP têm forma (n_features, n_classes)
-                    # Calcular a importância absoluta máxima por feature (entre todas as classes)
-                    if valores_array.ndim == 2:  # Shape (n_features, n_classes)
-                        # Para cada feature, pegar o valor SHAP com maior magnitude absoluta
-                        importancias_features = np.max(np.abs(valores_array), axis=1)
-                        indice_max = np.argmax(importancias_features)
-                        
-                        if indice_max < len(nomes_features):
-                            fator_principal = nomes_features[indice_max]
-                            # Valor específico que teve maior impacto para esta feature
-                            classe_max = np.argmax(np.abs(valores_array[indice_max]))
-                            valor_importancia = float(valores_array[indice_max, classe_max])
-                    elif valores_array.ndim == 1:  # Shape (n_features,) - modelo binário
-                        indice_max = np.argmax(np.abs(valores_array))
-                        if indice_max < len(nomes_features):
-                            fator_principal = nomes_features[indice_max]
-                            valor_importancia = float(valores_array[indice_max])
-        except Exception as e:
-            # Se houver algum erro com SHAP, usar valores padrão
-            registrador.debug(f"Erro ao processar valores SHAP para aluno {indice_aluno}: {e}")
+        if valores_shap is None:
+            # Modo regras primeiro: SHAP não é calculado para alunos decididos por regra
+            fator_principal = FATORES_POR_REGRA.get(resultado_regra.regra_aplicada, 'N/A')
+            valor_importancia = 0.0
+        else:
             fator_principal = "N/A"
             valor_importancia = 0.0
+            try:
+                if len(valores_shap) > indice_predicao_ml and len(nomes_features) > 0:
+                    valores_aluno = valores_shap[indice_predicao_ml] if hasattr(valores_shap[indice_predicao_ml], '__len__') else []
+                    if len(valores_aluno) > 0:
+                        # Converter para numpy array se necessário
+                        import numpy as np
+                        valores_array = np.array(valores_aluno)
+                        
+                        # Para modelos multiclasse, valores SHAP têm forma (n_features, n_classes)
+                        # Calcular a importância absoluta máxima por feature (entre todas as classes)
+                        if valores_array.ndim == 2:  # Shape (n_features, n_classes)
+                            # Para cada feature, pegar o valor SHAP com maior magnitude absoluta
+                            importancias_features = np.max(np.abs(valores_array), axis=1)
+                            indice_max = np.argmax(importancias_features)
+                            
+                            if indice_max < len(nomes_features):
+                                fator_principal = nomes_features[indice_max]
+                                # Valor específico que teve maior impacto para esta feature
+                                classe_max = np.argmax(np.abs(valores_array[indice_max]))
+                                valor_importancia = float(valores_array[indice_max, classe_max])
+                        elif valores_array.ndim == 1:  # Shape (n_features,) - modelo binário
+                            indice_max = np.argmax(np.abs(valores_array))
+                            if indice_max < len(nomes_features):
+                                fator_principal = nomes_features[indice_max]
+                                valor_importancia = float(valores_array[indice_max])
+            except Exception as e:
+                # Se houver algum erro com SHAP, usar valores padrão
+                registrador.debug(f"Erro ao processar valores SHAP para aluno {indice_aluno}: {e}")
+                fator_principal = "N/A"
+                valor_importancia = 0.0
+            
+            if fator_principal == "N/A":
+                metricas.incrementar('fallback_shap_total',
+                                     descricao='Alunos sem fator principal SHAP (valor padrão usado)')
         
         # Mapear features técnicas para nomes amigáveis
-        mapeamento_features = {
-            'Pend. Financ.': 'Pend. Financ.',
-            'Faltas Consecutivas': 'Faltas Consec.',
-            'Pend. Acad.': 'Pend. Acad.',
-        }
-        fator_principal_amigavel = mapeamento_features.get(fator_principal, fator_principal)
+        fator_principal_amigavel = NOMES_FEATURES_AMIGAVEIS.get(fator_principal, fator_principal)
         
         # Preparar informações sobre predições ML (top 3)
-        # Usar as classes reais do modelo - verificar diferentes chaves possíveis
-        if self.preditor_ml.info_classes:
-            if 'class_names' in self.preditor_ml.info_classes:
-                nomes_classes = list(self.preditor_ml.info_classes['class_names'])
-            elif 'classes' in self.preditor_ml.info_classes:
-                nomes_classes = list(self.preditor_ml.info_classes['classes'])
-            elif 'situacao_mapping' in self.preditor_ml.info_classes:
-                nomes_classes = list(self.preditor_ml.info_classes['situacao_mapping'].values())
-            else:
-                # Usar as chaves do próprio dicionário
-                nomes_classes = list(self.preditor_ml.info_classes.keys()) if isinstance(self.preditor_ml.info_classes, dict) else ['Classe_0', 'Classe_1', 'Classe_2', 'Classe_3', 'Classe_4', 'Classe_5']
-        else:
-            nomes_classes = ['Classe_0', 'Classe_1', 'Classe_2', 'Classe_3', 'Classe_4', 'Classe_5']
+        # Usar as classes reais do modelo
+        nomes_classes = preditor.nomes_classes()
             
-        probabilidades_ordenadas = sorted(enumerate(probabilidades_ml), key=lambda x: x[1], reverse=True)
-        
-        # Verificar se há probabilidades válidas
-        if not probabilidades_ordenadas or len(nomes_classes) == 0:
-            top_1_situacao = 'N/A'
-            top_1_prob = '0%'
-            top_2_situacao = 'N/A' 
-            top_2_prob = '0%'
-            top_3_situacao = 'N/A'
-            top_3_prob = '0%'
+        if probabilidades_ml is None:
+            # Modelo não executado para este aluno (modo regras primeiro)
+            top_1_situacao = top_2_situacao = top_3_situacao = ML_NAO_CALCULADO
+            top_1_prob = top_2_prob = top_3_prob = 'N/A'
         else:
-            # Garantir que os índices estão dentro dos limites
-            idx_0 = probabilidades_ordenadas[0][0] if len(probabilidades_ordenadas) > 0 else 0
-            top_1_situacao = nomes_classes[idx_0] if idx_0 < len(nomes_classes) else 'N/A'
-            top_1_prob = f"{probabilidades_ordenadas[0][1]*100:.1f}%" if probabilidades_ordenadas else '0%'
+            probabilidades_ordenadas = sorted(enumerate(probabilidades_ml), key=lambda x: x[1], reverse=True)
             
-            idx_1 = probabilidades_ordenadas[1][0] if len(probabilidades_ordenadas) > 1 else 0
-            top_2_situacao = nomes_classes[idx_1] if len(probabilidades_ordenadas) > 1 and idx_1 < len(nomes_classes) else 'N/A'
-            top_2_prob = f"{probabilidades_ordenadas[1][1]*100:.1f}%" if len(probabilidades_ordenadas) > 1 else '0%'
-            
-            idx_2 = probabilidades_ordenadas[2][0] if len(probabilidades_ordenadas) > 2 else 0
-            top_3_situacao = nomes_classes[idx_2] if len(probabilidades_ordenadas) > 2 and idx_2 < len(nomes_classes) else 'N/A'
-            top_3_prob = f"{probabilidades_ordenadas[2][1]*100:.1f}%" if len(probabilidades_ordenadas) > 2 else '0%'
+            # Verificar se há probabilidades válidas
+            if not probabilidades_ordenadas or len(nomes_classes) == 0:
+                top_1_situacao = 'N/A'
+                top_1_prob = '0%'
+                top_2_situacao = 'N/A' 
+                top_2_prob = '0%'
+                top_3_situacao = 'N/A'
+                top_3_prob = '0%'
+            else:
+                # Garantir que os índices estão dentro dos limites
+                idx_0 = probabilidades_ordenadas[0][0] if len(probabilidades_ordenadas) > 0 else 0
+                top_1_situacao = nomes_classes[idx_0] if idx_0 < len(nomes_classes) else 'N/A'
+                top_1_prob = f"{probabilidades_ordenadas[0][1]*100:.1f}%" if probabilidades_ordenadas else '0%'
+                
+                idx_1 = probabilidades_ordenadas[1][0] if len(probabilidades_ordenadas) > 1 else 0
+                top_2_situacao = nomes_classes[idx_1] if len(probabilidades_ordenadas) > 1 and idx_1 < len(nomes_classes) else 'N/A'
+                top_2_prob = f"{probabilidades_ordenadas[1][1]*100:.1f}%" if len(probabilidades_ordenadas) > 1 else '0%'
+                
+                idx_2 = probabilidades_ordenadas[2][0] if len(probabilidades_ordenadas) > 2 else 0
+                top_3_situacao = nomes_classes[idx_2] if len(probabilidades_ordenadas) > 2 and idx_2 < len(nomes_classes) else 'N/A'
+                top_3_prob = f"{probabilidades_ordenadas[2][1]*100:.1f}%" if len(probabilidades_ordenadas) > 2 else '0%'
         
         # Fonte da predição
         if resultado_regra.regra_aplicada == 'ML':
@@ -297,5 +725,6 @@ class SistemaPredicaoEvasao:
             top_2_situacao_ml=top_2_situacao,
             top_2_probabilidade_ml=top_2_prob,
             top_3_situacao_ml=top_3_situacao,
-            top_3_probabilidade_ml=top_3_prob
+            top_3_probabilidade_ml=top_3_prob,
+            versao_modelo=preditor.versao or ''
         )
\ No newline at end of file
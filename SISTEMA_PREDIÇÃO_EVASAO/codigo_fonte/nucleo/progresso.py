@@ -0,0 +1,202 @@
+﻿"""
+Eventos de progresso emitidos pelas etapas do pipeline de predição.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Etapas do pipeline, na ordem de execução
+ETAPA_CARREGAMENTO = 'carregamento'
+ETAPA_PREPROCESSAMENTO = 'preprocessamento'
+ETAPA_MODELO = 'modelo'
+ETAPA_REGRAS = 'regras'
+
+# Peso aproximado de cada etapa no tempo total (usado no percentual geral)
+PESOS_ETAPAS: Dict[str, float] = {
+    ETAPA_CARREGAMENTO: 0.10,
+    ETAPA_PREPROCESSAMENTO: 0.05,
+    ETAPA_MODELO: 0.55,
+    ETAPA_REGRAS: 0.30
+}
+
+# Tipos de evento
+INICIO_ETAPA = 'inicio_etapa'
+FIM_ETAPA = 'fim_etapa'
+PROGRESSO = 'progresso'
+
+@dataclass
+class EventoProgresso:
+    """Evento emitido pelo pipeline durante uma predição."""
+    tipo: str                     # inicio_etapa, fim_etapa ou progresso
+    etapa: str
+    linhas_processadas: int = 0
+    total_linhas: int = 0
+    duracao: float = 0.0          # Segundos (apenas em fim_etapa)
+    instante: float = field(default_factory=time.time)
+
+# Função que recebe os eventos (ex.: RastreadorProgresso ou ObservadorPredicao)
+Observador = Callable[[EventoProgresso], None]
+
+class PredicaoCancelada(Exception):
+    """Lançada quando a predição é interrompida por um TokenCancelamento."""
+
+class TokenCancelamento:
+    """
+    Sinaliza que uma predição em andamento deve parar.
+    
+    O pipeline verifica o token entre etapas e entre lotes; o cancelamento
+    pode ser pedido de qualquer thread (ex.: botão na interface, SIGINT).
+    """
+    
+    def __init__(self):
+        self._evento = threading.Event()
+        self.motivo: Optional[str] = None
+    
+    def cancelar(self, motivo: str = 'Cancelada pelo usuário') -> None:
+        """Pede o cancelamento."""
+        self.motivo = motivo
+        self._evento.set()
+    
+    @property
+    def cancelado(self) -> bool:
+        """True se o cancelamento foi pedido."""
+        return self._evento.is_set()
+    
+    def verificar(self) -> None:
+        """
+        Interrompe a execução se o cancelamento foi pedido.
+        
+        Raises:
+            PredicaoCancelada: Se o token foi cancelado
+        """
+        if self._evento.is_set():
+            raise PredicaoCancelada(self.motivo or 'Predição cancelada')
+
+def verificar_cancelamento(cancelamento: Optional[TokenCancelamento]) -> None:
+    """Atalho para checar um token opcional (None = nunca cancela)."""
+    if cancelamento is not None:
+        cancelamento.verificar()
+
+class ObservadorPredicao:
+    """
+    Observador com um método por tipo de evento.
+    
+    Subclasses sobrescrevem apenas o que interessa. Instâncias podem ser
+    passadas diretamente como ``observador`` para o pipeline.
+    """
+    
+    def __call__(self, evento: EventoProgresso) -> None:
+        if evento.tipo == PROGRESSO:
+            self.progresso(evento.etapa, evento.linhas_processadas, evento.total_linhas)
+        elif evento.tipo == INICIO_ETAPA:
+            self.inicio_etapa(evento.etapa, evento.total_linhas)
+        elif evento.tipo == FIM_ETAPA:
+            self.fim_etapa(evento.etapa, evento.total_linhas, evento.duracao)
+    
+    def inicio_etapa(self, etapa: str, total_linhas: int) -> None:
+        """Chamado quando uma etapa começa."""
+    
+    def progresso(self, etapa: str, linhas_processadas: int, total_linhas: int) -> None:
+        """Chamado ao fim de cada lote dentro de uma etapa."""
+    
+    def fim_etapa(self, etapa: str, total_linhas: int, duracao: float) -> None:
+        """Chamado quando uma etapa termina."""
+
+def emitir(observador: Optional[Observador], tipo: str, etapa: str,
+           linhas_processadas: int = 0, total_linhas: int = 0, duracao: float = 0.0) -> None:
+    """
+    Envia um evento ao observador, se houver.
+    
+    Args:
+        observador: Função que recebe o evento (None = nada a fazer)
+        tipo: Tipo do evento
+        etapa: Etapa do pipeline
+        linhas_processadas: Alunos já processados na etapa
+        total_linhas: Total de alunos da etapa
+        duracao: Duração da etapa em segundos
+    """
+    if observador is None:
+        return
+    observador(EventoProgresso(tipo, etapa, linhas_processadas, total_linhas, duracao))
+
+@contextmanager
+def acompanhar_etapa(observador: Optional[Observador], etapa: str, total_linhas: int = 0) -> Iterator[None]:
+    """
+    Emite inicio_etapa/fim_etapa (com a duração) em volta de um bloco.
+    
+    Args:
+        observador: Função que recebe os eventos (None = nada a fazer)
+        etapa: Etapa do pipeline
+        total_linhas: Total de alunos da etapa
+    """
+    if observador is None:
+        yield
+        return
+    
+    emitir(observador, INICIO_ETAPA, etapa, 0, total_linhas)
+    inicio = time.perf_counter()
+    yield
+    emitir(observador, FIM_ETAPA, etapa, total_linhas, total_linhas, time.perf_counter() - inicio)
+
+class RastreadorProgresso:
+    """
+    Observador que acumula os eventos e calcula o progresso geral.
+    
+    Pode ser lido por outra thread (ex.: a interface consultando uma tarefa
+    em segundo plano) enquanto o pipeline emite eventos.
+    """
+    
+    def __init__(self, pesos: Optional[Dict[str, float]] = None):
+        """
+        Inicializa o rastreador.
+        
+        Args:
+            pesos: Peso de cada etapa no progresso geral (padrão: PESOS_ETAPAS)
+        """
+        self.pesos = dict(pesos or PESOS_ETAPAS)
+        self._fracoes: Dict[str, float] = {}
+        self._eventos: List[EventoProgresso] = []
+        self._etapa_atual: Optional[str] = None
+        self._trava = threading.Lock()
+    
+    def __call__(self, evento: EventoProgresso) -> None:
+        with self._trava:
+            self._eventos.append(evento)
+            
+            if evento.tipo == INICIO_ETAPA:
+                self._etapa_atual = evento.etapa
+                self._fracoes.setdefault(evento.etapa, 0.0)
+            elif evento.tipo == PROGRESSO and evento.total_linhas:
+                self._fracoes[evento.etapa] = evento.linhas_processadas / evento.total_linhas
+            elif evento.tipo == FIM_ETAPA:
+                self._fracoes[evento.etapa] = 1.0
+    
+    @property
+    def etapa_atual(self) -> Optional[str]:
+        """Última etapa iniciada."""
+        return self._etapa_atual
+    
+    @property
+    def progresso(self) -> float:
+        """Progresso geral entre 0.0 e 1.0, ponderado pelas etapas executadas."""
+        with self._trava:
+            # Etapas que não rodam (ex.: carregamento ao predizer um DataFrame) não contam
+            etapas = [etapa for etapa in self.pesos if etapa in self._fracoes or etapa != ETAPA_CARREGAMENTO]
+            peso_total = sum(self.pesos[etapa] for etapa in etapas)
+            if not peso_total:
+                return 0.0
+            concluido = sum(self.pesos[etapa] * self._fracoes.get(etapa, 0.0) for etapa in etapas)
+            return min(concluido / peso_total, 1.0)
+    
+    def eventos(self) -> List[EventoProgresso]:
+        """Cópia dos eventos recebidos até agora."""
+        with self._trava:
+            return list(self._eventos)
+    
+    def duracoes(self) -> Dict[str, float]:
+        """Duração das etapas concluídas, em segundos."""
+        with self._trava:
+            return {evento.etapa: evento.duracao for evento in self._eventos if evento.tipo == FIM_ETAPA}
\ No newline at end of file
@@ -0,0 +1,178 @@
+﻿"""
+Troca do modelo em produção sem reiniciar o processo.
+
+Processos de longa duração (interface web) verificam periodicamente os
+arquivos de data/models. Quando um novo treino é gravado, o modelo é
+carregado e aquecido em segundo plano e só então substitui o anterior nos
+sistemas registrados. Predições em andamento terminam com o modelo que
+estavam usando; se o modelo novo falhar no carregamento ou no aquecimento,
+o anterior continua ativo.
+"""
+
+import threading
+import weakref
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from ..utilitarios import obter_registrador, metricas
+from ..configuracao import configuracoes
+from ..modelos import PreditorEvasaoEstudantil, calcular_versao_modelo
+from .preditor import SistemaPredicaoEvasao
+
+registrador = obter_registrador(__name__)
+
+# (caminho, mtime em ns, tamanho) de cada arquivo do modelo
+Assinatura = Tuple[Tuple[str, int, int], ...]
+
+class RecarregadorModelo:
+    """
+    Observa os arquivos do modelo e troca o preditor dos sistemas registrados.
+    
+    A troca é a atribuição de ``sistema.preditor_ml``; como o pipeline guarda
+    a referência ao preditor no início de cada execução, lotes em andamento
+    não são afetados.
+    """
+    
+    def __init__(self, intervalo: Optional[float] = None, caminhos: Optional[List[Path]] = None,
+                 fabrica_preditor: Optional[Callable[[], PreditorEvasaoEstudantil]] = None):
+        """
+        Inicializa o recarregador.
+        
+        Args:
+            intervalo: Segundos entre verificações
+                (padrão: configuracoes.execucao.intervalo_verificacao_modelo)
+            caminhos: Arquivos observados (padrão: PreditorEvasaoEstudantil.caminhos_padrao())
+            fabrica_preditor: Cria um preditor já carregado (padrão: carregar_modelo() com os caminhos padrão)
+        """
+        self.intervalo = intervalo or configuracoes.execucao.intervalo_verificacao_modelo
+        self.caminhos = [Path(caminho) for caminho in (caminhos or PreditorEvasaoEstudantil.caminhos_padrao())]
+        self._fabrica_preditor = fabrica_preditor or self._criar_preditor
+        self._sistemas: 'weakref.WeakSet[SistemaPredicaoEvasao]' = weakref.WeakSet()
+        self._assinatura_ativa: Assinatura = self.assinatura()
+        self._assinatura_pendente: Optional[Assinatura] = None
+        self._assinatura_rejeitada: Optional[Assinatura] = None
+        self.versao_ativa: Optional[str] = calcular_versao_modelo(self.caminhos)
+        self.ultimo_erro: Optional[str] = None
+        self._trava = threading.Lock()
+        # Uma recarga por vez; a trava acima só protege a lista de sistemas e a troca
+        self._trava_recarga = threading.Lock()
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    @staticmethod
+    def _criar_preditor() -> PreditorEvasaoEstudantil:
+        preditor = PreditorEvasaoEstudantil()
+        preditor.carregar_modelo()
+        return preditor
+    
+    def assinatura(self) -> Assinatura:
+        """Estado atual dos arquivos observados (arquivos ausentes têm mtime e tamanho -1)."""
+        itens = []
+        for caminho in self.caminhos:
+            try:
+                estado = caminho.stat()
+                itens.append((str(caminho), estado.st_mtime_ns, estado.st_size))
+            except OSError:
+                itens.append((str(caminho), -1, -1))
+        return tuple(itens)
+    
+    def registrar(self, sistema: SistemaPredicaoEvasao) -> None:
+        """Inclui um sistema inicializado entre os que recebem o modelo novo."""
+        with self._trava:
+            self._sistemas.add(sistema)
+    
+    def verificar(self) -> bool:
+        """
+        Verifica os arquivos uma vez e recarrega se mudaram.
+        
+        A mudança precisa se repetir em duas verificações seguidas antes da
+        recarga, para não ler um modelo que ainda está sendo gravado.
+        
+        Returns:
+            True se o modelo foi trocado
+        """
+        assinatura = self.assinatura()
+        if assinatura == self._assinatura_ativa or assinatura == self._assinatura_rejeitada:
+            self._assinatura_pendente = None
+            return False
+        
+        if assinatura != self._assinatura_pendente:
+            registrador.info("Alteração detectada nos arquivos do modelo; aguardando gravação terminar")
+            self._assinatura_pendente = assinatura
+            return False
+        
+        self._assinatura_pendente = None
+        return self.recarregar(assinatura)
+    
+    def recarregar(self, assinatura: Optional[Assinatura] = None) -> bool:
+        """
+        Carrega, aquece e coloca em uso o modelo atual de data/models.
+        
+        Um único preditor é carregado e aquecido fora da trava (registrar()
+        não espera a recarga) e depois entregue a todos os sistemas
+        registrados. Se ele falhar, os sistemas continuam com o modelo anterior.
+        
+        Args:
+            assinatura: Estado dos arquivos que está sendo carregado (padrão: o atual)
+        
+        Returns:
+            True se o modelo foi trocado
+        """
+        assinatura = assinatura or self.assinatura()
+        
+        with self._trava_recarga:
+            versao_anterior = self.versao_ativa
+            try:
+                preditor = self._fabrica_preditor()
+                preditor.aquecer()
+            except Exception as e:
+                self._assinatura_rejeitada = assinatura
+                self.ultimo_erro = str(e)
+                metricas.incrementar('recargas_modelo_total', descricao='Recargas do modelo em produção',
+                                     resultado='falha')
+                registrador.error(f"Novo modelo rejeitado, mantendo a versão {versao_anterior}: {e}")
+                return False
+            
+            versao_nova = preditor.versao
+            with self._trava:
+                sistemas = list(self._sistemas)
+                for sistema in sistemas:
+                    sistema.trocar_preditor(preditor)
+                self._assinatura_ativa = assinatura
+                self._assinatura_rejeitada = None
+                self.versao_ativa = versao_nova
+                self.ultimo_erro = None
+        
+        metricas.incrementar('recargas_modelo_total', descricao='Recargas do modelo em produção',
+                             resultado='sucesso')
+        if versao_anterior:
+            metricas.definir('modelo_ativo', 0, descricao='Versão do modelo em uso (1 = ativa)',
+                             versao=versao_anterior)
+        metricas.definir('modelo_ativo', 1, descricao='Versão do modelo em uso (1 = ativa)', versao=versao_nova)
+        registrador.info(f"Modelo trocado: {versao_anterior} -> {versao_nova} ({len(sistemas)} sistema(s))")
+        return True
+    
+    def iniciar(self) -> 'RecarregadorModelo':
+        """Inicia a verificação periódica em uma thread daemon."""
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar, name='recarregador-modelo', daemon=True)
+        self._thread.start()
+        registrador.info(f"Observando {configuracoes.dados.diretorio_modelos} a cada {self.intervalo:.0f}s")
+        return self
+    
+    def parar(self) -> None:
+        """Interrompe a verificação periódica."""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def _executar(self) -> None:
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.verificar()
+            except Exception as e:
+                registrador.error(f"Erro ao verificar arquivos do modelo: {e}")
\ No newline at end of file
@@ -0,0 +1,221 @@
+﻿"""
+Montagem da saída de predições em tabela Arrow, coluna a coluna.
+
+Produz as mesmas colunas e os mesmos valores de uma PredicaoAluno por aluno
+(SistemaPredicaoEvasao._criar_predicao_aluno), mas com operações sobre
+arrays inteiros: regras de urgência e top-3 em NumPy, textos formatados uma
+vez por valor distinto (utilitarios.colunar) e combinados com pyarrow.compute.
+"""
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..utilitarios import obter_registrador, CarregadorDados, mapear_por_valor, mapear_valores
+from .preditor import PontuacaoExecucao, FATORES_POR_REGRA, ML_NAO_CALCULADO, NOMES_FEATURES_AMIGAVEIS
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = pc = None
+
+registrador = obter_registrador(__name__)
+
+# Colunas da saída, na ordem do CSV de principal.py
+COLUNAS_PREDICAO = [
+    'Nome', 'Matricula', 'Situacao_Atual_Sistema', 'Curso', 'Sexo', 'Turma',
+    'Status_Predicao', 'Situacao_Predita', 'Probabilidade_Situacao',
+    'Probabilidade_Evasao_Total', 'Nivel_Urgencia', 'Fator_Principal',
+    'Valor_Importancia', 'Confianca_Predicao', 'Fonte_Predicao',
+    'Predicao_ML_Original', 'Prob_ML_Original',
+    'Top_1_Situacao_ML', 'Top_1_Probabilidade_ML',
+    'Top_2_Situacao_ML', 'Top_2_Probabilidade_ML',
+    'Top_3_Situacao_ML', 'Top_3_Probabilidade_ML', 'Versao_Modelo'
+]
+
+# Níveis de urgência: MATRICULADO e, para os demais, limites mínimos de probabilidade
+NIVEIS_URGENCIA = ['NENHUMA', 'URGENTE', 'ALTA', 'MEDIA', 'BAIXA']
+LIMITES_URGENCIA = (0.9, 0.8, 0.7)
+
+def _formatar_percentual(probabilidade: float) -> str:
+    return f"{probabilidade*100:.1f}%"
+
+def _fator_regra(regra: str) -> str:
+    fator = FATORES_POR_REGRA.get(regra, 'N/A')
+    return NOMES_FEATURES_AMIGAVEIS.get(fator, fator)
+
+def _rotulos(codigos: np.ndarray, textos: Sequence[str]) -> 'pa.Array':
+    """Texto de cada linha a partir do código (posição em textos)."""
+    return pa.array(list(textos), type=pa.string()).take(pa.array(codigos))
+
+def _texto_aluno(tabela: 'pa.Table', coluna: str, padrao: str) -> 'pa.Array':
+    """str() de uma coluna dos alunos, ou o padrão se ela não existir."""
+    if coluna in tabela.column_names:
+        return mapear_por_valor(tabela.column(coluna), str)
+    return pa.repeat(pa.scalar(padrao, pa.string()), tabela.num_rows)
+
+def _nomes(tabela: 'pa.Table') -> 'pa.Array':
+    """Nome de cada aluno (Aluno_N se a coluna não existir)."""
+    if 'Nome' in tabela.column_names:
+        return mapear_por_valor(tabela.column('Nome'), str)
+    numeros = pc.cast(pa.array(np.arange(1, tabela.num_rows + 1)), pa.string())
+    return pc.binary_join_element_wise('Aluno_', numeros, '')
+
+def _matriculas(tabela: 'pa.Table') -> 'pa.Array':
+    """Mesma regra de CarregadorDados.limpar_identificador_aluno, coluna a coluna."""
+    if 'Nome' in tabela.column_names:
+        matricula = mapear_por_valor(tabela.column('Nome'), lambda nome: f"NOME_{str(nome).replace(' ', '_')}")
+    else:
+        matricula = pa.repeat(pa.scalar('NOME_Desconhecido', pa.string()), tabela.num_rows)
+    
+    # Do menos ao mais preferido: o primeiro campo preenchido prevalece
+    for campo in reversed(CarregadorDados.CAMPOS_MATRICULA):
+        if campo in tabela.column_names:
+            coluna = tabela.column(campo)
+            preenchido = mapear_por_valor(coluna, pd.notna, pa.bool_())
+            matricula = pc.if_else(preenchido, mapear_por_valor(coluna, lambda valor: str(valor).strip()), matricula)
+    return matricula
+
+def _por_aluno(valores_modelo: 'pa.Array', posicoes: np.ndarray, usar_modelo: np.ndarray,
+               restantes) -> 'pa.Array':
+    """
+    Valor do modelo nas linhas marcadas em usar_modelo e restantes nas demais.
+    
+    Args:
+        valores_modelo: Um valor por linha pontuada pelo modelo
+        posicoes: Posição de cada aluno nas saídas do modelo (-1 = decidido por regra)
+        usar_modelo: Linhas que recebem o valor do modelo (só com posição >= 0)
+        restantes: Array ou escalar das demais linhas
+    """
+    if not len(valores_modelo):
+        return restantes if isinstance(restantes, (pa.Array, pa.ChunkedArray)) else \
+            pa.repeat(pa.scalar(restantes, pa.string()), len(posicoes))
+    tomados = valores_modelo.take(pa.array(np.maximum(posicoes, 0)))
+    return pc.if_else(pa.array(usar_modelo), tomados, restantes)
+
+def _fator_principal_shap(valores_shap, nomes_features: List[str]) -> Tuple['pa.Array', np.ndarray]:
+    """
+    Fator principal e |valor| SHAP de cada linha pontuada (critério de cache_predicoes.fator_principal).
+    
+    Returns:
+        Tuple com (nome amigável da feature, |SHAP| em float64)
+    """
+    # Versões antigas do SHAP retornam uma lista com um array por classe
+    valores = np.stack(valores_shap, axis=-1) if isinstance(valores_shap, list) else np.asarray(valores_shap)
+    linhas = np.arange(len(valores))
+    if valores.ndim == 3:
+        feature = np.argmax(np.max(np.abs(valores), axis=2), axis=1)
+        classe = np.argmax(np.abs(valores[linhas, feature]), axis=1)
+        valor = valores[linhas, feature, classe]
+    else:
+        feature = np.argmax(np.abs(valores), axis=1)
+        valor = valores[linhas, feature]
+    
+    nomes = [NOMES_FEATURES_AMIGAVEIS.get(nome, nome) for nome in nomes_features]
+    return _rotulos(feature, nomes), np.abs(valor.astype(np.float64))
+
+def montar_tabela_predicoes(tabela: 'pa.Table', execucao: PontuacaoExecucao) -> Tuple['pa.Table', int]:
+    """
+    Monta a tabela de predições de uma execução.
+    
+    Args:
+        tabela: Tabela com os dados dos alunos (mesma ordem de linhas da execução)
+        execucao: Regras e modelo da execução, com as saídas do modelo em arrays
+    
+    Returns:
+        Tuple com (tabela com COLUNAS_PREDICAO, alunos com status MATRICULADO)
+    """
+    preditor = execucao.preditor
+    total = tabela.num_rows
+    posicoes = execucao.posicoes_modelo
+    executado = posicoes >= 0
+    indices_modelo = np.maximum(posicoes, 0)
+    
+    resultados_regras = execucao.resultados_regras
+    regras = resultados_regras['regra_aplicada'].to_numpy(dtype=object)
+    por_modelo = regras == 'ML'
+    situacao_regra = resultados_regras['situacao'].to_numpy(dtype=object)
+    
+    # Situação e probabilidade: da regra ou, nas linhas sem regra, do modelo
+    predicoes_ml = np.asarray(execucao.predicoes_ml)
+    probabilidades_ml = np.asarray(execucao.probabilidades_ml)
+    probabilidade = resultados_regras['probabilidade'].to_numpy(dtype=np.float64, na_value=np.nan)
+    matriculado = situacao_regra == 'Matriculado'
+    situacao = pa.array(situacao_regra, type=pa.string(), from_pandas=True)
+    if execucao.total_modelo:
+        maximas = probabilidades_ml.max(axis=1).astype(np.float64)
+        probabilidade = np.where(por_modelo, maximas[indices_modelo], probabilidade)
+        matriculado_ml = mapear_valores(predicoes_ml, lambda rotulo: rotulo == 'Matriculado', pa.bool_())
+        matriculado = np.where(por_modelo, matriculado_ml.to_numpy(zero_copy_only=False)[indices_modelo],
+                               matriculado)
+        situacao = _por_aluno(mapear_valores(predicoes_ml, str), posicoes, por_modelo, situacao)
+    percentual = mapear_valores(probabilidade, _formatar_percentual)
+    
+    # Urgência: NENHUMA para matriculados; para os demais, pela probabilidade
+    urgencia = np.select(
+        [matriculado] + [probabilidade >= limite for limite in LIMITES_URGENCIA],
+        list(range(len(NIVEIS_URGENCIA) - 1)), len(NIVEIS_URGENCIA) - 1
+    )
+    
+    # Fator principal: SHAP onde o modelo rodou; no modo regras primeiro, a coluna da regra
+    fator = mapear_valores(regras, _fator_regra)
+    valor_importancia = np.zeros(total, dtype=np.float64)
+    if execucao.total_modelo:
+        fator_ml, valor_ml = _fator_principal_shap(execucao.valores_shap, execucao.nomes_features)
+        fator = _por_aluno(fator_ml, posicoes, executado, fator)
+        valor_importancia = np.where(executado, valor_ml[indices_modelo], valor_importancia)
+    
+    # Fonte: "Regra X: razão" ou Predição ML
+    regras_arrow = pa.array(regras, type=pa.string())
+    fonte = pc.if_else(
+        por_modelo, 'Predição ML',
+        pc.binary_join_element_wise('Regra ', regras_arrow, ': ',
+                                    pa.array(resultados_regras['razao'].to_numpy(dtype=object), type=pa.string()), '')
+    )
+    
+    # Top 3 do modelo, em ordem decrescente de probabilidade (empates na ordem das classes)
+    nomes_classes = [str(nome) for nome in preditor.nomes_classes()]
+    tops = []
+    ordem = np.argsort(-probabilidades_ml, axis=1, kind='stable') if execucao.total_modelo else None
+    for posicao_top in range(3):
+        if ordem is not None and posicao_top < ordem.shape[1]:
+            classe = ordem[:, posicao_top]
+            nome = _rotulos(np.minimum(classe, len(nomes_classes)), nomes_classes + ['N/A'])
+            prob = mapear_valores(
+                probabilidades_ml[np.arange(len(classe)), classe].astype(np.float64), _formatar_percentual
+            )
+        else:
+            nome = pa.repeat(pa.scalar('N/A', pa.string()), execucao.total_modelo)
+            prob = pa.repeat(pa.scalar('0%', pa.string()), execucao.total_modelo)
+        tops.append((_por_aluno(nome, posicoes, executado, ML_NAO_CALCULADO),
+                     _por_aluno(prob, posicoes, executado, 'N/A')))
+    
+    status = _rotulos(np.where(matriculado, 0, 1), ['MATRICULADO', 'RISCO_EVASAO'])
+    colunas = [
+        _nomes(tabela),
+        _matriculas(tabela),
+        _texto_aluno(tabela, 'Situação', 'Não informada'),
+        _texto_aluno(tabela, 'Curso', 'Não informado'),
+        _texto_aluno(tabela, 'Sexo', 'Não informado'),
+        _texto_aluno(tabela, 'Turma Atual', 'Não informada'),
+        status,
+        situacao,
+        percentual,
+        percentual,
+        _rotulos(urgencia, NIVEIS_URGENCIA),
+        fator,
+        pa.array(valor_importancia),
+        pa.repeat(pa.scalar('Alta', pa.string()), total),
+        fonte,
+        tops[0][0], tops[0][1],
+        tops[0][0], tops[0][1],
+        tops[1][0], tops[1][1],
+        tops[2][0], tops[2][1],
+        pa.repeat(pa.scalar(preditor.versao or '', pa.string()), total)
+    ]
+    
+    matriculados = int(np.count_nonzero(matriculado))
+    registrador.debug(f"Tabela de predições montada: {total} alunos, {matriculados} matriculados")
+    return pa.Table.from_arrays(colunas, names=COLUNAS_PREDICAO), matriculados
\ No newline at end of file
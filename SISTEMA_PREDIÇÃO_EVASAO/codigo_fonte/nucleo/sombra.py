@@ -0,0 +1,279 @@
+﻿"""
+Modo sombra: avaliação de um modelo candidato no tráfego real.
+
+Cada execução é pontuada pelo modelo de produção (que continua decidindo o
+resultado) e, em uma thread separada, pelo modelo candidato. Ao final, um
+relatório compara as classes previstas por classe e por regra de negócio e
+mede a latência de inferência de cada modelo (sem o SHAP, que o candidato
+não calcula), para decidir se o candidato pode ser promovido para data/models.
+"""
+
+import json
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..utilitarios import obter_registrador, metricas
+from ..configuracao import configuracoes
+from ..modelos import PreditorEvasaoEstudantil
+from ..modelos.modelo_ml import agrupar_vetores_iguais
+
+registrador = obter_registrador(__name__)
+
+def compartilha_preprocessamento(producao: PreditorEvasaoEstudantil,
+                                 candidato: PreditorEvasaoEstudantil) -> bool:
+    """
+    Verifica se os dois modelos usam a mesma matriz pré-processada.
+    
+    É o caso quando foram treinados com os mesmos encoders, imputadores e
+    features; caso contrário o candidato pré-processa os dados por conta própria.
+    """
+    colunas_producao = getattr(producao.modelo, 'feature_names_in_', None)
+    colunas_candidato = getattr(candidato.modelo, 'feature_names_in_', None)
+    if colunas_producao is None or colunas_candidato is None or list(colunas_producao) != list(colunas_candidato):
+        return False
+    
+    if producao.codificadores_rotulos.keys() != candidato.codificadores_rotulos.keys():
+        return False
+    for coluna, encoder in producao.codificadores_rotulos.items():
+        if not np.array_equal(encoder.classes_, candidato.codificadores_rotulos[coluna].classes_):
+            return False
+    
+    if producao.imputadores.keys() != candidato.imputadores.keys():
+        return False
+    for coluna, imputador in producao.imputadores.items():
+        if not np.array_equal(imputador.statistics_, candidato.imputadores[coluna].statistics_):
+            return False
+    
+    return True
+
+def _nomear_classes(preditor: PreditorEvasaoEstudantil, rotulos) -> List[str]:
+    """Converte os rótulos retornados pelo modelo em nomes de classe."""
+    nomes = preditor.nomes_classes()
+    return [nomes[int(rotulo)] if int(rotulo) < len(nomes) else str(rotulo) for rotulo in rotulos]
+
+def _taxa(parte: int, total: int) -> float:
+    return round(parte / total, 4) if total else 0.0
+
+class AvaliadorSombra:
+    """
+    Pontua as execuções também com o modelo candidato e gera o relatório de divergências.
+    
+    O candidato roda em uma thread própria (o XGBoost libera o GIL durante a
+    predição), então a produção não espera por ele: o relatório é montado
+    depois, na mesma thread, e gravado em output/.
+    """
+    
+    def __init__(self, candidato: PreditorEvasaoEstudantil, arquivo_relatorio: Optional[Path] = None):
+        """
+        Inicializa o avaliador.
+        
+        Args:
+            candidato: Modelo candidato já carregado
+            arquivo_relatorio: JSON gravado a cada execução
+                (padrão: output/ + configuracoes.execucao.arquivo_relatorio_sombra)
+        """
+        self.candidato = candidato
+        self.arquivo_relatorio = arquivo_relatorio or (
+            configuracoes.dados.diretorio_saida / configuracoes.execucao.arquivo_relatorio_sombra
+        )
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='modelo-sombra')
+        self._ultimo: Optional[Future] = None
+    
+    @classmethod
+    def carregar(cls, diretorio: Optional[Path] = None, arquivo_relatorio: Optional[Path] = None) -> 'AvaliadorSombra':
+        """
+        Carrega o modelo candidato de um diretório.
+        
+        O diretório segue a estrutura de data/models; mapeamento de classes e
+        artifacts de treino ausentes são lidos do modelo de produção.
+        
+        Args:
+            diretorio: Diretório do candidato (padrão: configuracoes.dados.diretorio_modelo_candidato)
+            arquivo_relatorio: JSON do relatório
+        
+        Raises:
+            FileNotFoundError: Se o arquivo do modelo candidato não existir
+        """
+        diretorio = Path(diretorio or configuracoes.dados.diretorio_modelo_candidato)
+        caminho_modelo, caminho_mapeamento, caminho_artifacts = PreditorEvasaoEstudantil.caminhos_padrao()
+        
+        def no_candidato(caminho_producao: Path) -> Path:
+            caminho = diretorio / caminho_producao.name
+            return caminho if caminho.exists() else caminho_producao
+        
+        registrador.info(f"Carregando modelo candidato de {diretorio}")
+        candidato = PreditorEvasaoEstudantil()
+        candidato.carregar_modelo(diretorio / caminho_modelo.name, no_candidato(caminho_mapeamento),
+                                  no_candidato(caminho_artifacts))
+        candidato.aquecer()
+        return cls(candidato, arquivo_relatorio)
+    
+    def pontuar(self, producao: PreditorEvasaoEstudantil, df: pd.DataFrame,
+                df_processado: pd.DataFrame) -> Future:
+        """
+        Submete a pontuação do candidato e retorna imediatamente.
+        
+        Args:
+            producao: Modelo de produção da execução
+            df: Dados brutos (usados só se a matriz não puder ser compartilhada)
+            df_processado: Matriz pré-processada pela produção
+        """
+        compartilhada = compartilha_preprocessamento(producao, self.candidato)
+        return self._executor.submit(self._pontuar_candidato, None if compartilhada else df, df_processado)
+    
+    def _pontuar_candidato(self, df: Optional[pd.DataFrame], df_processado: pd.DataFrame) -> Dict[str, Any]:
+        if df is not None:
+            df_processado = self.candidato.preprocessar_dados(df)
+        
+        # Mesmos vetores distintos que a produção pontua, para a latência ser comparável
+        inverso = None
+        if configuracoes.execucao.deduplicar_vetores and len(df_processado):
+            primeiras, inverso = agrupar_vetores_iguais(df_processado)
+            df_processado = df_processado.iloc[primeiras]
+        
+        # Só a inferência é cronometrada, como 'inferencia' na produção;
+        # multi:softprob: a classe prevista é a de maior probabilidade (o mesmo que predict())
+        inicio = time.perf_counter()
+        probabilidades = self.candidato.modelo.predict_proba(df_processado)
+        duracao = time.perf_counter() - inicio
+        
+        if inverso is not None:
+            probabilidades = probabilidades[inverso]
+        rotulos = self.candidato.modelo.classes_[np.argmax(probabilidades, axis=1)]
+        return {
+            'classes': _nomear_classes(self.candidato, rotulos),
+            'probabilidade_maxima': probabilidades.max(axis=1),
+            'duracao': duracao,
+            'matriz_compartilhada': df is None
+        }
+    
+    def comparar(self, futuro_candidato: Future, producao: PreditorEvasaoEstudantil,
+                 predicoes_producao: List[Any], probabilidades_producao: List[List[float]],
+                 regras_aplicadas: List[str], duracao_producao: float, sobrecarga_producao: float) -> Future:
+        """
+        Submete a montagem do relatório (na thread do candidato) e retorna imediatamente.
+        
+        Args:
+            futuro_candidato: Retorno de pontuar()
+            producao: Modelo de produção da execução
+            predicoes_producao: Rótulos previstos pela produção
+            probabilidades_producao: Probabilidades da produção
+            regras_aplicadas: Regra de negócio que decidiu cada aluno ('ML' = modelo)
+            duracao_producao: Duração da inferência do modelo de produção (sem o SHAP)
+            sobrecarga_producao: Tempo gasto pela produção para despachar o modo sombra
+        
+        Returns:
+            Future com o relatório (ver aguardar())
+        """
+        self._ultimo = self._executor.submit(
+            self._montar_relatorio, futuro_candidato, producao, predicoes_producao,
+            probabilidades_producao, regras_aplicadas, duracao_producao, sobrecarga_producao
+        )
+        return self._ultimo
+    
+    def _montar_relatorio(self, futuro_candidato: Future, producao: PreditorEvasaoEstudantil,
+                          predicoes_producao: List[Any], probabilidades_producao: List[List[float]],
+                          regras_aplicadas: List[str], duracao_producao: float,
+                          sobrecarga_producao: float) -> Dict[str, Any]:
+        try:
+            candidato = futuro_candidato.result()
+        except Exception as e:
+            metricas.incrementar('sombra_falhas_total', descricao='Execuções em que o modelo candidato falhou')
+            registrador.error(f"Modelo candidato falhou no modo sombra: {e}")
+            return {'erro': str(e), 'versao_candidato': self.candidato.versao}
+        
+        classes_producao = _nomear_classes(producao, predicoes_producao)
+        probabilidade_producao = np.max(probabilidades_producao, axis=1)
+        total = len(classes_producao)
+        por_classe: Dict[str, Dict[str, Any]] = defaultdict(lambda: {'total': 0, 'divergencias': 0,
+                                                                    'predicoes_candidato': Counter()})
+        por_regra: Dict[str, Dict[str, Any]] = defaultdict(lambda: {'total': 0, 'divergencias': 0})
+        
+        divergencias = 0
+        for classe_producao, classe_candidato, regra in zip(classes_producao, candidato['classes'], regras_aplicadas):
+            divergente = classe_producao != classe_candidato
+            divergencias += divergente
+            
+            por_classe[classe_producao]['total'] += 1
+            por_classe[classe_producao]['divergencias'] += divergente
+            por_classe[classe_producao]['predicoes_candidato'][classe_candidato] += 1
+            
+            por_regra[regra]['total'] += 1
+            por_regra[regra]['divergencias'] += divergente
+        
+        for grupo in list(por_classe.values()) + list(por_regra.values()):
+            grupo['taxa_divergencia'] = _taxa(grupo['divergencias'], grupo['total'])
+        for classe in por_classe.values():
+            classe['predicoes_candidato'] = dict(classe['predicoes_candidato'].most_common())
+        
+        # Só nos alunos decididos pelo modelo a divergência muda o resultado final
+        for regra, grupo in por_regra.items():
+            grupo['afeta_resultado'] = regra == 'ML'
+        divergencias_resultado = por_regra['ML']['divergencias'] if 'ML' in por_regra else 0
+        
+        relatorio = {
+            'gerado_em': datetime.now().isoformat(timespec='seconds'),
+            'versao_producao': producao.versao,
+            'versao_candidato': self.candidato.versao,
+            'total_alunos': total,
+            'divergencias': divergencias,
+            'taxa_divergencia': _taxa(divergencias, total),
+            'divergencias_resultado_final': divergencias_resultado,
+            'diferenca_media_confianca': round(float(np.mean(candidato['probabilidade_maxima'] - probabilidade_producao)), 4),
+            'matriz_compartilhada': candidato['matriz_compartilhada'],
+            'por_classe': dict(sorted(por_classe.items())),
+            'por_regra': dict(sorted(por_regra.items())),
+            'latencia': {
+                'producao_segundos': round(duracao_producao, 4),
+                'candidato_segundos': round(candidato['duracao'], 4),
+                'producao_ms_por_aluno': round(duracao_producao * 1000 / total, 4) if total else 0.0,
+                'candidato_ms_por_aluno': round(candidato['duracao'] * 1000 / total, 4) if total else 0.0,
+                'sobrecarga_producao_segundos': round(sobrecarga_producao, 6)
+            }
+        }
+        
+        metricas.incrementar('sombra_linhas_total', total, descricao='Alunos pontuados pelo modelo candidato')
+        for regra, grupo in por_regra.items():
+            if grupo['divergencias']:
+                metricas.incrementar('sombra_divergencias_total', grupo['divergencias'],
+                                     descricao='Alunos em que candidato e produção divergem', regra=regra)
+        metricas.observar('duracao_etapa_segundos', candidato['duracao'],
+                          descricao='Latência de cada etapa do pipeline', etapa='modelo_candidato')
+        
+        self._salvar(relatorio)
+        registrador.info(
+            f"Modo sombra: {divergencias}/{total} divergências ({relatorio['taxa_divergencia']:.1%}), "
+            f"{divergencias_resultado} no resultado final; candidato {candidato['duracao']:.2f}s, "
+            f"produção {duracao_producao:.2f}s"
+        )
+        return relatorio
+    
+    def _salvar(self, relatorio: Dict[str, Any]) -> None:
+        try:
+            self.arquivo_relatorio.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.arquivo_relatorio, 'w', encoding='utf-8') as f:
+                json.dump(relatorio, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            registrador.error(f"Erro ao salvar relatório do modo sombra: {e}")
+    
+    def aguardar(self, tempo_limite: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Bloqueia até o relatório da última execução ficar pronto.
+        
+        Returns:
+            Relatório (None se nenhuma execução foi comparada)
+        """
+        if self._ultimo is None:
+            return None
+        return self._ultimo.result(timeout=tempo_limite)
+    
+    def encerrar(self) -> None:
+        """Encerra a thread do candidato após terminar o que está pendente."""
+        self._executor.shutdown(wait=True)
\ No newline at end of file
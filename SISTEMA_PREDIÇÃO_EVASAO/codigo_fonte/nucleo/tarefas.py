@@ -0,0 +1,274 @@
+﻿"""
+Execução de predições em segundo plano.
+
+A interface web submete a predição e recebe um id de tarefa; o trabalho roda
+em um pool de threads e a interface consulta o progresso real emitido pelas
+etapas do pipeline (ver progresso.py), sem bloquear outros usuários.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from ..utilitarios import obter_registrador
+from ..configuracao import configuracoes
+from .preditor import SistemaPredicaoEvasao
+from .recarregador import RecarregadorModelo
+from .progresso import RastreadorProgresso, Observador, TokenCancelamento, PredicaoCancelada
+
+registrador = obter_registrador(__name__)
+
+# Estados de uma tarefa
+ESTADO_PENDENTE = 'pendente'
+ESTADO_EXECUTANDO = 'executando'
+ESTADO_CONCLUIDA = 'concluida'
+ESTADO_FALHOU = 'falhou'
+ESTADO_CANCELADA = 'cancelada'
+
+# Função executada pela tarefa: recebe o sistema compartilhado, o observador e o token de cancelamento
+FuncaoTarefa = Callable[[SistemaPredicaoEvasao, Observador, TokenCancelamento], Any]
+
+@dataclass
+class Tarefa:
+    """Predição submetida ao gerenciador."""
+    id: str
+    descricao: str
+    chave: Optional[str] = None
+    estado: str = ESTADO_PENDENTE
+    resultado: Any = None
+    erro: Optional[str] = None
+    criada_em: float = field(default_factory=time.time)
+    iniciada_em: Optional[float] = None
+    concluida_em: Optional[float] = None
+    rastreador: RastreadorProgresso = field(default_factory=RastreadorProgresso, repr=False)
+    cancelamento: TokenCancelamento = field(default_factory=TokenCancelamento, repr=False)
+    futuro: Optional[Future] = field(default=None, repr=False)
+    
+    @property
+    def progresso(self) -> float:
+        """Progresso entre 0.0 e 1.0."""
+        return 1.0 if self.estado == ESTADO_CONCLUIDA else self.rastreador.progresso
+    
+    @property
+    def etapa_atual(self) -> Optional[str]:
+        """Etapa do pipeline em execução."""
+        return self.rastreador.etapa_atual
+    
+    @property
+    def finalizada(self) -> bool:
+        """True se a tarefa terminou (com sucesso ou erro)."""
+        return self.estado in (ESTADO_CONCLUIDA, ESTADO_FALHOU, ESTADO_CANCELADA)
+    
+    @property
+    def duracao(self) -> Optional[float]:
+        """Tempo de execução em segundos (até agora, se ainda em andamento)."""
+        if self.iniciada_em is None:
+            return None
+        return (self.concluida_em or time.time()) - self.iniciada_em
+
+class GerenciadorTarefas:
+    """
+    Pool de threads que executa predições e guarda o estado de cada tarefa.
+    
+    Todas as threads do pool usam um único SistemaPredicaoEvasao (modelo e
+    explicador SHAP carregados uma vez), criado na primeira tarefa: o estado
+    de cada execução, como as contagens das regras, fica na própria execução,
+    então o mesmo sistema pontua vários lotes ao mesmo tempo. Com um
+    RecarregadorModelo, o sistema é registrado nele e passa a receber os
+    modelos novos.
+    """
+    
+    def __init__(self, fabrica_sistema: Optional[Callable[[], SistemaPredicaoEvasao]] = None,
+                 trabalhadores: Optional[int] = None, tarefas_retidas: Optional[int] = None,
+                 recarregador: Optional[RecarregadorModelo] = None):
+        """
+        Inicializa o gerenciador.
+        
+        Args:
+            fabrica_sistema: Cria um sistema já inicializado
+                (padrão: SistemaPredicaoEvasao() + inicializar())
+            trabalhadores: Tarefas simultâneas (padrão: configuracoes.execucao.trabalhadores_tarefas)
+            tarefas_retidas: Tarefas finalizadas mantidas em memória
+                (padrão: configuracoes.execucao.tarefas_retidas)
+            recarregador: Troca o modelo dos sistemas quando data/models muda
+        """
+        self._fabrica_sistema = fabrica_sistema or self._criar_sistema
+        self._trabalhadores = trabalhadores or configuracoes.execucao.trabalhadores_tarefas
+        self._tarefas_retidas = tarefas_retidas or configuracoes.execucao.tarefas_retidas
+        self._executor = ThreadPoolExecutor(max_workers=self._trabalhadores,
+                                            thread_name_prefix='tarefa-predicao')
+        self._tarefas: 'OrderedDict[str, Tarefa]' = OrderedDict()
+        self._sistema: Optional[SistemaPredicaoEvasao] = None
+        self._trava_sistema = threading.Lock()
+        self._trava = threading.Lock()
+        self.recarregador = recarregador
+    
+    @staticmethod
+    def _criar_sistema() -> SistemaPredicaoEvasao:
+        sistema = SistemaPredicaoEvasao()
+        sistema.inicializar()
+        return sistema
+    
+    def _sistema_compartilhado(self) -> SistemaPredicaoEvasao:
+        """Retorna (criando na primeira vez) o sistema usado por todas as tarefas."""
+        with self._trava_sistema:
+            if self._sistema is None:
+                registrador.info("Carregando sistema compartilhado pelas tarefas")
+                sistema = self._fabrica_sistema()
+                if self.recarregador is not None:
+                    self.recarregador.registrar(sistema)
+                self._sistema = sistema
+            return self._sistema
+    
+    def submeter(self, funcao: FuncaoTarefa, descricao: str = '', chave: Optional[str] = None) -> str:
+        """
+        Submete uma tarefa ao pool.
+        
+        Args:
+            funcao: Recebe (sistema, observador, cancelamento) e retorna o resultado da tarefa
+            descricao: Texto exibido ao usuário
+            chave: Identifica o trabalho (ex.: hash do arquivo). Se já existir
+                tarefa com a mesma chave em andamento ou concluída, o id dela é
+                reaproveitado em vez de processar de novo
+        
+        Returns:
+            Id da tarefa
+        """
+        with self._trava:
+            if chave is not None:
+                for tarefa in reversed(self._tarefas.values()):
+                    if tarefa.chave == chave and tarefa.estado not in (ESTADO_FALHOU, ESTADO_CANCELADA):
+                        registrador.info(f"Reaproveitando tarefa {tarefa.id} para a chave {chave[:12]}")
+                        return tarefa.id
+            
+            tarefa = Tarefa(id=uuid.uuid4().hex, descricao=descricao, chave=chave)
+            self._tarefas[tarefa.id] = tarefa
+            tarefa.futuro = self._executor.submit(self._executar, tarefa, funcao)
+            self._descartar_antigas()
+        
+        registrador.info(f"Tarefa {tarefa.id} submetida: {descricao}")
+        return tarefa.id
+    
+    def submeter_dataframe(self, df: pd.DataFrame, descricao: str = '', chave: Optional[str] = None) -> str:
+        """
+        Submete a predição de um DataFrame já carregado.
+        
+        O resultado da tarefa é o par (predicoes, estatisticas).
+        """
+        return self.submeter(
+            lambda sistema, observador, cancelamento: sistema.predizer_dataframe(df, observador, cancelamento),
+            descricao, chave
+        )
+    
+    def submeter_arquivo(self, caminho_arquivo, descricao: str = '', chave: Optional[str] = None) -> str:
+        """
+        Submete a predição de um arquivo de alunos.
+        
+        O resultado da tarefa é o par (predicoes, estatisticas).
+        """
+        return self.submeter(
+            lambda sistema, observador, cancelamento: sistema.predizer_alunos(caminho_arquivo, observador, cancelamento),
+            descricao or str(caminho_arquivo), chave
+        )
+    
+    def _executar(self, tarefa: Tarefa, funcao: FuncaoTarefa) -> Any:
+        tarefa.estado = ESTADO_EXECUTANDO
+        tarefa.iniciada_em = time.time()
+        try:
+            # Cancelada enquanto aguardava na fila
+            tarefa.cancelamento.verificar()
+            tarefa.resultado = funcao(self._sistema_compartilhado(), tarefa.rastreador, tarefa.cancelamento)
+            tarefa.estado = ESTADO_CONCLUIDA
+            registrador.info(f"Tarefa {tarefa.id} concluída em {tarefa.duracao:.1f}s")
+        except PredicaoCancelada as e:
+            tarefa.erro = str(e)
+            tarefa.estado = ESTADO_CANCELADA
+            registrador.info(f"Tarefa {tarefa.id} cancelada")
+        except Exception as e:
+            tarefa.erro = str(e)
+            tarefa.estado = ESTADO_FALHOU
+            registrador.error(f"Tarefa {tarefa.id} falhou: {e}")
+        finally:
+            tarefa.concluida_em = time.time()
+        return tarefa.resultado
+    
+    def _descartar_antigas(self) -> None:
+        """Remove as tarefas finalizadas mais antigas além do limite (chamado com a trava)."""
+        finalizadas = [tarefa_id for tarefa_id, tarefa in self._tarefas.items() if tarefa.finalizada]
+        for tarefa_id in finalizadas[:max(0, len(finalizadas) - self._tarefas_retidas)]:
+            del self._tarefas[tarefa_id]
+    
+    def obter(self, tarefa_id: str) -> Optional[Tarefa]:
+        """Retorna a tarefa pelo id (None se não existir ou já tiver sido descartada)."""
+        with self._trava:
+            return self._tarefas.get(tarefa_id)
+    
+    def listar(self) -> List[Tarefa]:
+        """Tarefas conhecidas, da mais antiga para a mais recente."""
+        with self._trava:
+            return list(self._tarefas.values())
+    
+    def cancelar(self, tarefa_id: str, motivo: str = 'Cancelada pelo usuário') -> bool:
+        """
+        Pede o cancelamento de uma tarefa.
+        
+        A tarefa para no próximo ponto de verificação do pipeline (entre
+        etapas ou lotes) e termina no estado 'cancelada'.
+        
+        Returns:
+            True se a tarefa existia e ainda não tinha terminado
+        """
+        tarefa = self.obter(tarefa_id)
+        if tarefa is None or tarefa.finalizada:
+            return False
+        tarefa.cancelamento.cancelar(motivo)
+        
+        # Ainda na fila: sai do pool sem chegar a executar
+        if tarefa.futuro is not None and tarefa.futuro.cancel():
+            tarefa.erro = motivo
+            tarefa.estado = ESTADO_CANCELADA
+            tarefa.concluida_em = time.time()
+        return True
+    
+    def resumo(self) -> Dict[str, int]:
+        """Quantidade de tarefas por estado."""
+        contagem = {ESTADO_PENDENTE: 0, ESTADO_EXECUTANDO: 0, ESTADO_CONCLUIDA: 0,
+                    ESTADO_FALHOU: 0, ESTADO_CANCELADA: 0}
+        for tarefa in self.listar():
+            contagem[tarefa.estado] += 1
+        return contagem
+    
+    def aguardar(self, tarefa_id: str, tempo_limite: Optional[float] = None) -> Any:
+        """
+        Bloqueia até a tarefa terminar.
+        
+        Returns:
+            Resultado da tarefa
+        
+        Raises:
+            KeyError: Se a tarefa não existir
+            RuntimeError: Se a tarefa falhou
+            PredicaoCancelada: Se a tarefa foi cancelada
+        """
+        tarefa = self.obter(tarefa_id)
+        if tarefa is None:
+            raise KeyError(f"Tarefa não encontrada: {tarefa_id}")
+        if not tarefa.futuro.cancelled():
+            tarefa.futuro.result(timeout=tempo_limite)
+        if tarefa.estado == ESTADO_CANCELADA:
+            raise PredicaoCancelada(tarefa.erro)
+        if tarefa.estado == ESTADO_FALHOU:
+            raise RuntimeError(tarefa.erro)
+        return tarefa.resultado
+    
+    def encerrar(self, esperar: bool = True) -> None:
+        """Encerra o pool de threads (e a verificação do modelo, se houver)."""
+        if self.recarregador is not None:
+            self.recarregador.parar()
+        self._executor.shutdown(wait=esperar)
\ No newline at end of file
@@ -2,11 +2,20 @@
 Módulo de regras de negócio.
 """
 
-from .motor_regras import MotorRegrasNegocio, ResultadoRegra
+from .motor_regras import MotorRegrasNegocio, ResultadoRegra, ContagemRegras
 from .analisador_curriculo import AnalisadorCurriculo
+from .indice_curriculo import IndiceCurriculo
+from .tabela_regras import AvaliadorRegras, Regra, Condicao, tabela_padrao, carregar_tabela_regras
 
 __all__ = [
     'MotorRegrasNegocio',
     'ResultadoRegra',
-    'AnalisadorCurriculo'
+    'ContagemRegras',
+    'AnalisadorCurriculo',
+    'IndiceCurriculo',
+    'AvaliadorRegras',
+    'Regra',
+    'Condicao',
+    'tabela_padrao',
+    'carregar_tabela_regras'
 ]
\ No newline at end of file
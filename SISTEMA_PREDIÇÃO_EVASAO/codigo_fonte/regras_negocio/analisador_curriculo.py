@@ -2,13 +2,61 @@
 Analisador de grade curricular para regras de negócio.
 """
 
+import numpy as np
 import pandas as pd
 from typing import Dict, Any, Optional, List
 
 from ..utilitarios import obter_registrador
+from .vetorizacao import aplicar_por_valor, coluna_ou_padrao
+from .indice_curriculo import IndiceCurriculo
 
 registrador = obter_registrador(__name__)
 
+# Valores de 'Módulo atual' que indicam o primeiro e o último módulo
+MODULOS_INICIAIS = ['1', '1.0', 'I', 'Módulo 1']
+MODULOS_FINAIS = ['4', '4.0', 'IV', 'Módulo 4', 'ÚLTIMO']
+
+# Situações que indicam conclusão
+SITUACOES_CONCLUSAO = ['FORMADO', 'CONCLUÍDO', 'FINALIZADO', 'TF']
+
+# Numeração romana usada em 'Módulo atual'
+MODULOS_ROMANOS = {'I': 1, 'II': 2, 'III': 3, 'IV': 4, 'V': 5, 'VI': 6}
+
+def _eh_modulo_inicial(modulo_atual: Any) -> bool:
+    return str(modulo_atual) in MODULOS_INICIAIS
+
+def _eh_modulo_final(modulo_atual: Any) -> bool:
+    return str(modulo_atual) in MODULOS_FINAIS
+
+def _numero_modulo(modulo_atual: Any) -> float:
+    """Número do módulo ('4', '4.0', 'IV', 'Módulo 4'); NaN se não reconhecido."""
+    texto = str(modulo_atual).strip().upper().replace('MÓDULO', '').strip()
+    if texto in MODULOS_ROMANOS:
+        return float(MODULOS_ROMANOS[texto])
+    try:
+        return float(texto)
+    except ValueError:
+        return np.nan
+
+def _eh_codigo_inicial(codigo_disciplina: Any) -> bool:
+    """Padrões de código que indicam primeira disciplina (terminam em 001, 01, etc.)."""
+    if not codigo_disciplina:
+        return False
+    codigo_str = str(codigo_disciplina)
+    return (codigo_str.endswith('001') or 
+            codigo_str.endswith('01') or
+            '001' in codigo_str or
+            'INTRO' in codigo_str.upper())
+
+def _sem_erro(funcao):
+    """Versão da função que retorna False em vez de lançar exceção."""
+    def protegida(valor: Any) -> bool:
+        try:
+            return funcao(valor)
+        except Exception:
+            return False
+    return protegida
+
 class AnalisadorCurriculo:
     """Analisador de grade curricular e progressão de curso."""
     
@@ -28,6 +76,9 @@ class AnalisadorCurriculo:
         if df_cursos is not None:
             self._processar_dados_cursos()
         
+        # Grade curricular indexada (vazia sem as planilhas: valem as heurísticas de código e módulo)
+        self.indice = IndiceCurriculo.construir(df_disciplinas, df_cursos)
+        
         registrador.info("Analisador de currículo inicializado")
     
     def _processar_dados_cursos(self) -> None:
@@ -56,25 +107,18 @@ class AnalisadorCurriculo:
             True se está na primeira disciplina
         """
         try:
+            # Grade conhecida: posição da disciplina atual
+            primeira = self.indice.eh_primeira(dados_aluno)
+            if primeira is not None:
+                return primeira
+            
             modulo_atual = dados_aluno.get('Módulo atual', '')
             codigo_disciplina = dados_aluno.get('Cód.Disc. atual', '')
             
-            # Considerar primeira disciplina se:
+            # Sem grade, considerar primeira disciplina se:
             # - Está no módulo 1
             # - Ou tem código que indica início (disciplinas que terminam em 001, 01, etc.)
-            if str(modulo_atual) in ['1', '1.0', 'I', 'Módulo 1']:
-                return True
-            
-            if codigo_disciplina:
-                codigo_str = str(codigo_disciplina)
-                # Padrões que indicam primeira disciplina
-                if (codigo_str.endswith('001') or 
-                    codigo_str.endswith('01') or
-                    '001' in codigo_str or
-                    'INTRO' in codigo_str.upper()):
-                    return True
-            
-            return False
+            return _eh_modulo_inicial(modulo_atual) or _eh_codigo_inicial(codigo_disciplina)
             
         except Exception as e:
             registrador.debug(f"Erro ao verificar primeira disciplina: {e}")
@@ -96,26 +140,64 @@ class AnalisadorCurriculo:
             modulo_atual = dados_aluno.get('Módulo atual', '')
             
             # Situações que indicam conclusão
-            situacoes_conclusao = ['FORMADO', 'CONCLUÍDO', 'FINALIZADO', 'TF']
-            if any(sit in situacao for sit in situacoes_conclusao):
+            if any(sit in situacao for sit in SITUACOES_CONCLUSAO):
                 return True
             
-            # Verificar se está no último módulo (assumindo máximo de 4 módulos)
-            if str(modulo_atual) in ['4', '4.0', 'IV', 'Módulo 4', 'ÚLTIMO']:
-                return True
+            # Verificar através do currículo se disponível: está na última disciplina da grade
+            ultima = self.indice.eh_ultima(dados_aluno)
+            if ultima is not None:
+                return ultima
             
-            # Verificar através do currículo se disponível
-            codigo_curso = dados_aluno.get('Cód.Curso', '')
-            if codigo_curso and self.df_cursos is not None:
-                # Lógica adicional baseada nos dados do curso
-                pass
-            
-            return False
+            # Verificar se está no último módulo (planilha de cursos ou, sem ela, máximo de 4 módulos)
+            total_modulos = self.indice.ultimo_modulo(dados_aluno)
+            if total_modulos is not None:
+                return _numero_modulo(modulo_atual) == total_modulos
+            return _eh_modulo_final(modulo_atual)
             
         except Exception as e:
             registrador.debug(f"Erro ao verificar conclusão do curso: {e}")
             return False
     
+    def eh_primeira_disciplina_lote(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Versão vetorizada de eh_primeira_disciplina() para um lote de alunos.
+        
+        Args:
+            df: Dados dos alunos
+            
+        Returns:
+            Array booleano, uma posição por linha de df
+        """
+        modulo_inicial = aplicar_por_valor(coluna_ou_padrao(df, 'Módulo atual', ''), _eh_modulo_inicial)
+        codigo_inicial = aplicar_por_valor(coluna_ou_padrao(df, 'Cód.Disc. atual', ''),
+                                           _sem_erro(_eh_codigo_inicial))
+        primeira, conhecida = self.indice.eh_primeira_lote(df)
+        return np.where(conhecida, primeira, modulo_inicial | codigo_inicial)
+    
+    def curso_completado_lote(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Versão vetorizada de curso_completado() para um lote de alunos.
+        
+        Args:
+            df: Dados dos alunos
+            
+        Returns:
+            Array booleano, uma posição por linha de df
+        """
+        situacao = coluna_ou_padrao(df, 'Situação', '')
+        # Situação não textual (ex.: vazia) faz curso_completado() retornar False
+        situacao_valida = aplicar_por_valor(situacao, lambda valor: isinstance(valor, str))
+        situacao_conclusao = aplicar_por_valor(
+            situacao,
+            lambda valor: isinstance(valor, str) and any(sit in valor.upper() for sit in SITUACOES_CONCLUSAO)
+        )
+        modulo = coluna_ou_padrao(df, 'Módulo atual', '')
+        total_modulos = self.indice.ultimo_modulo_lote(df)
+        modulo_final = np.where(np.isnan(total_modulos), aplicar_por_valor(modulo, _eh_modulo_final),
+                                aplicar_por_valor(modulo, _numero_modulo) == total_modulos)
+        ultima, conhecida = self.indice.eh_ultima_lote(df)
+        return situacao_valida & (situacao_conclusao | np.where(conhecida, ultima, modulo_final))
+    
     def obter_estatisticas_curso(self) -> Dict[str, Any]:
         """
         Retorna estatísticas dos cursos analisados.
@@ -126,6 +208,7 @@ class AnalisadorCurriculo:
         estatisticas = {
             'total_cursos': len(self.estatisticas_cursos) if self.df_cursos is not None else 0,
             'total_disciplinas': len(self.df_disciplinas) if self.df_disciplinas is not None else 0,
+            'grades_indexadas': len(self.indice.disciplinas),
             'cursos_disponiveis': list(self.estatisticas_cursos.keys()) if self.estatisticas_cursos else []
         }
         
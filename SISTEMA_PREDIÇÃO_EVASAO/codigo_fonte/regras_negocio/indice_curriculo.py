@@ -0,0 +1,252 @@
+﻿"""
+Índice da grade curricular.
+
+Monta, a partir das planilhas de disciplinas e cursos, a sequência ordenada
+de disciplinas de cada (curso, currículo). As consultas de posição, primeira
+e última disciplina são feitas em dicionários (O(1) por aluno) ou, para um
+lote, com um único get_indexer sobre as colunas do DataFrame.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..utilitarios import obter_registrador
+from .vetorizacao import aplicar_por_valor, coluna_ou_padrao
+
+registrador = obter_registrador(__name__)
+
+# Colunas aceitas na planilha de disciplinas e a coluna correspondente nos dados do aluno
+COLUNAS_CURSO = [('Cód.Curso', 'Cód.Curso'), ('Cód. Curso', 'Cód.Curso'), ('Cod.Curso', 'Cód.Curso'),
+                 ('Código Curso', 'Cód.Curso'), ('Curso', 'Curso')]
+COLUNAS_CURRICULO = ['Currículo', 'Curriculo', 'Cód.Currículo', 'Grade']
+COLUNAS_DISCIPLINA = ['Código', 'Cód.Disc.', 'Cód.Disciplina', 'Cód. Disciplina', 'Cod', 'Code']
+COLUNAS_MODULO = ['Módulo', 'Modulo', 'Módulo atual', 'Período']
+COLUNAS_ORDEM = ['Ordem', 'Sequência', 'Sequencia', 'Seq']
+
+# Coluna da planilha de cursos com a quantidade de módulos
+COLUNAS_TOTAL_MODULOS = ['Módulos', 'Modulos', 'Qtd. Módulos', 'Total Módulos']
+
+# Chave (curso, currículo); currículo é '' quando a planilha não tem a coluna
+ChaveCurriculo = Tuple[str, str]
+
+def normalizar_chave(valor: Any) -> str:
+    """Texto comparável entre planilhas e dados do aluno ('3', 3 e 3.0 viram '3')."""
+    if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    texto = str(valor).strip().upper()
+    return texto[:-2] if texto.endswith('.0') and texto[:-2].isdigit() else texto
+
+def _primeira_coluna(df: pd.DataFrame, candidatas: List[str]) -> Optional[str]:
+    return next((coluna for coluna in candidatas if coluna in df.columns), None)
+
+class IndiceCurriculo:
+    """
+    Sequência de disciplinas por (curso, currículo).
+    
+    As consultas retornam None quando a disciplina ou o currículo do aluno
+    não estão nas planilhas; nesse caso o AnalisadorCurriculo volta para as
+    heurísticas de código e módulo.
+    """
+    
+    def __init__(self, disciplinas: Optional[Dict[ChaveCurriculo, List[str]]] = None,
+                 modulos: Optional[Dict[ChaveCurriculo, List[str]]] = None,
+                 total_modulos: Optional[Dict[str, int]] = None,
+                 coluna_curso: str = 'Cód.Curso', por_curriculo: bool = True):
+        """
+        Inicializa o índice.
+        
+        Args:
+            disciplinas: Códigos das disciplinas em ordem, por (curso, currículo)
+            modulos: Módulo de cada disciplina, na mesma ordem
+            total_modulos: Quantidade de módulos por curso
+            coluna_curso: Coluna dos dados do aluno que identifica o curso
+            por_curriculo: False se a grade não distingue currículos
+        """
+        self.disciplinas: Dict[ChaveCurriculo, Tuple[str, ...]] = {
+            chave: tuple(codigos) for chave, codigos in (disciplinas or {}).items()
+        }
+        self.modulos: Dict[ChaveCurriculo, Tuple[str, ...]] = {
+            chave: tuple(valores) for chave, valores in (modulos or {}).items()
+        }
+        self.total_modulos = total_modulos or {}
+        self.coluna_curso = coluna_curso
+        self.por_curriculo = por_curriculo
+        
+        # (curso, currículo, disciplina) -> posição; a primeira ocorrência vale se houver repetição
+        self._posicoes: Dict[Tuple[str, str, str], int] = {}
+        for (curso, curriculo), codigos in self.disciplinas.items():
+            for posicao, codigo in enumerate(codigos):
+                self._posicoes.setdefault((curso, curriculo, codigo), posicao)
+        
+        if self._posicoes:
+            chaves = list(self._posicoes.keys())
+            self._indice_lote = pd.MultiIndex.from_tuples(chaves)
+            self._posicoes_lote = np.fromiter(self._posicoes.values(), dtype=np.int64, count=len(chaves))
+            self._totais_lote = np.fromiter((len(self.disciplinas[(curso, curriculo)]) for curso, curriculo, _ in chaves),
+                                            dtype=np.int64, count=len(chaves))
+        else:
+            self._indice_lote = None
+    
+    @classmethod
+    def construir(cls, df_disciplinas: Optional[pd.DataFrame],
+                  df_cursos: Optional[pd.DataFrame] = None) -> 'IndiceCurriculo':
+        """
+        Monta o índice a partir das planilhas carregadas por CarregadorDados.
+        
+        Disciplinas são ordenadas pela coluna de ordem, se existir, ou pela
+        ordem em que aparecem na planilha.
+        
+        Args:
+            df_disciplinas: Planilha de disciplinas
+            df_cursos: Planilha de cursos (quantidade de módulos, se disponível)
+        
+        Returns:
+            Índice (vazio se as colunas necessárias não existirem)
+        """
+        total_modulos = cls._ler_total_modulos(df_cursos)
+        if df_disciplinas is None or df_disciplinas.empty:
+            return cls(total_modulos=total_modulos)
+        
+        coluna_curso, coluna_curso_aluno = next(
+            ((coluna, aluno) for coluna, aluno in COLUNAS_CURSO if coluna in df_disciplinas.columns), (None, None)
+        )
+        coluna_disciplina = _primeira_coluna(df_disciplinas, COLUNAS_DISCIPLINA)
+        if coluna_curso is None or coluna_disciplina is None:
+            registrador.warning("Planilha de disciplinas sem colunas de curso/código; índice curricular vazio")
+            return cls(total_modulos=total_modulos)
+        
+        coluna_curriculo = _primeira_coluna(df_disciplinas, COLUNAS_CURRICULO)
+        coluna_modulo = _primeira_coluna(df_disciplinas, COLUNAS_MODULO)
+        coluna_ordem = _primeira_coluna(df_disciplinas, COLUNAS_ORDEM)
+        
+        grade = pd.DataFrame({
+            'curso': df_disciplinas[coluna_curso].map(normalizar_chave),
+            'curriculo': df_disciplinas[coluna_curriculo].map(normalizar_chave) if coluna_curriculo else '',
+            'disciplina': df_disciplinas[coluna_disciplina].map(normalizar_chave),
+            'modulo': df_disciplinas[coluna_modulo].astype(str).str.strip() if coluna_modulo else ''
+        })
+        if coluna_ordem:
+            grade['ordem'] = pd.to_numeric(df_disciplinas[coluna_ordem], errors='coerce')
+            grade = grade.sort_values(['curso', 'curriculo', 'ordem'], kind='stable')
+        grade = grade[(grade['curso'] != '') & (grade['disciplina'] != '')]
+        
+        disciplinas, modulos = {}, {}
+        for chave, grupo in grade.groupby(['curso', 'curriculo'], sort=False):
+            disciplinas[chave] = grupo['disciplina'].tolist()
+            modulos[chave] = grupo['modulo'].tolist()
+        
+        registrador.info(f"Índice curricular: {len(disciplinas)} grade(s), {len(grade)} disciplinas")
+        return cls(disciplinas, modulos, total_modulos, coluna_curso_aluno, coluna_curriculo is not None)
+    
+    @staticmethod
+    def _ler_total_modulos(df_cursos: Optional[pd.DataFrame]) -> Dict[str, int]:
+        if df_cursos is None:
+            return {}
+        coluna_total = _primeira_coluna(df_cursos, COLUNAS_TOTAL_MODULOS)
+        coluna_codigo = _primeira_coluna(df_cursos, ['Código', 'Cod', 'ID', 'Cód', 'Code'])
+        if coluna_total is None or coluna_codigo is None:
+            return {}
+        totais = pd.to_numeric(df_cursos[coluna_total], errors='coerce')
+        return {normalizar_chave(codigo): int(total)
+                for codigo, total in zip(df_cursos[coluna_codigo], totais) if pd.notna(total)}
+    
+    @property
+    def vazio(self) -> bool:
+        """True se nenhuma grade foi carregada."""
+        return not self._posicoes
+    
+    def _chave(self, dados_aluno: Dict[str, Any]) -> ChaveCurriculo:
+        curriculo = normalizar_chave(dados_aluno.get('Currículo', '')) if self.por_curriculo else ''
+        return normalizar_chave(dados_aluno.get(self.coluna_curso, '')), curriculo
+    
+    def posicao(self, dados_aluno: Dict[str, Any]) -> Optional[int]:
+        """Posição (0 = primeira) da disciplina atual na grade do aluno, ou None se desconhecida."""
+        if self.vazio:
+            return None
+        curso, curriculo = self._chave(dados_aluno)
+        return self._posicoes.get((curso, curriculo, normalizar_chave(dados_aluno.get('Cód.Disc. atual', ''))))
+    
+    def primeira_disciplina(self, dados_aluno: Dict[str, Any]) -> Optional[str]:
+        """Código da primeira disciplina da grade do aluno."""
+        codigos = self.disciplinas.get(self._chave(dados_aluno))
+        return codigos[0] if codigos else None
+    
+    def ultima_disciplina(self, dados_aluno: Dict[str, Any]) -> Optional[str]:
+        """Código da última disciplina da grade do aluno."""
+        codigos = self.disciplinas.get(self._chave(dados_aluno))
+        return codigos[-1] if codigos else None
+    
+    def eh_primeira(self, dados_aluno: Dict[str, Any]) -> Optional[bool]:
+        """True/False se a disciplina atual é a primeira da grade; None se desconhecida."""
+        posicao = self.posicao(dados_aluno)
+        return None if posicao is None else posicao == 0
+    
+    def eh_ultima(self, dados_aluno: Dict[str, Any]) -> Optional[bool]:
+        """True/False se a disciplina atual é a última da grade; None se desconhecida."""
+        posicao = self.posicao(dados_aluno)
+        if posicao is None:
+            return None
+        return posicao == len(self.disciplinas[self._chave(dados_aluno)]) - 1
+    
+    def ultimo_modulo(self, dados_aluno: Dict[str, Any]) -> Optional[int]:
+        """Quantidade de módulos do curso do aluno (planilha de cursos), se conhecida."""
+        return self.total_modulos.get(normalizar_chave(dados_aluno.get('Cód.Curso', '')))
+    
+    def posicoes_lote(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Versão vetorizada de posicao() para um lote de alunos.
+        
+        Args:
+            df: Dados dos alunos
+        
+        Returns:
+            Tuple com (posição da disciplina atual, -1 se desconhecida) e
+            (quantidade de disciplinas da grade, 0 se desconhecida)
+        """
+        if self.vazio:
+            return np.full(len(df), -1, dtype=np.int64), np.zeros(len(df), dtype=np.int64)
+        
+        curso = aplicar_por_valor(coluna_ou_padrao(df, self.coluna_curso, ''), normalizar_chave)
+        curriculo = (aplicar_por_valor(coluna_ou_padrao(df, 'Currículo', ''), normalizar_chave)
+                     if self.por_curriculo else np.full(len(df), '', dtype=object))
+        disciplina = aplicar_por_valor(coluna_ou_padrao(df, 'Cód.Disc. atual', ''), normalizar_chave)
+        
+        encontrados = self._indice_lote.get_indexer(pd.MultiIndex.from_arrays([curso, curriculo, disciplina]))
+        conhecidos = encontrados >= 0
+        posicoes = np.where(conhecidos, self._posicoes_lote[encontrados], -1)
+        totais = np.where(conhecidos, self._totais_lote[encontrados], 0)
+        return posicoes, totais
+    
+    def eh_primeira_lote(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Versão vetorizada de eh_primeira().
+        
+        Returns:
+            Tuple com (é a primeira disciplina, disciplina conhecida no índice)
+        """
+        posicoes, _ = self.posicoes_lote(df)
+        return posicoes == 0, posicoes >= 0
+    
+    def eh_ultima_lote(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Versão vetorizada de eh_ultima().
+        
+        Returns:
+            Tuple com (é a última disciplina, disciplina conhecida no índice)
+        """
+        posicoes, totais = self.posicoes_lote(df)
+        conhecidos = posicoes >= 0
+        return conhecidos & (posicoes == totais - 1), conhecidos
+    
+    def ultimo_modulo_lote(self, df: pd.DataFrame) -> np.ndarray:
+        """Versão vetorizada de ultimo_modulo() (NaN se desconhecido)."""
+        if not self.total_modulos:
+            return np.full(len(df), np.nan)
+        return aplicar_por_valor(
+            coluna_ou_padrao(df, 'Cód.Curso', ''),
+            lambda valor: float(self.total_modulos.get(normalizar_chave(valor), np.nan))
+        ).astype(float)
\ No newline at end of file
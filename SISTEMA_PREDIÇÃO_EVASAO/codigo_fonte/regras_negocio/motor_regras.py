@@ -2,13 +2,20 @@
 Motor de regras de negócio para classificação de estudantes.
 """
 
+import numpy as np
 import pandas as pd
-from typing import Dict, Any, Tuple
-from dataclasses import dataclass
+from typing import Dict, Any, List, Optional
+from dataclasses import dataclass, field
 
-from ..utilitarios import obter_registrador
+from ..utilitarios import obter_registrador, dividir_em_fatias, executar_em_fatias
 from ..configuracao import configuracoes
 from .analisador_curriculo import AnalisadorCurriculo
+from .vetorizacao import aplicar_por_valor, coluna_ou_padrao
+from .tabela_regras import (
+    AvaliadorRegras, Regra, carregar_tabela_regras, REGRA_MODELO,
+    COLUNA_FALTAS, COLUNA_PENDENCIA_FINANCEIRA, COLUNA_PENDENCIA_ACADEMICA,
+    COLUNA_PRIMEIRA_DISCIPLINA, COLUNA_CURSO_COMPLETADO
+)
 
 registrador = obter_registrador(__name__)
 
@@ -20,140 +27,161 @@ class ResultadoRegra:
     razao: str
     regra_aplicada: str
 
+@dataclass
+class ContagemRegras:
+    """
+    Regras aplicadas em uma execução.
+    
+    Cada predição usa a sua contagem (MotorRegrasNegocio.nova_contagem()),
+    então um mesmo motor pode atender execuções simultâneas.
+    """
+    contador_regras: Dict[str, int]
+    # Acertos e tempo por regra nas avaliações em lote desta contagem
+    desempenho_regras: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    
+    def contar(self, codigo: str, quantidade: int = 1) -> None:
+        """Soma alunos decididos pela regra de código informado."""
+        self.contador_regras[f'{codigo}_por_regra'] += quantidade
+        self.contador_regras['total_ajustes'] += quantidade
+    
+    def registrar_desempenho(self, desempenho: Dict[str, Dict[str, float]]) -> None:
+        """Acumula acertos e tempo por regra de uma avaliação em lote."""
+        for nome, valores in desempenho.items():
+            acumulado = self.desempenho_regras.setdefault(nome, {'acertos': 0, 'segundos': 0.0})
+            acumulado['acertos'] += valores['acertos']
+            acumulado['segundos'] += valores['segundos']
+
 class MotorRegrasNegocio:
-    """Motor de regras de negócio do Grau Técnico."""
+    """
+    Motor de regras de negócio do Grau Técnico.
+    
+    As regras vêm de uma tabela declarativa (ver tabela_regras.py), compilada
+    uma vez na criação do motor; incluir uma regra não adiciona custo por aluno.
     
-    def __init__(self, analisador_curriculo: AnalisadorCurriculo = None):
+    O motor não guarda estado por execução: os métodos de aplicação recebem a
+    ContagemRegras da chamada. Sem contagem, usam a contagem padrão do motor
+    (contador_regras/desempenho_regras), que não deve ser compartilhada entre threads.
+    """
+    
+    def __init__(self, analisador_curriculo: AnalisadorCurriculo = None, tabela: Optional[List[Regra]] = None):
         """
         Inicializa o motor de regras.
         
         Args:
             analisador_curriculo: Analisador de grade curricular
+            tabela: Regras (padrão: configuracoes.regras_negocio.arquivo_tabela_regras
+                ou, se não definido, tabela_padrao())
         """
         self.analisador_curriculo = analisador_curriculo
-        self.contador_regras = {
-            'NC_por_regra': 0,
-            'LFR_por_regra': 0,
-            'LFI_por_regra': 0,
-            'LAC_por_regra': 0,
-            'NF_por_regra': 0,
-            'MT_por_regra': 0,
-            'total_ajustes': 0
-        }
+        if tabela is None and configuracoes.regras_negocio.arquivo_tabela_regras:
+            registrador.info(f"Carregando tabela de regras de {configuracoes.regras_negocio.arquivo_tabela_regras}")
+            tabela = carregar_tabela_regras(configuracoes.regras_negocio.arquivo_tabela_regras)
+        self.avaliador = AvaliadorRegras(tabela)
+        
+        self.contagem = self.nova_contagem()
+    
+    def nova_contagem(self) -> ContagemRegras:
+        """Contagem zerada com todos os códigos de regra da tabela."""
+        contador = {f'{codigo}_por_regra': 0 for codigo in self.avaliador.codigos}
+        contador['total_ajustes'] = 0
+        return ContagemRegras(contador)
+    
+    @property
+    def contador_regras(self) -> Dict[str, int]:
+        """Contadores da contagem padrão do motor."""
+        return self.contagem.contador_regras
+    
+    @property
+    def desempenho_regras(self) -> Dict[str, Dict[str, float]]:
+        """Acertos e tempo por regra da contagem padrão do motor."""
+        return self.contagem.desempenho_regras
     
     def resetar_contadores(self) -> None:
-        """Reseta os contadores de regras aplicadas."""
-        for chave in self.contador_regras:
-            self.contador_regras[chave] = 0
+        """Reseta a contagem padrão do motor."""
+        self.contagem = self.nova_contagem()
     
-    def aplicar_regras_negocio(self, dados_aluno: Dict[str, Any], 
-                             predicao_ml: str, probabilidade_ml: float) -> ResultadoRegra:
+    def normalizar_aluno(self, dados_aluno: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Aplica regras de negócio para um aluno específico.
+        Extrai as colunas normalizadas usadas pela tabela de regras para um aluno.
         
         Args:
             dados_aluno: Dados do aluno
-            predicao_ml: Predição do modelo ML
-            probabilidade_ml: Probabilidade da predição ML
             
         Returns:
-            Resultado da aplicação das regras
+            Dicionário com faltas, pendencia_financeira, pendencia_academica,
+            primeira_disciplina e curso_completado
         """
-        # Extrair e limpar dados do aluno
-        faltas_consecutivas = self._extrair_valor_numerico(
-            dados_aluno.get('Faltas Consecutivas', 0)
-        )
-        pendencia_financeira = self._extrair_valor_financeiro(
-            dados_aluno.get('Pend. Financ.', 0)
-        )
         # Tratar NaN corretamente para pendência acadêmica
         pendencia_academica_bruta = dados_aluno.get('Pend. Acad.', '')
         pendencia_academica = '' if pd.isna(pendencia_academica_bruta) else str(pendencia_academica_bruta).strip()
         
-        registrador.debug(f"Analisando aluno: faltas={faltas_consecutivas}, "
-                         f"pend_fin={pendencia_financeira}, pend_acad='{pendencia_academica}'")
-        
-        # Aplicar regras em ordem de prioridade
-        
-        # REGRA 1: NC (Nunca Compareceu) - MELHORADA
-        if faltas_consecutivas >= configuracoes.regras_negocio.nc_minimo_faltas:
-            if self.analisador_curriculo and self.analisador_curriculo.eh_primeira_disciplina(dados_aluno):
-                self.contador_regras['NC_por_regra'] += 1
-                self.contador_regras['total_ajustes'] += 1
-                return ResultadoRegra(
-                    situacao='Nunca Compareceu',
-                    probabilidade=configuracoes.regras_negocio.probabilidade_nc,
-                    razao=f'≥{configuracoes.regras_negocio.nc_minimo_faltas} faltas na primeira disciplina',
-                    regra_aplicada='NC'
-                )
-            elif faltas_consecutivas >= configuracoes.regras_negocio.lfr_minimo_faltas:
-                # Se não é primeira disciplina mas tem muitas faltas, pode ser LFR
-                self.contador_regras['LFR_por_regra'] += 1
-                self.contador_regras['total_ajustes'] += 1
-                return ResultadoRegra(
-                    situacao='Limpeza de Frequencia',
-                    probabilidade=configuracoes.regras_negocio.probabilidade_lfr,
-                    razao=f'≥{configuracoes.regras_negocio.lfr_minimo_faltas} faltas (não primeira disciplina)',
-                    regra_aplicada='LFR'
-                )
-        
-        # REGRA 2: LFI (Limpeza Financeira) - AJUSTADA PARA ≥2 PARCELAS
-        if pendencia_financeira >= configuracoes.regras_negocio.lfi_minimo_parcelas:
-            self.contador_regras['LFI_por_regra'] += 1
-            self.contador_regras['total_ajustes'] += 1
-            return ResultadoRegra(
-                situacao='Limpeza Financeira',
-                probabilidade=configuracoes.regras_negocio.probabilidade_lfi,
-                razao=f'≥{configuracoes.regras_negocio.lfi_minimo_parcelas} parcelas em aberto',
-                regra_aplicada='LFI'
-            )
+        return {
+            COLUNA_FALTAS: self._extrair_valor_numerico(dados_aluno.get('Faltas Consecutivas', 0)),
+            COLUNA_PENDENCIA_FINANCEIRA: self._extrair_valor_financeiro(dados_aluno.get('Pend. Financ.', 0)),
+            COLUNA_PENDENCIA_ACADEMICA: self._tem_pendencia_academica(pendencia_academica),
+            COLUNA_PRIMEIRA_DISCIPLINA: bool(self.analisador_curriculo and
+                                             self.analisador_curriculo.eh_primeira_disciplina(dados_aluno)),
+            COLUNA_CURSO_COMPLETADO: bool(self.analisador_curriculo and
+                                          self.analisador_curriculo.curso_completado(dados_aluno))
+        }
+    
+    def normalizar_lote(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Extrai as colunas normalizadas de todos os alunos (mesmos valores de normalizar_aluno()).
         
-        # REGRA 3: LFR (Limpeza de Frequência) - GRAU TÉCNICO
-        if (pendencia_financeira > 0 and 
-            faltas_consecutivas >= configuracoes.regras_negocio.lfr_minimo_faltas):
-            self.contador_regras['LFR_por_regra'] += 1
-            self.contador_regras['total_ajustes'] += 1
-            return ResultadoRegra(
-                situacao='Limpeza de Frequencia',
-                probabilidade=configuracoes.regras_negocio.probabilidade_lfr,
-                razao=f'Pend. financeira + ≥{configuracoes.regras_negocio.lfr_minimo_faltas} faltas',
-                regra_aplicada='LFR'
-            )
+        Args:
+            df: Dados dos alunos
+            
+        Returns:
+            Dicionário de arrays, um por coluna normalizada
+        """
+        pendencia_academica = aplicar_por_valor(
+            coluna_ou_padrao(df, 'Pend. Acad.', ''),
+            lambda valor: self._tem_pendencia_academica('' if pd.isna(valor) else str(valor).strip())
+        )
         
-        # REGRA 4: LAC (Limpeza Acadêmica) - GRAU TÉCNICO
-        if self._tem_pendencia_academica(pendencia_academica):
-            self.contador_regras['LAC_por_regra'] += 1
-            self.contador_regras['total_ajustes'] += 1
-            return ResultadoRegra(
-                situacao='Limpeza Academica',
-                probabilidade=configuracoes.regras_negocio.probabilidade_lac,
-                razao='Pendência acadêmica',
-                regra_aplicada='LAC'
-            )
+        if self.analisador_curriculo:
+            primeira_disciplina = self.analisador_curriculo.eh_primeira_disciplina_lote(df)
+            curso_completado = self.analisador_curriculo.curso_completado_lote(df)
+        else:
+            primeira_disciplina = curso_completado = np.zeros(len(df), dtype=bool)
         
-        # REGRA 5: NF (Não Formado) - MELHORADA
-        if (self.analisador_curriculo and 
-            self.analisador_curriculo.curso_completado(dados_aluno) and
-            0 < pendencia_financeira <= 2):
-            self.contador_regras['NF_por_regra'] += 1
-            self.contador_regras['total_ajustes'] += 1
-            return ResultadoRegra(
-                situacao='Não Formados',
-                probabilidade=configuracoes.regras_negocio.probabilidade_nf,
-                razao='Curso completo + ≤2 parcelas',
-                regra_aplicada='NF'
-            )
+        return {
+            COLUNA_FALTAS: aplicar_por_valor(coluna_ou_padrao(df, 'Faltas Consecutivas', 0),
+                                             self._extrair_valor_numerico).astype(float),
+            COLUNA_PENDENCIA_FINANCEIRA: aplicar_por_valor(coluna_ou_padrao(df, 'Pend. Financ.', 0),
+                                                           self._extrair_valor_financeiro).astype(float),
+            COLUNA_PENDENCIA_ACADEMICA: np.asarray(pendencia_academica, dtype=bool),
+            COLUNA_PRIMEIRA_DISCIPLINA: primeira_disciplina,
+            COLUNA_CURSO_COMPLETADO: curso_completado
+        }
+    
+    def aplicar_regras_negocio(self, dados_aluno: Dict[str, Any], 
+                             predicao_ml: str, probabilidade_ml: float,
+                             contagem: Optional[ContagemRegras] = None) -> ResultadoRegra:
+        """
+        Aplica regras de negócio para um aluno específico.
         
-        # REGRA 6: MT (Matriculado) - GRAU TÉCNICO
-        if (pendencia_financeira == 0 and 
-            faltas_consecutivas <= configuracoes.regras_negocio.mt_maximo_faltas):
-            self.contador_regras['MT_por_regra'] += 1
-            self.contador_regras['total_ajustes'] += 1
+        Args:
+            dados_aluno: Dados do aluno
+            predicao_ml: Predição do modelo ML
+            probabilidade_ml: Probabilidade da predição ML
+            contagem: Contagem da execução (padrão: contagem do motor)
+            
+        Returns:
+            Resultado da aplicação das regras
+        """
+        valores = self.normalizar_aluno(dados_aluno)
+        registrador.debug(f"Analisando aluno: {valores}")
+        
+        regra = self.avaliador.avaliar_aluno(valores)
+        if regra is not None:
+            (contagem or self.contagem).contar(regra.codigo)
             return ResultadoRegra(
-                situacao='Matriculado',
-                probabilidade=configuracoes.regras_negocio.probabilidade_mt,
-                razao='Sem pendências significativas',
-                regra_aplicada='MT'
+                situacao=regra.situacao,
+                probabilidade=regra.probabilidade,
+                razao=regra.razao,
+                regra_aplicada=regra.codigo
             )
         
         # Se nenhuma regra se aplica, usar predição do ML
@@ -161,9 +189,50 @@ class MotorRegrasNegocio:
             situacao=predicao_ml,
             probabilidade=probabilidade_ml,
             razao='Predição ML',
-            regra_aplicada='ML'
+            regra_aplicada=REGRA_MODELO
         )
     
+    def aplicar_regras_lote(self, df: pd.DataFrame, contagem: Optional[ContagemRegras] = None) -> pd.DataFrame:
+        """
+        Aplica as regras de negócio a todos os alunos de uma vez, sem o modelo.
+        
+        Mesma tabela e mesma ordem de prioridade de aplicar_regras_negocio(),
+        avaliadas com máscaras sobre as colunas. Alunos que não se encaixam em
+        nenhuma regra ficam com regra_aplicada='ML' e situacao/probabilidade
+        vazias, para serem completados pela predição do modelo. Lotes grandes
+        são avaliados em fatias paralelas (ver utilitarios.paralelismo).
+        
+        Args:
+            df: Dados dos alunos
+            contagem: Contagem da execução (padrão: contagem do motor)
+            
+        Returns:
+            DataFrame (mesmo índice de df) com as colunas situacao,
+            probabilidade, razao e regra_aplicada
+        """
+        contagem = contagem or self.contagem
+        avaliacoes = executar_em_fatias(
+            lambda inicio, fim: self.avaliador.avaliar(self.normalizar_lote(df.iloc[inicio:fim])),
+            dividir_em_fatias(len(df))
+        )
+        indices = np.concatenate([indices_fatia for indices_fatia, _ in avaliacoes])
+        
+        saidas = [(regra.codigo, regra.situacao, regra.probabilidade, regra.razao)
+                  for regra in self.avaliador.regras]
+        tabela = pd.DataFrame(saidas + [(REGRA_MODELO, None, np.nan, 'Predição ML')],
+                              columns=['regra_aplicada', 'situacao', 'probabilidade', 'razao'])
+        resultado = tabela.iloc[indices].set_axis(df.index)
+        
+        # Contadores iguais aos da avaliação aluno a aluno
+        for _, desempenho in avaliacoes:
+            contagem.registrar_desempenho(desempenho)
+            for regra in self.avaliador.regras:
+                quantidade = desempenho[regra.nome]['acertos']
+                if quantidade:
+                    contagem.contar(regra.codigo, quantidade)
+        
+        return resultado
+    
     def _extrair_valor_numerico(self, valor: Any) -> float:
         """
         Extrai valor numérico de forma segura.
@@ -225,11 +294,14 @@ class MotorRegrasNegocio:
         # consideramos como pendência
         return pendencia_academica_str != ''
     
-    def obter_resumo_regras(self) -> Dict[str, int]:
+    def obter_resumo_regras(self, contagem: Optional[ContagemRegras] = None) -> Dict[str, int]:
         """
         Retorna resumo das regras aplicadas.
         
+        Args:
+            contagem: Contagem da execução (padrão: contagem do motor)
+        
         Returns:
             Dicionário com contadores das regras
         """
-        return self.contador_regras.copy()
\ No newline at end of file
+        return (contagem or self.contagem).contador_regras.copy()
\ No newline at end of file
@@ -0,0 +1,252 @@
+﻿"""
+Tabela declarativa das regras de negócio.
+
+Cada regra é uma lista de condições (todas precisam valer) sobre colunas
+normalizadas do aluno, com a situação, a probabilidade e a razão que ela
+produz. A tabela é compilada uma vez em um AvaliadorRegras, que avalia um
+lote inteiro com máscaras numpy: vale a primeira regra (em ordem de
+prioridade) cujas condições forem verdadeiras.
+
+Valores iniciados por '$' são lidos de configuracoes.regras_negocio na
+compilação (ex.: '$nc_minimo_faltas'), e a razão aceita os mesmos nomes
+entre chaves (ex.: '≥{nc_minimo_faltas} faltas'). Uma tabela própria pode
+ser carregada de um JSON com a mesma estrutura (ver carregar_tabela_regras).
+"""
+
+import json
+import operator
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..utilitarios import obter_registrador
+from ..configuracao import configuracoes
+
+registrador = obter_registrador(__name__)
+
+# Colunas normalizadas disponíveis para as condições (ver MotorRegrasNegocio.normalizar_lote)
+COLUNA_FALTAS = 'faltas'                            # float
+COLUNA_PENDENCIA_FINANCEIRA = 'pendencia_financeira'  # float (PC = 0)
+COLUNA_PENDENCIA_ACADEMICA = 'pendencia_academica'    # bool
+COLUNA_PRIMEIRA_DISCIPLINA = 'primeira_disciplina'    # bool
+COLUNA_CURSO_COMPLETADO = 'curso_completado'          # bool
+
+COLUNAS_NORMALIZADAS = (COLUNA_FALTAS, COLUNA_PENDENCIA_FINANCEIRA, COLUNA_PENDENCIA_ACADEMICA,
+                        COLUNA_PRIMEIRA_DISCIPLINA, COLUNA_CURSO_COMPLETADO)
+
+# Regra aplicada quando nenhuma linha da tabela se encaixa
+REGRA_MODELO = 'ML'
+
+OPERADORES: Dict[str, Callable[[Any, Any], Any]] = {
+    '>=': operator.ge,
+    '>': operator.gt,
+    '<=': operator.le,
+    '<': operator.lt,
+    '==': operator.eq,
+    '!=': operator.ne
+}
+
+@dataclass
+class Condicao:
+    """Comparação de uma coluna normalizada com um valor."""
+    coluna: str
+    operador: str
+    valor: Any
+
+@dataclass
+class Regra:
+    """Linha da tabela de regras."""
+    nome: str                  # Identificador único (contadores e tempos)
+    codigo: str                # Regra aplicada informada no resultado (NC, LFR, ...)
+    situacao: str
+    probabilidade: Any         # Número ou referência '$parametro'
+    razao: str                 # Pode conter {parametro}
+    condicoes: List[Condicao] = field(default_factory=list)
+    prioridade: int = 0        # Menor valor é avaliado primeiro
+
+def tabela_padrao() -> List[Regra]:
+    """Regras do Grau Técnico, na ordem de prioridade do motor original."""
+    return [
+        Regra('NC', 'NC', 'Nunca Compareceu', '$probabilidade_nc',
+              '≥{nc_minimo_faltas} faltas na primeira disciplina',
+              [Condicao(COLUNA_FALTAS, '>=', '$nc_minimo_faltas'),
+               Condicao(COLUNA_PRIMEIRA_DISCIPLINA, '==', True)], prioridade=10),
+        # Muitas faltas fora da primeira disciplina
+        Regra('LFR_faltas', 'LFR', 'Limpeza de Frequencia', '$probabilidade_lfr',
+              '≥{lfr_minimo_faltas} faltas (não primeira disciplina)',
+              [Condicao(COLUNA_FALTAS, '>=', '$nc_minimo_faltas'),
+               Condicao(COLUNA_FALTAS, '>=', '$lfr_minimo_faltas')], prioridade=20),
+        Regra('LFI', 'LFI', 'Limpeza Financeira', '$probabilidade_lfi',
+              '≥{lfi_minimo_parcelas} parcelas em aberto',
+              [Condicao(COLUNA_PENDENCIA_FINANCEIRA, '>=', '$lfi_minimo_parcelas')], prioridade=30),
+        Regra('LFR_financeira', 'LFR', 'Limpeza de Frequencia', '$probabilidade_lfr',
+              'Pend. financeira + ≥{lfr_minimo_faltas} faltas',
+              [Condicao(COLUNA_PENDENCIA_FINANCEIRA, '>', 0),
+               Condicao(COLUNA_FALTAS, '>=', '$lfr_minimo_faltas')], prioridade=40),
+        Regra('LAC', 'LAC', 'Limpeza Academica', '$probabilidade_lac', 'Pendência acadêmica',
+              [Condicao(COLUNA_PENDENCIA_ACADEMICA, '==', True)], prioridade=50),
+        Regra('NF', 'NF', 'Não Formados', '$probabilidade_nf', 'Curso completo + ≤2 parcelas',
+              [Condicao(COLUNA_CURSO_COMPLETADO, '==', True),
+               Condicao(COLUNA_PENDENCIA_FINANCEIRA, '>', 0),
+               Condicao(COLUNA_PENDENCIA_FINANCEIRA, '<=', 2)], prioridade=60),
+        Regra('MT', 'MT', 'Matriculado', '$probabilidade_mt', 'Sem pendências significativas',
+              [Condicao(COLUNA_PENDENCIA_FINANCEIRA, '==', 0),
+               Condicao(COLUNA_FALTAS, '<=', '$mt_maximo_faltas')], prioridade=70)
+    ]
+
+def carregar_tabela_regras(caminho: Path) -> List[Regra]:
+    """
+    Carrega uma tabela de regras de um arquivo JSON.
+    
+    Formato: lista de objetos com os campos de Regra; cada condição é um
+    objeto {coluna, operador, valor} ou uma lista [coluna, operador, valor].
+    
+    Raises:
+        FileNotFoundError: Se o arquivo não existir
+        ValueError: Se o conteúdo não for uma lista de regras
+    """
+    with open(caminho, 'r', encoding='utf-8') as f:
+        conteudo = json.load(f)
+    if not isinstance(conteudo, list):
+        raise ValueError(f"Tabela de regras deve ser uma lista: {caminho}")
+    
+    tabela = []
+    for item in conteudo:
+        condicoes = [Condicao(*c) if isinstance(c, (list, tuple)) else Condicao(**c)
+                     for c in item.get('condicoes', [])]
+        tabela.append(Regra(**{**item, 'condicoes': condicoes}))
+    return tabela
+
+def _resolver(valor: Any, parametros: Dict[str, Any]) -> Any:
+    """Substitui referências '$parametro' pelo valor da configuração."""
+    if isinstance(valor, str) and valor.startswith('$'):
+        nome = valor[1:]
+        if nome not in parametros:
+            raise ValueError(f"Parâmetro de regra desconhecido: {valor}")
+        return parametros[nome]
+    return valor
+
+@dataclass
+class RegraCompilada:
+    """Regra com valores resolvidos e operadores prontos para avaliação."""
+    nome: str
+    codigo: str
+    situacao: str
+    probabilidade: float
+    razao: str
+    condicoes: List[Tuple[str, Callable[[Any, Any], Any], Any]]
+
+class AvaliadorRegras:
+    """
+    Tabela de regras compilada em avaliação vetorizada com primeira ocorrência.
+    
+    Mantém, por regra, quantos alunos ela decidiu e o tempo gasto avaliando
+    suas máscaras (acumulados entre execuções; cada chamada de avaliar()
+    também retorna os números da própria chamada).
+    """
+    
+    def __init__(self, tabela: Optional[List[Regra]] = None, parametros: Optional[Dict[str, Any]] = None):
+        """
+        Compila a tabela.
+        
+        Args:
+            tabela: Regras (padrão: tabela_padrao())
+            parametros: Valores para '$parametro' e {parametro}
+                (padrão: campos de configuracoes.regras_negocio)
+        
+        Raises:
+            ValueError: Se uma regra usar coluna, operador ou parâmetro desconhecido
+        """
+        tabela = tabela if tabela is not None else tabela_padrao()
+        parametros = parametros if parametros is not None else asdict(configuracoes.regras_negocio)
+        
+        self.regras: List[RegraCompilada] = []
+        for regra in sorted(tabela, key=lambda r: r.prioridade):
+            condicoes = []
+            for condicao in regra.condicoes:
+                if condicao.coluna not in COLUNAS_NORMALIZADAS:
+                    raise ValueError(f"Regra {regra.nome}: coluna desconhecida '{condicao.coluna}'")
+                if condicao.operador not in OPERADORES:
+                    raise ValueError(f"Regra {regra.nome}: operador desconhecido '{condicao.operador}'")
+                condicoes.append((condicao.coluna, OPERADORES[condicao.operador],
+                                  _resolver(condicao.valor, parametros)))
+            
+            self.regras.append(RegraCompilada(
+                nome=regra.nome,
+                codigo=regra.codigo,
+                situacao=regra.situacao,
+                probabilidade=float(_resolver(regra.probabilidade, parametros)),
+                razao=regra.razao.format(**parametros),
+                condicoes=condicoes
+            ))
+        
+        nomes = [regra.nome for regra in self.regras]
+        if len(set(nomes)) != len(nomes):
+            raise ValueError(f"Nomes de regra repetidos na tabela: {nomes}")
+        
+        self._acertos = {nome: 0 for nome in nomes}
+        self._segundos = {nome: 0.0 for nome in nomes}
+        self._trava = threading.Lock()
+        registrador.debug(f"Tabela de regras compilada: {nomes}")
+    
+    @property
+    def codigos(self) -> List[str]:
+        """Códigos de regra distintos, na ordem da tabela."""
+        return list(dict.fromkeys(regra.codigo for regra in self.regras))
+    
+    def avaliar(self, colunas: Dict[str, np.ndarray]) -> Tuple[np.ndarray, Dict[str, Dict[str, float]]]:
+        """
+        Avalia a tabela em um lote.
+        
+        Args:
+            colunas: Colunas normalizadas (arrays do mesmo tamanho)
+        
+        Returns:
+            Tuple com (posição da regra decidida para cada aluno, len(regras) =
+            nenhuma regra/modelo) e {nome: {'acertos', 'segundos'}} desta chamada
+        """
+        total = len(colunas[COLUNA_FALTAS])
+        indices = np.full(total, len(self.regras), dtype=np.int64)
+        pendentes = np.ones(total, dtype=bool)
+        desempenho = {}
+        
+        for posicao, regra in enumerate(self.regras):
+            inicio = time.perf_counter()
+            mascara = pendentes.copy()
+            for coluna, comparar, valor in regra.condicoes:
+                mascara &= comparar(colunas[coluna], valor)
+            indices[mascara] = posicao
+            pendentes &= ~mascara
+            desempenho[regra.nome] = {'acertos': int(mascara.sum()), 'segundos': time.perf_counter() - inicio}
+        
+        with self._trava:
+            for nome, valores in desempenho.items():
+                self._acertos[nome] += valores['acertos']
+                self._segundos[nome] += valores['segundos']
+        
+        return indices, desempenho
+    
+    def avaliar_aluno(self, valores: Dict[str, Any]) -> Optional[RegraCompilada]:
+        """
+        Avalia a tabela para um único aluno (mesma semântica de avaliar()).
+        
+        Args:
+            valores: Valores normalizados do aluno
+        
+        Returns:
+            Primeira regra que se aplica ou None (usar o modelo)
+        """
+        for regra in self.regras:
+            if all(comparar(valores[coluna], valor) for coluna, comparar, valor in regra.condicoes):
+                return regra
+        return None
+    
+    def desempenho(self) -> Dict[str, Dict[str, float]]:
+        """Acertos e tempo de avaliação acumulados por regra."""
+        with self._trava:
+            return {nome: {'acertos': self._acertos[nome], 'segundos': self._segundos[nome]}
+                    for nome in self._acertos}
\ No newline at end of file
@@ -0,0 +1,65 @@
+﻿"""
+Auxiliares para avaliar as regras de negócio sobre um lote inteiro.
+
+As regras foram escritas para um aluno por vez (funções sobre valores
+individuais). Para aplicá-las a um DataFrame sem mudar o resultado, cada
+função é executada uma única vez por valor distinto da coluna e o
+resultado é espalhado para as linhas com numpy.
+"""
+
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from ..utilitarios import coluna_arrow
+
+def coluna_ou_padrao(df: pd.DataFrame, coluna: str, padrao: Any) -> pd.Series:
+    """
+    Retorna a coluna do DataFrame ou uma Series constante, como ``dict.get(coluna, padrao)``.
+    
+    Args:
+        df: Dados dos alunos
+        coluna: Nome da coluna
+        padrao: Valor usado quando a coluna não existe
+    """
+    if coluna in df.columns:
+        return df[coluna]
+    return pd.Series([padrao] * len(df), index=df.index, dtype=object)
+
+def aplicar_por_valor(serie: pd.Series, funcao: Callable[[Any], Any]) -> np.ndarray:
+    """
+    Aplica uma função escalar a cada linha avaliando-a só nos valores distintos.
+    
+    Equivalente a ``serie.map(funcao).to_numpy()``, inclusive para valores
+    ausentes (a função recebe o próprio NaN), mas com custo proporcional ao
+    número de valores distintos.
+    
+    Args:
+        serie: Coluna a transformar
+        funcao: Função aplicada a um valor
+    
+    Returns:
+        Array com o resultado para cada linha
+    """
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+    resultados = [funcao(valor) for valor in unicos]
+    possui_ausentes = (codigos < 0).any()
+    if possui_ausentes:
+        # Colunas Arrow (caminho colunar) usam pd.NA; a função recebe NaN, como na leitura pelo pandas
+        valores_ausentes = serie[codigos < 0]
+        ausente = np.nan if coluna_arrow(serie) else valores_ausentes.iloc[0]
+        resultados.append(funcao(ausente))
+        codigos = np.where(codigos < 0, len(resultados) - 1, codigos)
+    
+    tabela = np.empty(len(resultados), dtype=object)
+    tabela[:] = resultados
+    convertido = tabela[codigos] if len(resultados) else np.empty(0, dtype=object)
+    
+    # Mantém bool/float como tipos numpy nativos para as máscaras
+    if all(isinstance(valor, (bool, np.bool_)) for valor in resultados):
+        return convertido.astype(bool)
+    if all(isinstance(valor, (int, float, np.integer, np.floating)) and not isinstance(valor, bool)
+           for valor in resultados):
+        return convertido.astype(float)
+    return convertido
\ No newline at end of file
@@ -4,9 +4,35 @@ Módulo de utilitários do sistema.
 
 from .registrador import obter_registrador, Registrador
 from .carregador_dados import CarregadorDados
+from .leitores_planilha import ler_planilha, detectar_formato, leitores_disponiveis
+from .metricas import metricas, RegistroMetricas, iniciar_servidor_metricas, parar_servidor_metricas
+from .paralelismo import orcamento_threads, reservar_threads, dividir_em_fatias, executar_em_fatias
+from .colunar import (
+    coluna_arrow, dataframe_para_tabela, tabela_para_dataframe, valores_distintos, mapear_por_valor, mapear_valores, salvar_tabela,
+    salvar_tabelas
+)
 
 __all__ = [
     'obter_registrador',
     'Registrador', 
-    'CarregadorDados'
+    'CarregadorDados',
+    'ler_planilha',
+    'detectar_formato',
+    'leitores_disponiveis',
+    'metricas',
+    'RegistroMetricas',
+    'iniciar_servidor_metricas',
+    'parar_servidor_metricas',
+    'orcamento_threads',
+    'reservar_threads',
+    'dividir_em_fatias',
+    'executar_em_fatias',
+    'coluna_arrow',
+    'dataframe_para_tabela',
+    'tabela_para_dataframe',
+    'valores_distintos',
+    'mapear_por_valor',
+    'mapear_valores',
+    'salvar_tabela',
+    'salvar_tabelas'
 ]
\ No newline at end of file
@@ -2,12 +2,19 @@
 Utilitários para carregamento e manipulação de dados.
 """
 
+import csv
+import io
+
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from typing import Tuple, Optional, Dict, Any
+from typing import Tuple, Optional, Dict, Any, List
 
 from .registrador import obter_registrador
+from .leitores_planilha import (
+    ler_planilha, aplicar_cabecalho, detectar_codificacao, detectar_delimitador, TAMANHO_AMOSTRA
+)
+from .colunar import exigir_pyarrow, dataframe_para_tabela
 from ..configuracao import configuracoes
 
 registrador = obter_registrador(__name__)
@@ -15,6 +22,22 @@ registrador = obter_registrador(__name__)
 class CarregadorDados:
     """Classe para carregamento e manipulação de dados."""
     
+    # Campos de matrícula em ordem de preferência (ver limpar_identificador_aluno)
+    CAMPOS_MATRICULA = ['Matrícula', 'Matricula', 'ID', 'Código']
+    
+    # Colunas usadas para identificar o aluno e para montar a saída
+    COLUNAS_IDENTIFICACAO = CAMPOS_MATRICULA + ['Nome']
+    COLUNAS_SAIDA = ['Situação', 'Curso', 'Sexo', 'Turma Atual']
+    
+    # Colunas numéricas reduzidas para tipos menores na compactação
+    COLUNAS_NUMERICAS_COMPACTAVEIS = ['Faltas Consecutivas', 'Pend. Financ.']
+    
+    # Formatos de entrada aceitos, roteados pela extensão do arquivo
+    EXTENSOES_EXCEL = ('.xlsx', '.xls')
+    EXTENSOES_CSV = ('.csv',)
+    EXTENSOES_COLUNARES = ('.parquet', '.feather')
+    EXTENSOES_SUPORTADAS = EXTENSOES_EXCEL + EXTENSOES_CSV + EXTENSOES_COLUNARES
+    
     @staticmethod
     def detectar_linha_cabecalho(df: pd.DataFrame, palavras_chave: list = None) -> int:
         """
@@ -42,13 +65,16 @@ class CarregadorDados:
     
     @staticmethod
     def carregar_excel_com_deteccao_cabecalho(caminho_arquivo: Path, 
-                                            palavras_chave: list = None) -> pd.DataFrame:
+                                            palavras_chave: list = None,
+                                            compactar: bool = False) -> pd.DataFrame:
         """
         Carrega arquivo Excel com detecção automática de header.
         
         Args:
-            caminho_arquivo: Caminho para o arquivo Excel
+            caminho_arquivo: Caminho para o arquivo Excel ou arquivo já aberto
+                (ex.: upload do Streamlit)
             palavras_chave: Palavras-chave para detectar header
+            compactar: Se True, aplica compactar_tipos() ao DataFrame carregado
             
         Returns:
             DataFrame carregado
@@ -56,23 +82,359 @@ class CarregadorDados:
         Raises:
             FileNotFoundError: Se o arquivo não for encontrado
         """
-        if not caminho_arquivo.exists():
+        if not hasattr(caminho_arquivo, 'read') and not Path(caminho_arquivo).exists():
             raise FileNotFoundError(f"Arquivo não encontrado: {caminho_arquivo}")
         
         registrador.info(f"Carregando arquivo: {caminho_arquivo}")
         
-        # Carregar sem header para detectar
-        df_bruto = pd.read_excel(caminho_arquivo, header=None)
+        # Carregar uma única vez sem header (backend escolhido pelo formato real do arquivo)
+        df_bruto = ler_planilha(caminho_arquivo, header=None)
         
         # Detectar header
         linha_cabecalho = CarregadorDados.detectar_linha_cabecalho(df_bruto, palavras_chave)
         
-        # Recarregar com header correto
-        df = pd.read_excel(caminho_arquivo, header=linha_cabecalho)
+        # Aplicar header correto sem reler o arquivo
+        df = aplicar_cabecalho(df_bruto, linha_cabecalho)
+        
+        registrador.info(f"Dados carregados: {df.shape[0]} linhas, {df.shape[1]} colunas")
+        
+        if compactar:
+            df = CarregadorDados.compactar_tipos(df)
+        
+        return df
+    
+    @staticmethod
+    def carregar_alunos(caminho_arquivo: Path, colunas: Optional[List[str]] = None,
+                        palavras_chave: list = None, compactar: bool = False) -> pd.DataFrame:
+        """
+        Carrega o arquivo de alunos escolhendo o leitor pela extensão.
+        
+        - .xlsx/.xls: detecção automática de header
+        - .csv: detecção de codificação, delimitador e header
+        - .parquet/.feather: leitura colunar, lendo apenas as colunas pedidas
+        
+        Args:
+            caminho_arquivo: Caminho para o arquivo de alunos
+            colunas: Colunas de interesse (None = todas). Colunas ausentes no
+                arquivo são ignoradas; planilhas Excel são sempre lidas inteiras
+            palavras_chave: Palavras-chave para detectar header (Excel/CSV)
+            compactar: Se True, aplica compactar_tipos() ao DataFrame carregado
+            
+        Returns:
+            DataFrame carregado
+            
+        Raises:
+            FileNotFoundError: Se o arquivo não for encontrado
+            ValueError: Se a extensão não for suportada
+        """
+        caminho_arquivo = Path(caminho_arquivo)
+        if not caminho_arquivo.exists():
+            raise FileNotFoundError(f"Arquivo não encontrado: {caminho_arquivo}")
+        
+        extensao = caminho_arquivo.suffix.lower()
+        
+        if extensao in CarregadorDados.EXTENSOES_EXCEL:
+            df = CarregadorDados.carregar_excel_com_deteccao_cabecalho(caminho_arquivo, palavras_chave)
+        elif extensao in CarregadorDados.EXTENSOES_CSV:
+            df = CarregadorDados.carregar_csv_com_deteccao_cabecalho(caminho_arquivo, colunas, palavras_chave)
+        elif extensao in CarregadorDados.EXTENSOES_COLUNARES:
+            df = CarregadorDados.carregar_colunar(caminho_arquivo, colunas)
+        else:
+            raise ValueError(
+                f"Formato não suportado: '{extensao}'. "
+                f"Use um destes: {', '.join(CarregadorDados.EXTENSOES_SUPORTADAS)}"
+            )
+        
+        if compactar:
+            df = CarregadorDados.compactar_tipos(df)
+        
+        return df
+    
+    @staticmethod
+    def carregar_csv_com_deteccao_cabecalho(caminho_arquivo: Path, colunas: Optional[List[str]] = None,
+                                            palavras_chave: list = None) -> pd.DataFrame:
+        """
+        Carrega arquivo CSV detectando codificação, delimitador e header.
+        
+        Args:
+            caminho_arquivo: Caminho para o arquivo CSV
+            colunas: Colunas a ler (None = todas)
+            palavras_chave: Palavras-chave para detectar header
+            
+        Returns:
+            DataFrame carregado
+        """
+        registrador.info(f"Carregando arquivo: {caminho_arquivo}")
+        
+        codificacao, delimitador, linha_cabecalho, _ = CarregadorDados._detectar_formato_csv(
+            caminho_arquivo, palavras_chave
+        )
+        
+        usecols = None
+        if colunas is not None:
+            colunas_desejadas = set(colunas)
+            usecols = lambda coluna: coluna in colunas_desejadas
+        
+        df = pd.read_csv(caminho_arquivo, sep=delimitador, encoding=codificacao,
+                         skiprows=linha_cabecalho, usecols=usecols)
+        
+        registrador.info(f"Dados carregados: {df.shape[0]} linhas, {df.shape[1]} colunas")
+        return df
+    
+    @staticmethod
+    def _detectar_formato_csv(caminho_arquivo: Path, palavras_chave: list = None) -> Tuple[str, str, int, List[str]]:
+        """
+        Detecta codificação, delimitador e linha do header de um CSV pela amostra inicial.
+        
+        Returns:
+            Tuple com (codificação, delimitador, linha do header, nomes das colunas)
+        """
+        with open(caminho_arquivo, 'rb') as f:
+            amostra = f.read(TAMANHO_AMOSTRA)
+        
+        codificacao = detectar_codificacao(amostra)
+        texto = amostra.decode(codificacao, errors='ignore')
+        delimitador = detectar_delimitador(texto)
+        registrador.debug(f"CSV: codificação={codificacao}, delimitador={delimitador!r}")
+        
+        # Detectar header nas primeiras linhas (exportações podem ter linhas de título)
+        primeiras_linhas = list(csv.reader(io.StringIO(texto), delimiter=delimitador))[:5]
+        linha_cabecalho = CarregadorDados.detectar_linha_cabecalho(pd.DataFrame(primeiras_linhas), palavras_chave)
+        cabecalho = primeiras_linhas[linha_cabecalho] if linha_cabecalho < len(primeiras_linhas) else []
+        return codificacao, delimitador, linha_cabecalho, cabecalho
+    
+    @staticmethod
+    def _colunas_arquivo_colunar(caminho_arquivo: Path) -> Optional[List[str]]:
+        """
+        Lê apenas o schema de um arquivo Parquet/Feather.
+        
+        Returns:
+            Nomes das colunas, ou None se o pyarrow não estiver disponível
+        """
+        try:
+            import pyarrow.parquet as pq
+            import pyarrow.ipc as ipc
+        except ImportError:
+            return None
+        
+        if caminho_arquivo.suffix.lower() == '.parquet':
+            return list(pq.read_schema(caminho_arquivo).names)
+        
+        with ipc.open_file(caminho_arquivo) as leitor:
+            return list(leitor.schema.names)
+    
+    @staticmethod
+    def carregar_colunar(caminho_arquivo: Path, colunas: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Carrega arquivo Parquet ou Feather, com projeção de colunas.
+        
+        Args:
+            caminho_arquivo: Caminho para o arquivo .parquet/.feather
+            colunas: Colunas a ler (None = todas). Apenas as presentes no
+                schema do arquivo são solicitadas ao leitor
+            
+        Returns:
+            DataFrame carregado
+        """
+        registrador.info(f"Carregando arquivo: {caminho_arquivo}")
+        
+        colunas_leitura = None
+        if colunas is not None:
+            colunas_arquivo = CarregadorDados._colunas_arquivo_colunar(caminho_arquivo)
+            if colunas_arquivo is not None:
+                disponiveis = set(colunas_arquivo)
+                colunas_leitura = [col for col in dict.fromkeys(colunas) if col in disponiveis]
+                registrador.debug(f"Projeção: {len(colunas_leitura)}/{len(colunas_arquivo)} colunas")
+        
+        if caminho_arquivo.suffix.lower() == '.parquet':
+            df = pd.read_parquet(caminho_arquivo, columns=colunas_leitura)
+        else:
+            df = pd.read_feather(caminho_arquivo, columns=colunas_leitura)
         
         registrador.info(f"Dados carregados: {df.shape[0]} linhas, {df.shape[1]} colunas")
         return df
     
+    @staticmethod
+    def carregar_alunos_tabela(caminho_arquivo: Path, colunas: Optional[List[str]] = None,
+                               palavras_chave: list = None) -> 'pa.Table':
+        """
+        Carrega o arquivo de alunos como tabela Arrow (caminho colunar).
+        
+        - .parquet/.feather: lidos pelo pyarrow, só com as colunas pedidas
+        - .csv: mesma detecção de codificação, delimitador e header de
+          carregar_alunos(), com o leitor CSV do pyarrow
+        - .xlsx/.xls: não há leitor Arrow de Excel; a planilha é lida pelo
+          pandas e convertida (ver colunar.dataframe_para_tabela)
+        
+        Args:
+            caminho_arquivo: Caminho para o arquivo de alunos
+            colunas: Colunas de interesse (None = todas). Colunas ausentes no
+                arquivo são ignoradas
+            palavras_chave: Palavras-chave para detectar header (Excel/CSV)
+            
+        Returns:
+            Tabela carregada
+            
+        Raises:
+            FileNotFoundError: Se o arquivo não for encontrado
+            ValueError: Se a extensão não for suportada
+            ImportError: Se o pyarrow não estiver instalado
+        """
+        exigir_pyarrow()
+        import pyarrow.csv as pa_csv
+        import pyarrow.feather as feather
+        import pyarrow.parquet as pq
+        
+        caminho_arquivo = Path(caminho_arquivo)
+        if not caminho_arquivo.exists():
+            raise FileNotFoundError(f"Arquivo não encontrado: {caminho_arquivo}")
+        
+        extensao = caminho_arquivo.suffix.lower()
+        if extensao not in CarregadorDados.EXTENSOES_SUPORTADAS:
+            raise ValueError(
+                f"Formato não suportado: '{extensao}'. "
+                f"Use um destes: {', '.join(CarregadorDados.EXTENSOES_SUPORTADAS)}"
+            )
+        
+        def projetar(disponiveis: List[str]) -> Optional[List[str]]:
+            if colunas is None:
+                return None
+            presentes = set(disponiveis)
+            return [coluna for coluna in dict.fromkeys(colunas) if coluna in presentes]
+        
+        registrador.info(f"Carregando arquivo (Arrow): {caminho_arquivo}")
+        if extensao in CarregadorDados.EXTENSOES_EXCEL:
+            df = CarregadorDados.carregar_excel_com_deteccao_cabecalho(caminho_arquivo, palavras_chave)
+            colunas_leitura = projetar([str(coluna) for coluna in df.columns])
+            tabela = dataframe_para_tabela(df if colunas_leitura is None else df[colunas_leitura])
+        elif extensao in CarregadorDados.EXTENSOES_CSV:
+            codificacao, delimitador, linha_cabecalho, cabecalho = CarregadorDados._detectar_formato_csv(
+                caminho_arquivo, palavras_chave
+            )
+            tabela = pa_csv.read_csv(
+                caminho_arquivo,
+                read_options=pa_csv.ReadOptions(encoding=codificacao, skip_rows=linha_cabecalho),
+                parse_options=pa_csv.ParseOptions(delimiter=delimitador),
+                # Como o pandas: texto vazio é ausente e datas continuam texto
+                convert_options=pa_csv.ConvertOptions(include_columns=projetar(cabecalho) or [],
+                                                      strings_can_be_null=True, timestamp_parsers=[])
+            )
+        elif extensao == '.parquet':
+            tabela = pq.read_table(caminho_arquivo, columns=projetar(pq.read_schema(caminho_arquivo).names))
+        else:
+            tabela = feather.read_table(caminho_arquivo,
+                                        columns=projetar(CarregadorDados._colunas_arquivo_colunar(caminho_arquivo)))
+        
+        registrador.info(f"Dados carregados: {tabela.num_rows} linhas, {tabela.num_columns} colunas")
+        return tabela
+    
+    @staticmethod
+    def colunas_necessarias() -> List[str]:
+        """
+        Retorna as colunas usadas por features, identificação e saída.
+        
+        Returns:
+            Lista de nomes de colunas (sem repetição, na ordem de uso)
+        """
+        colunas = (configuracoes.dados.caracteristicas_esperadas +
+                   CarregadorDados.COLUNAS_IDENTIFICACAO +
+                   CarregadorDados.COLUNAS_SAIDA)
+        return list(dict.fromkeys(colunas))
+    
+    @staticmethod
+    def relatorio_memoria(df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Mede o consumo de memória de um DataFrame.
+        
+        Args:
+            df: DataFrame a medir
+            
+        Returns:
+            Dicionário com linhas, colunas, bytes totais e bytes por linha
+        """
+        bytes_total = int(df.memory_usage(index=True, deep=True).sum())
+        return {
+            'linhas': len(df),
+            'colunas': df.shape[1],
+            'bytes_total': bytes_total,
+            'bytes_por_linha': bytes_total / len(df) if len(df) else 0.0
+        }
+    
+    @staticmethod
+    def _reduzir_coluna_numerica(serie: pd.Series) -> pd.Series:
+        """
+        Reduz uma coluna numérica ao menor tipo que preserva os valores.
+        
+        Colunas texto (ex.: 'PC' em Pend. Financ.) são convertidas como o
+        pré-processamento do modelo faria: valores não numéricos viram 0.
+        """
+        if serie.dtype == 'object':
+            serie = pd.to_numeric(serie, errors='coerce').fillna(0)
+        
+        if serie.isna().any() or not np.all(np.mod(serie.to_numpy(dtype=float), 1) == 0):
+            return serie.astype(np.float32)
+        
+        return pd.to_numeric(serie, downcast='integer')
+    
+    @staticmethod
+    def compactar_tipos(df: pd.DataFrame, descartar_colunas: bool = True,
+                        limite_cardinalidade: Optional[float] = None) -> pd.DataFrame:
+        """
+        Converte o DataFrame para tipos compactos em memória.
+        
+        - Remove colunas que não são features, identificação nem saída
+        - Converte colunas texto de baixa cardinalidade para 'category'
+        - Reduz Faltas Consecutivas/Pend. Financ. para inteiros pequenos ou float32
+        
+        O relatório de memória (antes/depois) fica em df.attrs['relatorio_memoria'].
+        
+        Args:
+            df: DataFrame carregado
+            descartar_colunas: Se True, remove colunas desnecessárias
+            limite_cardinalidade: Fração máxima de valores distintos para
+                virar 'category' (padrão: configuracoes.dados.limite_cardinalidade_categoria)
+            
+        Returns:
+            DataFrame compactado
+        """
+        if limite_cardinalidade is None:
+            limite_cardinalidade = configuracoes.dados.limite_cardinalidade_categoria
+        
+        relatorio_antes = CarregadorDados.relatorio_memoria(df)
+        
+        if descartar_colunas:
+            colunas_mantidas = [col for col in CarregadorDados.colunas_necessarias() if col in df.columns]
+            df_compacto = df[colunas_mantidas].copy()
+        else:
+            df_compacto = df.copy()
+        
+        for coluna in CarregadorDados.COLUNAS_NUMERICAS_COMPACTAVEIS:
+            if coluna in df_compacto.columns:
+                df_compacto[coluna] = CarregadorDados._reduzir_coluna_numerica(df_compacto[coluna])
+        
+        for coluna in df_compacto.select_dtypes(include=['object']).columns:
+            if coluna in CarregadorDados.COLUNAS_IDENTIFICACAO:
+                continue
+            valores_distintos = df_compacto[coluna].nunique(dropna=True)
+            if len(df_compacto) and valores_distintos / len(df_compacto) <= limite_cardinalidade:
+                df_compacto[coluna] = df_compacto[coluna].astype('category')
+        
+        relatorio_depois = CarregadorDados.relatorio_memoria(df_compacto)
+        df_compacto.attrs['relatorio_memoria'] = {
+            'antes': relatorio_antes,
+            'depois': relatorio_depois,
+            'reducao_percentual': (1 - relatorio_depois['bytes_total'] / relatorio_antes['bytes_total']) * 100
+                                  if relatorio_antes['bytes_total'] else 0.0
+        }
+        
+        registrador.info(
+            f"Memória: {relatorio_antes['bytes_por_linha']:.0f} → "
+            f"{relatorio_depois['bytes_por_linha']:.0f} bytes/linha "
+            f"({df_compacto.attrs['relatorio_memoria']['reducao_percentual']:.1f}% menor, "
+            f"{relatorio_antes['colunas']} → {relatorio_depois['colunas']} colunas)"
+        )
+        return df_compacto
+    
     @staticmethod
     def carregar_dados_curriculares() -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
         """
@@ -88,17 +450,15 @@ class CarregadorDados:
             # Carregar disciplinas
             caminho_disciplinas = configuracoes.obter_caminho_disciplinas()
             if caminho_disciplinas.exists():
-                df_bruto = pd.read_excel(caminho_disciplinas)
-                # Usar linha 1 como header (que contém: Código, Disciplina, etc.)
-                cabecalho = df_bruto.iloc[1].values
-                df_disciplinas = pd.read_excel(caminho_disciplinas, skiprows=2)
-                df_disciplinas.columns = cabecalho
+                df_bruto = ler_planilha(caminho_disciplinas, header=None)
+                # Usar a terceira linha do arquivo como header (que contém: Código, Disciplina, etc.)
+                df_disciplinas = aplicar_cabecalho(df_bruto, 2)
                 registrador.info(f"Disciplinas carregadas: {len(df_disciplinas)} registros")
             
             # Carregar cursos
             caminho_cursos = configuracoes.obter_caminho_cursos()
             if caminho_cursos.exists():
-                df_cursos = pd.read_excel(caminho_cursos)
+                df_cursos = ler_planilha(caminho_cursos)
                 registrador.info(f"Cursos carregados: {len(df_cursos)} registros")
             
         except Exception as e:
@@ -117,9 +477,7 @@ class CarregadorDados:
         Returns:
             Identificador limpo
         """
-        identificadores_possiveis = ['Matrícula', 'Matricula', 'ID', 'Código']
-        
-        for campo in identificadores_possiveis:
+        for campo in CarregadorDados.CAMPOS_MATRICULA:
             if campo in dados_aluno:
                 valor = dados_aluno[campo]
                 if pd.notna(valor):
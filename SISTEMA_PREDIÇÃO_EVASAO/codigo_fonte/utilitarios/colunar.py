@@ -0,0 +1,208 @@
+﻿"""
+Auxiliares do caminho colunar (Apache Arrow).
+
+No caminho colunar os alunos ficam em um pyarrow.Table do carregamento até a
+gravação: o pandas enxerga as colunas como ArrowDtype (sem cópia) e cada
+transformação escalar é avaliada uma única vez por valor distinto, com o
+resultado espalhado pelos índices de um array de dicionário (a mesma ideia
+de regras_negocio.vetorizacao). Assim o custo em objetos Python acompanha o
+número de valores distintos, e não o de alunos.
+
+O pyarrow é opcional: só este caminho depende dele.
+"""
+
+import codecs
+from contextlib import ExitStack
+from itertools import chain
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .registrador import obter_registrador
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = pc = None
+
+registrador = obter_registrador(__name__)
+
+EXTENSOES_SAIDA = ('.csv', '.parquet', '.feather')
+
+def exigir_pyarrow() -> None:
+    """
+    Garante que o pyarrow e um pandas com ArrowDtype estão disponíveis.
+    
+    Raises:
+        ImportError: Se o pyarrow não estiver instalado ou o pandas for anterior ao 2.0
+    """
+    if pa is None:
+        raise ImportError("O caminho colunar precisa do pyarrow (pip install pyarrow)")
+    if not hasattr(pd, 'ArrowDtype'):
+        raise ImportError("O caminho colunar precisa do pandas 2.0 ou mais recente")
+
+def coluna_arrow(serie: pd.Series) -> bool:
+    """True se a coluna é ArrowDtype (pd.ArrowDtype só existe a partir do pandas 2.0)."""
+    return isinstance(serie.dtype, getattr(pd, 'ArrowDtype', ()))
+
+def dataframe_para_tabela(df: pd.DataFrame) -> 'pa.Table':
+    """
+    Converte um DataFrame carregado pelo pandas (ex.: Excel) em tabela Arrow.
+    
+    Colunas 'category' viram arrays de dicionário. Colunas object com tipos
+    misturados (ex.: 'PC' e números em Pend. Financ.) viram texto, forma que
+    as regras e o pré-processamento já aceitam para esses valores.
+    """
+    exigir_pyarrow()
+    arrays = []
+    for coluna in df.columns:
+        serie = df[coluna]
+        try:
+            arrays.append(pa.array(serie, from_pandas=True))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            registrador.debug(f"Coluna {coluna} com tipos misturados convertida para texto")
+            arrays.append(pa.array(serie.map(str, na_action='ignore'), type=pa.string(), from_pandas=True))
+    return pa.Table.from_arrays(arrays, names=[str(coluna) for coluna in df.columns])
+
+def tabela_para_dataframe(tabela: 'pa.Table') -> pd.DataFrame:
+    """DataFrame com colunas ArrowDtype sobre os mesmos buffers da tabela (sem cópia)."""
+    exigir_pyarrow()
+    return tabela.to_pandas(types_mapper=pd.ArrowDtype)
+
+def valores_distintos(coluna: Union['pa.Array', 'pa.ChunkedArray', pd.Series]) -> Tuple[pd.Series, np.ndarray]:
+    """
+    Valores distintos de uma coluna e a posição de cada linha entre eles.
+    
+    Os distintos têm o tipo que o pandas daria à coluna inteira (ex.: inteiros
+    com ausentes viram float64). Ausentes ficam como um último valor NaN, que é
+    o que as funções escalares do pipeline recebem na leitura do Excel/CSV.
+    
+    Args:
+        coluna: Array Arrow ou Series ArrowDtype
+    
+    Returns:
+        Tuple com (valores distintos, índice do distinto de cada linha)
+    """
+    exigir_pyarrow()
+    array = pa.array(coluna) if isinstance(coluna, pd.Series) else coluna
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    if pa.types.is_dictionary(array.type):
+        array = array.dictionary_decode()
+    
+    codificada = pc.dictionary_encode(array)
+    distintos = codificada.dictionary.to_pandas()
+    indices = codificada.indices
+    if indices.null_count:
+        distintos = (pd.concat([distintos, pd.Series([np.nan])], ignore_index=True)
+                     if len(distintos) else pd.Series([np.nan]))
+        indices = pc.fill_null(indices, len(distintos) - 1)
+    return distintos, indices.to_numpy(zero_copy_only=False)
+
+def mapear_por_valor(coluna: Union['pa.Array', 'pa.ChunkedArray', pd.Series], funcao: Callable[[Any], Any],
+                     tipo: Optional['pa.DataType'] = None) -> 'pa.Array':
+    """
+    Aplica uma função escalar a cada linha avaliando-a só nos valores distintos.
+    
+    Equivalente a ``pa.array(serie.map(funcao))``, sem criar um objeto Python
+    por linha.
+    
+    Args:
+        coluna: Array Arrow ou Series ArrowDtype
+        funcao: Função aplicada a um valor
+        tipo: Tipo Arrow do resultado (padrão: texto)
+    """
+    distintos, indices = valores_distintos(coluna)
+    resultados = pa.array([funcao(valor) for valor in distintos], type=tipo or pa.string())
+    return resultados.take(indices)
+
+def mapear_valores(valores: np.ndarray, funcao: Callable[[Any], Any],
+                   tipo: Optional['pa.DataType'] = None) -> 'pa.Array':
+    """
+    Como mapear_por_valor(), para um array NumPy (ex.: formatar probabilidades).
+    
+    Args:
+        valores: Array unidimensional
+        funcao: Função aplicada a um valor
+        tipo: Tipo Arrow do resultado (padrão: texto)
+    """
+    exigir_pyarrow()
+    unicos, inverso = np.unique(valores, return_inverse=True)
+    resultados = pa.array([funcao(valor) for valor in unicos.tolist()], type=tipo or pa.string())
+    return resultados.take(pa.array(inverso.reshape(-1)))
+
+def salvar_tabela(tabela: 'pa.Table', caminho: Path, bom: bool = False) -> Path:
+    """
+    Grava a tabela direto do Arrow, no formato indicado pela extensão.
+    
+    Args:
+        tabela: Tabela a gravar
+        caminho: Arquivo .csv, .parquet ou .feather
+        bom: CSV com BOM UTF-8 (Excel e Power BI reconhecem a codificação)
+    
+    Returns:
+        Caminho gravado
+    
+    Raises:
+        ValueError: Se a extensão não for suportada
+    """
+    salvar_tabelas([tabela], caminho, bom)
+    registrador.info(f"Tabela gravada: {caminho} ({tabela.num_rows} linhas, {tabela.num_columns} colunas)")
+    return Path(caminho)
+
+def salvar_tabelas(tabelas: Iterable['pa.Table'], caminho: Path, bom: bool = False) -> int:
+    """
+    Grava em sequência, no mesmo arquivo, tabelas com o mesmo esquema.
+    
+    Só uma tabela precisa estar em memória por vez (ex.: saídas parciais
+    lidas sob demanda por um gerador).
+    
+    Args:
+        tabelas: Tabelas a gravar, na ordem
+        caminho: Arquivo .csv, .parquet ou .feather
+        bom: CSV com BOM UTF-8
+    
+    Returns:
+        Total de linhas gravadas
+    
+    Raises:
+        ValueError: Se a extensão não for suportada ou não houver tabelas
+    """
+    exigir_pyarrow()
+    caminho = Path(caminho)
+    extensao = caminho.suffix.lower()
+    if extensao not in EXTENSOES_SAIDA:
+        raise ValueError(f"Formato de saída não suportado: '{extensao}'. "
+                         f"Use um destes: {', '.join(EXTENSOES_SAIDA)}")
+    
+    iterador = iter(tabelas)
+    primeira = next(iterador, None)
+    if primeira is None:
+        raise ValueError("Nenhuma tabela para gravar")
+    
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    total = 0
+    with ExitStack() as pilha:
+        if extensao == '.csv':
+            import pyarrow.csv as pa_csv
+            arquivo = pilha.enter_context(open(caminho, 'wb'))
+            if bom:
+                arquivo.write(codecs.BOM_UTF8)
+            gravador = pa_csv.CSVWriter(arquivo, primeira.schema,
+                                        write_options=pa_csv.WriteOptions(quoting_style='needed'))
+        elif extensao == '.parquet':
+            import pyarrow.parquet as pq
+            gravador = pq.ParquetWriter(caminho, primeira.schema)
+        else:
+            # Feather V2 é o formato de arquivo IPC do Arrow (lz4, como write_feather)
+            compressao = 'lz4' if pa.Codec.is_available('lz4_frame') else None
+            gravador = pa.ipc.new_file(str(caminho), primeira.schema,
+                                       options=pa.ipc.IpcWriteOptions(compression=compressao))
+        with gravador:
+            for tabela in chain([primeira], iterador):
+                gravador.write_table(tabela)
+                total += tabela.num_rows
+    return total
\ No newline at end of file
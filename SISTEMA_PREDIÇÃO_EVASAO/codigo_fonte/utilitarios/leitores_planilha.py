@@ -0,0 +1,346 @@
+﻿"""
+Backends de leitura de planilhas com seleção automática.
+
+O formato real do arquivo é identificado pelos bytes iniciais (assinatura),
+e não pela extensão: exportações do AcadWeb às vezes chegam como ``.xls``
+sendo na verdade CSV. Para cada formato é usado o backend disponível mais
+rápido (calamine, quando instalado; openpyxl/xlrd caso contrário).
+"""
+
+import csv
+import importlib.util
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from .registrador import obter_registrador
+from ..configuracao import configuracoes
+
+registrador = obter_registrador(__name__)
+
+FORMATO_XLSX = 'xlsx'
+FORMATO_XLS = 'xls'
+FORMATO_CSV = 'csv'
+FORMATO_DESCONHECIDO = 'desconhecido'
+
+# Assinaturas (magic bytes) dos formatos binários
+ASSINATURA_XLSX = b'PK\x03\x04'            # Arquivo ZIP (Office Open XML)
+ASSINATURA_XLS = b'\xd0\xcf\x11\xe0'       # OLE2 (Excel 97-2003)
+
+# Ordem de tentativa ao identificar a codificação de arquivos texto
+CODIFICACOES_TEXTO = ['utf-8-sig', 'cp1252', 'latin1']
+DELIMITADORES_CSV = ';,\t|'
+TAMANHO_AMOSTRA = 64 * 1024
+
+Arquivo = Union[str, Path, Any]
+
+def _ler_bytes_iniciais(arquivo: Arquivo, quantidade: int) -> bytes:
+    """Lê os primeiros bytes de um caminho ou objeto de arquivo sem consumi-lo."""
+    if hasattr(arquivo, 'read'):
+        posicao = arquivo.tell() if hasattr(arquivo, 'tell') else 0
+        arquivo.seek(0)
+        dados = arquivo.read(quantidade)
+        arquivo.seek(posicao)
+        return dados if isinstance(dados, bytes) else dados.encode('utf-8')
+    
+    with open(arquivo, 'rb') as f:
+        return f.read(quantidade)
+
+def _rebobinar(arquivo: Arquivo) -> None:
+    """Volta objetos de arquivo ao início antes de uma nova leitura."""
+    if hasattr(arquivo, 'seek'):
+        arquivo.seek(0)
+
+def detectar_codificacao(amostra: bytes) -> str:
+    """
+    Identifica a codificação de um arquivo texto.
+    
+    Args:
+        amostra: Bytes iniciais do arquivo
+    
+    Returns:
+        Nome da codificação
+    """
+    for codificacao in CODIFICACOES_TEXTO:
+        try:
+            amostra.decode(codificacao)
+            return codificacao
+        except UnicodeDecodeError:
+            # A amostra pode cortar um caractere multibyte no final
+            if codificacao.startswith('utf-8'):
+                try:
+                    amostra[:-3].decode(codificacao)
+                    return codificacao
+                except UnicodeDecodeError:
+                    pass
+    return 'latin1'
+
+def detectar_delimitador(texto: str) -> str:
+    """
+    Identifica o delimitador de um CSV.
+    
+    Args:
+        texto: Trecho inicial do arquivo já decodificado
+    
+    Returns:
+        Delimitador detectado (';' se não for possível identificar)
+    """
+    try:
+        return csv.Sniffer().sniff(texto, delimiters=DELIMITADORES_CSV).delimiter
+    except csv.Error:
+        # Exportações brasileiras usam ';' por padrão
+        contagens = {d: texto.count(d) for d in DELIMITADORES_CSV}
+        melhor = max(contagens, key=contagens.get)
+        return melhor if contagens[melhor] > 0 else ';'
+
+def detectar_formato(arquivo: Arquivo) -> str:
+    """
+    Identifica o formato real de uma planilha pelos bytes iniciais.
+    
+    Args:
+        arquivo: Caminho ou objeto de arquivo
+    
+    Returns:
+        'xlsx', 'xls', 'csv' ou 'desconhecido'
+    """
+    amostra = _ler_bytes_iniciais(arquivo, TAMANHO_AMOSTRA)
+    
+    if amostra.startswith(ASSINATURA_XLSX):
+        return FORMATO_XLSX
+    if amostra.startswith(ASSINATURA_XLS):
+        return FORMATO_XLS
+    
+    # Texto sem bytes nulos é tratado como CSV (ex.: CSV salvo como .xls)
+    if amostra and b'\x00' not in amostra:
+        texto = amostra.decode(detectar_codificacao(amostra), errors='ignore')
+        if texto.strip():
+            return FORMATO_CSV
+    
+    return FORMATO_DESCONHECIDO
+
+def aplicar_cabecalho(df_bruto: pd.DataFrame, linha_cabecalho: int) -> pd.DataFrame:
+    """
+    Transforma uma leitura sem cabeçalho (header=None) na leitura com cabeçalho.
+    
+    Reproduz ``pd.read_excel(header=linha_cabecalho)`` sem reler o arquivo:
+    nomes 'Unnamed: N' para células de cabeçalho vazias, sufixos '.1', '.2'
+    em nomes duplicados e tipos reinferidos por coluna (a linha de cabeçalho
+    deixava todas as colunas como object).
+    
+    Args:
+        df_bruto: DataFrame lido com header=None
+        linha_cabecalho: Índice da linha que contém os nomes das colunas
+    
+    Returns:
+        DataFrame com cabeçalho aplicado
+    """
+    nomes = []
+    vistos: Dict[Any, int] = {}
+    for posicao, valor in enumerate(df_bruto.iloc[linha_cabecalho]):
+        nome = f"Unnamed: {posicao}" if pd.isna(valor) or valor == '' else valor
+        if nome in vistos:
+            vistos[nome] += 1
+            nome = f"{nome}.{vistos[nome]}"
+        vistos.setdefault(nome, 0)
+        nomes.append(nome)
+    
+    corpo = df_bruto.iloc[linha_cabecalho + 1:].reset_index(drop=True)
+    corpo = corpo.where(corpo.notna() & corpo.ne(''))
+    corpo.columns = nomes
+    corpo = corpo.infer_objects()
+    for coluna in corpo.columns[corpo.dtypes == object]:
+        try:
+            corpo[coluna] = pd.to_numeric(corpo[coluna])
+        except (ValueError, TypeError):
+            pass
+    return corpo
+
+class LeitorPlanilha(ABC):
+    """Backend de leitura de planilhas."""
+    
+    nome = 'base'
+    formatos: Tuple[str, ...] = ()
+    modulo_requerido: Optional[str] = None
+    
+    def disponivel(self) -> bool:
+        """Verifica se a dependência do backend está instalada."""
+        if self.modulo_requerido is None:
+            return True
+        return importlib.util.find_spec(self.modulo_requerido) is not None
+    
+    def suporta(self, formato: str) -> bool:
+        """Verifica se o backend lê o formato informado."""
+        return formato in self.formatos
+    
+    @abstractmethod
+    def ler(self, arquivo: Arquivo, **kwargs) -> pd.DataFrame:
+        """
+        Lê a planilha.
+        
+        Args:
+            arquivo: Caminho ou objeto de arquivo
+            **kwargs: Argumentos de leitura (header, nrows, skiprows, ...)
+        
+        Returns:
+            DataFrame lido
+        """
+
+class _LeitorExcelPandas(LeitorPlanilha):
+    """Backend baseado em pd.read_excel com um engine específico."""
+    
+    engine: Optional[str] = None
+    
+    def ler(self, arquivo: Arquivo, **kwargs) -> pd.DataFrame:
+        _rebobinar(arquivo)
+        return pd.read_excel(arquivo, engine=self.engine, **kwargs)
+
+class LeitorCalamine(_LeitorExcelPandas):
+    """Leitor em Rust (python-calamine), muito mais rápido que openpyxl/xlrd."""
+    
+    nome = 'calamine'
+    engine = 'calamine'
+    formatos = (FORMATO_XLSX, FORMATO_XLS)
+    modulo_requerido = 'python_calamine'
+    
+    def disponivel(self) -> bool:
+        # engine='calamine' existe a partir do pandas 2.2
+        versao_pandas = tuple(int(parte) for parte in pd.__version__.split('.')[:2])
+        return versao_pandas >= (2, 2) and super().disponivel()
+
+class LeitorOpenpyxl(_LeitorExcelPandas):
+    """Leitor padrão de arquivos .xlsx (puro Python)."""
+    
+    nome = 'openpyxl'
+    engine = 'openpyxl'
+    formatos = (FORMATO_XLSX,)
+    modulo_requerido = 'openpyxl'
+
+class LeitorXlrd(_LeitorExcelPandas):
+    """Leitor de arquivos .xls legados (puro Python)."""
+    
+    nome = 'xlrd'
+    engine = 'xlrd'
+    formatos = (FORMATO_XLS,)
+    modulo_requerido = 'xlrd'
+
+class LeitorCsv(LeitorPlanilha):
+    """Leitor de CSV com detecção de codificação e delimitador."""
+    
+    nome = 'csv'
+    formatos = (FORMATO_CSV,)
+    
+    def ler(self, arquivo: Arquivo, **kwargs) -> pd.DataFrame:
+        amostra = _ler_bytes_iniciais(arquivo, TAMANHO_AMOSTRA)
+        codificacao = kwargs.pop('encoding', None) or detectar_codificacao(amostra)
+        delimitador = kwargs.pop('sep', None) or detectar_delimitador(
+            amostra.decode(codificacao, errors='ignore')
+        )
+        registrador.debug(f"CSV detectado: codificação={codificacao}, delimitador={delimitador!r}")
+        
+        _rebobinar(arquivo)
+        return pd.read_csv(arquivo, sep=delimitador, encoding=codificacao, **kwargs)
+
+# Backends em ordem de preferência (mais rápido primeiro)
+LEITORES: List[LeitorPlanilha] = [LeitorCalamine(), LeitorOpenpyxl(), LeitorXlrd(), LeitorCsv()]
+
+def obter_leitor(nome: str) -> LeitorPlanilha:
+    """
+    Retorna o backend pelo nome.
+    
+    Args:
+        nome: Nome do backend ('calamine', 'openpyxl', 'xlrd', 'csv')
+    
+    Raises:
+        ValueError: Se o backend não existir
+    """
+    for leitor in LEITORES:
+        if leitor.nome == nome:
+            return leitor
+    raise ValueError(f"Leitor de planilha desconhecido: {nome}")
+
+def leitores_disponiveis(formato: Optional[str] = None) -> List[LeitorPlanilha]:
+    """
+    Lista os backends instalados, opcionalmente filtrando por formato.
+    
+    Args:
+        formato: Formato a filtrar ('xlsx', 'xls', 'csv')
+    
+    Returns:
+        Backends em ordem de preferência
+    """
+    return [leitor for leitor in LEITORES
+            if leitor.disponivel() and (formato is None or leitor.suporta(formato))]
+
+def selecionar_leitor(formato: str, preferido: Optional[str] = None) -> LeitorPlanilha:
+    """
+    Escolhe o backend para um formato.
+    
+    Args:
+        formato: Formato detectado do arquivo
+        preferido: Nome do backend desejado ou 'auto'
+            (padrão: configuracoes.dados.leitor_planilha)
+    
+    Returns:
+        Backend selecionado
+    
+    Raises:
+        ValueError: Se nenhum backend instalado suportar o formato
+    """
+    preferido = preferido or configuracoes.dados.leitor_planilha
+    
+    if preferido and preferido != 'auto':
+        leitor = obter_leitor(preferido)
+        if leitor.suporta(formato) and leitor.disponivel():
+            return leitor
+        registrador.warning(f"Leitor '{preferido}' indisponível para {formato}, usando seleção automática")
+    
+    candidatos = leitores_disponiveis(formato)
+    if not candidatos:
+        raise ValueError(f"Nenhum leitor instalado suporta o formato '{formato}'")
+    return candidatos[0]
+
+def ler_planilha(arquivo: Arquivo, leitor: Optional[str] = None, **kwargs) -> pd.DataFrame:
+    """
+    Lê uma planilha escolhendo o backend pelo formato real do arquivo.
+    
+    Args:
+        arquivo: Caminho ou objeto de arquivo (ex.: upload do Streamlit)
+        leitor: Nome do backend desejado ou 'auto'
+        **kwargs: Argumentos de leitura (header, nrows, skiprows, ...)
+    
+    Returns:
+        DataFrame lido
+    
+    Raises:
+        ValueError: Se o formato não for reconhecido
+    """
+    formato = detectar_formato(arquivo)
+    if formato == FORMATO_DESCONHECIDO:
+        raise ValueError("Formato de planilha não reconhecido (esperado XLSX, XLS ou CSV)")
+    
+    backend = selecionar_leitor(formato, leitor)
+    registrador.debug(f"Lendo planilha {formato} com backend '{backend.nome}'")
+    return backend.ler(arquivo, **kwargs)
+
+def descrever_formato(formato: str) -> Dict[str, Any]:
+    """
+    Descreve um formato detectado para mensagens ao usuário.
+    
+    Args:
+        formato: Formato retornado por detectar_formato()
+    
+    Returns:
+        Dicionário com descrição e validade
+    """
+    descricoes = {
+        FORMATO_XLSX: 'XLSX (ZIP)',
+        FORMATO_XLS: 'XLS (OLE2)',
+        FORMATO_CSV: 'CSV (texto)',
+    }
+    return {
+        'formato': formato,
+        'descricao': descricoes.get(formato, 'Desconhecido'),
+        'valido': formato in descricoes
+    }
\ No newline at end of file
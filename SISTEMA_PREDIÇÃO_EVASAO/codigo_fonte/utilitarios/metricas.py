@@ -0,0 +1,348 @@
+﻿"""
+Registro de métricas do sistema de predição de evasão estudantil.
+
+Mantém contadores, medidores e histogramas em memória e os exporta no
+formato texto do Prometheus ou em JSON, seja em arquivo (execuções em
+lote) ou por HTTP no endpoint ``/metrics``.
+"""
+
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, List
+
+from ..configuracao import configuracoes
+
+# Limites padrão dos histogramas de latência (em segundos)
+LIMITES_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Rotulos = Tuple[Tuple[str, str], ...]
+
+def _normalizar_rotulos(rotulos: Dict[str, Any]) -> Rotulos:
+    """Converte rótulos em tupla ordenada (chave usada internamente)."""
+    return tuple(sorted((chave, str(valor)) for chave, valor in rotulos.items()))
+
+def _formatar_rotulos(rotulos: Rotulos, extra: Optional[Dict[str, str]] = None) -> str:
+    """Formata rótulos no padrão do Prometheus: {chave="valor",...}."""
+    pares = list(rotulos) + list((extra or {}).items())
+    if not pares:
+        return ''
+    texto = ','.join(f'{chave}="{_escapar_rotulo(valor)}"' for chave, valor in pares)
+    return '{' + texto + '}'
+
+def _escapar_rotulo(valor: Any) -> str:
+    """Escapa barra invertida, aspas e quebras de linha em valores de rótulo."""
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _formatar_valor(valor: float) -> str:
+    """Formata número no padrão do Prometheus."""
+    if math.isinf(valor):
+        return '+Inf' if valor > 0 else '-Inf'
+    if float(valor).is_integer():
+        return str(int(valor))
+    return repr(float(valor))
+
+class _Histograma:
+    """Histograma cumulativo no estilo Prometheus."""
+    
+    def __init__(self, limites: Tuple[float, ...]):
+        self.limites = tuple(sorted(limites))
+        self.contagens = [0] * len(self.limites)
+        self.soma = 0.0
+        self.total = 0
+    
+    def observar(self, valor: float) -> None:
+        self.soma += valor
+        self.total += 1
+        for i, limite in enumerate(self.limites):
+            if valor <= limite:
+                self.contagens[i] += 1
+    
+    def para_dict(self) -> Dict[str, Any]:
+        return {
+            'limites': {_formatar_valor(limite): contagem
+                        for limite, contagem in zip(self.limites, self.contagens)},
+            'soma': self.soma,
+            'total': self.total
+        }
+
+class RegistroMetricas:
+    """Registro thread-safe de contadores, medidores e histogramas."""
+    
+    def __init__(self, prefixo: str = 'evasao'):
+        """
+        Inicializa o registro.
+        
+        Args:
+            prefixo: Prefixo aplicado ao nome de todas as métricas exportadas
+        """
+        self.prefixo = prefixo
+        self._trava = threading.Lock()
+        self._contadores: Dict[str, Dict[Rotulos, float]] = {}
+        self._medidores: Dict[str, Dict[Rotulos, float]] = {}
+        self._histogramas: Dict[str, Dict[Rotulos, _Histograma]] = {}
+        self._descricoes: Dict[str, str] = {}
+    
+    def _nome_completo(self, nome: str) -> str:
+        return f"{self.prefixo}_{nome}" if self.prefixo else nome
+    
+    def incrementar(self, nome: str, valor: float = 1.0, descricao: str = '', **rotulos) -> None:
+        """
+        Incrementa um contador.
+        
+        Args:
+            nome: Nome da métrica (sem prefixo)
+            valor: Valor a somar (deve ser >= 0)
+            descricao: Texto de ajuda exportado junto com a métrica
+            **rotulos: Rótulos da série
+        """
+        if valor < 0:
+            raise ValueError("Contadores só podem ser incrementados com valores positivos")
+        chave = _normalizar_rotulos(rotulos)
+        with self._trava:
+            serie = self._contadores.setdefault(nome, {})
+            serie[chave] = serie.get(chave, 0.0) + valor
+            if descricao:
+                self._descricoes.setdefault(nome, descricao)
+    
+    def definir(self, nome: str, valor: float, descricao: str = '', **rotulos) -> None:
+        """
+        Define o valor de um medidor.
+        
+        Args:
+            nome: Nome da métrica (sem prefixo)
+            valor: Valor atual
+            descricao: Texto de ajuda exportado junto com a métrica
+            **rotulos: Rótulos da série
+        """
+        chave = _normalizar_rotulos(rotulos)
+        with self._trava:
+            self._medidores.setdefault(nome, {})[chave] = float(valor)
+            if descricao:
+                self._descricoes.setdefault(nome, descricao)
+    
+    def observar(self, nome: str, valor: float, descricao: str = '',
+                 limites: Tuple[float, ...] = LIMITES_LATENCIA, **rotulos) -> None:
+        """
+        Registra uma observação em um histograma.
+        
+        Args:
+            nome: Nome da métrica (sem prefixo)
+            valor: Valor observado
+            descricao: Texto de ajuda exportado junto com a métrica
+            limites: Limites superiores dos buckets
+            **rotulos: Rótulos da série
+        """
+        chave = _normalizar_rotulos(rotulos)
+        with self._trava:
+            serie = self._histogramas.setdefault(nome, {})
+            if chave not in serie:
+                serie[chave] = _Histograma(limites)
+            serie[chave].observar(float(valor))
+            if descricao:
+                self._descricoes.setdefault(nome, descricao)
+    
+    @contextmanager
+    def cronometrar(self, etapa: str, nome: str = 'duracao_etapa_segundos'):
+        """
+        Mede a duração de um bloco e registra no histograma de latência por etapa.
+        
+        Args:
+            etapa: Nome da etapa (rótulo ``etapa``)
+            nome: Nome do histograma
+        """
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nome, time.perf_counter() - inicio,
+                          descricao='Latência de cada etapa do pipeline', etapa=etapa)
+    
+    def obter_valor(self, nome: str, **rotulos) -> Optional[float]:
+        """
+        Retorna o valor atual de um contador ou medidor.
+        
+        Args:
+            nome: Nome da métrica (sem prefixo)
+            **rotulos: Rótulos da série
+        
+        Returns:
+            Valor atual ou None se a série não existir
+        """
+        chave = _normalizar_rotulos(rotulos)
+        with self._trava:
+            for grupo in (self._contadores, self._medidores):
+                if nome in grupo and chave in grupo[nome]:
+                    return grupo[nome][chave]
+        return None
+    
+    def resetar(self) -> None:
+        """Remove todas as séries registradas."""
+        with self._trava:
+            self._contadores.clear()
+            self._medidores.clear()
+            self._histogramas.clear()
+    
+    def instantaneo(self) -> Dict[str, Any]:
+        """
+        Retorna uma cópia serializável de todas as métricas.
+        
+        Returns:
+            Dicionário com contadores, medidores e histogramas
+        """
+        def series(grupo, conversor):
+            return {
+                self._nome_completo(nome): [
+                    {'rotulos': dict(rotulos), 'valor': conversor(valor)}
+                    for rotulos, valor in valores.items()
+                ]
+                for nome, valores in grupo.items()
+            }
+        
+        with self._trava:
+            return {
+                'gerado_em': time.time(),
+                'contadores': series(self._contadores, float),
+                'medidores': series(self._medidores, float),
+                'histogramas': series(self._histogramas, lambda h: h.para_dict())
+            }
+    
+    def exportar_json(self) -> str:
+        """Exporta as métricas em JSON."""
+        return json.dumps(self.instantaneo(), ensure_ascii=False, indent=2)
+    
+    def exportar_prometheus(self) -> str:
+        """Exporta as métricas no formato texto do Prometheus."""
+        linhas: List[str] = []
+        
+        with self._trava:
+            for tipo, grupo in (('counter', self._contadores), ('gauge', self._medidores)):
+                for nome, valores in sorted(grupo.items()):
+                    nome_completo = self._nome_completo(nome)
+                    if nome in self._descricoes:
+                        linhas.append(f"# HELP {nome_completo} {self._descricoes[nome]}")
+                    linhas.append(f"# TYPE {nome_completo} {tipo}")
+                    for rotulos, valor in sorted(valores.items()):
+                        linhas.append(f"{nome_completo}{_formatar_rotulos(rotulos)} {_formatar_valor(valor)}")
+            
+            for nome, valores in sorted(self._histogramas.items()):
+                nome_completo = self._nome_completo(nome)
+                if nome in self._descricoes:
+                    linhas.append(f"# HELP {nome_completo} {self._descricoes[nome]}")
+                linhas.append(f"# TYPE {nome_completo} histogram")
+                for rotulos, histograma in sorted(valores.items()):
+                    for limite, contagem in zip(histograma.limites, histograma.contagens):
+                        rotulo_le = {'le': _formatar_valor(limite)}
+                        linhas.append(f"{nome_completo}_bucket{_formatar_rotulos(rotulos, rotulo_le)} {contagem}")
+                    linhas.append(f"{nome_completo}_bucket{_formatar_rotulos(rotulos, {'le': '+Inf'})} {histograma.total}")
+                    linhas.append(f"{nome_completo}_sum{_formatar_rotulos(rotulos)} {_formatar_valor(histograma.soma)}")
+                    linhas.append(f"{nome_completo}_count{_formatar_rotulos(rotulos)} {histograma.total}")
+        
+        return '\n'.join(linhas) + '\n'
+    
+    def salvar(self, caminho_arquivo: Path) -> Path:
+        """
+        Salva as métricas em arquivo.
+        
+        O formato é escolhido pela extensão: ``.json`` gera JSON e qualquer
+        outra (ex.: ``.prom``) gera o formato texto do Prometheus. A escrita é
+        atômica para que o textfile collector nunca leia um arquivo parcial.
+        
+        Args:
+            caminho_arquivo: Caminho do arquivo de saída
+        
+        Returns:
+            Caminho do arquivo gravado
+        """
+        caminho_arquivo = Path(caminho_arquivo)
+        caminho_arquivo.parent.mkdir(parents=True, exist_ok=True)
+        
+        if caminho_arquivo.suffix.lower() == '.json':
+            conteudo = self.exportar_json()
+        else:
+            conteudo = self.exportar_prometheus()
+        
+        caminho_temporario = caminho_arquivo.with_name(caminho_arquivo.name + '.tmp')
+        caminho_temporario.write_text(conteudo, encoding='utf-8')
+        caminho_temporario.replace(caminho_arquivo)
+        return caminho_arquivo
+
+# Instância global de métricas
+metricas = RegistroMetricas()
+
+class _ManipuladorMetricas(BaseHTTPRequestHandler):
+    """Responde ``/metrics`` (Prometheus) e ``/metrics.json``."""
+    
+    registro: RegistroMetricas = metricas
+    
+    def do_GET(self):
+        caminho = self.path.split('?', 1)[0].rstrip('/')
+        if caminho == '/metrics':
+            corpo = self.registro.exportar_prometheus().encode('utf-8')
+            tipo = 'text/plain; version=0.0.4; charset=utf-8'
+        elif caminho == '/metrics.json':
+            corpo = self.registro.exportar_json().encode('utf-8')
+            tipo = 'application/json; charset=utf-8'
+        else:
+            self.send_error(404)
+            return
+        
+        self.send_response(200)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+    
+    def log_message(self, formato, *args):
+        # Evitar poluir o console a cada coleta do Prometheus
+        pass
+
+_servidor_metricas: Optional[ThreadingHTTPServer] = None
+_trava_servidor = threading.Lock()
+
+def iniciar_servidor_metricas(porta: Optional[int] = None, endereco: Optional[str] = None,
+                              registro: Optional[RegistroMetricas] = None) -> ThreadingHTTPServer:
+    """
+    Inicia (uma única vez por processo) o servidor HTTP que expõe ``/metrics``.
+    
+    Args:
+        porta: Porta TCP (padrão: configuracoes.metricas.porta_servidor)
+        endereco: Endereço de escuta (padrão: configuracoes.metricas.endereco_servidor)
+        registro: Registro a expor (padrão: instância global)
+    
+    Returns:
+        Servidor em execução
+    """
+    global _servidor_metricas
+    
+    with _trava_servidor:
+        if _servidor_metricas is not None:
+            return _servidor_metricas
+        
+        porta = configuracoes.metricas.porta_servidor if porta is None else porta
+        endereco = endereco or configuracoes.metricas.endereco_servidor
+        
+        manipulador = type('ManipuladorMetricas', (_ManipuladorMetricas,),
+                           {'registro': registro or metricas})
+        servidor = ThreadingHTTPServer((endereco, porta), manipulador)
+        servidor.daemon_threads = True
+        
+        thread = threading.Thread(target=servidor.serve_forever, name='servidor-metricas', daemon=True)
+        thread.start()
+        
+        _servidor_metricas = servidor
+        return servidor
+
+def parar_servidor_metricas() -> None:
+    """Encerra o servidor HTTP de métricas, se estiver em execução."""
+    global _servidor_metricas
+    
+    with _trava_servidor:
+        if _servidor_metricas is not None:
+            _servidor_metricas.shutdown()
+            _servidor_metricas.server_close()
+            _servidor_metricas = None
\ No newline at end of file
@@ -0,0 +1,130 @@
+﻿"""
+Orçamento de threads e execução em fatias para a inferência.
+
+XGBoost e NumPy liberam o GIL, então um lote grande pode ser dividido em
+fatias pontuadas em paralelo por threads, todas no mesmo pool do processo
+(fatias_simultaneas threads). Para não disputar núcleos quando várias
+execuções rodam ao mesmo tempo, cada pontuação reserva suas threads do
+XGBoost com reservar_threads(): a soma em uso fica dentro de
+configuracoes.modelo.threads_inferencia, inclusive para lotes de uma fatia,
+que rodam fora do pool.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .registrador import obter_registrador
+from ..configuracao import configuracoes
+
+registrador = obter_registrador(__name__)
+
+_pool: Optional[ThreadPoolExecutor] = None
+_tamanho_pool = 0
+# Execuções em andamento em cada pool: um pool substituído só é encerrado quando elas terminam
+_usuarios_pool: Dict[ThreadPoolExecutor, int] = {}
+_trava_pool = threading.Lock()
+# Threads do XGBoost reservadas pelas pontuações em andamento
+_threads_reservadas = 0
+_trava_threads = threading.Condition()
+
+def _total_threads() -> int:
+    return configuracoes.modelo.threads_inferencia or os.cpu_count() or 1
+
+def orcamento_threads() -> Tuple[int, int]:
+    """
+    Divide o orçamento de threads de inferência.
+    
+    Returns:
+        Tuple com (fatias simultâneas, threads do XGBoost por fatia)
+    """
+    total = _total_threads()
+    por_fatia = max(1, min(configuracoes.modelo.threads_por_fatia, total))
+    return max(1, total // por_fatia), por_fatia
+
+@contextmanager
+def reservar_threads(minimo: int, maximo: int) -> Iterator[int]:
+    """
+    Reserva threads do orçamento do processo enquanto o bloco executa.
+    
+    Espera até haver pelo menos ``minimo`` threads livres e reserva o que
+    estiver livre, até ``maximo``. Sozinha, uma pontuação de fatia única
+    recebe o orçamento inteiro; com outras em andamento, divide o que sobrou.
+    
+    Yields:
+        Quantidade de threads reservadas
+    """
+    global _threads_reservadas
+    with _trava_threads:
+        _trava_threads.wait_for(lambda: _total_threads() - _threads_reservadas >= min(minimo, _total_threads()))
+        reservadas = max(1, min(maximo, _total_threads() - _threads_reservadas))
+        _threads_reservadas += reservadas
+    try:
+        yield reservadas
+    finally:
+        with _trava_threads:
+            _threads_reservadas -= reservadas
+            _trava_threads.notify_all()
+
+def dividir_em_fatias(total_linhas: int) -> List[Tuple[int, int]]:
+    """
+    Intervalos [início, fim) das fatias de um lote.
+    
+    Lotes menores que duas vezes configuracoes.modelo.linhas_minimas_fatia
+    ficam inteiros: abaixo disso o custo de coordenação supera o ganho.
+    """
+    fatias_simultaneas, _ = orcamento_threads()
+    minimo = max(1, configuracoes.modelo.linhas_minimas_fatia)
+    quantidade = max(1, min(fatias_simultaneas, total_linhas // minimo))
+    limites = [total_linhas * indice // quantidade for indice in range(quantidade + 1)]
+    return list(zip(limites[:-1], limites[1:]))
+
+def _reservar_pool(tamanho: int) -> ThreadPoolExecutor:
+    """
+    Pool compartilhado pelo processo, recriado se o orçamento mudar.
+    
+    Cada reserva deve ser devolvida com _liberar_pool(): o pool anterior a uma
+    mudança de orçamento continua aceitando tarefas de quem já o reservou.
+    """
+    global _pool, _tamanho_pool
+    with _trava_pool:
+        if _pool is None or _tamanho_pool != tamanho:
+            anterior = _pool
+            _pool = ThreadPoolExecutor(max_workers=tamanho, thread_name_prefix='fatia')
+            _tamanho_pool = tamanho
+            if anterior is not None and anterior not in _usuarios_pool:
+                anterior.shutdown(wait=False)
+            registrador.debug(f"Pool de fatias: {tamanho} thread(s)")
+        _usuarios_pool[_pool] = _usuarios_pool.get(_pool, 0) + 1
+        return _pool
+
+def _liberar_pool(pool: ThreadPoolExecutor) -> None:
+    """Devolve uma reserva; encerra o pool se ele já foi substituído e não tem mais usuários."""
+    with _trava_pool:
+        _usuarios_pool[pool] -= 1
+        if not _usuarios_pool[pool]:
+            del _usuarios_pool[pool]
+            if pool is not _pool:
+                pool.shutdown(wait=False)
+
+def executar_em_fatias(funcao: Callable[[int, int], Any], fatias: List[Tuple[int, int]]) -> List[Any]:
+    """
+    Executa funcao(início, fim) para cada fatia e devolve os resultados na ordem das fatias.
+    
+    Uma única fatia roda na própria thread. Não deve ser chamada de dentro de
+    uma fatia (o pool é compartilhado e poderia esperar por si mesmo).
+    
+    Args:
+        funcao: Processa as linhas [início, fim)
+        fatias: Intervalos de dividir_em_fatias()
+    """
+    if len(fatias) == 1:
+        return [funcao(*fatias[0])]
+    pool = _reservar_pool(orcamento_threads()[0])
+    try:
+        futuros = [pool.submit(funcao, inicio, fim) for inicio, fim in fatias]
+        return [futuro.result() for futuro in futuros]
+    finally:
+        _liberar_pool(pool)
\ No newline at end of file
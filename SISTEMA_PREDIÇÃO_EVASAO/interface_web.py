@@ -8,7 +8,6 @@ import pandas as pd
 import sys
 import os
 from pathlib import Path
-import tempfile
 import zipfile
 from datetime import datetime
 
@@ -17,6 +16,23 @@ sys.path.insert(0, os.getcwd())
 
 from codigo_fonte.nucleo import SistemaPredicaoEvasao
 from codigo_fonte.configuracao import configuracoes
+from codigo_fonte.utilitarios import iniciar_servidor_metricas, CarregadorDados, obter_registrador
+from codigo_fonte.utilitarios.leitores_planilha import (
+    ler_planilha, detectar_formato, descrever_formato, FORMATO_CSV
+)
+
+registrador = obter_registrador(__name__)
+
+@st.cache_resource
+def iniciar_metricas():
+    """Expõe /metrics uma única vez por processo do Streamlit"""
+    if not configuracoes.metricas.servidor_habilitado:
+        return None
+    try:
+        return iniciar_servidor_metricas()
+    except OSError as e:
+        registrador.warning(f"Servidor de métricas não iniciado: {e}")
+        return None
 
 def tentar_reparar_arquivo_excel(arquivo_path):
     """
@@ -29,55 +45,15 @@ def tentar_reparar_arquivo_excel(arquivo_path):
         str or None: Caminho para arquivo reparado ou None se falhou
     """
     try:
-        # Estratégia 1: Tentar diferentes engines um por vez
-        engines = [
-            {'name': 'openpyxl', 'engine': 'openpyxl'},
-            {'name': 'xlrd', 'engine': 'xlrd'},
-            {'name': 'auto', 'engine': None}
-        ]
-        
-        for engine_info in engines:
-            try:
-                if engine_info['engine']:
-                    df = pd.read_excel(arquivo_path, engine=engine_info['engine'])
-                else:
-                    df = pd.read_excel(arquivo_path)
-                
-                # Se conseguiu ler, recriar arquivo
-                arquivo_limpo = arquivo_path.replace('.xlsx', '_limpo.xlsx')
-                df.to_excel(arquivo_limpo, index=False, engine='openpyxl')
-                
-                # Testar se o arquivo limpo funciona
-                df_test = pd.read_excel(arquivo_limpo, nrows=1)
-                return arquivo_limpo
-                
-            except Exception:
-                continue
+        # O backend é escolhido pelo formato real (inclui CSV salvo como Excel,
+        # com detecção de codificação e delimitador)
+        df = ler_planilha(arquivo_path)
         
-        # Estratégia 2: Tentar como CSV e reconverter
-        try:
-            # Às vezes arquivos "Excel" são na verdade CSV
-            df_csv = pd.read_csv(arquivo_path, encoding='utf-8', sep=';')
-            if len(df_csv.columns) > 1:  # Se conseguiu ler como CSV
-                arquivo_convertido = arquivo_path.replace('.xlsx', '_convertido.xlsx')
-                df_csv.to_excel(arquivo_convertido, index=False, engine='openpyxl')
-                return arquivo_convertido
-        except:
-            pass
-            
-        # Estratégia 3: Tentar com diferentes encodings
-        encodings = ['utf-8', 'latin1', 'cp1252', 'iso-8859-1']
-        for encoding in encodings:
-            try:
-                df_enc = pd.read_csv(arquivo_path, encoding=encoding)
-                if len(df_enc.columns) > 1:
-                    arquivo_enc = arquivo_path.replace('.xlsx', f'_enc_{encoding}.xlsx')
-                    df_enc.to_excel(arquivo_enc, index=False, engine='openpyxl')
-                    return arquivo_enc
-            except:
-                continue
-        
-        return None
+        formato = detectar_formato(arquivo_path)
+        sufixo = '_convertido.xlsx' if formato == FORMATO_CSV else '_limpo.xlsx'
+        arquivo_limpo = str(Path(arquivo_path).with_suffix('')) + sufixo
+        df.to_excel(arquivo_limpo, index=False, engine='openpyxl')
+        return arquivo_limpo
         
     except Exception:
         return None
@@ -87,7 +63,7 @@ def verificar_arquivo_excel(arquivo_path):
     Verifica a integridade e formato do arquivo Excel
     
     Args:
-        arquivo_path: Caminho para o arquivo
+        arquivo_path: Caminho para o arquivo ou arquivo enviado pelo upload
         
     Returns:
         dict: Informações sobre o arquivo
@@ -101,28 +77,34 @@ def verificar_arquivo_excel(arquivo_path):
     
     try:
         # Verificar se o arquivo existe e tem tamanho
-        if not os.path.exists(arquivo_path):
+        if hasattr(arquivo_path, 'getvalue'):
+            tamanho = len(arquivo_path.getvalue())
+        elif not os.path.exists(arquivo_path):
             info['erro'] = 'Arquivo não encontrado'
             return info
-            
-        tamanho = os.path.getsize(arquivo_path)
+        else:
+            tamanho = os.path.getsize(arquivo_path)
+        
         if tamanho == 0:
             info['erro'] = 'Arquivo vazio'
             info['sugestoes'].append('Verificar se o arquivo foi salvo corretamente')
             return info
         
-        # Ler os primeiros bytes para identificar o formato
-        with open(arquivo_path, 'rb') as f:
-            header = f.read(8)
-        
-        # Verificar assinaturas de arquivo
-        if header.startswith(b'PK\x03\x04'):
-            info['formato'] = 'XLSX (ZIP)'
-            info['sugestoes'].append('Arquivo parece ser XLSX válido')
-        elif header.startswith(b'\xd0\xcf\x11\xe0'):
-            info['formato'] = 'XLS (OLE2)'
-            info['sugestoes'].append('Arquivo parece ser XLS válido')
+        # Identificar o formato pelos bytes iniciais (assinatura do arquivo)
+        descricao = descrever_formato(detectar_formato(arquivo_path))
+        
+        if descricao['valido']:
+            info['formato'] = descricao['descricao']
+            if descricao['formato'] == FORMATO_CSV:
+                info['sugestoes'].append('Arquivo é texto/CSV com extensão de Excel - será lido como CSV')
+            else:
+                info['sugestoes'].append(f"Arquivo parece ser {descricao['formato'].upper()} válido")
         else:
+            if hasattr(arquivo_path, 'getvalue'):
+                header = arquivo_path.getvalue()[:8]
+            else:
+                with open(arquivo_path, 'rb') as f:
+                    header = f.read(8)
             info['formato'] = f'Desconhecido (header: {header.hex()})'
             info['sugestoes'].extend([
                 'Arquivo pode estar corrompido',
@@ -130,7 +112,7 @@ def verificar_arquivo_excel(arquivo_path):
                 'Verificar se o arquivo não foi truncado durante o upload'
             ])
         
-        info['valido'] = header.startswith(b'PK\x03\x04') or header.startswith(b'\xd0\xcf\x11\xe0')
+        info['valido'] = descricao['valido']
         
     except Exception as e:
         info['erro'] = f'Erro ao analisar arquivo: {str(e)}'
@@ -273,7 +255,8 @@ def detectar_header_automatico(arquivo, engine=None):
     
     Args:
         arquivo: Arquivo Excel ou caminho
-        engine: Engine específico para usar
+        engine: Backend de leitura específico ('calamine', 'openpyxl', 'xlrd', 'csv');
+            None escolhe pelo formato real do arquivo
         
     Returns:
         int: Linha do header detectada
@@ -288,100 +271,77 @@ def detectar_header_automatico(arquivo, engine=None):
     ]
     
     try:
-        # Tentar múltiplas estratégias de leitura
-        strategies = []
+        # Ler primeiras 10 linhas para análise (backend escolhido pelos bytes
+        # iniciais do arquivo, sem tentativa e erro entre engines)
+        df_temp = ler_planilha(arquivo, leitor=engine, header=None, nrows=10)
         
-        if engine:
-            strategies.append({'engine': engine})
-        else:
-            strategies.extend([
-                {'engine': 'openpyxl'},
-                {'engine': 'xlrd'},
-                {'engine': None}
-            ])
+        # Analisar cada linha procurando por headers
+        resultados = []
         
-        for strategy in strategies:
-            try:
-                # Ler primeiras 10 linhas para análise
-                read_kwargs = {'header': None, 'nrows': 10}
-                if strategy['engine']:
-                    read_kwargs['engine'] = strategy['engine']
-                
-                df_temp = pd.read_excel(arquivo, **read_kwargs)
-                
-                # Analisar cada linha procurando por headers
-                resultados = []
-                
-                for i in range(min(8, len(df_temp))):  # Aumentei para 8 linhas
-                    linha = df_temp.iloc[i]
-                    texto_linha = ' '.join([str(valor) for valor in linha.values if pd.notna(valor)]).upper()
-                    
-                    # Calcular score da linha
-                    score = 0
-                    palavras_encontradas = []
-                    
-                    for palavra in palavras_chave:
-                        if palavra in texto_linha:
-                            # Peso extra para palavras mais importantes
-                            if palavra in ['MATRÍCULA', 'MATRICULA', 'NOME', 'CURSO']:
-                                score += 3
-                            else:
-                                score += 1
-                            palavras_encontradas.append(palavra)
-                    
-                    # Bonus: se tem muitas colunas não-vazias (indica header)
-                    valores_nao_nulos = [v for v in linha.values if pd.notna(v) and str(v).strip()]
-                    if len(valores_nao_nulos) >= 5:
-                        score += len(valores_nao_nulos) * 0.5
-                    
-                    # Penalty: se parece ser dados (números/códigos no início)
-                    primeiro_valor = str(valores_nao_nulos[0]) if valores_nao_nulos else ""
-                    if primeiro_valor.replace('.', '').replace('-', '').isdigit():
-                        score -= 2  # Provavelmente é linha de dados
-                    
-                    resultados.append({
-                        'linha': i,
-                        'score': score,
-                        'palavras': palavras_encontradas,
-                        'texto': texto_linha[:100],  # Primeira parte do texto
-                        'colunas_preenchidas': len(valores_nao_nulos)
-                    })
-                
-                # Encontrar a linha com maior score
-                if resultados:
-                    melhor = max(resultados, key=lambda x: x['score'])
-                    
-                    # Se tem score razoável (pelo menos 2 palavras-chave), usar
-                    if melhor['score'] >= 2:
-                        return melhor['linha']
-                    
-                    # Caso contrário, procurar linha com muitas colunas preenchidas
-                    linha_com_mais_colunas = max(resultados, key=lambda x: x['colunas_preenchidas'])
-                    if linha_com_mais_colunas['colunas_preenchidas'] >= 5:
-                        return linha_com_mais_colunas['linha']
-                
-                # Fallback: procurar padrão "Base de dados" + linha vazia + headers
-                for i in range(min(5, len(df_temp) - 2)):
-                    linha_atual = ' '.join([str(v) for v in df_temp.iloc[i].values if pd.notna(v)]).upper()
+        for i in range(min(8, len(df_temp))):  # Aumentei para 8 linhas
+            linha = df_temp.iloc[i]
+            texto_linha = ' '.join([str(valor) for valor in linha.values if pd.notna(valor)]).upper()
+            
+            # Calcular score da linha
+            score = 0
+            palavras_encontradas = []
+            
+            for palavra in palavras_chave:
+                if palavra in texto_linha:
+                    # Peso extra para palavras mais importantes
+                    if palavra in ['MATRÍCULA', 'MATRICULA', 'NOME', 'CURSO']:
+                        score += 3
+                    else:
+                        score += 1
+                    palavras_encontradas.append(palavra)
+            
+            # Bonus: se tem muitas colunas não-vazias (indica header)
+            valores_nao_nulos = [v for v in linha.values if pd.notna(v) and str(v).strip()]
+            if len(valores_nao_nulos) >= 5:
+                score += len(valores_nao_nulos) * 0.5
+            
+            # Penalty: se parece ser dados (números/códigos no início)
+            primeiro_valor = str(valores_nao_nulos[0]) if valores_nao_nulos else ""
+            if primeiro_valor.replace('.', '').replace('-', '').isdigit():
+                score -= 2  # Provavelmente é linha de dados
+            
+            resultados.append({
+                'linha': i,
+                'score': score,
+                'palavras': palavras_encontradas,
+                'texto': texto_linha[:100],  # Primeira parte do texto
+                'colunas_preenchidas': len(valores_nao_nulos)
+            })
+        
+        # Encontrar a linha com maior score
+        if resultados:
+            melhor = max(resultados, key=lambda x: x['score'])
+            
+            # Se tem score razoável (pelo menos 2 palavras-chave), usar
+            if melhor['score'] >= 2:
+                return melhor['linha']
+            
+            # Caso contrário, procurar linha com muitas colunas preenchidas
+            linha_com_mais_colunas = max(resultados, key=lambda x: x['colunas_preenchidas'])
+            if linha_com_mais_colunas['colunas_preenchidas'] >= 5:
+                return linha_com_mais_colunas['linha']
+        
+        # Fallback: procurar padrão "Base de dados" + linha vazia + headers
+        for i in range(min(5, len(df_temp) - 2)):
+            linha_atual = ' '.join([str(v) for v in df_temp.iloc[i].values if pd.notna(v)]).upper()
+            
+            # Se encontrou linha com "BASE DE DADOS" ou similar
+            if any(termo in linha_atual for termo in ['BASE', 'DADOS', 'PLANILHA', 'RELATÓRIO']):
+                # Verificar se a linha i+2 tem headers
+                if i + 2 < len(df_temp):
+                    possivel_header = df_temp.iloc[i + 2]
+                    texto_header = ' '.join([str(v) for v in possivel_header.values if pd.notna(v)]).upper()
+                    palavras_header = sum(1 for palavra in palavras_chave if palavra in texto_header)
                     
-                    # Se encontrou linha com "BASE DE DADOS" ou similar
-                    if any(termo in linha_atual for termo in ['BASE', 'DADOS', 'PLANILHA', 'RELATÓRIO']):
-                        # Verificar se a linha i+2 tem headers
-                        if i + 2 < len(df_temp):
-                            possivel_header = df_temp.iloc[i + 2]
-                            texto_header = ' '.join([str(v) for v in possivel_header.values if pd.notna(v)]).upper()
-                            palavras_header = sum(1 for palavra in palavras_chave if palavra in texto_header)
-                            
-                            if palavras_header >= 2:
-                                return i + 2
-                
-                # Se chegou aqui, usar linha 0 como fallback
-                return 0
-                
-            except Exception:
-                continue
+                    if palavras_header >= 2:
+                        return i + 2
         
-        # Se todas as estratégias falharam, usar 0
+        # Se chegou aqui, usar linha 0 como fallback
         return 0
         
     except Exception:
@@ -390,93 +350,58 @@ def detectar_header_automatico(arquivo, engine=None):
 
 def ler_excel_seguro(arquivo, **kwargs):
     """Lê arquivo Excel com tratamento ultra-robusto para diferentes formatos"""
-    import tempfile
-    import os
     
-    # Lista de estratégias para tentar - OTIMIZADA PARA PLANILHAS INSTITUCIONAIS
+    # Estratégias de cabeçalho - OTIMIZADAS PARA PLANILHAS INSTITUCIONAIS
+    # O backend de leitura (calamine/openpyxl/xlrd/CSV) é escolhido pelos bytes
+    # iniciais do arquivo, então não há mais tentativa e erro entre engines
     estrategias = [
         # CONFIGURAÇÃO ESPECÍFICA PARA PLANILHA DO LUCAS
-        {'engine': 'openpyxl', 'skiprows': 2, 'header': 0, 'nome': 'Configuração Institucional'},
-        {'engine': 'openpyxl', 'header': 2, 'nome': 'Header Linha 2'},
-        {'engine': 'openpyxl', 'read_only': False, 'nome': 'OpenPyXL Padrão'},
-        {'engine': 'openpyxl', 'read_only': True, 'nome': 'OpenPyXL Read-Only'},
-        {'engine': 'xlrd', 'nome': 'Engine XLRD'},
-        {'engine': None, 'nome': 'Pandas Auto'},  # Deixar pandas decidir
+        {'skiprows': 2, 'header': 0, 'nome': 'Configuração Institucional'},
+        {'header': 2, 'nome': 'Header Linha 2'},
+        {'nome': 'Header Automático'},
     ]
     
     erros = []
-    arquivo_temp = None
     
-    try:
-        # Se o arquivo não for um arquivo temporário, criar um
-        if hasattr(arquivo, 'read'):
-            # É um arquivo uploadado, salvar temporariamente
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp:
-                arquivo.seek(0)  # Volta ao início
-                tmp.write(arquivo.read())
-                arquivo_temp = tmp.name
-            arquivo_para_ler = arquivo_temp
-        else:
-            arquivo_para_ler = arquivo
+    for i, estrategia in enumerate(estrategias):
+        try:
+            nome_estrategia = estrategia.get('nome', f'Estratégia {i+1}')
+            kwargs_local = kwargs.copy()
             
-        for i, estrategia in enumerate(estrategias):
-            try:
-                nome_estrategia = estrategia.get('nome', f'Estratégia {i+1}')
-                engine = estrategia.get('engine')
-                kwargs_local = kwargs.copy()
-                
-                # Aplicar configurações específicas da estratégia
-                for key, value in estrategia.items():
-                    if key not in ['engine', 'nome']:
-                        kwargs_local[key] = value
-                
-                # Remover argumentos que possam causar conflito
-                if engine == 'xlrd':
-                    kwargs_local.pop('data_only', None)
-                    kwargs_local.pop('keep_vba', None)
-                    kwargs_local.pop('read_only', None)
-                
-                # Detectar header se necessário (apenas se não foi especificado na estratégia)
-                if 'header' not in kwargs_local and 'skiprows' not in kwargs_local:
-                    try:
-                        header_linha = detectar_header_automatico(arquivo_para_ler, engine=engine)
-                        kwargs_local['header'] = header_linha
-                    except:
-                        kwargs_local['header'] = 0  # Fallback
-                
-                # Tentar ler
-                if engine is None:
-                    df = pd.read_excel(arquivo_para_ler, **kwargs_local)
-                else:
-                    df = pd.read_excel(arquivo_para_ler, engine=engine, **kwargs_local)
-                
-                # Aplicar correções pós-leitura para planilhas institucionais
-                df = corrigir_planilha_institucional(df)
-                
-                # Se chegou até aqui, deu certo
-                if len(df) > 0:
-                    return df
-                    
-            except Exception as e:
-                erro_msg = str(e)
-                erros.append(f"{nome_estrategia}: {erro_msg}")
-                
-                # Log específico para debugging
-                if i == 0:  # Primeira estratégia (nossa configuração otimizada)
-                    st.info(f"⚠️ Configuração otimizada falhou: {erro_msg[:100]}...")
+            # Aplicar configurações específicas da estratégia
+            for key, value in estrategia.items():
+                if key != 'nome':
+                    kwargs_local[key] = value
+            
+            # Detectar header se necessário (apenas se não foi especificado na estratégia)
+            if 'header' not in kwargs_local and 'skiprows' not in kwargs_local:
+                try:
+                    kwargs_local['header'] = detectar_header_automatico(arquivo)
+                except:
+                    kwargs_local['header'] = 0  # Fallback
+            
+            # Ler (aceita caminho ou arquivo enviado pelo upload)
+            df = ler_planilha(arquivo, **kwargs_local)
+            
+            # Aplicar correções pós-leitura para planilhas institucionais
+            df = corrigir_planilha_institucional(df)
+            
+            # Se chegou até aqui, deu certo
+            if len(df) > 0:
+                return df
                 
-                continue
-        
-        # Se chegou aqui, todas as estratégias falharam
-        raise Exception(f"Todas as estratégias falharam. Detalhes: {' | '.join(erros)}")
-        
-    finally:
-        # Limpar arquivo temporário se criado
-        if arquivo_temp and os.path.exists(arquivo_temp):
-            try:
-                os.unlink(arquivo_temp)
-            except:
-                pass
+        except Exception as e:
+            erro_msg = str(e)
+            erros.append(f"{nome_estrategia}: {erro_msg}")
+            
+            # Log específico para debugging
+            if i == 0:  # Primeira estratégia (nossa configuração otimizada)
+                st.info(f"⚠️ Configuração otimizada falhou: {erro_msg[:100]}...")
+            
+            continue
+    
+    # Se chegou aqui, todas as estratégias falharam
+    raise Exception(f"Todas as estratégias falharam. Detalhes: {' | '.join(erros)}")
 
 def main():
     # Configurar a página
@@ -487,6 +412,8 @@ def main():
         initial_sidebar_state="expanded"
     )
     
+    iniciar_metricas()
+    
     # Título principal
     st.title("🎓 Sistema de Predição de Evasão Estudantil")
     
@@ -853,25 +780,15 @@ def processar_predicoes(uploaded_file):
     status_text = st.empty()
     
     try:
-        # Passo 1: Salvar arquivo temporário
-        status_text.text("📁 Salvando arquivo...")
+        # Passo 1: Ler o arquivo enviado (direto da memória, sem arquivo temporário)
+        status_text.text("📁 Lendo arquivo...")
         progress_bar.progress(10)
         
-        # Determinar extensão apropriada
-        extensao_arquivo = uploaded_file.name.lower().split('.')[-1]
-        sufixo = f'.{extensao_arquivo}' if extensao_arquivo in ['xlsx', 'xls'] else '.xlsx'
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix=sufixo) as tmp_file:
-            tmp_file.write(uploaded_file.read())
-            arquivo_temp = tmp_file.name
-        
-        # Verificar se conseguimos ler o arquivo salvo
         try:
             # Primeiro, verificar a integridade do arquivo
-            info_arquivo = verificar_arquivo_excel(arquivo_temp)
+            info_arquivo = verificar_arquivo_excel(uploaded_file)
             
             if not info_arquivo['valido']:
-                os.unlink(arquivo_temp)
                 st.error(f"❌ Arquivo inválido: {info_arquivo.get('erro', 'Formato não reconhecido')}")
                 st.warning(f"🔍 Formato detectado: {info_arquivo['formato']}")
                 
@@ -889,14 +806,14 @@ def processar_predicoes(uploaded_file):
                 """)
                 return
             
-            # Se o arquivo é válido, tentar ler
-            test_df = ler_excel_seguro(arquivo_temp, nrows=1)
-            st.success(f"✅ Arquivo validado: {len(test_df.columns)} colunas encontradas")
+            # Se o arquivo é válido, ler uma única vez e reutilizar o DataFrame na predição
+            df_alunos = CarregadorDados.carregar_excel_com_deteccao_cabecalho(
+                uploaded_file, compactar=configuracoes.dados.compactar_tipos
+            )
+            st.success(f"✅ Arquivo validado: {len(df_alunos.columns)} colunas encontradas")
             st.info(f"📄 Formato: {info_arquivo['formato']}")
                 
         except Exception as e:
-            os.unlink(arquivo_temp)
-            
             # Análise mais detalhada do erro
             erro_str = str(e)
             st.error(f"❌ Erro ao validar arquivo: {erro_str}")
@@ -908,18 +825,11 @@ def processar_predicoes(uploaded_file):
                 
                 # Tentar diagnóstico básico do arquivo
                 try:
-                    # Recriar arquivo temporário para análise
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_diag:
-                        uploaded_file.seek(0)
-                        tmp_diag.write(uploaded_file.read())
-                        arquivo_diag = tmp_diag.name
-                    
-                    # Análise básica
-                    tamanho = os.path.getsize(arquivo_diag)
-                    st.write(f"📏 **Tamanho do arquivo**: {tamanho:,} bytes")
+                    # Análise básica dos bytes enviados
+                    conteudo = uploaded_file.getvalue()
+                    st.write(f"📏 **Tamanho do arquivo**: {len(conteudo):,} bytes")
                     
-                    with open(arquivo_diag, 'rb') as f:
-                        header = f.read(16)
+                    header = conteudo[:16]
                     st.write(f"🔢 **Header (primeiros 16 bytes)**: `{header.hex()}`")
                     
                     if header.startswith(b'PK\x03\x04'):
@@ -930,8 +840,6 @@ def processar_predicoes(uploaded_file):
                         st.write("❌ **Formato detectado**: Não reconhecido")
                         st.warning("⚠️ O arquivo pode estar corrompido ou ter formato incompatível")
                     
-                    os.unlink(arquivo_diag)
-                    
                 except Exception as diag_error:
                     st.write(f"❌ Erro no diagnóstico: {diag_error}")
             
@@ -1021,7 +929,7 @@ def processar_predicoes(uploaded_file):
         status_text.text("🤖 Processando predições...")
         progress_bar.progress(60)
         
-        predicoes, estatisticas = sistema.predizer_alunos(Path(arquivo_temp))
+        predicoes, estatisticas = sistema.predizer_dataframe(df_alunos)
         
         # Passo 4: Gerar CSV
         status_text.text("📊 Gerando relatório...")
@@ -1041,7 +949,8 @@ def processar_predicoes(uploaded_file):
                 'Nivel_Urgencia': predicao.nivel_urgencia,
                 'Fator_Principal': predicao.fator_principal,
                 'Valor_Importancia': predicao.valor_importancia,
-                'Fonte_Predicao': predicao.fonte_predicao
+                'Fonte_Predicao': predicao.fonte_predicao,
+                'Versao_Modelo': predicao.versao_modelo
             })
         
         df_resultado = pd.DataFrame(dados_csv)
@@ -1085,9 +994,6 @@ def processar_predicoes(uploaded_file):
             use_container_width=True
         )
         
-        # Limpar arquivo temporário
-        os.unlink(arquivo_temp)
-        
     except Exception as e:
         st.error(f"❌ Erro durante processamento: {str(e)}")
         status_text.text("❌ Erro no processamento")
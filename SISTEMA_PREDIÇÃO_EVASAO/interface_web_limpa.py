@@ -8,12 +8,11 @@ Versão otimizada com sidebar organizada e sem repetições
 
 import streamlit as st
 import pandas as pd
-import numpy as np
 import datetime
-import tempfile
+import hashlib
+import io
 import os
 import time
-from pathlib import Path
 
 # Importações dos módulos do sistema
 import sys
@@ -27,9 +26,142 @@ except ImportError:
     POWERBI_DISPONIVEL = False
     print("⚠️ Automação Power BI não disponível")
 
-from codigo_fonte.nucleo.preditor import SistemaPredicaoEvasao
+from codigo_fonte.nucleo.tarefas import GerenciadorTarefas, ESTADO_CONCLUIDA, ESTADO_FALHOU, ESTADO_CANCELADA
+from codigo_fonte.nucleo.recarregador import RecarregadorModelo
 from codigo_fonte.utilitarios.carregador_dados import CarregadorDados
-from codigo_fonte.utilitarios.registrador import Registrador
+from codigo_fonte.utilitarios.registrador import Registrador, obter_registrador
+from codigo_fonte.utilitarios.metricas import iniciar_servidor_metricas
+from codigo_fonte.utilitarios.leitores_planilha import ler_planilha
+from codigo_fonte.configuracao import configuracoes
+
+registrador = obter_registrador(__name__)
+
+# Arquivos de download mantidos em cache (um por arquivo enviado e formato)
+TAMANHO_CACHE_DOWNLOADS = 16
+TAMANHOS_PAGINA = [25, 50, 100]
+
+# Intervalo de consulta ao progresso das tarefas em segundo plano (segundos)
+INTERVALO_ATUALIZACAO = 1.0
+
+NOMES_ETAPAS = {
+    'carregamento': '📁 Carregando dados...',
+    'preprocessamento': '🔧 Preparando dados...',
+    'modelo': '🤖 Executando modelo ML...',
+    'regras': '📋 Aplicando regras de negócio...'
+}
+
+@st.cache_resource
+def iniciar_metricas():
+    """Expõe /metrics uma única vez por processo do Streamlit"""
+    if not configuracoes.metricas.servidor_habilitado:
+        return None
+    try:
+        return iniciar_servidor_metricas()
+    except OSError as e:
+        registrador.warning(f"Servidor de métricas não iniciado: {e}")
+        return None
+
+@st.cache_resource
+def obter_gerenciador_tarefas():
+    """Pool de predições compartilhado por todas as sessões do Streamlit"""
+    # Modelos novos em data/models entram em uso sem reiniciar o Streamlit
+    recarregador = RecarregadorModelo().iniciar() if configuracoes.execucao.recarregar_modelo else None
+    return GerenciadorTarefas(recarregador=recarregador)
+
+def predizer_planilha(conteudo, sistema, observador, cancelamento):
+    """
+    Faz as predições de uma planilha (executada em segundo plano).
+    
+    Args:
+        conteudo: Bytes do arquivo enviado
+        sistema: Sistema de predição compartilhado pelas tarefas
+        observador: Recebe os eventos de progresso do pipeline
+        cancelamento: Token acionado pelo botão "Cancelar"
+        
+    Returns:
+        Tuple (resultados, estatisticas)
+    """
+    df = carregar_planilha_acadweb(io.BytesIO(conteudo))
+    
+    predicoes, estatisticas = sistema.predizer_dataframe(df, observador, cancelamento)
+    
+    # Converter predições para DataFrame
+    resultados = pd.DataFrame([
+        {
+            'Matrícula': p.matricula,
+            'Nome': p.nome,
+            'Situação Atual': p.situacao_atual,
+            'Curso': p.curso,
+            'Status Predição': p.status_predicao,
+            'Situação Predita': p.situacao_predita,
+            'Probabilidade Evasão': p.probabilidade_evasao_total,
+            'Nível Urgência': p.nivel_urgencia,
+            'Fator Principal': p.fator_principal,
+            'Confiança': p.confianca_predicao,
+            'Versão Modelo': p.versao_modelo
+        }
+        for p in predicoes
+    ])
+    
+    return resultados, estatisticas
+
+@st.cache_data(show_spinner=False, max_entries=TAMANHO_CACHE_DOWNLOADS)
+def gerar_arquivo_download(hash_arquivo, formato, _resultados):
+    """
+    Serializa os resultados para download uma única vez por arquivo e formato.
+    
+    Args:
+        hash_arquivo: SHA-256 do arquivo processado (chave do cache)
+        formato: 'csv' ou 'parquet'
+        _resultados: DataFrame de resultados
+        
+    Returns:
+        bytes do arquivo
+    """
+    if formato == 'parquet':
+        # Colunas texto podem misturar números e strings (ex.: Matrícula)
+        colunas_texto = _resultados.select_dtypes(include=['object']).columns
+        buffer = io.BytesIO()
+        _resultados.astype({coluna: str for coluna in colunas_texto}).to_parquet(buffer, index=False)
+        return buffer.getvalue()
+    
+    return _resultados.to_csv(index=False).encode('utf-8-sig')
+
+def filtrar_resultados(resultados, cursos=None, urgencias=None, status=None):
+    """
+    Filtra os resultados no servidor antes de enviar ao navegador.
+    
+    Args:
+        resultados: DataFrame de resultados
+        cursos: Cursos selecionados (vazio = todos)
+        urgencias: Níveis de urgência selecionados (vazio = todos)
+        status: Status de predição selecionados (vazio = todos)
+        
+    Returns:
+        DataFrame filtrado
+    """
+    mascara = pd.Series(True, index=resultados.index)
+    
+    for coluna, valores in (('Curso', cursos), ('Nível Urgência', urgencias), ('Status Predição', status)):
+        if valores:
+            mascara &= resultados[coluna].isin(valores)
+    
+    return resultados[mascara]
+
+def paginar(df, pagina, tamanho_pagina):
+    """
+    Retorna apenas as linhas de uma página.
+    
+    Args:
+        df: DataFrame completo
+        pagina: Número da página (começando em 1)
+        tamanho_pagina: Linhas por página
+        
+    Returns:
+        DataFrame com as linhas da página
+    """
+    inicio = (pagina - 1) * tamanho_pagina
+    return df.iloc[inicio:inicio + tamanho_pagina]
 
 def main():
     # Configurar a página
@@ -40,6 +172,8 @@ def main():
         initial_sidebar_state="expanded"
     )
     
+    iniciar_metricas()
+    
     # Título principal
     st.title("🎓 Sistema de Predição de Evasão Estudantil")
     st.markdown("**Versão 2.1 - Otimizada para AcadWeb**")
@@ -160,43 +294,42 @@ def processar_predicoes_tab():
                     # Usar nossa função otimizada de carregamento
                     df_preview = carregar_planilha_acadweb(uploaded_file)
                     
-                    if df_preview is not None:
-                        st.success(f"✅ **Arquivo carregado com sucesso!**")
-                        st.write(f"📊 **Dimensões:** {len(df_preview)} alunos × {len(df_preview.columns)} colunas")
-                        
-                        # Mostrar preview
-                        st.dataframe(df_preview.head(10), use_container_width=True)
+                    st.success(f"✅ **Arquivo carregado com sucesso!**")
+                    st.write(f"📊 **Dimensões:** {len(df_preview)} alunos × {len(df_preview.columns)} colunas")
+                    
+                    # Mostrar preview
+                    st.dataframe(df_preview.head(10), use_container_width=True)
+                    
+                    # Informações das colunas
+                    colunas_principais = ['Matrícula', 'Nome', 'Situação', 'Curso']
+                    colunas_encontradas = [col for col in colunas_principais if col in df_preview.columns]
+                    
+                    if len(colunas_encontradas) >= 3:
+                        st.success(f"✅ Colunas principais detectadas: {', '.join(colunas_encontradas)}")
+                    else:
+                        st.warning("⚠️ Algumas colunas principais não foram detectadas")
+                    
+                    # Mostrar colunas para o modelo ML
+                    colunas_modelo = [
+                        'Curso', 'Currículo', 'Sexo', 'Turma Atual', 'Cód.Disc. atual', 
+                        'Disciplina atual', 'Pend. Acad.', 'Pend. Financ.', 'Faltas Consecutivas', 
+                        'Cód.Curso', 'Identidade', 'Módulo atual'
+                    ]
+                    
+                    colunas_modelo_presentes = [col for col in colunas_modelo if col in df_preview.columns]
+                    colunas_modelo_faltantes = [col for col in colunas_modelo if col not in df_preview.columns]
+                    
+                    with st.expander("🤖 **Status das Colunas do Modelo ML**"):
+                        if colunas_modelo_presentes:
+                            st.success(f"✅ **Presentes ({len(colunas_modelo_presentes)}):** {', '.join(colunas_modelo_presentes)}")
                         
-                        # Informações das colunas
-                        colunas_principais = ['Matrícula', 'Nome', 'Situação', 'Curso']
-                        colunas_encontradas = [col for col in colunas_principais if col in df_preview.columns]
+                        if colunas_modelo_faltantes:
+                            st.info(f"💡 **Serão criadas com valores padrão ({len(colunas_modelo_faltantes)}):** {', '.join(colunas_modelo_faltantes)}")
                         
-                        if len(colunas_encontradas) >= 3:
-                            st.success(f"✅ Colunas principais detectadas: {', '.join(colunas_encontradas)}")
+                        if len(colunas_modelo_presentes) >= len(colunas_modelo) // 2:
+                            st.success("🎯 **Arquivo compatível com o modelo ML!**")
                         else:
-                            st.warning("⚠️ Algumas colunas principais não foram detectadas")
-                        
-                        # Mostrar colunas para o modelo ML
-                        colunas_modelo = [
-                            'Curso', 'Currículo', 'Sexo', 'Turma Atual', 'Cód.Disc. atual', 
-                            'Disciplina atual', 'Pend. Acad.', 'Pend. Financ.', 'Faltas Consecutivas', 
-                            'Cód.Curso', 'Identidade', 'Módulo atual'
-                        ]
-                        
-                        colunas_modelo_presentes = [col for col in colunas_modelo if col in df_preview.columns]
-                        colunas_modelo_faltantes = [col for col in colunas_modelo if col not in df_preview.columns]
-                        
-                        with st.expander("🤖 **Status das Colunas do Modelo ML**"):
-                            if colunas_modelo_presentes:
-                                st.success(f"✅ **Presentes ({len(colunas_modelo_presentes)}):** {', '.join(colunas_modelo_presentes)}")
-                            
-                            if colunas_modelo_faltantes:
-                                st.info(f"💡 **Serão criadas com valores padrão ({len(colunas_modelo_faltantes)}):** {', '.join(colunas_modelo_faltantes)}")
-                            
-                            if len(colunas_modelo_presentes) >= len(colunas_modelo) // 2:
-                                st.success("🎯 **Arquivo compatível com o modelo ML!**")
-                            else:
-                                st.warning("⚠️ Poucas colunas do modelo detectadas - resultados podem ser limitados")
+                            st.warning("⚠️ Poucas colunas do modelo detectadas - resultados podem ser limitados")
                     
                 except Exception as e:
                     st.error(f"❌ Erro ao carregar arquivo: {str(e)}")
@@ -235,7 +368,7 @@ def processar_predicoes_tab():
                                     help="Aplica regras específicas para análise curricular")
         
         formato_saida = st.selectbox("📄 Formato de saída", 
-                                   ["CSV (recomendado)", "Excel"],
+                                   ["CSV (recomendado)", "Parquet", "Excel"],
                                    help="Formato do arquivo de resultados")
     
     # Botão de processamento
@@ -253,14 +386,28 @@ def processar_predicoes_tab():
                 processar_arquivo(uploaded_file, incluir_shap, incluir_regras, formato_saida, auto_bi, pasta_bi)
     else:
         st.info("📁 **Faça upload de um arquivo Excel para começar o processamento**")
+    
+    # Tarefa em andamento: acompanhar o progresso sem bloquear a página
+    if 'tarefa_predicao' in st.session_state:
+        acompanhar_tarefa()
+    
+    # Resultados ficam na sessão e são reexibidos a cada rerun sem reprocessar
+    sessao = st.session_state.get('resultado_predicao')
+    if sessao is not None:
+        exibir_resultados(sessao['resultados'], formato_saida, sessao['estatisticas'],
+                          sessao['auto_powerbi_sucesso'], sessao['hash_arquivo'])
 
 def carregar_planilha_acadweb(arquivo):
     """
     Carrega planilha do AcadWeb com configuração específica otimizada
+    
+    Raises:
+        Exception: Erros de leitura são registrados e repassados a quem chamou
+        (o preview mostra a mensagem; na tarefa em segundo plano ela vai para tarefa.erro)
     """
     try:
-        # Ler arquivo detectando automaticamente os cabeçalhos na linha 2 (índice 2)
-        df = pd.read_excel(arquivo, engine='openpyxl')
+        # Ler arquivo (backend escolhido pelo formato real: xlsx, xls ou CSV disfarçado)
+        df = ler_planilha(arquivo)
         
         # Os cabeçalhos estão na linha índice 2
         headers = df.iloc[2]  # Linha 2 contém os nomes das colunas
@@ -315,109 +462,116 @@ def carregar_planilha_acadweb(arquivo):
         # Verificar colunas do modelo presentes
         return df
         
-    except Exception as e:
-        st.error(f"Erro ao carregar arquivo: {str(e)}")
-        return None
+    except Exception:
+        registrador.exception("Erro ao carregar planilha do AcadWeb")
+        raise
 
 def processar_arquivo(uploaded_file, incluir_shap, incluir_regras, formato_saida, auto_powerbi=False, pasta_powerbi="C:/Users/lucas/Downloads/TCC2/SISTEMA_PREDIÇÃO_EVASAO TCC2/Dashboard/"):
-    """Processa o arquivo carregado"""
-    
-    progress_bar = st.progress(0)
-    status_text = st.empty()
+    """Submete o arquivo carregado para processamento em segundo plano"""
     
     try:
-        # Etapa 1: Carregar dados
-        status_text.text("📁 Carregando dados...")
-        progress_bar.progress(20)
-        
-        df = carregar_planilha_acadweb(uploaded_file)
-        
-        if df is None:
-            st.error("❌ Falha ao carregar dados")
-            return
-        
-        # Salvar temporariamente para o sistema processar
-        import tempfile
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
-            df.to_excel(tmp_file.name, index=False)
-            tmp_path = Path(tmp_file.name)
-        
-        # Etapa 2: Inicializar sistema
-        status_text.text("🤖 Inicializando sistema de predição...")
-        progress_bar.progress(40)
-        
-        sistema = SistemaPredicaoEvasao()
-        sistema.inicializar()
-        
-        # Etapa 3: Processar predições
-        status_text.text("⚡ Processando predições...")
-        progress_bar.progress(60)
-        
-        predicoes, estatisticas = sistema.predizer_alunos(tmp_path)
-        
-        # Converter predições para DataFrame
-        resultados = pd.DataFrame([
-            {
-                'Matrícula': p.matricula,
-                'Nome': p.nome,
-                'Situação Atual': p.situacao_atual,
-                'Curso': p.curso,
-                'Status Predição': p.status_predicao,
-                'Situação Predita': p.situacao_predita,
-                'Probabilidade Evasão': p.probabilidade_evasao_total,
-                'Nível Urgência': p.nivel_urgencia,
-                'Fator Principal': p.fator_principal,
-                'Confiança': p.confianca_predicao
-            }
-            for p in predicoes
-        ])
-        
-        # Limpeza
-        os.unlink(tmp_path)
-        
-        # Etapa 4: Aplicar regras adicionais se solicitado
-        if incluir_regras:
-            status_text.text("📋 Aplicando regras de negócio...")
-            progress_bar.progress(80)
-        
-        # Etapa 5: Automação Power BI (se habilitada)
-        auto_powerbi_sucesso = False
-        if auto_powerbi and POWERBI_DISPONIVEL:
-            status_text.text("🚀 Atualizando Power BI...")
-            progress_bar.progress(85)
-            
-            try:
-                automacao = AutomacaoPowerBI(pasta_powerbi)
-                
-                metadados = {
-                    'data_processamento': datetime.datetime.now(),
-                    'total_alunos': len(resultados),
-                    'arquivo_original': uploaded_file.name,
-                    'incluir_shap': incluir_shap,
-                    'incluir_regras': incluir_regras
-                }
-                
-                auto_powerbi_sucesso = automacao.salvar_csv_para_powerbi(resultados, metadados)
-                
-            except Exception as e:
-                st.warning(f"⚠️ Erro na automação Power BI: {e}")
-        
-        # Etapa 6: Finalizar
-        status_text.text("✅ Finalizando processamento...")
-        progress_bar.progress(100)
-        
-        # Mostrar resultados
-        exibir_resultados(resultados, formato_saida, estatisticas, auto_powerbi_sucesso)
+        conteudo = uploaded_file.getvalue()
+        hash_arquivo = hashlib.sha256(conteudo).hexdigest()
+        gerenciador = obter_gerenciador_tarefas()
+        
+        # O mesmo arquivo (mesmo hash) reaproveita a tarefa já existente, inclusive de outro usuário,
+        # enquanto o modelo em uso for o mesmo
+        versao_modelo = gerenciador.recarregador.versao_ativa if gerenciador.recarregador else None
+        tarefa_id = gerenciador.submeter(
+            lambda sistema, observador, cancelamento: predizer_planilha(conteudo, sistema, observador, cancelamento),
+            descricao=uploaded_file.name,
+            chave=f"{hash_arquivo}:{versao_modelo}"
+        )
         
-        progress_bar.empty()
-        status_text.empty()
+        st.session_state['tarefa_predicao'] = {
+            'id': tarefa_id,
+            'hash_arquivo': hash_arquivo,
+            'nome_arquivo': uploaded_file.name,
+            'formato_saida': formato_saida,
+            'incluir_shap': incluir_shap,
+            'incluir_regras': incluir_regras,
+            'auto_powerbi': auto_powerbi,
+            'pasta_powerbi': pasta_powerbi
+        }
+        st.session_state.pop('resultado_predicao', None)
         
     except Exception as e:
         st.error(f"❌ Erro durante processamento: {str(e)}")
-        progress_bar.empty()
-        status_text.empty()
 
-def exibir_resultados(resultados, formato_saida, estatisticas=None, auto_powerbi_sucesso=False):
+@st.fragment(run_every=INTERVALO_ATUALIZACAO)
+def acompanhar_tarefa():
+    """Mostra o progresso real da tarefa da sessão e coleta o resultado ao final"""
+    
+    pedido = st.session_state.get('tarefa_predicao')
+    if pedido is None:
+        return
+    
+    tarefa = obter_gerenciador_tarefas().obter(pedido['id'])
+    if tarefa is None:
+        st.session_state.pop('tarefa_predicao', None)
+        st.warning("⚠️ A tarefa expirou. Processe o arquivo novamente.")
+        return
+    
+    if tarefa.estado == ESTADO_FALHOU:
+        st.session_state.pop('tarefa_predicao', None)
+        st.error(f"❌ Erro durante processamento: {tarefa.erro}")
+        return
+    
+    if tarefa.estado == ESTADO_CANCELADA:
+        st.session_state.pop('tarefa_predicao', None)
+        st.warning("⏹️ Processamento cancelado.")
+        return
+    
+    if tarefa.estado != ESTADO_CONCLUIDA:
+        etapa = NOMES_ETAPAS.get(tarefa.etapa_atual, '⏳ Aguardando na fila...')
+        st.progress(tarefa.progresso, text=f"{etapa} {tarefa.progresso:.0%}")
+        
+        col_info, col_cancelar = st.columns([3, 1])
+        with col_info:
+            if tarefa.duracao is not None:
+                st.caption(f"⏱️ {tarefa.duracao:.0f}s em execução • {pedido['nome_arquivo']}")
+        with col_cancelar:
+            # A tarefa para no próximo lote; o estado 'cancelada' aparece na próxima consulta
+            if st.button("⏹️ Cancelar", key='cancelar_tarefa', disabled=tarefa.cancelamento.cancelado):
+                obter_gerenciador_tarefas().cancelar(tarefa.id)
+        return
+    
+    resultados, estatisticas = tarefa.resultado
+    
+    # Automação Power BI (se habilitada)
+    auto_powerbi_sucesso = False
+    if pedido['auto_powerbi'] and POWERBI_DISPONIVEL:
+        try:
+            automacao = AutomacaoPowerBI(pedido['pasta_powerbi'])
+            
+            metadados = {
+                'data_processamento': datetime.datetime.now(),
+                'total_alunos': len(resultados),
+                'arquivo_original': pedido['nome_arquivo'],
+                'incluir_shap': pedido['incluir_shap'],
+                'incluir_regras': pedido['incluir_regras']
+            }
+            
+            auto_powerbi_sucesso = automacao.salvar_csv_para_powerbi(resultados, metadados)
+            
+        except Exception as e:
+            st.warning(f"⚠️ Erro na automação Power BI: {e}")
+    
+    # Guardar na sessão para sobreviver aos reruns (downloads, filtros, troca de aba)
+    st.session_state['resultado_predicao'] = {
+        'hash_arquivo': pedido['hash_arquivo'],
+        'nome_arquivo': pedido['nome_arquivo'],
+        'resultados': resultados,
+        'estatisticas': estatisticas,
+        'formato_saida': pedido['formato_saida'],
+        'auto_powerbi_sucesso': auto_powerbi_sucesso
+    }
+    st.session_state.pop('tarefa_predicao', None)
+    
+    # Rerun completo para exibir os resultados fora do fragmento
+    st.rerun()
+
+def exibir_resultados(resultados, formato_saida, estatisticas=None, auto_powerbi_sucesso=False, hash_arquivo=None):
     """Exibe os resultados do processamento"""
     
     st.success("🎉 **Processamento Concluído com Sucesso!**")
@@ -444,22 +598,62 @@ def exibir_resultados(resultados, formato_saida, estatisticas=None, auto_powerbi
         tempo_processamento = "< 30s"
         st.metric("⚡ Tempo", tempo_processamento)
     
-    # Preview dos resultados
+    if estatisticas and estatisticas.get('model_version'):
+        st.caption(f"🧠 Versão do modelo: {estatisticas['model_version']}")
+    
+    # Resultados filtrados e paginados no servidor (só a página vai para o navegador)
     st.subheader("📊 Resultados da Análise")
-    st.dataframe(resultados.head(10), use_container_width=True)
     
-    # Download
+    col_curso, col_urgencia, col_status = st.columns(3)
+    with col_curso:
+        cursos = st.multiselect("🎓 Curso", sorted(resultados['Curso'].unique()), key='filtro_curso')
+    with col_urgencia:
+        urgencias = st.multiselect("🚨 Nível Urgência", sorted(resultados['Nível Urgência'].unique()), key='filtro_urgencia')
+    with col_status:
+        status = st.multiselect("📌 Status Predição", sorted(resultados['Status Predição'].unique()), key='filtro_status')
+    
+    filtrados = filtrar_resultados(resultados, cursos, urgencias, status)
+    
+    col_tamanho, col_pagina, col_info = st.columns([1, 1, 2])
+    with col_tamanho:
+        tamanho_pagina = st.selectbox("Linhas por página", TAMANHOS_PAGINA, key='tamanho_pagina')
+    total_paginas = max(1, -(-len(filtrados) // tamanho_pagina))
+    with col_pagina:
+        pagina = st.number_input("Página", min_value=1, value=1, step=1, key='pagina_resultados')
+    with col_info:
+        st.caption(f"{len(filtrados)} de {len(resultados)} alunos • página {min(pagina, total_paginas)} de {total_paginas}")
+    
+    st.dataframe(paginar(filtrados, min(pagina, total_paginas), tamanho_pagina), use_container_width=True)
+    
+    # Download (bytes gerados uma única vez por arquivo e formato)
     st.subheader("💾 Download dos Resultados")
     
+    chave_cache = hash_arquivo or hashlib.sha256(pd.util.hash_pandas_object(resultados).values.tobytes()).hexdigest()
+    if estatisticas and estatisticas.get('model_version'):
+        chave_cache = f"{chave_cache}:{estatisticas['model_version']}"
+    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+    
     if formato_saida == "CSV (recomendado)":
-        csv = resultados.to_csv(index=False)
         st.download_button(
             label="📥 **Baixar Resultados (CSV)**",
-            data=csv,
-            file_name=f"predicoes_evasao_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            data=gerar_arquivo_download(chave_cache, 'csv', resultados),
+            file_name=f"predicoes_evasao_{timestamp}.csv",
             mime="text/csv",
             use_container_width=True
         )
+    elif formato_saida == "Parquet":
+        try:
+            dados_parquet = gerar_arquivo_download(chave_cache, 'parquet', resultados)
+        except ImportError:
+            st.warning("⚠️ Parquet requer o pacote pyarrow. Use CSV.")
+        else:
+            st.download_button(
+                label="📥 **Baixar Resultados (Parquet)**",
+                data=dados_parquet,
+                file_name=f"predicoes_evasao_{timestamp}.parquet",
+                mime="application/octet-stream",
+                use_container_width=True
+            )
     else:
         # Para Excel, você precisaria implementar a conversão
         st.info("💡 Formato Excel em desenvolvimento. Use CSV para importar no Power BI.")
@@ -10,7 +10,10 @@ Desenvolvido para Grau Técnico - 2025
 Uso:
     python principal.py                    # Usar arquivo padrão
     python principal.py arquivo.xlsx      # Especificar arquivo
+    python principal.py alunos.parquet    # Também aceita .xls, .csv e .feather
     python principal.py --verbose         # Modo detalhado
+    python principal.py --metricas m.json # Exportar métricas em JSON
+    python principal.py --arrow --parquet # Caminho colunar, saída também em Parquet
     python principal.py --ajuda          # Mostrar ajuda
 
 Exemplo:
@@ -18,14 +21,19 @@ Exemplo:
 """
 
 import sys
+import signal
 import argparse
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Tuple
 import csv
 
-from codigo_fonte.utilitarios import obter_registrador
+from codigo_fonte.utilitarios import (
+    obter_registrador, metricas, CarregadorDados, orcamento_threads, salvar_tabela
+)
 from codigo_fonte.configuracao import configuracoes
-from codigo_fonte.nucleo import SistemaPredicaoEvasao, PredicaoAluno
+from codigo_fonte.nucleo import (
+    SistemaPredicaoEvasao, PredicaoAluno, ObservadorPredicao, TokenCancelamento, PredicaoCancelada
+)
 
 def configurar_argumentos() -> argparse.ArgumentParser:
     """
@@ -41,15 +49,25 @@ def configurar_argumentos() -> argparse.ArgumentParser:
 Exemplos:
   python principal.py                              # Arquivo padrão
   python principal.py arquivo_alunos.xlsx         # Arquivo específico
+  python principal.py alunos.csv                  # CSV/Parquet/Feather exportado do banco
   python principal.py --verboso                   # Modo detalhado
   python principal.py arquivo.xlsx --verboso      # Arquivo específico + verbose
+  python principal.py --metricas metricas.prom    # Métricas para o textfile collector
+  python principal.py --progresso                 # Andamento por etapa/lote
+  python principal.py --sombra                    # Compara com o modelo em data/models/candidato
+  python principal.py --regras-primeiro           # Modelo/SHAP só para alunos sem regra aplicável
+  python principal.py --modelo-compacto           # Modelo gerado por scripts/compactar_modelo.py
+  python principal.py --cache-predicoes           # Reaproveita predições de execuções anteriores
+  python principal.py --processos 4               # Modelo/SHAP em 4 processos (memória compartilhada)
+  python principal.py --arrow                     # Caminho colunar (Apache Arrow) do arquivo ao CSV
+  python principal.py --arrow --parquet           # ... e saída também em output/analise_completa.parquet
         """
     )
     
     parser.add_argument(
         'arquivo_alunos',
         nargs='?',
-        help='Arquivo Excel com dados dos alunos (padrão: data/raw/alunos_ativos_atual.xlsx)'
+        help='Arquivo com dados dos alunos: .xlsx, .xls, .csv, .parquet ou .feather (padrão: data/raw/alunos_ativos_atual.xlsx)'
     )
     
     parser.add_argument(
@@ -58,8 +76,110 @@ Exemplos:
         help='Modo verboso para debugging'
     )
     
+    parser.add_argument(
+        '--compactar',
+        action='store_true',
+        help='Carregar dados com tipos compactos (category/inteiros pequenos) para reduzir memória'
+    )
+    
+    parser.add_argument(
+        '--metricas',
+        metavar='ARQUIVO',
+        help='Arquivo de métricas da execução: .prom (Prometheus) ou .json '
+             '(padrão: output/metricas_predicao.prom)'
+    )
+    
+    parser.add_argument(
+        '--progresso',
+        action='store_true',
+        help='Mostrar o andamento de cada etapa (Ctrl+C cancela entre lotes)'
+    )
+    
+    parser.add_argument(
+        '--regras-primeiro',
+        action='store_true',
+        help='Aplicar as regras de negócio antes do modelo; ML e SHAP rodam só para os alunos '
+             'que nenhuma regra decide (colunas do modelo ficam como não calculadas nos demais)'
+    )
+    
+    parser.add_argument(
+        '--modelo-compacto',
+        action='store_true',
+        help='Predizer com o modelo compacto (data/models/modelo_xgboost_compacto.pkl) no lugar do completo'
+    )
+    
+    parser.add_argument(
+        '--cache-predicoes',
+        action='store_true',
+        help='Guardar probabilidades e fator SHAP por vetor de features em data/processed/cache_predicoes.sqlite '
+             'e reaproveitá-los nas próximas execuções com o mesmo modelo'
+    )
+    
+    parser.add_argument(
+        '--processos',
+        type=int,
+        default=None,
+        metavar='N',
+        help='Pontuar modelo e SHAP em N processos com a matriz em memória compartilhada '
+             '(0 = um por fatia do orçamento de threads)'
+    )
+    
+    parser.add_argument(
+        '--arrow',
+        action='store_true',
+        help='Caminho colunar: ler o arquivo para uma tabela Apache Arrow e gravar a saída direto dela, '
+             'sem um objeto por aluno (requer pyarrow)'
+    )
+    
+    parser.add_argument(
+        '--parquet',
+        action='store_true',
+        help='Com --arrow, gravar também output/analise_completa.parquet'
+    )
+    
+    parser.add_argument(
+        '--sombra',
+        nargs='?',
+        const='',
+        metavar='DIRETORIO',
+        help='Pontuar também com um modelo candidato e gerar o relatório de divergências '
+             '(padrão: data/models/candidato; os resultados continuam vindo do modelo atual)'
+    )
+    
     return parser
 
+class ObservadorTerminal(ObservadorPredicao):
+    """Mostra o andamento das etapas do pipeline no terminal."""
+    
+    def inicio_etapa(self, etapa: str, total_linhas: int) -> None:
+        print(f"  [{etapa}] iniciando...", end='\r', flush=True)
+    
+    def progresso(self, etapa: str, linhas_processadas: int, total_linhas: int) -> None:
+        percentual = linhas_processadas / total_linhas * 100 if total_linhas else 0.0
+        print(f"  [{etapa}] {linhas_processadas}/{total_linhas} alunos ({percentual:.0f}%)", end='\r', flush=True)
+    
+    def fim_etapa(self, etapa: str, total_linhas: int, duracao: float) -> None:
+        print(f"  [{etapa}] concluída em {duracao:.2f}s" + ' ' * 20)
+
+def instalar_cancelamento_por_sinal() -> TokenCancelamento:
+    """
+    Faz o primeiro Ctrl+C cancelar a predição no próximo lote.
+    
+    Um segundo Ctrl+C interrompe imediatamente (comportamento padrão).
+    
+    Returns:
+        Token cancelado pelo sinal
+    """
+    cancelamento = TokenCancelamento()
+    
+    def ao_receber_sinal(numero_sinal, quadro):
+        cancelamento.cancelar("Interrompida pelo usuário (Ctrl+C)")
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        print("\nCancelando após o lote atual... (Ctrl+C novamente para sair imediatamente)")
+    
+    signal.signal(signal.SIGINT, ao_receber_sinal)
+    return cancelamento
+
 def salvar_predicoes_em_csv(predicoes: List[PredicaoAluno], arquivo_saida: Path) -> None:
     """
     Salva as predições em arquivo CSV.
@@ -78,7 +198,7 @@ def salvar_predicoes_em_csv(predicoes: List[PredicaoAluno], arquivo_saida: Path)
             'Predicao_ML_Original', 'Prob_ML_Original',
             'Top_1_Situacao_ML', 'Top_1_Probabilidade_ML',
             'Top_2_Situacao_ML', 'Top_2_Probabilidade_ML',
-            'Top_3_Situacao_ML', 'Top_3_Probabilidade_ML'
+            'Top_3_Situacao_ML', 'Top_3_Probabilidade_ML', 'Versao_Modelo'
         ]
         
         escritor = csv.writer(csvfile)
@@ -97,7 +217,7 @@ def salvar_predicoes_em_csv(predicoes: List[PredicaoAluno], arquivo_saida: Path)
                 predicao.prob_ml_original, predicao.top_1_situacao_ml,
                 predicao.top_1_probabilidade_ml, predicao.top_2_situacao_ml,
                 predicao.top_2_probabilidade_ml, predicao.top_3_situacao_ml,
-                predicao.top_3_probabilidade_ml
+                predicao.top_3_probabilidade_ml, predicao.versao_modelo
             ]
             escritor.writerow(linha)
 
@@ -109,37 +229,87 @@ def imprimir_relatorio_resumo(predicoes: List[PredicaoAluno], estatisticas: dict
         predicoes: Lista de predições
         estatisticas: Estatísticas compiladas
     """
+    # Distribuição por urgência
+    alunos_risco = [p for p in predicoes if p.status_predicao == 'RISCO_EVASAO']
+    niveis_urgencia = {}
+    for aluno in alunos_risco:
+        nivel = aluno.nivel_urgencia
+        niveis_urgencia[nivel] = niveis_urgencia.get(nivel, 0) + 1
+    
+    # Casos urgentes
+    casos_urgentes = [
+        (p.nome, p.matricula, p.situacao_predita, p.probabilidade_situacao, p.fonte_predicao)
+        for p in alunos_risco if p.nivel_urgencia == 'URGENTE'
+    ]
+    imprimir_relatorio(estatisticas, niveis_urgencia, len(casos_urgentes), casos_urgentes[:5])
+
+def imprimir_relatorio_tabela(tabela, estatisticas: dict) -> None:
+    """
+    Imprime o mesmo relatório resumo a partir da tabela do caminho colunar.
+    
+    Args:
+        tabela: Tabela Arrow de SistemaPredicaoEvasao.predizer_tabela()
+        estatisticas: Estatísticas compiladas
+    """
+    import pyarrow.compute as pc
+    
+    alunos_risco = tabela.filter(pc.equal(tabela['Status_Predicao'], 'RISCO_EVASAO'))
+    niveis_urgencia = {
+        contagem['values'].as_py(): contagem['counts'].as_py()
+        for contagem in pc.value_counts(alunos_risco['Nivel_Urgencia'])
+    }
+    
+    urgentes = alunos_risco.filter(pc.equal(alunos_risco['Nivel_Urgencia'], 'URGENTE'))
+    colunas = ['Nome', 'Matricula', 'Situacao_Predita', 'Probabilidade_Situacao', 'Fonte_Predicao']
+    primeiros = urgentes.slice(0, 5).select(colunas).to_pydict()
+    imprimir_relatorio(estatisticas, niveis_urgencia, urgentes.num_rows,
+                       list(zip(*(primeiros[coluna] for coluna in colunas))))
+
+def imprimir_relatorio(estatisticas: dict, niveis_urgencia: Dict[str, int], total_urgentes: int,
+                       primeiros_urgentes: List[Tuple[str, str, str, str, str]]) -> None:
+    """
+    Imprime o relatório resumo.
+    
+    Args:
+        estatisticas: Estatísticas compiladas
+        niveis_urgencia: Alunos em risco por nível de urgência
+        total_urgentes: Alunos com urgência URGENTE
+        primeiros_urgentes: (nome, matrícula, situação, probabilidade, fonte) dos primeiros urgentes
+    """
     print("=" * 80)
     print("RELATÓRIO DE PREDIÇÃO DE EVASÃO ESTUDANTIL")
     print("=" * 80)
     
     print(f"\nVISÃO GERAL:")
     print(f"Total de alunos analisados: {estatisticas['total_students']}")
+    print(f"Versão do modelo: {estatisticas.get('model_version')}")
     print(f"Matriculados: {estatisticas['enrolled_students']} ({estatisticas['enrolled_percentage']:.1f}%)")
     print(f"Em risco de evasão: {estatisticas['dropout_risk_students']} ({estatisticas['dropout_risk_percentage']:.1f}%)")
     
     # Distribuição por urgência
-    alunos_risco = [p for p in predicoes if p.status_predicao == 'RISCO_EVASAO']
-    if alunos_risco:
-        niveis_urgencia = {}
-        for aluno in alunos_risco:
-            nivel = aluno.nivel_urgencia
-            niveis_urgencia[nivel] = niveis_urgencia.get(nivel, 0) + 1
-        
+    if niveis_urgencia:
         print(f"\nDISTRIBUIÇÃO POR URGÊNCIA:")
-        total_risco = len(alunos_risco)
+        total_risco = sum(niveis_urgencia.values())
         for nivel, quantidade in niveis_urgencia.items():
             percentual = (quantidade / total_risco) * 100
             print(f"  {nivel}: {quantidade} alunos ({percentual:.1f}%)")
     
     # Casos urgentes
-    casos_urgentes = [p for p in alunos_risco if p.nivel_urgencia == 'URGENTE']
-    if casos_urgentes:
-        print(f"\nALUNOS QUE PRECISAM DE AÇÃO IMEDIATA ({len(casos_urgentes)} alunos):")
-        for i, aluno in enumerate(casos_urgentes[:5]):  # Mostrar apenas os primeiros 5
-            print(f"  • {aluno.nome} (Matrícula: {aluno.matricula})")
-            print(f"    Situação: {aluno.situacao_predita} - Prob: {aluno.probabilidade_situacao}")
-            print(f"    Fonte: {aluno.fonte_predicao}")
+    if total_urgentes:
+        print(f"\nALUNOS QUE PRECISAM DE AÇÃO IMEDIATA ({total_urgentes} alunos):")
+        for nome, matricula, situacao, probabilidade, fonte in primeiros_urgentes:  # Mostrar apenas os primeiros 5
+            print(f"  • {nome} (Matrícula: {matricula})")
+            print(f"    Situação: {situacao} - Prob: {probabilidade}")
+            print(f"    Fonte: {fonte}")
+    
+    # Relatório de memória (carga compactada)
+    relatorio_memoria = estatisticas.get('memory_report')
+    if relatorio_memoria:
+        antes, depois = relatorio_memoria['antes'], relatorio_memoria['depois']
+        print(f"\nMEMÓRIA DOS DADOS CARREGADOS:")
+        print(f"  Antes:  {antes['bytes_por_linha']:.0f} bytes/linha ({antes['colunas']} colunas)")
+        print(f"  Depois: {depois['bytes_por_linha']:.0f} bytes/linha ({depois['colunas']} colunas)")
+        print(f"  Redução: {relatorio_memoria['reducao_percentual']:.1f}%")
     
     # Resumo das regras aplicadas
     resumo_regras = estatisticas.get('rules_summary', {})
@@ -153,6 +323,27 @@ def imprimir_relatorio_resumo(predicoes: List[PredicaoAluno], estatisticas: dict
         print(f"  NF (Não Formados): {resumo_regras.get('NF_por_regra', 0)} alunos")
         print(f"  MT (Matriculados): {resumo_regras.get('MT_por_regra', 0)} alunos")
 
+def imprimir_relatorio_sombra(relatorio: dict, arquivo_relatorio: Path) -> None:
+    """
+    Imprime o resumo da comparação com o modelo candidato.
+    
+    Args:
+        relatorio: Relatório gerado pelo AvaliadorSombra
+        arquivo_relatorio: JSON com o relatório completo
+    """
+    print(f"\nMODO SOMBRA (candidato {relatorio.get('versao_candidato')}):")
+    if 'erro' in relatorio:
+        print(f"  Candidato falhou: {relatorio['erro']}")
+        return
+    
+    print(f"  Divergências: {relatorio['divergencias']}/{relatorio['total_alunos']} "
+          f"({relatorio['taxa_divergencia']:.1%}), {relatorio['divergencias_resultado_final']} no resultado final")
+    for regra, grupo in relatorio['por_regra'].items():
+        print(f"    Regra {regra}: {grupo['divergencias']}/{grupo['total']} ({grupo['taxa_divergencia']:.1%})")
+    latencia = relatorio['latencia']
+    print(f"  Latência: produção {latencia['producao_segundos']:.2f}s, candidato {latencia['candidato_segundos']:.2f}s")
+    print(f"  Relatório completo: {arquivo_relatorio}")
+
 def principal() -> int:
     """
     Função principal do programa.
@@ -180,6 +371,11 @@ def principal() -> int:
             print(f"Erro: Arquivo não encontrado: {arquivo_alunos}")
             return 1
         
+        if arquivo_alunos.suffix.lower() not in CarregadorDados.EXTENSOES_SUPORTADAS:
+            print(f"Erro: Formato não suportado: {arquivo_alunos.suffix} "
+                  f"(use {', '.join(CarregadorDados.EXTENSOES_SUPORTADAS)})")
+            return 1
+        
         # Determinar arquivo de saída
         arquivo_saida = configuracoes.dados.diretorio_saida / "analise_completa.csv"
         
@@ -188,6 +384,26 @@ def principal() -> int:
             print(f"Erro: Arquivo não encontrado: {arquivo_alunos}")
             return 1
         
+        if args.parquet and not args.arrow:
+            print("Erro: --parquet requer --arrow")
+            return 1
+        
+        if args.compactar:
+            configuracoes.dados.compactar_tipos = True
+        
+        if args.regras_primeiro:
+            configuracoes.execucao.regras_primeiro = True
+        
+        if args.modelo_compacto:
+            configuracoes.dados.usar_modelo_compacto = True
+        
+        if args.cache_predicoes:
+            configuracoes.execucao.cache_predicoes = True
+        
+        # Executor criado em inicializar(), depois do modelo carregado
+        if args.processos is not None:
+            configuracoes.execucao.processos_pontuacao = args.processos or orcamento_threads()[0]
+        
         # Inicializar sistema
         registrador.info("Inicializando sistema de predição de evasão...")
         print("Inicializando sistema de predição de evasão...")
@@ -195,18 +411,44 @@ def principal() -> int:
         sistema = SistemaPredicaoEvasao()
         sistema.inicializar()
         
+        if args.sombra is not None and sistema.sombra is None:
+            sistema.ativar_modo_sombra(Path(args.sombra) if args.sombra else None)
+        
         # Fazer predições
         registrador.info(f"Processando arquivo: {arquivo_alunos}")
         print(f"Processando arquivo: {arquivo_alunos}")
         
-        predicoes, estatisticas = sistema.predizer_alunos(arquivo_alunos)
+        cancelamento = instalar_cancelamento_por_sinal()
+        observador = ObservadorTerminal() if args.progresso else None
+        if args.arrow:
+            # Caminho colunar: a tabela é gravada direto, sem objetos por aluno
+            tabela, estatisticas = sistema.predizer_alunos_tabela(arquivo_alunos, observador, cancelamento)
+            salvar_tabela(tabela, arquivo_saida)
+            if args.parquet:
+                salvar_tabela(tabela, arquivo_saida.with_suffix('.parquet'))
+        else:
+            predicoes, estatisticas = sistema.predizer_alunos(arquivo_alunos, observador, cancelamento)
+            
+            # Salvar resultados
+            arquivo_saida.parent.mkdir(parents=True, exist_ok=True)
+            salvar_predicoes_em_csv(predicoes, arquivo_saida)
         
-        # Salvar resultados
-        arquivo_saida.parent.mkdir(parents=True, exist_ok=True)
-        salvar_predicoes_em_csv(predicoes, arquivo_saida)
+        # Relatório do modo sombra (montado em paralelo pelo candidato)
+        relatorio_sombra = sistema.sombra.aguardar() if sistema.sombra else None
+        
+        # Exportar métricas da execução
+        if args.metricas or configuracoes.metricas.habilitado:
+            arquivo_metricas = Path(args.metricas) if args.metricas else configuracoes.obter_caminho_metricas()
+            metricas.salvar(arquivo_metricas)
+            registrador.info(f"Métricas salvas em: {arquivo_metricas}")
         
         # Imprimir relatório
-        imprimir_relatorio_resumo(predicoes, estatisticas)
+        if args.arrow:
+            imprimir_relatorio_tabela(tabela, estatisticas)
+        else:
+            imprimir_relatorio_resumo(predicoes, estatisticas)
+        if relatorio_sombra:
+            imprimir_relatorio_sombra(relatorio_sombra, sistema.sombra.arquivo_relatorio)
         
         print(f"\nAnálise concluída com sucesso!")
         print(f"Arquivo de saída: {arquivo_saida}")
@@ -216,7 +458,7 @@ def principal() -> int:
         
         return 0
         
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, PredicaoCancelada):
         registrador.info("Operação cancelada pelo usuário")
         print("\nOperação cancelada pelo usuário")
         return 1
@@ -6,15 +6,36 @@ Script de produção para processar automaticamente arquivos na pasta input
 import sys
 import os
 import glob
+import signal
 from pathlib import Path
 from datetime import datetime
 
 # Adicionar o caminho do projeto
 sys.path.insert(0, os.getcwd())
 
-from codigo_fonte.nucleo import SistemaPredicaoEvasao
+from codigo_fonte.nucleo import SistemaPredicaoEvasao, ObservadorPredicao, TokenCancelamento, PredicaoCancelada
 from codigo_fonte.configuracao import configuracoes
-from codigo_fonte.utilitarios import registrador
+from codigo_fonte.utilitarios import registrador, metricas, CarregadorDados
+
+class ObservadorProducao(ObservadorPredicao):
+    """Mostra o andamento de cada etapa no console"""
+    
+    def progresso(self, etapa, linhas_processadas, total_linhas):
+        print(f"   ⏳ {etapa}: {linhas_processadas}/{total_linhas} alunos")
+    
+    def fim_etapa(self, etapa, total_linhas, duracao):
+        print(f"   ✅ {etapa}: {duracao:.1f}s")
+
+def instalar_cancelamento():
+    """SIGTERM/SIGINT cancelam a predição no próximo lote, sem mover o arquivo de entrada"""
+    cancelamento = TokenCancelamento()
+    
+    def ao_receber_sinal(numero_sinal, quadro):
+        cancelamento.cancelar(f"Interrompida pelo sinal {signal.Signals(numero_sinal).name}")
+    
+    for sinal in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sinal, ao_receber_sinal)
+    return cancelamento
 
 def processar_arquivo_automatico():
     """Processa automaticamente arquivos da pasta input"""
@@ -26,15 +47,18 @@ def processar_arquivo_automatico():
     output_dir.mkdir(exist_ok=True)
     
     try:
-        print("🔍 Procurando arquivos Excel na pasta 'input'...")
+        print("🔍 Procurando arquivos de alunos na pasta 'input'...")
         
-        # Buscar arquivos Excel
-        arquivos_excel = list(input_dir.glob("*.xlsx"))
+        # Buscar arquivos suportados (Excel, CSV, Parquet, Feather)
+        arquivos_excel = sorted(
+            arquivo for arquivo in input_dir.iterdir()
+            if arquivo.is_file() and arquivo.suffix.lower() in CarregadorDados.EXTENSOES_SUPORTADAS
+        )
         
         if not arquivos_excel:
-            print("❌ Nenhum arquivo Excel encontrado na pasta 'input'")
+            print("❌ Nenhum arquivo de alunos encontrado na pasta 'input'")
             print("\n📋 INSTRUÇÕES:")
-            print("1. Coloque seu arquivo Excel (.xlsx) na pasta 'input'")
+            print(f"1. Coloque seu arquivo ({', '.join(CarregadorDados.EXTENSOES_SUPORTADAS)}) na pasta 'input'")
             print("2. Execute este script novamente")
             return False
         
@@ -50,7 +74,8 @@ def processar_arquivo_automatico():
         
         # Fazer predições
         print("🧠 Processando predições...")
-        predicoes, estatisticas = sistema.predizer_alunos(arquivo_entrada)
+        cancelamento = instalar_cancelamento()
+        predicoes, estatisticas = sistema.predizer_alunos(arquivo_entrada, ObservadorProducao(), cancelamento)
         
         # Gerar nome do arquivo de saída
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -70,7 +95,7 @@ def processar_arquivo_automatico():
                 'Status_Predicao', 'Situacao_Predita', 'Probabilidade_Situacao',
                 'Probabilidade_Evasao_Total', 'Nivel_Urgencia', 'Fator_Principal',
                 'Valor_Importancia', 'Confianca_Predicao', 'Fonte_Predicao',
-                'Data_Processamento'
+                'Data_Processamento', 'Versao_Modelo'
             ])
             
             # Dados
@@ -82,9 +107,15 @@ def processar_arquivo_automatico():
                     predicao.probabilidade_situacao, predicao.probabilidade_evasao_total,
                     predicao.nivel_urgencia, predicao.fator_principal,
                     abs(predicao.valor_importancia), predicao.confianca_predicao,
-                    predicao.fonte_predicao, datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    predicao.fonte_predicao, datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    predicao.versao_modelo
                 ])
         
+        # Métricas para o textfile collector do Prometheus
+        if configuracoes.metricas.habilitado:
+            arquivo_metricas = metricas.salvar(output_dir / configuracoes.metricas.arquivo_metricas)
+            print(f"📈 Métricas salvas em: {arquivo_metricas}")
+        
         # Estatísticas finais
         total_alunos = len(predicoes)
         matriculados = len([p for p in predicoes if p.status_predicao == 'MATRICULADO'])
@@ -105,12 +136,17 @@ def processar_arquivo_automatico():
         # Mover arquivo processado para subpasta
         processed_dir = input_dir / "processados"
         processed_dir.mkdir(exist_ok=True)
-        novo_nome = processed_dir / f"{arquivo_entrada.stem}_processado_{timestamp}.xlsx"
+        novo_nome = processed_dir / f"{arquivo_entrada.stem}_processado_{timestamp}{arquivo_entrada.suffix}"
         arquivo_entrada.rename(novo_nome)
         print(f"📁 Arquivo original movido para: {novo_nome}")
         
         return True
         
+    except PredicaoCancelada as e:
+        print(f"\n⏹️ Processamento cancelado: {e}")
+        print("   O arquivo de entrada foi mantido na pasta 'input'")
+        return False
+        
     except Exception as e:
         print(f"\n❌ ERRO durante processamento:")
         print(f"   {str(e)}")
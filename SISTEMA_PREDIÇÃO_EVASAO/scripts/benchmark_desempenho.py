@@ -0,0 +1,703 @@
+﻿#!/usr/bin/env python3
+"""
+Benchmarks de desempenho do sistema de predição.
+
+Mede etapas isoladas do pipeline para comparar alternativas de implementação
+no mesmo arquivo de entrada.
+
+Uso:
+    python scripts/benchmark_desempenho.py leitores [arquivo] [--repeticoes N]
+    python scripts/benchmark_desempenho.py regras-primeiro [arquivo] [--repeticoes N]
+    python scripts/benchmark_desempenho.py treino [--tamanhos N ...] [--modos exact hist externa]
+    python scripts/benchmark_desempenho.py concorrencia [arquivo] [--threads N] [--execucoes N]
+    python scripts/benchmark_desempenho.py escalabilidade [arquivo] [--threads 1 2 4 ...] [--threads-por-fatia N]
+    python scripts/benchmark_desempenho.py processos [arquivo] [--processos 1 2 4 ...] [--replicar N]
+    python scripts/benchmark_desempenho.py matriz [arquivo] [--linhas-bloco N] [--replicar N]
+    python scripts/benchmark_desempenho.py colunar [arquivo] [--replicar N]
+
+Exemplo:
+    python scripts/benchmark_desempenho.py leitores data/raw/alunos_ativos_atual.xlsx
+"""
+
+import gc
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import threading
+import tracemalloc
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Adicionar o diretório pai ao path para que possamos importar codigo_fonte
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from codigo_fonte.configuracao import configuracoes
+from codigo_fonte.utilitarios.leitores_planilha import (
+    detectar_formato, leitores_disponiveis, FORMATO_DESCONHECIDO
+)
+
+def cronometrar(funcao, repeticoes: int) -> list:
+    """
+    Executa uma função várias vezes e retorna os tempos em segundos.
+
+    Args:
+        funcao: Função sem argumentos a ser medida
+        repeticoes: Número de execuções
+
+    Returns:
+        Lista com a duração de cada execução
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+def benchmark_leitores(args) -> int:
+    """Compara os backends de leitura de planilha instalados."""
+    arquivo = Path(args.arquivo) if args.arquivo else configuracoes.dados.diretorio_dados_brutos / configuracoes.dados.arquivo_alunos
+
+    if not arquivo.exists():
+        print(f"❌ Arquivo não encontrado: {arquivo}")
+        return 1
+
+    formato = detectar_formato(arquivo)
+    if formato == FORMATO_DESCONHECIDO:
+        print(f"❌ Formato não reconhecido: {arquivo}")
+        return 1
+
+    leitores = leitores_disponiveis(formato)
+    print(f"📄 Arquivo: {arquivo} ({formato}, {arquivo.stat().st_size / 1024:.0f} KB)")
+    print(f"🔁 Repetições: {args.repeticoes}")
+    print()
+
+    resultados = {}
+    for leitor in leitores:
+        tempos = cronometrar(lambda: leitor.ler(arquivo, header=None), args.repeticoes)
+        resultados[leitor.nome] = tempos
+
+    if not resultados:
+        print("❌ Nenhum leitor instalado para este formato")
+        return 1
+
+    mais_lento = max(min(tempos) for tempos in resultados.values())
+    print(f"{'Leitor':<12} {'Melhor (s)':>12} {'Média (s)':>12} {'Speedup':>10}")
+    print("-" * 50)
+    for nome, tempos in sorted(resultados.items(), key=lambda item: min(item[1])):
+        melhor = min(tempos)
+        print(f"{nome:<12} {melhor:>12.4f} {statistics.mean(tempos):>12.4f} {mais_lento / melhor:>9.1f}x")
+
+    return 0
+
+def carregar_alunos_benchmark(args):
+    """Carrega o arquivo de alunos informado (ou o padrão) como no pipeline."""
+    from codigo_fonte.utilitarios import CarregadorDados
+
+    arquivo = Path(args.arquivo) if args.arquivo else configuracoes.dados.diretorio_dados_brutos / configuracoes.dados.arquivo_alunos
+    if not arquivo.exists():
+        print(f"❌ Arquivo não encontrado: {arquivo}")
+        return arquivo, None
+    return arquivo, CarregadorDados.carregar_alunos(arquivo, colunas=CarregadorDados.colunas_necessarias())
+
+def benchmark_regras_primeiro(args) -> int:
+    """Compara o pipeline padrão com o modo regras primeiro."""
+    from codigo_fonte.nucleo import SistemaPredicaoEvasao
+
+    arquivo, df = carregar_alunos_benchmark(args)
+    if df is None:
+        return 1
+
+    sistema = SistemaPredicaoEvasao()
+    sistema.inicializar()
+
+    print(f"📄 Arquivo: {arquivo} ({len(df)} alunos)")
+    print(f"🔁 Repetições: {args.repeticoes}")
+    print()
+
+    resultados = {}
+    for nome, regras_primeiro in (('padrão', False), ('regras primeiro', True)):
+        configuracoes.execucao.regras_primeiro = regras_primeiro
+        estatisticas = {}
+
+        def executar():
+            estatisticas.update(sistema.predizer_dataframe(df)[1])
+
+        resultados[nome] = (cronometrar(executar, args.repeticoes), estatisticas['ml_scored_students'])
+
+    mais_lento = max(min(tempos) for tempos, _ in resultados.values())
+    print(f"{'Modo':<16} {'Modelo (alunos)':>16} {'Melhor (s)':>12} {'Média (s)':>12} {'Speedup':>10}")
+    print("-" * 70)
+    for nome, (tempos, alunos_modelo) in resultados.items():
+        melhor = min(tempos)
+        print(f"{nome:<16} {alunos_modelo:>16} {melhor:>12.4f} {statistics.mean(tempos):>12.4f} "
+              f"{mais_lento / melhor:>9.1f}x")
+
+    return 0
+
+# Modos do benchmark de treino: (tree_method, memória externa)
+MODOS_TREINO = {
+    'exact': ('exact', False),
+    'hist': ('hist', False),
+    'externa': ('hist', True)
+}
+
+def gerar_blocos_sinteticos(linhas: int, diretorio: Path) -> list:
+    """Grava uma matriz codificada sintética (12 features, 8 classes) em blocos Parquet."""
+    import numpy as np
+    import pandas as pd
+    from codigo_fonte.modelos.memoria_externa import gravar_blocos
+
+    gerador = np.random.default_rng(configuracoes.modelo.semente_aleatoria)
+    X = pd.DataFrame(gerador.normal(size=(linhas, 12)).astype(np.float32),
+                     columns=[f'f{i}' for i in range(12)])
+    # Classe dependente de algumas features, para as árvores terem o que aprender
+    y = (np.abs(X['f0'] * 2 + X['f1'] - X['f2']).to_numpy() * 2).astype(int).clip(0, 7)
+    return gravar_blocos(X, y, diretorio)
+
+def _treinar_modo(modo: str, arquivos: list, diretorio_cache: str) -> tuple:
+    """Treina em um processo novo e retorna (segundos, pico de memória em MB ou None)."""
+    import pandas as pd
+    import xgboost as xgb
+    from codigo_fonte.modelos.memoria_externa import ler_bloco, treinar_memoria_externa
+
+    metodo, externa = MODOS_TREINO[modo]
+    configuracoes.modelo.metodo_arvore = metodo
+    parametros = {'n_estimators': 50, 'max_depth': 6, 'learning_rate': 0.1}
+
+    inicio = time.perf_counter()
+    if externa:
+        treinar_memoria_externa(arquivos, parametros, 8, Path(diretorio_cache))
+    else:
+        blocos = [ler_bloco(arquivo) for arquivo in arquivos]
+        X = pd.concat([X for X, _ in blocos], ignore_index=True)
+        y = pd.concat([pd.Series(y) for _, y in blocos], ignore_index=True)
+        del blocos
+        xgb.XGBClassifier(**parametros, tree_method=metodo, max_bin=configuracoes.modelo.max_bin).fit(X, y)
+    duracao = time.perf_counter() - inicio
+
+    try:
+        import resource
+        # ru_maxrss em KB no Linux
+        return duracao, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        return duracao, None
+
+def benchmark_treino(args) -> int:
+    """Compara tempo e pico de memória do treino exact, hist e em memória externa."""
+    contexto = multiprocessing.get_context('spawn')
+
+    print(f"🔁 Tamanhos: {args.tamanhos}; modos: {args.modos}")
+    print()
+    print(f"{'Linhas':>10} {'Modo':<10} {'Tempo (s)':>12} {'Pico RSS (MB)':>15}")
+    print("-" * 50)
+
+    for linhas in args.tamanhos:
+        with tempfile.TemporaryDirectory() as diretorio:
+            arquivos = gerar_blocos_sinteticos(linhas, Path(diretorio) / 'blocos')
+            for modo in args.modos:
+                # Um processo por medição: o pico de RSS não herda o das anteriores
+                with contexto.Pool(1) as pool:
+                    duracao, pico = pool.apply(_treinar_modo, (modo, arquivos, str(Path(diretorio) / 'cache')))
+                pico_texto = f"{pico:.0f}" if pico is not None else '-'
+                print(f"{linhas:>10} {modo:<10} {duracao:>12.2f} {pico_texto:>15}")
+
+    return 0
+
+def benchmark_concorrencia(args) -> int:
+    """
+    Executa predições simultâneas em um único sistema e confere cada resultado.
+
+    O arquivo é dividido em fatias de tamanhos diferentes (resumos de regras
+    diferentes); cada fatia é pontuada uma vez em sequência como referência e
+    depois várias vezes em paralelo no mesmo SistemaPredicaoEvasao. Qualquer
+    diferença no resumo de regras ou nas predições é reportada.
+    """
+    from codigo_fonte.nucleo import SistemaPredicaoEvasao
+
+    arquivo, df = carregar_alunos_benchmark(args)
+    if df is None:
+        return 1
+
+    sistema = SistemaPredicaoEvasao()
+    sistema.inicializar()
+
+    # Fatias de tamanhos crescentes, cada uma deslocada no arquivo
+    fatias = []
+    for indice in range(args.fatias):
+        tamanho = max(1, len(df) * (indice + 1) // (args.fatias * 2))
+        inicio = indice * len(df) // args.fatias
+        fatias.append(df.iloc[inicio:inicio + tamanho].reset_index(drop=True))
+
+    def pontuar(fatia):
+        predicoes, estatisticas = sistema.predizer_dataframe(fatia)
+        return [(p.situacao_predita, p.fonte_predicao, p.fator_principal) for p in predicoes], estatisticas
+
+    print(f"📄 Arquivo: {arquivo} ({len(df)} alunos em {len(fatias)} fatias)")
+    print(f"🧵 Threads: {args.threads}; execuções: {args.execucoes}")
+    print()
+
+    inicio = time.perf_counter()
+    referencias = [pontuar(fatia) for fatia in fatias]
+    duracao_sequencial = time.perf_counter() - inicio
+
+    trabalhos = [indice % len(fatias) for indice in range(args.execucoes)]
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        resultados = list(executor.map(lambda indice: pontuar(fatias[indice]), trabalhos))
+    duracao_paralela = time.perf_counter() - inicio
+
+    divergencias = 0
+    for indice, (predicoes, estatisticas) in zip(trabalhos, resultados):
+        predicoes_referencia, estatisticas_referencia = referencias[indice]
+        for chave in ('rules_summary', 'total_students', 'enrolled_students', 'ml_scored_students'):
+            if estatisticas[chave] != estatisticas_referencia[chave]:
+                divergencias += 1
+                print(f"❌ Fatia {indice}: {chave} = {estatisticas[chave]} (esperado {estatisticas_referencia[chave]})")
+        if predicoes != predicoes_referencia:
+            divergencias += 1
+            print(f"❌ Fatia {indice}: predições diferentes da execução sequencial")
+
+    alunos_sequencial = sum(len(fatia) for fatia in fatias)
+    alunos_paralelo = sum(len(fatias[indice]) for indice in trabalhos)
+    print(f"{'Modo':<12} {'Execuções':>10} {'Alunos':>10} {'Tempo (s)':>10} {'Alunos/s':>10}")
+    print("-" * 56)
+    print(f"{'sequencial':<12} {len(fatias):>10} {alunos_sequencial:>10} {duracao_sequencial:>10.2f} "
+          f"{alunos_sequencial / duracao_sequencial:>10.0f}")
+    print(f"{'paralelo':<12} {len(trabalhos):>10} {alunos_paralelo:>10} {duracao_paralela:>10.2f} "
+          f"{alunos_paralelo / duracao_paralela:>10.0f}")
+    print()
+
+    if divergencias:
+        print(f"❌ {divergencias} divergência(s) entre execuções simultâneas e sequenciais")
+        return 1
+    print(f"✅ Resumos de regras e predições idênticos em todas as {len(trabalhos)} execuções simultâneas")
+    return 0
+
+def benchmark_escalabilidade(args) -> int:
+    """Mede o pipeline com orçamentos de threads de inferência crescentes."""
+    from codigo_fonte.nucleo import SistemaPredicaoEvasao
+
+    arquivo, df = carregar_alunos_benchmark(args)
+    if df is None:
+        return 1
+
+    nucleos = os.cpu_count() or 1
+    orcamentos = args.threads or sorted({min(2 ** expoente, nucleos) for expoente in range(nucleos.bit_length() + 1)})
+    configuracoes.modelo.threads_por_fatia = args.threads_por_fatia
+
+    sistema = SistemaPredicaoEvasao()
+    sistema.inicializar()
+
+    print(f"📄 Arquivo: {arquivo} ({len(df)} alunos)")
+    print(f"🧮 Núcleos: {nucleos}; threads por fatia: {args.threads_por_fatia}; repetições: {args.repeticoes}")
+    print()
+
+    resultados = {}
+    for threads in orcamentos:
+        configuracoes.modelo.threads_inferencia = threads
+        resultados[threads] = cronometrar(lambda: sistema.predizer_dataframe(df), args.repeticoes)
+
+    base = min(resultados[orcamentos[0]])
+    print(f"{'Threads':>8} {'Melhor (s)':>12} {'Média (s)':>12} {'Alunos/s':>10} {'Speedup':>10}")
+    print("-" * 56)
+    for threads, tempos in resultados.items():
+        melhor = min(tempos)
+        print(f"{threads:>8} {melhor:>12.4f} {statistics.mean(tempos):>12.4f} {len(df) / melhor:>10.0f} "
+              f"{base / melhor:>9.1f}x")
+
+    return 0
+
+def memoria_pss_mb(pids: list):
+    """Soma do PSS (memória compartilhada dividida entre quem a usa) dos processos, em MB; None fora do Linux."""
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as arquivo:
+                total += next(int(linha.split()[1]) for linha in arquivo if linha.startswith('Pss:'))
+        except (OSError, StopIteration):
+            return None
+    return total / 1024
+
+def medir_pico_memoria(funcao) -> tuple:
+    """Executa a função amostrando o PSS do processo e dos filhos; retorna (segundos, pico em MB)."""
+    pico = [memoria_pss_mb([os.getpid()])]
+    fim = threading.Event()
+
+    def amostrar():
+        while not fim.wait(0.05):
+            atual = memoria_pss_mb([os.getpid()] + [filho.pid for filho in multiprocessing.active_children()])
+            if atual is not None and (pico[0] is None or atual > pico[0]):
+                pico[0] = atual
+
+    amostrador = threading.Thread(target=amostrar, daemon=True)
+    amostrador.start()
+    inicio = time.perf_counter()
+    funcao()
+    duracao = time.perf_counter() - inicio
+    fim.set()
+    amostrador.join()
+    return duracao, pico[0]
+
+def benchmark_processos(args) -> int:
+    """Compara o pipeline em um processo com o executor de processos em memória compartilhada."""
+    import pandas as pd
+    from codigo_fonte.nucleo import SistemaPredicaoEvasao
+
+    arquivo, df = carregar_alunos_benchmark(args)
+    if df is None:
+        return 1
+    if args.replicar > 1:
+        df = pd.concat([df] * args.replicar, ignore_index=True)
+
+    sistema = SistemaPredicaoEvasao()
+    sistema.inicializar()
+    # Mesmo pipeline em todas as medições: sem a deduplicação, que esconderia as cópias replicadas
+    configuracoes.execucao.deduplicar_vetores = False
+
+    print(f"📄 Arquivo: {arquivo} ({len(df)} alunos)")
+    print(f"🚀 Método de início: {configuracoes.execucao.metodo_inicio_processos}")
+    print()
+
+    resultados = {0: medir_pico_memoria(lambda: sistema.predizer_dataframe(df))}
+    for processos in args.processos:
+        sistema.ativar_processos(processos)
+        resultados[processos] = medir_pico_memoria(lambda: sistema.predizer_dataframe(df))
+        sistema.executor_processos.encerrar()
+        sistema.executor_processos = None
+
+    base_tempo, base_memoria = resultados[0]
+    print(f"{'Processos':<12} {'Tempo (s)':>10} {'Speedup':>9} {'PSS pico (MB)':>14} {'vs. no processo':>15}")
+    print("-" * 64)
+    for processos, (duracao, memoria) in resultados.items():
+        nome = 'no processo' if processos == 0 else str(processos)
+        memoria_texto = f"{memoria:>14.0f}" if memoria is not None else f"{'-':>14}"
+        relacao = f"{memoria / base_memoria:>14.2f}x" if memoria and base_memoria else f"{'-':>15}"
+        print(f"{nome:<12} {duracao:>10.2f} {base_tempo / duracao:>8.1f}x {memoria_texto} {relacao}")
+
+    return 0
+
+# Tipos da matriz antes da saída float32: códigos inteiros e 'Pend. Financ.' em float64
+TIPOS_MATRIZ_LEGADA = {'Pend. Financ.': 'float64'}
+
+def benchmark_matriz(args) -> int:
+    """
+    Mede cópias e pico de memória do pré-processamento até o SHAP, bloco a bloco.
+
+    Compara a matriz float32 de preprocessar_dados() com a entrega antiga
+    (DataFrame int64/float64, convertido pelo XGBoost e pelo SHAP). "Cópias" é o pico do tracemalloc (alocações do
+    NumPy/pandas) dividido pelo tamanho da matriz float32 do bloco.
+    """
+    import pandas as pd
+    from codigo_fonte.modelos import PreditorEvasaoEstudantil
+
+    arquivo, df = carregar_alunos_benchmark(args)
+    if df is None:
+        return 1
+    if args.replicar > 1:
+        df = pd.concat([df] * args.replicar, ignore_index=True)
+
+    preditor = PreditorEvasaoEstudantil()
+    preditor.carregar_modelo()
+    blocos = [df.iloc[inicio:inicio + args.linhas_bloco] for inicio in range(0, len(df), args.linhas_bloco)]
+    tamanho_matriz = args.linhas_bloco * len(preditor.nomes_features()) * 4
+
+    def pontuar(X):
+        preditor.modelo.predict_proba(X)
+        preditor.explicador.shap_values(X)
+
+    def float32():
+        for bloco in blocos:
+            pontuar(preditor.preprocessar_dados(bloco))
+
+    def legada():
+        for bloco in blocos:
+            X = preditor.preprocessar_dados(bloco)
+            pontuar(X.astype({coluna: TIPOS_MATRIZ_LEGADA.get(coluna, 'int64') for coluna in X.columns}))
+
+    print(f"📄 Arquivo: {arquivo} ({len(df)} alunos em {len(blocos)} bloco(s) de até {args.linhas_bloco})")
+    print(f"🧮 Matriz float32 por bloco: {tamanho_matriz / 2 ** 20:.1f} MB")
+    print()
+
+    print(f"{'Modo':<22} {'Tempo (s)':>10} {'Pico NumPy (MB)':>16} {'Cópias':>8} {'PSS pico (MB)':>14}")
+    print("-" * 74)
+    for nome, funcao in (('float32', float32), ('int64/float64 (antiga)', legada)):
+        duracao, pss = medir_pico_memoria(funcao)
+        tracemalloc.start()
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        pss_texto = f"{pss:>14.0f}" if pss is not None else f"{'-':>14}"
+        print(f"{nome:<22} {duracao:>10.2f} {pico / 2 ** 20:>16.1f} {pico / tamanho_matriz:>8.1f} {pss_texto}")
+
+    return 0
+
+def benchmark_colunar(args) -> int:
+    """
+    Compara a saída em objetos (PredicaoAluno + csv) com o caminho colunar (Arrow).
+
+    Cada modo pontua os mesmos alunos e grava o CSV de saída. "Blocos/aluno" é o
+    aumento de blocos alocados pelo Python (sys.getallocatedblocks) enquanto o
+    resultado está em memória, dividido pelo número de alunos: aproxima os
+    objetos Python criados por aluno.
+    """
+    import pandas as pd
+    import pyarrow as pa
+    from codigo_fonte.utilitarios import CarregadorDados, salvar_tabela
+    from codigo_fonte.nucleo import SistemaPredicaoEvasao
+    from principal import salvar_predicoes_em_csv
+
+    arquivo, df = carregar_alunos_benchmark(args)
+    if df is None:
+        return 1
+    tabela = CarregadorDados.carregar_alunos_tabela(arquivo, colunas=CarregadorDados.colunas_necessarias())
+    if args.replicar > 1:
+        df = pd.concat([df] * args.replicar, ignore_index=True)
+        tabela = pa.concat_tables([tabela] * args.replicar)
+
+    sistema = SistemaPredicaoEvasao()
+    sistema.inicializar()
+
+    print(f"📄 Arquivo: {arquivo} ({len(df)} alunos)")
+    print()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        saida = Path(diretorio) / "analise_completa.csv"
+
+        def objetos():
+            predicoes, _ = sistema.predizer_dataframe(df)
+            salvar_predicoes_em_csv(predicoes, saida)
+            return predicoes
+
+        def colunar():
+            resultado, _ = sistema.predizer_tabela(tabela)
+            salvar_tabela(resultado, saida)
+            return resultado
+
+        print(f"{'Modo':<22} {'Tempo (s)':>10} {'Speedup':>9} {'Pico alocações (MB)':>20} {'Blocos/aluno':>13}")
+        print("-" * 78)
+        base = None
+        for nome, funcao in (('objetos (PredicaoAluno)', objetos), ('colunar (Arrow)', colunar)):
+            duracao = min(cronometrar(funcao, args.repeticoes))
+            base = base or duracao
+
+            gc.collect()
+            blocos_antes = sys.getallocatedblocks()
+            tracemalloc.start()
+            resultado = funcao()
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            gc.collect()
+            blocos_aluno = (sys.getallocatedblocks() - blocos_antes) / len(df)
+            del resultado
+
+            print(f"{nome:<22} {duracao:>10.2f} {base / duracao:>8.1f}x {pico / 2 ** 20:>20.1f} {blocos_aluno:>13.1f}")
+
+    return 0
+
+def main():
+    """Função principal."""
+    parser = argparse.ArgumentParser(
+        description="Benchmarks de desempenho do sistema de predição de evasão"
+    )
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    parser_leitores = subparsers.add_parser(
+        'leitores',
+        help='Compara os backends de leitura de planilha no mesmo arquivo'
+    )
+    parser_leitores.add_argument(
+        'arquivo',
+        nargs='?',
+        default=None,
+        help='Planilha a ser lida (padrão: arquivo de dados brutos configurado)'
+    )
+    parser_leitores.add_argument(
+        '--repeticoes', '-r',
+        type=int,
+        default=3,
+        help='Número de leituras por backend (padrão: 3)'
+    )
+    parser_leitores.set_defaults(funcao=benchmark_leitores)
+
+    parser_regras = subparsers.add_parser(
+        'regras-primeiro',
+        help='Compara o pipeline padrão com o modo regras primeiro (ML/SHAP só para alunos sem regra)'
+    )
+    parser_regras.add_argument(
+        'arquivo',
+        nargs='?',
+        default=None,
+        help='Arquivo de alunos (padrão: arquivo de dados brutos configurado)'
+    )
+    parser_regras.add_argument(
+        '--repeticoes', '-r',
+        type=int,
+        default=3,
+        help='Número de execuções por modo (padrão: 3)'
+    )
+    parser_regras.set_defaults(funcao=benchmark_regras_primeiro)
+
+    parser_treino = subparsers.add_parser(
+        'treino',
+        help='Compara tempo e memória do treino exact, hist e em memória externa (dados sintéticos)'
+    )
+    parser_treino.add_argument(
+        '--tamanhos',
+        type=int,
+        nargs='+',
+        default=[100000, 500000],
+        help='Quantidades de linhas a gerar (padrão: 100000 500000)'
+    )
+    parser_treino.add_argument(
+        '--modos',
+        nargs='+',
+        choices=list(MODOS_TREINO),
+        default=list(MODOS_TREINO),
+        help='Modos comparados (padrão: todos)'
+    )
+    parser_treino.set_defaults(funcao=benchmark_treino)
+
+    parser_concorrencia = subparsers.add_parser(
+        'concorrencia',
+        help='Predições simultâneas em um único sistema, conferindo cada resumo contra a execução sequencial'
+    )
+    parser_concorrencia.add_argument(
+        'arquivo',
+        nargs='?',
+        default=None,
+        help='Arquivo de alunos (padrão: arquivo de dados brutos configurado)'
+    )
+    parser_concorrencia.add_argument(
+        '--threads', '-t',
+        type=int,
+        default=8,
+        help='Threads do pool (padrão: 8)'
+    )
+    parser_concorrencia.add_argument(
+        '--execucoes', '-n',
+        type=int,
+        default=32,
+        help='Predições submetidas ao pool (padrão: 32)'
+    )
+    parser_concorrencia.add_argument(
+        '--fatias',
+        type=int,
+        default=4,
+        help='Fatias distintas do arquivo, pontuadas em rodízio (padrão: 4)'
+    )
+    parser_concorrencia.set_defaults(funcao=benchmark_concorrencia)
+
+    parser_escalabilidade = subparsers.add_parser(
+        'escalabilidade',
+        help='Mede o pipeline com 1 a N threads de inferência (fatias paralelas)'
+    )
+    parser_escalabilidade.add_argument(
+        'arquivo',
+        nargs='?',
+        default=None,
+        help='Arquivo de alunos (padrão: arquivo de dados brutos configurado)'
+    )
+    parser_escalabilidade.add_argument(
+        '--threads', '-t',
+        type=int,
+        nargs='+',
+        default=None,
+        help='Orçamentos de threads medidos (padrão: 1, 2, 4, ... até o número de núcleos)'
+    )
+    parser_escalabilidade.add_argument(
+        '--threads-por-fatia',
+        type=int,
+        default=1,
+        help='Threads do XGBoost em cada fatia (padrão: 1)'
+    )
+    parser_escalabilidade.add_argument(
+        '--repeticoes', '-r',
+        type=int,
+        default=3,
+        help='Execuções por orçamento (padrão: 3)'
+    )
+    parser_escalabilidade.set_defaults(funcao=benchmark_escalabilidade)
+
+    parser_processos = subparsers.add_parser(
+        'processos',
+        help='Tempo e memória (PSS) do executor de processos com memória compartilhada'
+    )
+    parser_processos.add_argument(
+        'arquivo',
+        nargs='?',
+        default=None,
+        help='Arquivo de alunos (padrão: arquivo de dados brutos configurado)'
+    )
+    parser_processos.add_argument(
+        '--processos', '-p',
+        type=int,
+        nargs='+',
+        default=[1, 2, 4],
+        help='Quantidades de processos medidas (padrão: 1 2 4)'
+    )
+    parser_processos.add_argument(
+        '--replicar',
+        type=int,
+        default=1,
+        help='Repetir as linhas do arquivo N vezes para simular lotes maiores (padrão: 1)'
+    )
+    parser_processos.set_defaults(funcao=benchmark_processos)
+
+    parser_matriz = subparsers.add_parser(
+        'matriz',
+        help='Cópias e pico de memória da matriz de features (float32 x int64/float64)'
+    )
+    parser_matriz.add_argument(
+        'arquivo',
+        nargs='?',
+        default=None,
+        help='Arquivo de alunos (padrão: arquivo de dados brutos configurado)'
+    )
+    parser_matriz.add_argument(
+        '--linhas-bloco',
+        type=int,
+        default=50000,
+        help='Alunos por bloco (padrão: 50000)'
+    )
+    parser_matriz.add_argument(
+        '--replicar',
+        type=int,
+        default=1,
+        help='Repetir as linhas do arquivo N vezes para simular arquivos maiores (padrão: 1)'
+    )
+    parser_matriz.set_defaults(funcao=benchmark_matriz)
+
+    parser_colunar = subparsers.add_parser(
+        'colunar',
+        help='Saída em objetos por aluno x caminho colunar (Arrow): tempo, pico de memória e objetos por aluno'
+    )
+    parser_colunar.add_argument(
+        'arquivo',
+        nargs='?',
+        default=None,
+        help='Arquivo de alunos (padrão: arquivo de dados brutos configurado)'
+    )
+    parser_colunar.add_argument(
+        '--replicar',
+        type=int,
+        default=1,
+        help='Repetir as linhas do arquivo N vezes para simular arquivos maiores (padrão: 1)'
+    )
+    parser_colunar.add_argument(
+        '--repeticoes', '-r',
+        type=int,
+        default=3,
+        help='Execuções por modo; vale a melhor (padrão: 3)'
+    )
+    parser_colunar.set_defaults(funcao=benchmark_colunar)
+
+    args = parser.parse_args()
+    return args.funcao(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,222 @@
+﻿#!/usr/bin/env python3
+"""
+Compactação do modelo em produção.
+
+Gera modelos menores a partir do modelo atual (truncamento de rodadas, poda
+de divisões de baixo ganho e destilação em um booster mais raso), mede a
+perda de acurácia no conjunto de teste contra o ganho de velocidade da
+predição e do SHAP, e salva o mais rápido dentro da tolerância como
+data/models/modelo_xgboost_compacto.pkl (usado com principal.py
+--modelo-compacto ou configuracoes.dados.usar_modelo_compacto).
+
+Uso:
+    python scripts/compactar_modelo.py [arquivo_dados] [--metodos truncar podar destilar] [--tolerancia 0.01]
+
+Exemplo:
+    python scripts/compactar_modelo.py data/raw/Planilhabasedados.xlsx --profundidade 3 --rodadas-aluno 60
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import joblib
+import numpy as np
+import shap
+
+# Adicionar o diretório pai ao path para que possamos importar codigo_fonte
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from codigo_fonte.utilitarios import obter_registrador
+from codigo_fonte.configuracao import configuracoes
+from codigo_fonte.modelos import truncar_modelo, podar_modelo, destilar_modelo
+from codigo_fonte.modelos.compactacao import resumo_modelo, ganhos_divisoes
+from train_model import ModelTrainer
+
+registrador = obter_registrador(__name__)
+
+METODOS = ('truncar', 'podar', 'destilar')
+
+# Frações das rodadas mantidas no truncamento
+FRACOES_TRUNCAMENTO = (0.1, 0.25, 0.5, 0.75)
+
+# Quantis do ganho das divisões usados como limite de poda
+QUANTIS_PODA = (0.25, 0.5, 0.75)
+
+def medir_segundos(funcao, repeticoes: int) -> float:
+    """Melhor tempo de várias execuções."""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+def gerar_candidatos(args, professor, X_treino, y_treino) -> dict:
+    """Modelos compactos de cada método pedido, por nome."""
+    candidatos = {}
+    rodadas = professor.get_booster().num_boosted_rounds()
+
+    if 'truncar' in args.metodos:
+        for fracao in FRACOES_TRUNCAMENTO:
+            mantidas = max(1, round(rodadas * fracao))
+            if mantidas < rodadas:
+                candidatos[f'truncar_{mantidas}'] = truncar_modelo(professor, mantidas)
+
+    if 'podar' in args.metodos:
+        ganhos = ganhos_divisoes(professor)
+        for quantil in QUANTIS_PODA:
+            limite = float(np.quantile(ganhos, quantil))
+            candidatos[f'podar_q{int(quantil * 100)}'] = podar_modelo(
+                professor, X_treino, y_treino, limite, args.profundidade_poda
+            )
+
+    if 'destilar' in args.metodos:
+        rodadas_aluno = args.rodadas_aluno or max(1, rodadas // 2)
+        candidatos[f'destilar_p{args.profundidade}_{rodadas_aluno}'] = destilar_modelo(
+            professor, X_treino, rodadas_aluno, args.profundidade,
+            {'learning_rate': configuracoes.modelo.taxa_aprendizado}
+        )
+
+    return candidatos
+
+def avaliar(trainer, modelo, X_teste, y_teste, predicoes_professor, amostra_shap, repeticoes: int) -> dict:
+    """Acurácia, concordância com o professor, tamanho e tempos de predição/SHAP."""
+    resultado = trainer.evaluate_holdout(modelo, X_teste, y_teste)
+    resultado['concordancia_professor'] = float(np.mean(modelo.predict(X_teste) == predicoes_professor))
+    resultado.update(resumo_modelo(modelo))
+    resultado['segundos_predicao'] = medir_segundos(lambda: modelo.predict_proba(X_teste), repeticoes)
+
+    explicador = shap.TreeExplainer(modelo)
+    resultado['segundos_shap'] = medir_segundos(lambda: explicador.shap_values(amostra_shap), repeticoes)
+    return resultado
+
+def main():
+    """Função principal."""
+    parser = argparse.ArgumentParser(
+        description="Compactação do modelo XGBoost (truncamento, poda e destilação)"
+    )
+    parser.add_argument(
+        'arquivo_dados',
+        nargs='?',
+        default=None,
+        help='Planilha rotulada para poda/destilação e avaliação (padrão: dados de treinamento configurados)'
+    )
+    parser.add_argument(
+        '--metodos',
+        nargs='+',
+        choices=METODOS,
+        default=list(METODOS),
+        help='Métodos avaliados (padrão: todos)'
+    )
+    parser.add_argument(
+        '--tolerancia',
+        type=float,
+        default=0.01,
+        help='Perda máxima de acurácia e de acurácia binária aceita (padrão: 0.01)'
+    )
+    parser.add_argument(
+        '--profundidade',
+        type=int,
+        default=3,
+        help='Profundidade das árvores do modelo destilado (padrão: 3)'
+    )
+    parser.add_argument(
+        '--rodadas-aluno',
+        type=int,
+        default=None,
+        help='Rodadas do modelo destilado (padrão: metade das rodadas do modelo atual)'
+    )
+    parser.add_argument(
+        '--profundidade-poda',
+        type=int,
+        default=None,
+        help='Profundidade máxima após a poda (padrão: manter)'
+    )
+    parser.add_argument(
+        '--amostra-shap',
+        type=int,
+        default=200,
+        help='Linhas do teste usadas para medir o SHAP (padrão: 200)'
+    )
+    parser.add_argument(
+        '--repeticoes', '-r',
+        type=int,
+        default=3,
+        help='Execuções por medição de tempo (padrão: 3)'
+    )
+    parser.add_argument(
+        '--sem-salvar',
+        action='store_true',
+        help='Só avaliar, sem gravar o modelo compacto'
+    )
+    args = parser.parse_args()
+
+    arquivo = Path(args.arquivo_dados) if args.arquivo_dados else configuracoes.obter_caminho_dados_treinamento()
+    if not arquivo.exists():
+        print(f"❌ Arquivo não encontrado: {arquivo}")
+        return 1
+
+    trainer = ModelTrainer()
+    feature_names = trainer.load_production_model()
+    professor = trainer.model
+    X, y = trainer.preprocess_with_artifacts(arquivo, feature_names)
+    X_treino, X_teste, y_treino, y_teste = trainer.split_holdout(X, y)
+    amostra_shap = X_teste.iloc[:args.amostra_shap]
+    predicoes_professor = professor.predict(X_teste)
+
+    modelos = {'original': professor, **gerar_candidatos(args, professor, X_treino, y_treino)}
+    resultados = {
+        nome: avaliar(trainer, modelo, X_teste, y_teste, predicoes_professor, amostra_shap, args.repeticoes)
+        for nome, modelo in modelos.items()
+    }
+
+    original = resultados['original']
+    for resultado in resultados.values():
+        resultado['perda_acuracia'] = original['acuracia'] - resultado['acuracia']
+        resultado['perda_acuracia_binaria'] = original['acuracia_binaria'] - resultado['acuracia_binaria']
+        resultado['speedup_predicao'] = original['segundos_predicao'] / resultado['segundos_predicao']
+        resultado['speedup_shap'] = original['segundos_shap'] / resultado['segundos_shap']
+
+    aceitos = [
+        nome for nome, resultado in resultados.items()
+        if nome != 'original' and resultado['perda_acuracia'] <= args.tolerancia
+        and resultado['perda_acuracia_binaria'] <= args.tolerancia
+    ]
+    escolhido = min(aceitos, key=lambda nome: resultados[nome]['segundos_predicao'], default=None)
+
+    print(f"📄 Dados: {arquivo} (teste: {len(y_teste)} linhas); tolerância: {args.tolerancia}")
+    print()
+    print(f"{'Modelo':<18} {'Árvores':>8} {'Divisões':>9} {'Acurácia':>9} {'Binária':>8} "
+          f"{'Concord.':>9} {'Pred.':>7} {'SHAP':>7}")
+    print("-" * 82)
+    for nome, resultado in resultados.items():
+        marcador = ' ✓' if nome == escolhido else ''
+        print(f"{nome:<18} {resultado['arvores']:>8} {resultado['divisoes']:>9} {resultado['acuracia']:>9.4f} "
+              f"{resultado['acuracia_binaria']:>8.4f} {resultado['concordancia_professor']:>9.4f} "
+              f"{resultado['speedup_predicao']:>6.1f}x {resultado['speedup_shap']:>6.1f}x{marcador}")
+    print()
+
+    configuracoes.dados.diretorio_saida.mkdir(parents=True, exist_ok=True)
+    caminho_relatorio = configuracoes.dados.diretorio_saida / "compactacao_modelo.json"
+    with open(caminho_relatorio, 'w', encoding='utf-8') as f:
+        json.dump({'arquivo_dados': str(arquivo), 'linhas_teste': int(len(y_teste)), 'tolerancia': args.tolerancia,
+                   'escolhido': escolhido, 'modelos': resultados}, f, ensure_ascii=False, indent=2)
+    print(f"📝 Relatório: {caminho_relatorio}")
+
+    if escolhido is None:
+        print("⚠️ Nenhum modelo compacto dentro da tolerância; nada foi salvo")
+        return 0
+
+    if not args.sem_salvar:
+        caminho_modelo = configuracoes.obter_caminho_modelo(compacto=True)
+        joblib.dump(modelos[escolhido], caminho_modelo)
+        registrador.info(f"Modelo compacto ({escolhido}) salvo em: {caminho_modelo}")
+        print(f"📁 Modelo compacto ({escolhido}) salvo em: {caminho_modelo}")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,219 @@
+﻿#!/usr/bin/env python3
+"""
+Pontuação em lote distribuída por uma fila de trabalho em arquivos.
+
+Um diretório compartilhado (disco local, NFS, SMB) guarda a fila: o
+coordenador divide as entradas em unidades, trabalhadores em quantas
+máquinas houver reivindicam e pontuam as unidades e, ao final, as saídas
+parciais são mescladas em um único arquivo (ver codigo_fonte/nucleo/fila_trabalho.py).
+
+Uso:
+    python scripts/fila_pontuacao.py coordenar DIR arquivo [arquivo ...] [--linhas-por-unidade N] [--copiar-entradas]
+    python scripts/fila_pontuacao.py trabalhar DIR [--sem-aguardar] [--max-unidades N] [--threads N]
+    python scripts/fila_pontuacao.py estado DIR
+    python scripts/fila_pontuacao.py mesclar DIR [--saida arquivo.parquet|.csv|.feather] [--parcial]
+    python scripts/fila_pontuacao.py local DIR arquivo [arquivo ...] --trabalhadores N
+
+Exemplo (uma máquina, 4 trabalhadores):
+    python scripts/fila_pontuacao.py local /tmp/fila data/raw/alunos_ativos_atual.xlsx --trabalhadores 4
+"""
+
+import os
+import sys
+import json
+import signal
+import argparse
+import subprocess
+from pathlib import Path
+from datetime import datetime
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from codigo_fonte.utilitarios import obter_registrador
+from codigo_fonte.configuracao import configuracoes
+from codigo_fonte.modelos import PreditorEvasaoEstudantil, calcular_versao_modelo
+from codigo_fonte.nucleo import FilaTrabalho, TrabalhadorFila
+
+registrador = obter_registrador(__name__)
+
+def coordenar(args) -> int:
+    """Cria a fila a partir dos arquivos de entrada."""
+    versao = None if args.sem_verificar_modelo else calcular_versao_modelo(PreditorEvasaoEstudantil.caminhos_padrao())
+    fila = FilaTrabalho.criar(Path(args.diretorio), [Path(arquivo) for arquivo in args.arquivos],
+                              args.linhas_por_unidade, args.copiar_entradas, versao)
+    estado = fila.estado()
+    print(f"📋 Fila criada em {args.diretorio}: {estado['total_unidades']} unidade(s), "
+          f"{estado['total_linhas']} alunos")
+    if versao:
+        print(f"🔒 Versão do modelo exigida: {versao}")
+    return 0
+
+def trabalhar(args) -> int:
+    """Processa unidades da fila até ela acabar (ou até SIGINT/SIGTERM)."""
+    if args.threads:
+        configuracoes.modelo.threads_inferencia = args.threads
+    trabalhador = TrabalhadorFila(FilaTrabalho(Path(args.diretorio)), nome=args.nome)
+
+    def ao_sinal(numero, _quadro):
+        registrador.warning(f"Sinal {numero} recebido: devolvendo a unidade atual à fila")
+        trabalhador.parar(f"Sinal {numero}")
+    signal.signal(signal.SIGINT, ao_sinal)
+    signal.signal(signal.SIGTERM, ao_sinal)
+
+    concluidas = trabalhador.executar(aguardar=not args.sem_aguardar, max_unidades=args.max_unidades)
+    print(f"✅ {trabalhador.nome}: {concluidas} unidade(s) concluída(s)")
+    return 0
+
+def mostrar_estado(args) -> int:
+    """Mostra unidades por situação e os arrendamentos ativos."""
+    estado = FilaTrabalho(Path(args.diretorio)).estado()
+    print(json.dumps(estado, ensure_ascii=False, indent=2))
+    return 0
+
+def caminho_saida_padrao() -> Path:
+    return configuracoes.dados.diretorio_saida / f"predicoes_fila_{datetime.now().strftime('%Y%m%d_%H%M%S')}.parquet"
+
+def mesclar(args) -> int:
+    """Junta as saídas parciais em um único arquivo."""
+    saida = Path(args.saida) if args.saida else caminho_saida_padrao()
+    try:
+        resumo = FilaTrabalho(Path(args.diretorio)).mesclar(saida, parcial=args.parcial)
+    except RuntimeError as erro:
+        print(f"❌ {erro}")
+        return 1
+    imprimir_resumo(resumo)
+    return 0
+
+def imprimir_resumo(resumo: dict) -> None:
+    estatisticas = resumo['estatisticas']
+    print(f"💾 {resumo['linhas']} alunos de {resumo['unidades']} unidade(s) em {resumo['arquivo']}")
+    print(f"   Matriculados: {estatisticas['enrolled_students']}  "
+          f"Risco de evasão: {estatisticas['dropout_risk_students']}  "
+          f"Pontuados pelo modelo: {estatisticas['ml_scored_students']}")
+    print(f"   Tempo somado dos trabalhadores: {resumo['segundos_trabalhadores']:.1f}s")
+    if resumo['faltantes']:
+        print(f"⚠️  {len(resumo['faltantes'])} unidade(s) não concluída(s) ficaram de fora")
+
+def local(args) -> int:
+    """Cria a fila, roda N trabalhadores nesta máquina e mescla o resultado."""
+    args.sem_verificar_modelo = False
+    coordenar(args)
+
+    # Orçamento de threads dividido entre os trabalhadores
+    threads = max(1, (configuracoes.modelo.threads_inferencia or os.cpu_count() or 1) // args.trabalhadores)
+    comando = [sys.executable, str(Path(__file__).resolve()), 'trabalhar', args.diretorio,
+               '--threads', str(threads)]
+    processos = [subprocess.Popen(comando + ['--nome', f"local-{indice}"]) for indice in range(args.trabalhadores)]
+    print(f"👷 {args.trabalhadores} trabalhador(es) com {threads} thread(s) cada")
+    try:
+        codigos = [processo.wait() for processo in processos]
+    except KeyboardInterrupt:
+        for processo in processos:
+            processo.terminate()
+        for processo in processos:
+            processo.wait()
+        return 130
+    if any(codigos):
+        print(f"⚠️  Trabalhador(es) terminaram com erro: {codigos}")
+
+    args.parcial = False
+    return mesclar(args)
+
+def main():
+    """Função principal."""
+    parser = argparse.ArgumentParser(
+        description="Pontuação em lote distribuída por uma fila de trabalho em arquivos"
+    )
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    def argumentos_coordenador(subparser):
+        subparser.add_argument('diretorio', help='Diretório compartilhado da fila')
+        subparser.add_argument('arquivos', nargs='+', help='Arquivos de alunos')
+        subparser.add_argument(
+            '--linhas-por-unidade',
+            type=int,
+            default=None,
+            help=f'Alunos por unidade de trabalho (padrão: {configuracoes.execucao.linhas_por_unidade})'
+        )
+        subparser.add_argument(
+            '--copiar-entradas',
+            action='store_true',
+            help='Copiar as entradas para a fila (trabalhadores sem acesso aos caminhos originais)'
+        )
+
+    parser_coordenar = subparsers.add_parser('coordenar', help='Divide as entradas em unidades e cria a fila')
+    argumentos_coordenador(parser_coordenar)
+    parser_coordenar.add_argument(
+        '--sem-verificar-modelo',
+        action='store_true',
+        help='Aceitar trabalhadores com qualquer versão do modelo'
+    )
+    parser_coordenar.set_defaults(funcao=coordenar)
+
+    parser_trabalhar = subparsers.add_parser('trabalhar', help='Reivindica e pontua unidades até a fila acabar')
+    parser_trabalhar.add_argument('diretorio', help='Diretório compartilhado da fila')
+    parser_trabalhar.add_argument(
+        '--sem-aguardar',
+        action='store_true',
+        help='Encerrar quando não houver unidade livre, sem esperar as que estão com outros trabalhadores'
+    )
+    parser_trabalhar.add_argument(
+        '--max-unidades',
+        type=int,
+        default=None,
+        help='Encerrar após concluir N unidades'
+    )
+    parser_trabalhar.add_argument(
+        '--nome',
+        default=None,
+        help='Identificação do trabalhador (padrão: máquina-pid)'
+    )
+    parser_trabalhar.add_argument(
+        '--threads', '-t',
+        type=int,
+        default=None,
+        help='Threads de inferência deste trabalhador (padrão: configuracoes.modelo.threads_inferencia)'
+    )
+    parser_trabalhar.set_defaults(funcao=trabalhar)
+
+    parser_estado = subparsers.add_parser('estado', help='Unidades por situação e arrendamentos ativos')
+    parser_estado.add_argument('diretorio', help='Diretório compartilhado da fila')
+    parser_estado.set_defaults(funcao=mostrar_estado)
+
+    parser_mesclar = subparsers.add_parser('mesclar', help='Junta as saídas parciais em um único arquivo')
+    parser_mesclar.add_argument('diretorio', help='Diretório compartilhado da fila')
+    parser_mesclar.add_argument(
+        '--saida', '-o',
+        default=None,
+        help='Arquivo .parquet, .csv ou .feather (padrão: output/predicoes_fila_<data>.parquet)'
+    )
+    parser_mesclar.add_argument(
+        '--parcial',
+        action='store_true',
+        help='Mesclar só as unidades concluídas, mesmo que faltem outras'
+    )
+    parser_mesclar.set_defaults(funcao=mesclar)
+
+    parser_local = subparsers.add_parser(
+        'local',
+        help='Cria a fila, roda N trabalhadores nesta máquina e mescla o resultado'
+    )
+    argumentos_coordenador(parser_local)
+    parser_local.add_argument(
+        '--trabalhadores', '-n',
+        type=int,
+        default=2,
+        help='Processos trabalhadores (padrão: 2)'
+    )
+    parser_local.add_argument(
+        '--saida', '-o',
+        default=None,
+        help='Arquivo .parquet, .csv ou .feather (padrão: output/predicoes_fila_<data>.parquet)'
+    )
+    parser_local.set_defaults(funcao=local)
+
+    args = parser.parse_args()
+    return args.funcao(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
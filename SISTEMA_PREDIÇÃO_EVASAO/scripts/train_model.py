@@ -6,14 +6,23 @@ Este script treina um novo modelo usando os dados históricos
 e salva o modelo treinado para uso no sistema de predição.
 
 Uso:
-    python scripts/train_model.py [arquivo_dados]
+    python scripts/train_model.py [arquivo_dados] [--buscar] [--memoria-externa] [--continuar]
 
 Exemplo:
     python scripts/train_model.py data/raw/Planilhabasedados.xlsx
+    python scripts/train_model.py --buscar --estrategia halving --candidatos 30
+    python scripts/train_model.py data/raw/historico_parquet/ --memoria-externa
+    python scripts/train_model.py data/raw/novos_rotulados.xlsx --continuar --historico data/raw/Planilhabasedados.xlsx
 """
 
 import sys
+import json
+import time
+import shutil
+import hashlib
+import tempfile
 import argparse
+from collections import Counter
 from pathlib import Path
 import pandas as pd
 import numpy as np
@@ -21,7 +30,7 @@ import joblib
 import matplotlib.pyplot as plt
 import seaborn as sns
 from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
+from sklearn.metrics import classification_report, confusion_matrix, accuracy_score, log_loss
 from sklearn.preprocessing import LabelEncoder
 from sklearn.impute import SimpleImputer
 import xgboost as xgb
@@ -31,9 +40,17 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from codigo_fonte.utilitarios import obter_registrador, CarregadorDados
 from codigo_fonte.configuracao import configuracoes
+from codigo_fonte.modelos import BuscaHiperparametros, estender_codificador, continuar_treino
+from codigo_fonte.modelos.memoria_externa import (
+    gravar_blocos, treinar_memoria_externa, prever_blocos, parametros_arvore, memoria_externa_disponivel
+)
 
 registrador = obter_registrador(__name__)
 
+# Classes removidas do treino (conforme análise anterior)
+PROBLEMATIC_CLASSES = ['Cancelamento Interno', 'Transferência Interna']
+TARGET_COLUMN = 'Situação'
+
 class ModelTrainer:
     """Classe para treinamento do modelo XGBoost."""
     
@@ -44,29 +61,49 @@ class ModelTrainer:
         self.imputers = {}
         self.class_mapping = {}
         
-    def load_and_preprocess_data(self, data_file: Path) -> tuple:
+    def _cache_path(self, data_file: Path) -> Path:
+        """Arquivo da matriz pré-processada, invalidado quando a planilha ou as features mudam."""
+        stat = data_file.stat()
+        key = f"{data_file.resolve()}|{stat.st_mtime_ns}|{stat.st_size}|{configuracoes.dados.caracteristicas_esperadas}"
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+        return configuracoes.dados.diretorio_dados_processados / f"matriz_treino_{digest}.joblib"
+    
+    def load_and_preprocess_data(self, data_file: Path, use_cache: bool = True) -> tuple:
         """
         Carrega e pré-processa os dados de treinamento.
         
+        A matriz codificada (com encoders, imputers e mapeamento de classes) fica
+        em data/processed; as próximas execuções com a mesma planilha não relêem
+        nem recodificam o Excel.
+        
         Args:
             data_file: Caminho para o arquivo de dados
+            use_cache: Reaproveitar a matriz pré-processada, se existir
             
         Returns:
             Tuple com (X, y, feature_names)
         """
+        cache_path = self._cache_path(data_file)
+        if use_cache and cache_path.exists():
+            cached = joblib.load(cache_path)
+            self.label_encoders = cached['label_encoders']
+            self.imputers = cached['imputers']
+            self.class_mapping = cached['class_mapping']
+            registrador.info(f"Matriz de treino reaproveitada de {cache_path}: {cached['X'].shape}")
+            return cached['X'], cached['y'], cached['feature_names']
+        
         registrador.info(f"Carregando dados de treinamento: {data_file}")
         
         # Carregar dados
         df = CarregadorDados.carregar_excel_com_deteccao_cabecalho(data_file)
         registrador.info(f"Dados carregados: {df.shape}")
         
-        # Remover classes problemáticas (conforme análise anterior)
-        problematic_classes = ['Cancelamento Interno', 'Transferência Interna']
-        df = df[~df['Situação'].isin(problematic_classes)]
+        # Remover classes problemáticas
+        df = df[~df[TARGET_COLUMN].isin(PROBLEMATIC_CLASSES)]
         registrador.info(f"Dados após remoção de classes problemáticas: {df.shape}")
         
         # Separar features e target
-        target_column = 'Situação'
+        target_column = TARGET_COLUMN
         feature_columns = [col for col in configuracoes.dados.caracteristicas_esperadas if col in df.columns]
         
         registrador.info(f"Features disponíveis: {len(feature_columns)}/{len(configuracoes.dados.caracteristicas_esperadas)}")
@@ -81,8 +118,9 @@ class ModelTrainer:
         le_target = LabelEncoder()
         y_encoded = le_target.fit_transform(y)
         
-        # Salvar mapeamento de classes
+        # Salvar mapeamento de classes ('class_names' é a chave lida pelo preditor)
         self.class_mapping = {
+            'class_names': list(le_target.classes_),
             'classes_mantidas': list(le_target.classes_),
             'label_encoder': le_target
         }
@@ -92,7 +130,111 @@ class ModelTrainer:
             count = np.sum(y_encoded == i)
             registrador.info(f"  {class_name}: {count} amostras")
         
-        return X, y_encoded, X.columns.tolist()
+        feature_names = X.columns.tolist()
+        if use_cache:
+            joblib.dump({
+                'X': X, 'y': y_encoded, 'feature_names': feature_names,
+                'label_encoders': self.label_encoders, 'imputers': self.imputers,
+                'class_mapping': self.class_mapping
+            }, cache_path)
+            registrador.info(f"Matriz de treino salva em: {cache_path}")
+        
+        return X, y_encoded, feature_names
+    
+    def preprocess_parquet_chunks(self, data_dir: Path, output_dir: Path, test_size: float = 0.2) -> tuple:
+        """
+        Pré-processa um diretório de blocos Parquet brutos sem juntá-los em memória.
+        
+        Os blocos têm as mesmas colunas da planilha de treino. O primeiro passo
+        acumula medianas, modas, categorias e classes; o segundo codifica cada
+        bloco com os mesmos encoders/imputers de _preprocess_features() e o grava
+        em output_dir como treino ou teste (sorteio por linha com semente fixa).
+        
+        Args:
+            data_dir: Diretório com arquivos *.parquet
+            output_dir: Destino dos blocos codificados (recriado)
+            test_size: Fração das linhas separada para teste
+            
+        Returns:
+            Tuple com (blocos de treino, blocos de teste, feature_names)
+        """
+        files = sorted(Path(data_dir).glob('*.parquet'))
+        if not files:
+            raise FileNotFoundError(f"Nenhum arquivo .parquet em {data_dir}")
+        
+        first = pd.read_parquet(files[0])
+        feature_columns = [col for col in configuracoes.dados.caracteristicas_esperadas if col in first.columns]
+        numeric_cols = first[feature_columns].select_dtypes(include=['int64', 'float64']).columns.tolist()
+        categorical_cols = first[feature_columns].select_dtypes(include=['object']).columns.tolist()
+        del first
+        registrador.info(f"{len(files)} bloco(s) Parquet; features disponíveis: {len(feature_columns)}")
+        
+        def read_chunk(path: Path) -> pd.DataFrame:
+            df = pd.read_parquet(path, columns=feature_columns + [TARGET_COLUMN])
+            # Parquet devolve None nas colunas de texto; os imputers tratam só NaN (como no Excel)
+            df = df.replace({None: np.nan})
+            return df[~df[TARGET_COLUMN].isin(PROBLEMATIC_CLASSES)]
+        
+        # 1º passo: estatísticas dos imputers, categorias e classes
+        numeric_values = {col: [] for col in numeric_cols}
+        category_counts = {col: Counter() for col in categorical_cols}
+        target_counts = Counter()
+        for path in files:
+            df = read_chunk(path)
+            for col in numeric_cols:
+                values = pd.to_numeric(df[col], errors='coerce')
+                numeric_values[col].append(values[values.notna()].to_numpy(dtype=np.float64))
+            for col in categorical_cols:
+                category_counts[col].update(df[col].dropna().tolist())
+            target_counts.update(df[TARGET_COLUMN].tolist())
+        
+        # Imputers/encoders ajustados com as estatísticas globais (mesmo resultado do ajuste em memória)
+        if numeric_cols:
+            medians = [np.median(np.concatenate(numeric_values[col])) if numeric_values[col] else np.nan
+                       for col in numeric_cols]
+            self.imputers['numeric'] = SimpleImputer(strategy='median').fit(pd.DataFrame([medians], columns=numeric_cols))
+        if categorical_cols:
+            # Empate: menor valor, como o SimpleImputer
+            modes = [min(counts, key=lambda value: (-counts[value], value)) if counts else 'DESCONHECIDO'
+                     for counts in category_counts.values()]
+            self.imputers['categorical'] = SimpleImputer(strategy='most_frequent').fit(
+                pd.DataFrame([modes], columns=categorical_cols, dtype=object)
+            )
+            for col, counts in category_counts.items():
+                self.label_encoders[col] = LabelEncoder().fit(sorted({str(value) for value in counts} or {'DESCONHECIDO'}))
+        del numeric_values
+        
+        le_target = LabelEncoder().fit(sorted(target_counts))
+        self.class_mapping = {
+            'class_names': list(le_target.classes_),
+            'classes_mantidas': list(le_target.classes_),
+            'label_encoder': le_target
+        }
+        for class_name in le_target.classes_:
+            registrador.info(f"  {class_name}: {target_counts[class_name]} amostras")
+        
+        # 2º passo: codificar e gravar cada bloco
+        shutil.rmtree(output_dir, ignore_errors=True)
+        train_files, test_files = [], []
+        for number, path in enumerate(files):
+            df = read_chunk(path)
+            X = df[feature_columns].copy()
+            if numeric_cols:
+                for col in numeric_cols:
+                    X[col] = pd.to_numeric(X[col], errors='coerce')
+                X[numeric_cols] = self.imputers['numeric'].transform(X[numeric_cols])
+            if categorical_cols:
+                X[categorical_cols] = self.imputers['categorical'].transform(X[categorical_cols])
+                for col in categorical_cols:
+                    X[col] = self.label_encoders[col].transform(X[col].astype(str))
+            X = X.fillna(0)
+            y = le_target.transform(df[TARGET_COLUMN])
+            
+            test_mask = np.random.default_rng([configuracoes.modelo.semente_aleatoria, number]).random(len(X)) < test_size
+            train_files += gravar_blocos(X[~test_mask], y[~test_mask], output_dir, prefixo=f'treino-{number:05d}')
+            test_files += gravar_blocos(X[test_mask], y[test_mask], output_dir, prefixo=f'teste-{number:05d}')
+        
+        return train_files, test_files, feature_columns
     
     def _preprocess_features(self, X: pd.DataFrame) -> pd.DataFrame:
         """Pré-processa as features."""
@@ -126,13 +268,245 @@ class ModelTrainer:
         
         return X
     
-    def train_model(self, X: pd.DataFrame, y: np.ndarray) -> dict:
+    def load_production_model(self) -> list:
+        """
+        Carrega o modelo, o mapeamento de classes e os encoders/imputers em produção.
+        
+        Returns:
+            Features do modelo, na ordem usada no treino
+            
+        Raises:
+            FileNotFoundError: Se algum artefato não existir
+        """
+        model_path = configuracoes.obter_caminho_modelo(compacto=False)
+        class_mapping_path = configuracoes.obter_caminho_mapeamento_classes()
+        artifacts_path = configuracoes.dados.diretorio_modelos / "training_artifacts.pkl"
+        for path in (model_path, class_mapping_path, artifacts_path):
+            if not path.exists():
+                raise FileNotFoundError(f"Artefato do modelo em produção não encontrado: {path}")
+        
+        self.model = joblib.load(model_path)
+        class_mapping = joblib.load(class_mapping_path)
+        self.class_mapping = {**class_mapping, 'classes_mantidas': list(class_mapping['class_names'])}
+        artifacts = joblib.load(artifacts_path)
+        self.label_encoders = artifacts['label_encoders']
+        self.imputers = artifacts['imputers']
+        
+        feature_names = list(self.model.get_booster().feature_names)
+        registrador.info(f"Modelo em produção carregado: {self.model.get_booster().num_boosted_rounds()} rodadas, "
+                         f"{len(feature_names)} features, {len(self.class_mapping['class_names'])} classes")
+        return feature_names
+    
+    def preprocess_with_artifacts(self, data_file: Path, feature_names: list) -> tuple:
+        """
+        Codifica dados com os encoders/imputers já carregados (sem reajustá-los).
+        
+        Categorias novas são acrescentadas aos LabelEncoders sem mudar os códigos
+        existentes; linhas com classes que o modelo não conhece são descartadas.
+        
+        Args:
+            data_file: Planilha com dados rotulados
+            feature_names: Features do modelo
+            
+        Returns:
+            Tuple com (X, y)
+        """
+        registrador.info(f"Carregando dados rotulados: {data_file}")
+        df = CarregadorDados.carregar_excel_com_deteccao_cabecalho(data_file)
+        df = df[~df[TARGET_COLUMN].isin(PROBLEMATIC_CLASSES)]
+        
+        class_names = list(self.class_mapping['class_names'])
+        unknown = ~df[TARGET_COLUMN].isin(class_names)
+        if unknown.any():
+            registrador.warning(f"{unknown.sum()} linha(s) com classes fora do modelo descartadas: "
+                                f"{df.loc[unknown, TARGET_COLUMN].value_counts().to_dict()}")
+            df = df[~unknown]
+        
+        # Colunas ausentes ficam NaN e recebem o valor dos imputers. Os valores vêm de
+        # statistics_ (e não de transform()) para aceitar imputers salvos por outra versão do sklearn
+        X = df.reindex(columns=feature_names)
+        fill_values = {
+            kind: dict(zip(imputer.feature_names_in_, imputer.statistics_)) for kind, imputer in self.imputers.items()
+        }
+        
+        if 'numeric' in fill_values:
+            for col, value in fill_values['numeric'].items():
+                X[col] = pd.to_numeric(X[col], errors='coerce').fillna(value)
+        
+        if 'categorical' in fill_values:
+            for col, value in fill_values['categorical'].items():
+                X[col] = X[col].astype(object).fillna(value)
+            for col in fill_values['categorical']:
+                values = X[col].astype(str)
+                new_categories = estender_codificador(self.label_encoders[col], values)
+                if new_categories:
+                    registrador.info(f"  {col}: {len(new_categories)} categoria(s) nova(s)")
+                X[col] = self.label_encoders[col].transform(values)
+        
+        X = X.fillna(0)
+        y = df[TARGET_COLUMN].map({name: code for code, name in enumerate(class_names)}).to_numpy()
+        registrador.info(f"Dados codificados: {X.shape}")
+        return X, y
+    
+    def split_holdout(self, X: pd.DataFrame, y: np.ndarray) -> tuple:
+        """Separa 20% para teste, estratificado quando todas as classes presentes têm 2+ linhas."""
+        stratify = y if np.bincount(y)[np.unique(y)].min() >= 2 else None
+        return train_test_split(
+            X, y, test_size=0.2, random_state=configuracoes.modelo.semente_aleatoria, stratify=stratify
+        )
+    
+    def evaluate_holdout(self, model: xgb.XGBClassifier, X_test: pd.DataFrame, y_test: np.ndarray) -> dict:
+        """Acurácia, acurácia binária e log loss de um modelo no conjunto de teste."""
+        probabilities = model.predict_proba(X_test)
+        y_pred = probabilities.argmax(axis=1)
+        return {
+            'acuracia': float(accuracy_score(y_test, y_pred)),
+            'acuracia_binaria': float(self._calculate_binary_accuracy(y_test, y_pred)),
+            'log_loss': float(log_loss(y_test, probabilities, labels=np.arange(probabilities.shape[1])))
+        }
+    
+    def continue_model(self, X_train: pd.DataFrame, y_train: np.ndarray, X_test: pd.DataFrame,
+                       y_test: np.ndarray, rounds: int) -> dict:
+        """
+        Acrescenta rodadas ao modelo carregado usando só os dados novos.
+        
+        Args:
+            X_train: Features novas de treino
+            y_train: Classes de treino
+            X_test: Features de teste (dados novos separados)
+            y_test: Classes de teste
+            rounds: Rodadas de boosting acrescentadas
+            
+        Returns:
+            Dicionário com métricas de avaliação (mesmas chaves de train_model())
+        """
+        base_model = self.model
+        start = time.perf_counter()
+        self.model = continuar_treino(base_model, X_train, y_train, rounds, self._model_params())
+        duration = time.perf_counter() - start
+        
+        y_pred_train = self.model.predict(X_train)
+        y_pred_test = self.model.predict(X_test)
+        metrics = {
+            'train_accuracy': accuracy_score(y_train, y_pred_train),
+            'test_accuracy': accuracy_score(y_test, y_pred_test),
+            'cv_mean': float('nan'),
+            'cv_std': float('nan'),
+            'binary_train_accuracy': self._calculate_binary_accuracy(y_train, y_pred_train),
+            'binary_test_accuracy': self._calculate_binary_accuracy(y_test, y_pred_test),
+            'X_test': X_test,
+            'y_test': y_test,
+            'y_pred_test': y_pred_test,
+            'base_model': base_model,
+            'training_seconds': duration
+        }
+        
+        registrador.info(f"Continuação concluída em {duration:.2f}s ({len(X_train)} linhas de treino)")
+        registrador.info(f"Acurácia de teste: modelo atual {accuracy_score(y_test, base_model.predict(X_test)):.4f} "
+                         f"-> continuado {metrics['test_accuracy']:.4f}")
+        return metrics
+    
+    def compare_with_full_retrain(self, history_file: Path, feature_names: list, metrics: dict,
+                                  X_train: pd.DataFrame, y_train: np.ndarray) -> dict:
+        """
+        Compara o modelo continuado com um retreino completo no mesmo conjunto de teste.
+        
+        O retreino usa o histórico mais o treino novo (o teste dos dados novos
+        fica de fora dos dois) e os hiperparâmetros de ConfiguracaoModelo.
+        A comparação é salva em output/avaliacao_continuacao.json.
+        
+        Args:
+            history_file: Planilha do histórico já usado no modelo atual
+            feature_names: Features do modelo
+            metrics: Resultado de continue_model()
+            X_train: Features novas de treino
+            y_train: Classes de treino
+            
+        Returns:
+            Dicionário com as métricas de cada modelo
+        """
+        X_history, y_history = self.preprocess_with_artifacts(history_file, feature_names)
+        X_full = pd.concat([X_history, X_train], ignore_index=True)
+        y_full = np.concatenate([y_history, y_train])
+        
+        registrador.info(f"Retreino completo para comparação: {X_full.shape}")
+        full_model = xgb.XGBClassifier(
+            **self._model_params(),
+            **parametros_arvore(),
+            random_state=configuracoes.modelo.semente_aleatoria,
+            eval_metric=configuracoes.modelo.metrica_avaliacao
+        )
+        start = time.perf_counter()
+        full_model.fit(X_full, y_full)
+        full_seconds = time.perf_counter() - start
+        
+        X_test, y_test = metrics['X_test'], metrics['y_test']
+        comparison = {
+            'linhas_teste': int(len(y_test)),
+            'modelo_atual': {**self.evaluate_holdout(metrics['base_model'], X_test, y_test),
+                             'linhas_treino': None, 'segundos_treino': None},
+            'continuado': {**self.evaluate_holdout(self.model, X_test, y_test),
+                           'linhas_treino': int(len(y_train)), 'segundos_treino': round(metrics['training_seconds'], 3)},
+            'retreino_completo': {**self.evaluate_holdout(full_model, X_test, y_test),
+                                  'linhas_treino': int(len(y_full)), 'segundos_treino': round(full_seconds, 3)}
+        }
+        
+        output_dir = configuracoes.dados.diretorio_saida
+        output_dir.mkdir(parents=True, exist_ok=True)
+        comparison_path = output_dir / "avaliacao_continuacao.json"
+        with open(comparison_path, 'w', encoding='utf-8') as f:
+            json.dump(comparison, f, ensure_ascii=False, indent=2)
+        
+        for name in ('modelo_atual', 'continuado', 'retreino_completo'):
+            scores = comparison[name]
+            seconds = f"{scores['segundos_treino']}s" if scores['segundos_treino'] is not None else '-'
+            registrador.info(f"  {name:<18} acurácia {scores['acuracia']:.4f}  binária {scores['acuracia_binaria']:.4f}  "
+                             f"log loss {scores['log_loss']:.4f}  treino {seconds}")
+        registrador.info(f"Comparação salva em: {comparison_path}")
+        return comparison
+    
+    def search_hyperparameters(self, X: pd.DataFrame, y: np.ndarray, search: BuscaHiperparametros,
+                               data_file: Path = None) -> dict:
+        """
+        Busca os hiperparâmetros no conjunto de treino (o de teste fica de fora).
+        
+        Args:
+            X: Features de treinamento
+            y: Target codificado
+            search: Busca configurada
+            data_file: Planilha de origem (registrada no placar)
+            
+        Returns:
+            Parâmetros do melhor candidato para train_model()
+        """
+        X_train, _, y_train, _ = train_test_split(
+            X, y, test_size=0.2, random_state=configuracoes.modelo.semente_aleatoria, stratify=y
+        )
+        best_params = search.executar(X_train.to_numpy(), y_train)
+        search.salvar_placar(configuracoes.dados.diretorio_saida / "busca_hiperparametros.json", data_file)
+        return best_params
+    
+    def _model_params(self, params: dict = None) -> dict:
+        """Hiperparâmetros de ConfiguracaoModelo, substituídos pelos informados."""
+        model_params = {
+            'n_estimators': configuracoes.modelo.numero_estimadores,
+            'max_depth': configuracoes.modelo.profundidade_maxima,
+            'learning_rate': configuracoes.modelo.taxa_aprendizado,
+            'subsample': configuracoes.modelo.subamostra,
+            'colsample_bytree': configuracoes.modelo.subamostra_colunas
+        }
+        model_params.update(params or {})
+        registrador.info(f"Hiperparâmetros: {model_params} ({parametros_arvore()})")
+        return model_params
+    
+    def train_model(self, X: pd.DataFrame, y: np.ndarray, params: dict = None) -> dict:
         """
         Treina o modelo XGBoost.
         
         Args:
             X: Features de treinamento
             y: Target codificado
+            params: Hiperparâmetros (ex.: resultado da busca) que substituem os de ConfiguracaoModelo
             
         Returns:
             Dicionário com métricas de avaliação
@@ -141,7 +515,7 @@ class ModelTrainer:
         
         # Dividir dados em treino e teste
         X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42, stratify=y
+            X, y, test_size=0.2, random_state=configuracoes.modelo.semente_aleatoria, stratify=y
         )
         
         registrador.info(f"Dados de treino: {X_train.shape}")
@@ -149,14 +523,10 @@ class ModelTrainer:
         
         # Configurar modelo XGBoost
         self.model = xgb.XGBClassifier(
-            n_estimators=configuracoes.model.n_estimators,
-            max_depth=configuracoes.model.max_depth,
-            learning_rate=configuracoes.model.learning_rate,
-            subsample=configuracoes.model.subsample,
-            colsample_bytree=configuracoes.model.colsample_bytree,
-            random_state=configuracoes.model.random_state,
-            eval_metric=configuracoes.model.eval_metric,
-            n_jobs=-1
+            **self._model_params(params),
+            **parametros_arvore(),
+            random_state=configuracoes.modelo.semente_aleatoria,
+            eval_metric=configuracoes.modelo.metrica_avaliacao
         )
         
         # Treinar modelo
@@ -200,6 +570,53 @@ class ModelTrainer:
         
         return metrics
     
+    def train_model_external(self, train_files: list, test_files: list, params: dict = None) -> dict:
+        """
+        Treina a partir de blocos Parquet codificados (memória externa).
+        
+        A avaliação também é feita bloco a bloco; a validação cruzada não é
+        calculada nesse modo.
+        
+        Args:
+            train_files: Blocos de treino
+            test_files: Blocos de teste
+            params: Hiperparâmetros que substituem os de ConfiguracaoModelo
+            
+        Returns:
+            Dicionário com métricas de avaliação (mesmas chaves de train_model())
+        """
+        registrador.info("Iniciando treinamento do modelo XGBoost em memória externa...")
+        
+        # Páginas no diretório temporário do sistema: a libxgboost não abre caminhos
+        # com acentos (como o diretório do projeto)
+        with tempfile.TemporaryDirectory(prefix='cache_xgboost_') as cache_dir:
+            self.model = treinar_memoria_externa(
+                train_files, self._model_params(params), len(self.class_mapping['class_names']), Path(cache_dir)
+            )
+        
+        registrador.info("Avaliando modelo...")
+        y_train, y_pred_train = prever_blocos(self.model, train_files)
+        y_test, y_pred_test = prever_blocos(self.model, test_files)
+        
+        metrics = {
+            'train_accuracy': accuracy_score(y_train, y_pred_train),
+            'test_accuracy': accuracy_score(y_test, y_pred_test),
+            'cv_mean': float('nan'),
+            'cv_std': float('nan'),
+            'binary_train_accuracy': self._calculate_binary_accuracy(y_train, y_pred_train),
+            'binary_test_accuracy': self._calculate_binary_accuracy(y_test, y_pred_test),
+            'X_test': None,
+            'y_test': y_test,
+            'y_pred_test': y_pred_test
+        }
+        
+        registrador.info(f"Dados de treino: {len(y_train)} linhas; teste: {len(y_test)} linhas")
+        registrador.info(f"Acurácia de treino: {metrics['train_accuracy']:.4f}")
+        registrador.info(f"Acurácia de teste: {metrics['test_accuracy']:.4f}")
+        registrador.info(f"Acurácia binária (teste): {metrics['binary_test_accuracy']:.4f}")
+        
+        return metrics
+    
     def _calculate_binary_accuracy(self, y_true: np.ndarray, y_pred: np.ndarray) -> float:
         """Calcula acurácia binária (Evasão vs Matriculado)."""
         # Converter para binário (0 = Matriculado, 1 = Evasão)
@@ -212,16 +629,16 @@ class ModelTrainer:
     
     def save_model(self) -> None:
         """Salva o modelo e artefatos relacionados."""
-        models_dir = configuracoes.data.models_dir
+        models_dir = configuracoes.dados.diretorio_modelos
         models_dir.mkdir(parents=True, exist_ok=True)
         
         # Salvar modelo
-        model_path = models_dir / configuracoes.data.model_file
+        model_path = configuracoes.obter_caminho_modelo(compacto=False)
         joblib.dump(self.model, model_path)
         registrador.info(f"Modelo salvo em: {model_path}")
         
         # Salvar mapeamento de classes
-        class_mapping_path = models_dir / configuracoes.data.class_mapping_file
+        class_mapping_path = configuracoes.obter_caminho_mapeamento_classes()
         joblib.dump(self.class_mapping, class_mapping_path)
         registrador.info(f"Mapeamento de classes salvo em: {class_mapping_path}")
         
@@ -236,7 +653,7 @@ class ModelTrainer:
     
     def generate_reports(self, metrics: dict, feature_names: list) -> None:
         """Gera relatórios de avaliação do modelo."""
-        output_dir = configuracoes.data.output_dir
+        output_dir = configuracoes.dados.diretorio_saida
         output_dir.mkdir(parents=True, exist_ok=True)
         
         # Relatório de texto
@@ -246,7 +663,10 @@ class ModelTrainer:
             f.write("=" * 50 + "\n\n")
             f.write(f"Acurácia de treino: {metrics['train_accuracy']:.4f}\n")
             f.write(f"Acurácia de teste: {metrics['test_accuracy']:.4f}\n")
-            f.write(f"Validação cruzada: {metrics['cv_mean']:.4f} ± {metrics['cv_std']:.4f}\n")
+            if np.isnan(metrics['cv_mean']):
+                f.write("Validação cruzada: não calculada (memória externa/continuação)\n")
+            else:
+                f.write(f"Validação cruzada: {metrics['cv_mean']:.4f} ± {metrics['cv_std']:.4f}\n")
             f.write(f"Acurácia binária (treino): {metrics['binary_train_accuracy']:.4f}\n")
             f.write(f"Acurácia binária (teste): {metrics['binary_test_accuracy']:.4f}\n\n")
             
@@ -318,6 +738,92 @@ def main():
         help='Arquivo Excel com dados de treinamento (padrão: data/raw/Planilhabasedados.xlsx)'
     )
     
+    parser.add_argument(
+        '--buscar',
+        action='store_true',
+        help='Buscar hiperparâmetros antes do treino final (placar em output/busca_hiperparametros.json)'
+    )
+    
+    parser.add_argument(
+        '--estrategia',
+        choices=['halving', 'aleatoria'],
+        default='halving',
+        help='Estratégia da busca: successive halving ou aleatória (padrão: halving)'
+    )
+    
+    parser.add_argument(
+        '--candidatos',
+        type=int,
+        default=None,
+        help='Combinações avaliadas na busca (padrão: configuracoes.modelo.busca_candidatos)'
+    )
+    
+    parser.add_argument(
+        '--trabalhadores',
+        type=int,
+        default=None,
+        help='Processos da busca (padrão: um por núcleo)'
+    )
+    
+    parser.add_argument(
+        '--memoria-externa',
+        action='store_true',
+        help='Treinar a partir de blocos Parquet no disco (arquivo_dados pode ser um diretório de .parquet)'
+    )
+    
+    parser.add_argument(
+        '--metodo-arvore',
+        choices=['hist', 'approx', 'exact'],
+        default=None,
+        help='tree_method do XGBoost (padrão: configuracoes.modelo.metodo_arvore)'
+    )
+    
+    parser.add_argument(
+        '--max-bin',
+        type=int,
+        default=None,
+        help='Bins por feature no método hist (padrão: configuracoes.modelo.max_bin)'
+    )
+    
+    parser.add_argument(
+        '--threads',
+        type=int,
+        default=None,
+        help='Threads do XGBoost no treino (padrão: todos os núcleos)'
+    )
+    
+    parser.add_argument(
+        '--linhas-por-bloco',
+        type=int,
+        default=None,
+        help='Linhas por bloco Parquet na memória externa (padrão: configuracoes.modelo.linhas_por_bloco)'
+    )
+    
+    parser.add_argument(
+        '--continuar',
+        action='store_true',
+        help='Acrescentar rodadas ao modelo em produção usando só os dados novos de arquivo_dados'
+    )
+    
+    parser.add_argument(
+        '--rodadas',
+        type=int,
+        default=None,
+        help='Rodadas acrescentadas no --continuar (padrão: configuracoes.modelo.rodadas_continuacao)'
+    )
+    
+    parser.add_argument(
+        '--historico',
+        default=None,
+        help='Com --continuar: planilha do histórico para comparar com um retreino completo'
+    )
+    
+    parser.add_argument(
+        '--sem-cache',
+        action='store_true',
+        help='Reler e recodificar a planilha mesmo se a matriz pré-processada existir'
+    )
+    
     parser.add_argument(
         '--verbose', '-v',
         action='store_true',
@@ -325,6 +831,12 @@ def main():
     )
     
     args = parser.parse_args()
+    if args.continuar and (args.buscar or args.memoria_externa):
+        parser.error("--continuar não pode ser combinado com --buscar ou --memoria-externa")
+    if args.memoria_externa and not memoria_externa_disponivel():
+        parser.error(f"--memoria-externa precisa do XGBoost 3.0 ou mais recente (instalado: {xgb.__version__})")
+    if args.historico and not args.continuar:
+        parser.error("--historico só é usado com --continuar")
     
     # Configurar logging
     if args.verbose:
@@ -336,20 +848,60 @@ def main():
         if args.data_file:
             data_file = Path(args.data_file)
         else:
-            data_file = configuracoes.get_training_data_path()
+            data_file = configuracoes.obter_caminho_dados_treinamento()
         
         if not data_file.exists():
             registrador.error(f"Arquivo não encontrado: {data_file}")
             return 1
         
+        if args.metodo_arvore:
+            configuracoes.modelo.metodo_arvore = args.metodo_arvore
+        if args.max_bin:
+            configuracoes.modelo.max_bin = args.max_bin
+        if args.threads:
+            configuracoes.modelo.threads_treino = args.threads
+        if args.linhas_por_bloco:
+            configuracoes.modelo.linhas_por_bloco = args.linhas_por_bloco
+        
         # Inicializar treinador
         trainer = ModelTrainer()
-        
-        # Carregar e pré-processar dados
-        X, y, feature_names = trainer.load_and_preprocess_data(data_file)
-        
-        # Treinar modelo
-        metrics = trainer.train_model(X, y)
+        best_params = None
+        
+        if args.continuar:
+            feature_names = trainer.load_production_model()
+            X, y = trainer.preprocess_with_artifacts(data_file, feature_names)
+            X_train, X_test, y_train, y_test = trainer.split_holdout(X, y)
+            metrics = trainer.continue_model(
+                X_train, y_train, X_test, y_test, args.rodadas or configuracoes.modelo.rodadas_continuacao
+            )
+            if args.historico:
+                trainer.compare_with_full_retrain(Path(args.historico), feature_names, metrics, X_train, y_train)
+        elif args.memoria_externa:
+            chunks_dir = configuracoes.dados.diretorio_dados_processados / "blocos_treino"
+            if data_file.is_dir():
+                train_files, test_files, feature_names = trainer.preprocess_parquet_chunks(data_file, chunks_dir)
+            else:
+                X, y, feature_names = trainer.load_and_preprocess_data(data_file, use_cache=not args.sem_cache)
+                X_train, X_test, y_train, y_test = train_test_split(
+                    X, y, test_size=0.2, random_state=configuracoes.modelo.semente_aleatoria, stratify=y
+                )
+                shutil.rmtree(chunks_dir, ignore_errors=True)
+                train_files = gravar_blocos(X_train, y_train, chunks_dir, prefixo='treino')
+                test_files = gravar_blocos(X_test, y_test, chunks_dir, prefixo='teste')
+                del X, X_train, X_test
+            
+            metrics = trainer.train_model_external(train_files, test_files)
+        else:
+            # Carregar e pré-processar dados
+            X, y, feature_names = trainer.load_and_preprocess_data(data_file, use_cache=not args.sem_cache)
+            
+            # Buscar hiperparâmetros na mesma matriz
+            if args.buscar:
+                search = BuscaHiperparametros(args.estrategia, args.candidatos, args.trabalhadores)
+                best_params = trainer.search_hyperparameters(X, y, search, data_file)
+            
+            # Treinar modelo
+            metrics = trainer.train_model(X, y, best_params)
         
         # Salvar modelo
         trainer.save_model()
@@ -360,7 +912,9 @@ def main():
         print("\n✅ Treinamento concluído com sucesso!")
         print(f"📊 Acurácia de teste: {metrics['test_accuracy']:.4f}")
         print(f"📊 Acurácia binária: {metrics['binary_test_accuracy']:.4f}")
-        print(f"📁 Modelo salvo em: {configuracoes.get_model_path()}")
+        if best_params:
+            print(f"🔎 Melhores hiperparâmetros: {best_params}")
+        print(f"📁 Modelo salvo em: {configuracoes.obter_caminho_modelo(compacto=False)}")
         
         return 0
         